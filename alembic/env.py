@@ -4,6 +4,7 @@ from sqlalchemy.ext.asyncio import async_engine_from_config
 from alembic import context  # type: ignore
 from app.config import database_uri
 from app.models import Base
+from app.partitions import include_name
 
 # this is the Alembic Config object, which provides
 # access to the values within the .ini file in use.
@@ -43,6 +44,7 @@ def run_migrations_offline() -> None:
         target_metadata=target_metadata,
         literal_binds=True,
         compare_types=True,
+        include_name=include_name,
         dialect_opts={"paramstyle": "named"},
     )
 
@@ -55,6 +57,7 @@ def do_run_migration(connection):
         connection=connection,
         target_metadata=target_metadata,
         compare_type=True,
+        include_name=include_name,
     )
 
     with context.begin_transaction():
@@ -0,0 +1,84 @@
+"""Convert part to the model types and create test table
+
+The databases created by `create_all` before the schema was migrated have
+no alembic_version table, and their part and test tables are already the
+ones of this revision: stamp them with `alembic stamp 2f6a8c1d4e70`, then
+run `alembic upgrade head`.
+
+Revision ID: 2f6a8c1d4e70
+Revises: 9ddadf84c339
+Create Date: 2026-10-17 14:06:21.305117
+
+"""
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "2f6a8c1d4e70"
+down_revision = "9ddadf84c339"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # The integer ids are kept as the low bits of the uuids.
+    op.alter_column("part", "id", server_default=None)
+    op.execute("DROP SEQUENCE IF EXISTS part_id_seq")
+    op.alter_column(
+        "part",
+        "id",
+        type_=sa.UUID(),
+        postgresql_using="CAST(lpad(to_hex(id), 32, '0') AS uuid)",
+    )
+    # The names and timestamps left empty by the first revision are set.
+    op.execute("UPDATE part SET name = '' WHERE name IS NULL")
+    op.alter_column("part", "name", nullable=False)
+    op.alter_column(
+        "part",
+        "modified_timestamp",
+        type_=sa.DateTime(),
+        nullable=False,
+        postgresql_using=(
+            "coalesce(modified_timestamp, now()) AT TIME ZONE 'UTC'"
+        ),
+    )
+    op.create_table(
+        "test",
+        sa.Column("id", sa.UUID(), nullable=False),
+        sa.Column("part_id", sa.UUID(), nullable=False),
+        sa.Column("timestamp", sa.DateTime(), nullable=False),
+        sa.Column("successful", sa.Boolean(), nullable=False),
+        sa.Column("data", sa.JSON(), nullable=True),
+        sa.ForeignKeyConstraint(["part_id"], ["part.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("id"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("test")
+    op.alter_column(
+        "part",
+        "modified_timestamp",
+        type_=sa.DateTime(timezone=True),
+        nullable=True,
+        postgresql_using="modified_timestamp AT TIME ZONE 'UTC'",
+    )
+    op.alter_column("part", "name", nullable=True)
+    op.alter_column(
+        "part",
+        "id",
+        type_=sa.Integer(),
+        postgresql_using=(
+            "CAST(CAST('x' || right(replace(CAST(id AS text), '-', ''), 8) "
+            "AS bit(32)) AS integer)"
+        ),
+    )
+    op.execute("CREATE SEQUENCE part_id_seq OWNED BY part.id")
+    op.execute(
+        "SELECT setval('part_id_seq', coalesce(max(id), 0) + 1, false) "
+        "FROM part"
+    )
+    op.alter_column(
+        "part", "id", server_default=sa.text("nextval('part_id_seq')")
+    )
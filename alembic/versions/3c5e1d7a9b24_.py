@@ -0,0 +1,29 @@
+"""Add entity version table
+
+Revision ID: 3c5e1d7a9b24
+Revises: 99de430ad167
+Create Date: 2026-10-16 23:30:12.402611
+
+"""
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "3c5e1d7a9b24"
+down_revision = "99de430ad167"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "entity_version",
+        sa.Column("name", sa.String(), nullable=False),
+        sa.Column("version", sa.BigInteger(), nullable=False),
+        sa.PrimaryKeyConstraint("name"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("entity_version")
@@ -0,0 +1,48 @@
+"""Shard the entity versions
+
+Revision ID: 4d2b8e6f1a93
+Revises: e1f4a7c2b895
+Create Date: 2026-10-17 19:12:44.518302
+
+"""
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "4d2b8e6f1a93"
+down_revision = "e1f4a7c2b895"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "entity_version",
+        sa.Column(
+            "shard", sa.SmallInteger(), nullable=False, server_default="0"
+        ),
+    )
+    op.alter_column("entity_version", "shard", server_default=None)
+    op.drop_constraint("entity_version_pkey", "entity_version")
+    op.create_primary_key(
+        "entity_version_pkey", "entity_version", ["name", "shard"]
+    )
+
+
+def downgrade() -> None:
+    op.execute(
+        "UPDATE entity_version SET version = total.version "
+        "FROM (SELECT name, sum(version) AS version FROM entity_version "
+        "GROUP BY name) AS total "
+        "WHERE entity_version.name = total.name AND shard = 0"
+    )
+    op.execute(
+        "INSERT INTO entity_version (name, shard, version) "
+        "SELECT name, 0, sum(version) FROM entity_version GROUP BY name "
+        "ON CONFLICT DO NOTHING"
+    )
+    op.execute("DELETE FROM entity_version WHERE shard <> 0")
+    op.drop_constraint("entity_version_pkey", "entity_version")
+    op.drop_column("entity_version", "shard")
+    op.create_primary_key("entity_version_pkey", "entity_version", ["name"])
@@ -0,0 +1,41 @@
+"""Add part test stats table
+
+Revision ID: 5b8f2e4c6d13
+Revises: 3c5e1d7a9b24
+Create Date: 2026-10-17 09:12:44.918305
+
+"""
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "5b8f2e4c6d13"
+down_revision = "3c5e1d7a9b24"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "part_test_stats",
+        sa.Column("id", sa.UUID(), nullable=False),
+        sa.Column("passed", sa.BigInteger(), nullable=False),
+        sa.Column("failed", sa.BigInteger(), nullable=False),
+        sa.ForeignKeyConstraint(["id"], ["part.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.execute(
+        """
+        INSERT INTO part_test_stats (id, passed, failed)
+        SELECT part_id,
+               count(*) FILTER (WHERE successful),
+               count(*) FILTER (WHERE NOT successful)
+        FROM test
+        GROUP BY part_id
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("part_test_stats")
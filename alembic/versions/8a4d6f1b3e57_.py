@@ -0,0 +1,35 @@
+"""Add test filter indexes
+
+Revision ID: 8a4d6f1b3e57
+Revises: 5b8f2e4c6d13
+Create Date: 2026-10-17 10:41:07.226518
+
+"""
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "8a4d6f1b3e57"
+down_revision = "5b8f2e4c6d13"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        "ix_test_part_id_timestamp_id",
+        "test",
+        ["part_id", "timestamp", "id"],
+    )
+    op.create_index(
+        "ix_test_failed_timestamp_id",
+        "test",
+        ["timestamp", "id"],
+        postgresql_where=sa.text("NOT successful"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_test_failed_timestamp_id", table_name="test")
+    op.drop_index("ix_test_part_id_timestamp_id", table_name="test")
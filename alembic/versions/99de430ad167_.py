@@ -0,0 +1,28 @@
+"""Add keyset pagination indexes
+
+Revision ID: 99de430ad167
+Revises: 2f6a8c1d4e70
+Create Date: 2026-10-16 09:12:41.512203
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "99de430ad167"
+down_revision = "2f6a8c1d4e70"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        "ix_part_modified_timestamp_id",
+        "part",
+        ["modified_timestamp", "id"],
+    )
+    op.create_index("ix_test_timestamp_id", "test", ["timestamp", "id"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_test_timestamp_id", table_name="test")
+    op.drop_index("ix_part_modified_timestamp_id", table_name="part")
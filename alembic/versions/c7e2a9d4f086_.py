@@ -0,0 +1,47 @@
+"""Store test data as JSONB with a GIN index
+
+Revision ID: c7e2a9d4f086
+Revises: 8a4d6f1b3e57
+Create Date: 2026-10-17 14:03:51.640772
+
+"""
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "c7e2a9d4f086"
+down_revision = "8a4d6f1b3e57"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.alter_column(
+        "test",
+        "data",
+        type_=postgresql.JSONB(),
+        existing_type=sa.JSON(),
+        existing_nullable=True,
+        postgresql_using="data::jsonb",
+    )
+    op.create_index(
+        "ix_test_data",
+        "test",
+        ["data"],
+        postgresql_using="gin",
+        postgresql_ops={"data": "jsonb_path_ops"},
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_test_data", table_name="test")
+    op.alter_column(
+        "test",
+        "data",
+        type_=sa.JSON(),
+        existing_type=postgresql.JSONB(),
+        existing_nullable=True,
+        postgresql_using="data::json",
+    )
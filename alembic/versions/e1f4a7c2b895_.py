@@ -0,0 +1,113 @@
+"""Partition the test table by month
+
+Revision ID: e1f4a7c2b895
+Revises: c7e2a9d4f086
+Create Date: 2026-10-17 16:27:09.305118
+
+"""
+from datetime import datetime
+
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "e1f4a7c2b895"
+down_revision = "c7e2a9d4f086"
+branch_labels = None
+depends_on = None
+
+INDEXES = (
+    ("ix_test_timestamp_id", ["timestamp", "id"], {}),
+    ("ix_test_part_id_timestamp_id", ["part_id", "timestamp", "id"], {}),
+    (
+        "ix_test_failed_timestamp_id",
+        ["timestamp", "id"],
+        {"postgresql_where": sa.text("NOT successful")},
+    ),
+    (
+        "ix_test_data",
+        ["data"],
+        {
+            "postgresql_using": "gin",
+            "postgresql_ops": {"data": "jsonb_path_ops"},
+        },
+    ),
+)
+
+
+def _create_test_table(*constraints, **kwargs) -> None:
+    op.create_table(
+        "test",
+        sa.Column("id", sa.UUID(), nullable=False),
+        sa.Column("part_id", sa.UUID(), nullable=False),
+        sa.Column("timestamp", sa.DateTime(), nullable=False),
+        sa.Column("successful", sa.Boolean(), nullable=False),
+        sa.Column("data", postgresql.JSONB(), nullable=True),
+        sa.ForeignKeyConstraint(["part_id"], ["part.id"], ondelete="CASCADE"),
+        *constraints,
+        **kwargs,
+    )
+
+
+def _create_indexes() -> None:
+    for name, columns, kwargs in INDEXES:
+        op.create_index(name, "test", columns, **kwargs)
+
+
+def _drop_indexes() -> None:
+    for name, _, _ in INDEXES:
+        op.drop_index(name, table_name="test")
+
+
+def _next_month(month: datetime) -> datetime:
+    year, index = divmod(month.year * 12 + month.month, 12)
+    return datetime(year, index + 1, 1)
+
+
+def upgrade() -> None:
+    _drop_indexes()
+    op.rename_table("test", "test_unpartitioned")
+    op.execute("ALTER INDEX test_pkey RENAME TO test_unpartitioned_pkey")
+    _create_test_table(
+        sa.PrimaryKeyConstraint("id", "timestamp"),
+        postgresql_partition_by="RANGE (timestamp)",
+    )
+    op.execute("CREATE TABLE test_default PARTITION OF test DEFAULT")
+    months = op.get_bind().execute(
+        sa.text(
+            "SELECT DISTINCT date_trunc('month', timestamp) "
+            "FROM test_unpartitioned"
+        )
+    )
+    for (month,) in months:
+        op.execute(
+            f"CREATE TABLE test_y{month:%Y}m{month:%m} PARTITION OF test "
+            f"FOR VALUES FROM ('{month.isoformat()}') "
+            f"TO ('{_next_month(month).isoformat()}')"
+        )
+    op.execute(
+        "INSERT INTO test (id, part_id, timestamp, successful, data) "
+        "SELECT id, part_id, timestamp, successful, data "
+        "FROM test_unpartitioned"
+    )
+    op.drop_table("test_unpartitioned")
+    _create_indexes()
+
+
+def downgrade() -> None:
+    _drop_indexes()
+    op.rename_table("test", "test_partitioned")
+    op.execute(
+        "ALTER TABLE test_partitioned "
+        "RENAME CONSTRAINT test_pkey TO test_partitioned_pkey"
+    )
+    _create_test_table(sa.PrimaryKeyConstraint("id"))
+    op.execute(
+        "INSERT INTO test (id, part_id, timestamp, successful, data) "
+        "SELECT id, part_id, timestamp, successful, data "
+        "FROM test_partitioned"
+    )
+    op.drop_table("test_partitioned")
+    _create_indexes()
@@ -0,0 +1,1143 @@
+"""
+Module for the archive of the old tests.
+
+The tests older than TEST_ARCHIVE_AGE_DAYS are moved by batches from the
+test table to segment files in a directory shared by all the instances of
+the application. A segment stores its tests sorted by (timestamp, id),
+column by column, each column compressed with zlib. Its header holds the
+passed and failed tests of each part and the min and max timestamps of
+its tests, so that the readers skip the segments which cannot match, and
+count the archived tests, without decompressing them. It also holds a
+bloom filter of the ids, so that a test is only searched in the segments
+which may hold it. The
+readers rescan the directory whenever it changed, so that every process
+sees the segments written by the others.
+
+A batch is written to a temporary file, deleted from the test table and
+only then renamed to a segment, once the deletion is committed along with
+a bump of the version of the test table, as the listings change. The
+segments are only written in a transaction holding an advisory lock, so
+that a single process archives at a time, and the temporary files found
+while holding the lock were left by an interruption: they are renamed,
+or removed if their tests are still in the table.
+
+The archived tests are read-only: the test repository finds and lists
+them, but they can neither be changed nor deleted, except along with
+their part. Deleting a part leaves a tombstone file in the directory,
+which hides the archived tests of the part from the readers until the
+next archiving removes them from the segments.
+"""
+import asyncio
+import heapq
+import os
+import struct
+import sys
+import zlib
+from array import array
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from itertools import islice
+from logging import getLogger
+from pathlib import Path
+from time import monotonic
+from typing import (
+    Any,
+    AsyncIterator,
+    BinaryIO,
+    Callable,
+    Collection,
+    Iterator,
+    Mapping,
+    NamedTuple,
+    Sequence,
+)
+from uuid import UUID, uuid4
+
+import orjson
+from sqlalchemy import any_, bindparam, delete, exists, func, select
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine
+
+from app.config import Settings
+from app.domains import TestDomain
+from app.models import Part, Test
+from app.pagination import Cursor
+from app.response_cache import ResponseCache
+from app.versions import bump_version_statement
+
+logger = getLogger(__name__)
+
+MAGIC = b"TSEG\x01"
+SUFFIX = ".seg"
+TMP_SUFFIX = ".seg.tmp"
+TOMBSTONE_SUFFIX = ".deleted"
+COLUMNS = ("id", "part_id", "timestamp", "successful", "data")
+FILTERS = frozenset(
+    {
+        "part_id",
+        "successful",
+        "timestamp_from",
+        "timestamp_to",
+        "data_contains",
+    }
+)
+# Bits per test and hashes of the bloom filters of the ids, about 1% of
+# false positives.
+ID_FILTER_BITS = 10
+ID_FILTER_HASHES = 7
+# Seconds after which the directory is rescanned even if its modification
+# time did not change, e.g. on a file system with a coarse resolution.
+RESCAN_INTERVAL = 60.0
+EPOCH = datetime(1970, 1, 1)
+MICROSECOND = timedelta(microseconds=1)
+
+SELECT_BATCH = (
+    select(Test.id, Test.part_id, Test.timestamp, Test.successful, Test.data)
+    .where(Test.timestamp < bindparam("cutoff"))
+    .order_by(Test.timestamp, Test.id)
+    .limit(bindparam("limit"))
+    .with_for_update(skip_locked=True)
+)
+
+DELETE_BATCH = delete(Test).where(
+    Test.timestamp < bindparam("cutoff"),
+    Test.id == any_(bindparam("ids", type_=ARRAY(Test.id.type))),
+)
+
+EXISTS_TEST = select(
+    exists().where(
+        Test.id == bindparam("id"), Test.timestamp == bindparam("timestamp")
+    )
+)
+
+EXISTING_PARTS = select(Part.id).where(
+    Part.id == any_(bindparam("ids", type_=ARRAY(Part.id.type)))
+)
+
+# The advisory lock of the transactions writing the segments.
+LOCK_KEY = func.hashtext(__name__)
+TRY_LOCK = select(func.pg_try_advisory_xact_lock(LOCK_KEY))
+
+
+class IdFilter(NamedTuple):
+    """
+    A bloom filter of the ids of the tests of a segment.
+
+    Attributes:
+        bits (bytes): The bits of the filter.
+        hashes (int): The number of bits set per id.
+    """
+
+    bits: bytes
+    hashes: int
+
+    @classmethod
+    def build(cls, ids: Collection[UUID]) -> "IdFilter":
+        """
+        Builds the filter of ids, with ID_FILTER_BITS bits per id.
+
+        Args:
+            ids (Collection[UUID]): The ids of the tests.
+
+        Returns:
+            IdFilter: The filter.
+        """
+        bits = bytearray(max(1, len(ids) * ID_FILTER_BITS // 8))
+        for id in ids:
+            for position in _positions(id, len(bits) * 8, ID_FILTER_HASHES):
+                bits[position >> 3] |= 1 << (position & 7)
+        return cls(bytes(bits), ID_FILTER_HASHES)
+
+    def may_contain(self, id: UUID) -> bool:
+        """
+        Tells whether the id may be in the filter.
+
+        Args:
+            id (UUID): The id of a test.
+
+        Returns:
+            bool: False if no test of the segment has this id.
+        """
+        bits = self.bits
+        return all(
+            bits[position >> 3] & (1 << (position & 7))
+            for position in _positions(id, len(bits) * 8, self.hashes)
+        )
+
+
+def _positions(id: UUID, size: int, hashes: int) -> Iterator[int]:
+    """
+    Yields the positions of the bits of an id, derived from the two
+    halves of the id, which is random or a hash already.
+    """
+    first = id.int & 0xFFFFFFFFFFFFFFFF
+    second = (id.int >> 64) | 1
+    return ((first + index * second) % size for index in range(hashes))
+
+
+class SegmentInfo(NamedTuple):
+    """
+    Represents the header of a segment.
+
+    Attributes:
+        path (Path): The file of the segment.
+        size (int): The number of tests.
+        min_timestamp (datetime): The earliest timestamp.
+        max_timestamp (datetime): The latest timestamp.
+        columns (dict[str, tuple[int, int]]): The offset and the length
+            of every compressed column in the file.
+        part_ids (frozenset[UUID]): The part ids of the tests.
+        stamp (tuple[int, int]): The inode and the modification time of
+            the file, which change when the segment is rewritten.
+        part_counts (dict[UUID, tuple[int, int]]): The passed and failed
+            tests of each part.
+        id_filter (IdFilter | None): The filter of the ids, None for a
+            segment written without it.
+    """
+
+    path: Path
+    size: int
+    min_timestamp: datetime
+    max_timestamp: datetime
+    columns: dict[str, tuple[int, int]]
+    part_ids: frozenset[UUID]
+    stamp: tuple[int, int]
+    part_counts: dict[UUID, tuple[int, int]]
+    id_filter: IdFilter | None
+
+    def may_contain(self, id: UUID) -> bool:
+        """
+        Tells whether the segment may hold a test.
+
+        Args:
+            id (UUID): The id of the test.
+
+        Returns:
+            bool: False if no test of the segment has this id.
+        """
+        return self.id_filter is None or self.id_filter.may_contain(id)
+
+    def may_match(self, filters: Mapping[str, Any]) -> bool:
+        """
+        Tells whether the segment may hold tests matching the filters.
+
+        Args:
+            filters (Mapping[str, Any]): The filters of the tests.
+
+        Returns:
+            bool: False if no test of the segment matches.
+        """
+        part_id = filters.get("part_id")
+        if part_id is not None and part_id not in self.part_ids:
+            return False
+        start = filters.get("timestamp_from")
+        if start is not None and self.max_timestamp < start:
+            return False
+        end = filters.get("timestamp_to")
+        if end is not None and self.min_timestamp >= end:
+            return False
+        return True
+
+
+def _sort_key(test: TestDomain) -> tuple[datetime, UUID]:
+    return test.timestamp, test.id
+
+
+def check_filters(filters: Mapping[str, Any]) -> dict[str, Any]:
+    """
+    Returns the filters set, as the test repository accepts them.
+
+    Args:
+        filters (Mapping[str, Any]): The filters of the tests.
+
+    Raises:
+        ValueError: If a filter is unknown.
+
+    Returns:
+        dict[str, Any]: The filters which are not None.
+    """
+    for key in filters:
+        if key not in FILTERS:
+            raise ValueError(f"Unknown filter: {key}")
+    return {key: value for key, value in filters.items() if value is not None}
+
+
+def matches(test: TestDomain, filters: Mapping[str, Any]) -> bool:
+    """
+    Tells whether a test matches checked filters.
+
+    Args:
+        test (TestDomain): The test.
+        filters (Mapping[str, Any]): The filters, see check_filters.
+
+    Returns:
+        bool: True if the test matches every filter.
+    """
+    for key, value in filters.items():
+        if key == "part_id" and test.part_id != value:
+            return False
+        if key == "successful" and test.successful is not value:
+            return False
+        if key == "timestamp_from" and test.timestamp < value:
+            return False
+        if key == "timestamp_to" and test.timestamp >= value:
+            return False
+        if key == "data_contains" and not _contains(test.data, value):
+            return False
+    return True
+
+
+def _contains(document: Any, value: Any, top: bool = True) -> bool:
+    """
+    Tells whether a JSON document contains a value, as @> does: only a
+    top-level array contains a scalar which is one of its elements.
+    """
+    if isinstance(value, dict):
+        return isinstance(document, dict) and all(
+            key in document and _contains(document[key], item, False)
+            for key, item in value.items()
+        )
+    if isinstance(value, list):
+        return isinstance(document, list) and all(
+            any(_contains(element, item, False) for element in document)
+            for item in value
+        )
+    if top and isinstance(document, list):
+        return any(_equals(element, value) for element in document)
+    return _equals(document, value)
+
+
+def _equals(document: Any, value: Any) -> bool:
+    """
+    Tells whether a JSON document is a scalar equal to another, without
+    taking the booleans for numbers.
+    """
+    return (
+        not isinstance(document, (dict, list))
+        and isinstance(document, bool) is isinstance(value, bool)
+        and bool(document == value)
+    )
+
+
+def _encode_timestamps(timestamps: Sequence[datetime]) -> bytes:
+    values = array("q", ((ts - EPOCH) // MICROSECOND for ts in timestamps))
+    if sys.byteorder == "big":
+        values.byteswap()
+    return values.tobytes()
+
+
+def _decode_timestamps(raw: bytes) -> list[datetime]:
+    values = array("q")
+    values.frombytes(raw)
+    if sys.byteorder == "big":
+        values.byteswap()
+    return [EPOCH + value * MICROSECOND for value in values]
+
+
+def _decode_ids(raw: bytes) -> list[UUID]:
+    return [UUID(bytes=chunk) for (chunk,) in struct.iter_unpack("16s", raw)]
+
+
+def _decode_interned_ids(raw: bytes) -> list[UUID]:
+    """
+    Decodes repeated ids to a single UUID object per id.
+    """
+    ids: dict[bytes, UUID] = {}
+    return [
+        ids.get(chunk) or ids.setdefault(chunk, UUID(bytes=chunk))
+        for (chunk,) in struct.iter_unpack("16s", raw)
+    ]
+
+
+def write_segment(path: Path, tests: Sequence[TestDomain]) -> SegmentInfo:
+    """
+    Writes tests to a segment file, synced to disk.
+
+    Args:
+        path (Path): The file to write.
+        tests (Sequence[TestDomain]): The tests, at least one.
+
+    Returns:
+        SegmentInfo: The header of the segment.
+    """
+    tests = sorted(tests, key=_sort_key)
+    encoded = {
+        "id": b"".join(test.id.bytes for test in tests),
+        "part_id": b"".join(test.part_id.bytes for test in tests),
+        "timestamp": _encode_timestamps([test.timestamp for test in tests]),
+        "successful": bytes(test.successful for test in tests),
+        "data": orjson.dumps([test.data for test in tests]),
+    }
+    id_filter = IdFilter.build([test.id for test in tests])
+    encoded["id_filter"] = id_filter.bits
+    names = (*COLUMNS, "id_filter")
+    blocks = [zlib.compress(encoded[name]) for name in names]
+    part_counts = _count_parts(
+        [test.part_id for test in tests], [test.successful for test in tests]
+    )
+    header = {
+        "count": len(tests),
+        "part_ids": [str(part_id) for part_id in sorted(part_counts)],
+        "part_counts": [
+            [str(part_id), passed, failed]
+            for part_id, (passed, failed) in sorted(part_counts.items())
+        ],
+        "min_timestamp": tests[0].timestamp.isoformat(),
+        "max_timestamp": tests[-1].timestamp.isoformat(),
+        "columns": [[name, len(block)] for name, block in zip(names, blocks)],
+        "id_filter_hashes": id_filter.hashes,
+    }
+    raw_header = orjson.dumps(header)
+    with open(path, "wb") as file:
+        file.write(MAGIC)
+        file.write(len(raw_header).to_bytes(4, "little"))
+        file.write(raw_header)
+        for block in blocks:
+            file.write(block)
+        file.flush()
+        os.fsync(file.fileno())
+    return read_segment_info(path)
+
+
+def _count_parts(
+    part_ids: Sequence[UUID], successful: Sequence[int]
+) -> dict[UUID, tuple[int, int]]:
+    """
+    Counts the passed and failed tests of each part.
+    """
+    counts: dict[UUID, tuple[int, int]] = {}
+    for part_id, success in zip(part_ids, successful):
+        passed, failed = counts.get(part_id, (0, 0))
+        if success:
+            counts[part_id] = (passed + 1, failed)
+        else:
+            counts[part_id] = (passed, failed + 1)
+    return counts
+
+
+def read_segment_info(path: Path) -> SegmentInfo:
+    """
+    Reads the header of a segment.
+
+    Args:
+        path (Path): The file of the segment.
+
+    Raises:
+        ValueError: If the file is not a segment.
+
+    Returns:
+        SegmentInfo: The header.
+    """
+    with open(path, "rb") as file:
+        return _read_info(file, path)
+
+
+def _stamp(file: BinaryIO) -> tuple[int, int]:
+    stat = os.fstat(file.fileno())
+    return stat.st_ino, stat.st_mtime_ns
+
+
+def _read_info(file: BinaryIO, path: Path) -> SegmentInfo:
+    """
+    Reads the header of an open segment.
+    """
+    file.seek(0)
+    if file.read(len(MAGIC)) != MAGIC:
+        raise ValueError(f"Not a test segment: {path}")
+    size = int.from_bytes(file.read(4), "little")
+    header = orjson.loads(file.read(size))
+    offset = len(MAGIC) + 4 + size
+    columns = {}
+    for name, length in header["columns"]:
+        columns[name] = (offset, length)
+        offset += length
+    if "part_counts" in header:
+        part_counts = {
+            UUID(part_id): (passed, failed)
+            for part_id, passed, failed in header["part_counts"]
+        }
+    else:
+        part_counts = _count_parts(
+            _decode_interned_ids(_read_block(file, columns["part_id"])),
+            _read_block(file, columns["successful"]),
+        )
+    id_filter = None
+    if "id_filter" in columns:
+        id_filter = IdFilter(
+            _read_block(file, columns["id_filter"]),
+            header["id_filter_hashes"],
+        )
+    return SegmentInfo(
+        path=path,
+        size=header["count"],
+        min_timestamp=datetime.fromisoformat(header["min_timestamp"]),
+        max_timestamp=datetime.fromisoformat(header["max_timestamp"]),
+        columns=columns,
+        part_ids=frozenset(part_counts),
+        stamp=_stamp(file),
+        part_counts=part_counts,
+        id_filter=id_filter,
+    )
+
+
+def _read_block(file: BinaryIO, position: tuple[int, int]) -> bytes:
+    offset, length = position
+    file.seek(offset)
+    return zlib.decompress(file.read(length))
+
+
+def _read_columns(info: SegmentInfo, names: Sequence[str]) -> list[bytes]:
+    """
+    Reads and decompresses columns of a segment, from the header of the
+    file if it was rewritten since the given header was read.
+    """
+    columns = []
+    with open(info.path, "rb") as file:
+        if _stamp(file) != info.stamp:
+            info = _read_info(file, info.path)
+        for name in names:
+            columns.append(_read_block(file, info.columns[name]))
+    return columns
+
+
+def read_segment(info: SegmentInfo) -> list[TestDomain]:
+    """
+    Reads the tests of a segment.
+
+    Args:
+        info (SegmentInfo): The header of the segment.
+
+    Returns:
+        list[TestDomain]: The tests, sorted by (timestamp, id).
+    """
+    ids, part_ids, timestamps, successful, data = _read_columns(info, COLUMNS)
+    return [
+        TestDomain(
+            id=id,
+            part_id=part_id,
+            timestamp=timestamp,
+            successful=bool(success),
+            data=document,
+        )
+        for id, part_id, timestamp, success, document in zip(
+            _decode_ids(ids),
+            _decode_interned_ids(part_ids),
+            _decode_timestamps(timestamps),
+            successful,
+            orjson.loads(data),
+        )
+    ]
+
+
+def remove_parts(info: SegmentInfo, part_ids: Collection[UUID]) -> int:
+    """
+    Removes the tests of parts from a segment.
+
+    The segment is rewritten to a temporary file which replaces it, or
+    removed if none of its tests is left.
+
+    Args:
+        info (SegmentInfo): The header of the segment.
+        part_ids (Collection[UUID]): The ids of the parts.
+
+    Returns:
+        int: The number of removed tests.
+    """
+    tests = read_segment(info)
+    kept = [test for test in tests if test.part_id not in part_ids]
+    if not kept:
+        info.path.unlink()
+    elif len(kept) < len(tests):
+        tmp = info.path.with_name(
+            info.path.name.removesuffix(SUFFIX) + TMP_SUFFIX
+        )
+        write_segment(tmp, kept)
+        tmp.replace(info.path)
+    return len(tests) - len(kept)
+
+
+def find_in_segment(info: SegmentInfo, id: UUID) -> int | None:
+    """
+    Finds the position of a test in a segment, decompressing its ids only.
+
+    Args:
+        info (SegmentInfo): The header of the segment.
+        id (UUID): The id of the test.
+
+    Returns:
+        int | None: The position of the test, None if it is not archived
+            in this segment.
+    """
+    (ids,) = _read_columns(info, ["id"])
+    position = ids.find(id.bytes)
+    while position != -1 and position % 16:
+        position = ids.find(id.bytes, position + 1)
+    return None if position == -1 else position // 16
+
+
+def _unlink_all(paths: Collection[Path]) -> None:
+    for path in paths:
+        path.unlink(missing_ok=True)
+
+
+class TestArchive:
+    """
+    The archive of the old tests, in segment files.
+
+    The headers of the segments and the tombstones of the deleted parts
+    are loaded in memory, the headers sorted by their earliest timestamp,
+    and reloaded before every read if the directory changed. The last
+    decompressed segments are cached. The archive is disabled without a
+    directory.
+
+    Once tests were archived, the cached test responses of this process
+    are invalidated, the other processes see the bumped version.
+    """
+
+    def __init__(
+        self,
+        path: Path | None = None,
+        age: timedelta = timedelta(days=365),
+        batch_size: int = 10_000,
+        interval: float = 3600.0,
+        cache_size: int = 16,
+        clock: Callable[[], datetime] = datetime.utcnow,
+        response_cache: ResponseCache | None = None,
+    ) -> None:
+        self._path = path
+        self._age = age
+        self._batch_size = batch_size
+        self._interval = interval
+        self._cache_size = cache_size
+        self._clock = clock
+        self._response_cache = response_cache
+        self._segments: list[SegmentInfo] = []
+        self._deleted: frozenset[UUID] = frozenset()
+        self._scanned: tuple[int, float] | None = None
+        self._cache: OrderedDict[Path, list[TestDomain]] = OrderedDict()
+
+    @property
+    def enabled(self) -> bool:
+        return self._path is not None
+
+    @property
+    def segments(self) -> list[SegmentInfo]:
+        return list(self._segments)
+
+    def init_app(self, settings: Settings) -> None:
+        """
+        Configures the archive and forgets the loaded segments.
+
+        Args:
+            settings (Settings): The settings of the archive.
+        """
+        self._path = (
+            Path(settings.TEST_ARCHIVE_PATH)
+            if settings.TEST_ARCHIVE_PATH
+            else None
+        )
+        self._age = timedelta(days=settings.TEST_ARCHIVE_AGE_DAYS)
+        self._batch_size = settings.TEST_ARCHIVE_BATCH_SIZE
+        self._interval = settings.TEST_ARCHIVE_INTERVAL
+        self._cache_size = settings.TEST_ARCHIVE_CACHE_SIZE
+        self._segments = []
+        self._deleted = frozenset()
+        self._scanned = None
+        self._cache.clear()
+
+    async def load(self, engine: AsyncEngine) -> None:
+        """
+        Loads the headers of the segments, after recovering the temporary
+        files of an interrupted archiving, unless another process holds
+        the lock of the archive.
+
+        Args:
+            engine (AsyncEngine): The engine of the database.
+        """
+        assert self._path is not None
+        self._path.mkdir(parents=True, exist_ok=True)
+        async with engine.begin() as conn:
+            if await conn.scalar(TRY_LOCK):
+                await self._recover_all(conn)
+        await self.refresh()
+
+    async def refresh(self) -> None:
+        """
+        Reloads the headers of the segments and the tombstones if the
+        directory changed since the last scan, or after RESCAN_INTERVAL
+        seconds, so that the segments written, rewritten or removed and the
+        parts deleted by the other processes are seen. Only the headers of
+        the new or rewritten segments are read.
+        """
+        assert self._path is not None
+        modified = (await asyncio.to_thread(os.stat, self._path)).st_mtime_ns
+        if (
+            self._scanned is not None
+            and self._scanned[0] == modified
+            and monotonic() - self._scanned[1] < RESCAN_INTERVAL
+        ):
+            return
+        scanned = (modified, monotonic())
+        previous = {info.path: info.stamp for info in self._segments}
+        self._segments, self._deleted = await asyncio.to_thread(self._scan)
+        self._scanned = scanned
+        current = {info.path: info.stamp for info in self._segments}
+        for path in list(self._cache):
+            if current.get(path) != previous.get(path):
+                del self._cache[path]
+
+    async def archive(self, engine: AsyncEngine) -> int:
+        """
+        Moves the tests older than the archive age to new segments,
+        TEST_ARCHIVE_BATCH_SIZE tests at a time.
+
+        The tests locked by a transaction are skipped until the next run.
+
+        Args:
+            engine (AsyncEngine): The engine of the database.
+
+        Returns:
+            int: The number of archived tests.
+        """
+        assert self._path is not None
+        async with engine.begin() as conn:
+            if not await conn.scalar(TRY_LOCK):
+                logger.info("The tests are archived by another process")
+                return 0
+            await self._recover_all(conn)
+            tombstones = await asyncio.to_thread(self._list_tombstones)
+            await self._delete_orphans(conn)
+            await asyncio.to_thread(_unlink_all, tombstones)
+        cutoff = self._clock() - self._age
+        archived = 0
+        while True:
+            async with engine.begin() as conn:
+                if not await conn.scalar(TRY_LOCK):
+                    break
+                tests = await self._archive_batch(conn, cutoff)
+            if not tests:
+                break
+            archived += len(tests)
+            logger.info("Archived %d tests", len(tests))
+            if len(tests) < self._batch_size:
+                break
+        await self.refresh()
+        return archived
+
+    async def hide_parts(self, part_ids: Collection[UUID]) -> None:
+        """
+        Hides the archived tests of deleted parts, by writing their
+        tombstones, without waiting for the lock of the archive.
+
+        The tests are removed from the segments by the next archiving,
+        which removes the tombstones.
+
+        Args:
+            part_ids (Collection[UUID]): The ids of the deleted parts.
+        """
+        assert self._path is not None
+        await asyncio.to_thread(self._write_tombstones, part_ids)
+        self._deleted |= frozenset(part_ids)
+
+    async def _remove_parts(self, part_ids: Collection[UUID]) -> int:
+        """
+        Removes the archived tests of deleted parts from the segments, in a
+        transaction holding the lock of the archive.
+        """
+        await self.refresh()
+        removed = 0
+        for info in self._segments:
+            if not info.part_ids.isdisjoint(part_ids):
+                removed += await asyncio.to_thread(
+                    remove_parts, info, part_ids
+                )
+        if removed:
+            logger.info("Removed %d archived tests of deleted parts", removed)
+            await self.refresh()
+        return removed
+
+    async def monitor(self, engine: AsyncEngine) -> None:
+        """
+        Archives the old tests every TEST_ARCHIVE_INTERVAL seconds.
+
+        Args:
+            engine (AsyncEngine): The engine of the database.
+        """
+        while True:
+            await asyncio.sleep(self._interval)
+            try:
+                await self.archive(engine)
+            except Exception:
+                logger.exception("Error archiving the tests")
+
+    async def find_by_id(self, id: UUID) -> TestDomain | None:
+        """
+        Finds an archived test.
+
+        Args:
+            id (UUID): The id of the test.
+
+        Returns:
+            TestDomain | None: The test, None if it is not archived.
+        """
+        await self.refresh()
+        for info in self._segments:
+            if not info.may_contain(id):
+                continue
+            try:
+                position = await asyncio.to_thread(find_in_segment, info, id)
+            except FileNotFoundError:
+                continue
+            if position is None:
+                continue
+            # The segment may have been rewritten since it was searched.
+            tests = await self._read(info)
+            if position < len(tests) and tests[position].id == id:
+                return tests[position]
+            return next((test for test in tests if test.id == id), None)
+        return None
+
+    async def count(self, filters: Mapping[str, Any]) -> int:
+        """
+        Counts the archived tests matching the filters, from the headers
+        of the segments when filtered by part and result only.
+
+        Args:
+            filters (Mapping[str, Any]): The filters of the tests.
+
+        Returns:
+            int: The number of matching tests.
+        """
+        filters = check_filters(filters)
+        if set(filters) <= {"part_id", "successful"}:
+            passed, failed = await self.count_results(filters.get("part_id"))
+            if "successful" not in filters:
+                return passed + failed
+            return passed if filters["successful"] else failed
+        count = 0
+        async for tests in self._iter_matching(filters):
+            count += len(tests)
+        return count
+
+    async def count_results(
+        self, part_id: UUID | None = None
+    ) -> tuple[int, int]:
+        """
+        Counts the passed and failed archived tests, from the headers of
+        the segments.
+
+        Args:
+            part_id (UUID | None): The part of the tests, None for all
+                the parts.
+
+        Returns:
+            tuple[int, int]: The numbers of passed and failed tests.
+        """
+        await self.refresh()
+        passed = failed = 0
+        for info in self._segments:
+            part_ids = (
+                info.part_ids if part_id is None else info.part_ids & {part_id}
+            )
+            for id in part_ids - self._deleted:
+                part_passed, part_failed = info.part_counts[id]
+                passed += part_passed
+                failed += part_failed
+        return passed, failed
+
+    async def find_all(
+        self, limit: int, offset: int, filters: Mapping[str, Any]
+    ) -> list[TestDomain]:
+        """
+        Returns the archived tests matching the filters, in the order of
+        the segments.
+
+        Args:
+            limit (int): The maximum number of tests.
+            offset (int): The number of matching tests to skip.
+            filters (Mapping[str, Any]): The filters of the tests.
+
+        Returns:
+            list[TestDomain]: The tests.
+        """
+        filters = check_filters(filters)
+        found: list[TestDomain] = []
+        if limit <= 0:
+            return found
+        await self.refresh()
+        for info in self._segments:
+            if (
+                not filters
+                and offset >= info.size
+                and info.part_ids.isdisjoint(self._deleted)
+            ):
+                offset -= info.size
+                continue
+            if not info.may_match(filters):
+                continue
+            tests = [
+                test
+                for test in await self._read(info)
+                if matches(test, filters)
+            ]
+            end = offset + limit - len(found)
+            found += tests[offset:end]
+            offset = max(0, offset - len(tests))
+            if len(found) == limit:
+                break
+        return found
+
+    async def stream_all(
+        self, limit: int, offset: int, filters: Mapping[str, Any]
+    ) -> AsyncIterator[TestDomain]:
+        """
+        Streams the archived tests matching the filters, in the order of
+        the segments, one segment in memory at a time.
+
+        Args:
+            limit (int): The maximum number of tests.
+            offset (int): The number of matching tests to skip.
+            filters (Mapping[str, Any]): The filters of the tests.
+
+        Returns:
+            AsyncIterator[TestDomain]: The tests.
+        """
+        async for tests in self._iter_matching(check_filters(filters)):
+            for test in tests[offset:]:
+                if limit <= 0:
+                    return
+                yield test
+                limit -= 1
+            offset = max(0, offset - len(tests))
+
+    async def stream_segments(
+        self, filters: Mapping[str, Any]
+    ) -> AsyncIterator[list[TestDomain]]:
+        """
+        Streams all the archived tests matching the filters, one list per
+        segment, in the order of the segments.
+
+        Args:
+            filters (Mapping[str, Any]): The filters of the tests.
+
+        Returns:
+            AsyncIterator[list[TestDomain]]: The tests of each segment.
+        """
+        async for tests in self._iter_matching(check_filters(filters)):
+            if tests:
+                yield tests
+
+    async def find_page(
+        self, limit: int, cursor: Cursor | None, filters: Mapping[str, Any]
+    ) -> list[TestDomain]:
+        """
+        Returns the first archived tests after a cursor, in the
+        (timestamp, id) order.
+
+        The segments are read by earliest timestamp, until the next one
+        starts after the last test of the page.
+
+        Args:
+            limit (int): The maximum number of tests.
+            cursor (Cursor | None): The position of the previous page.
+            filters (Mapping[str, Any]): The filters of the tests.
+
+        Returns:
+            list[TestDomain]: The tests, sorted by (timestamp, id).
+        """
+        filters = check_filters(filters)
+        after = None if cursor is None else (cursor.key, cursor.id)
+        found: list[TestDomain] = []
+        await self.refresh()
+        for info in self._segments:
+            if (
+                len(found) >= limit
+                and info.min_timestamp > found[-1].timestamp
+            ):
+                break
+            if after is not None and info.max_timestamp < after[0]:
+                continue
+            if not info.may_match(filters):
+                continue
+            tests = (
+                test
+                for test in await self._read(info)
+                if (after is None or _sort_key(test) > after)
+                and matches(test, filters)
+            )
+            found = list(
+                islice(heapq.merge(found, tests, key=_sort_key), limit)
+            )
+        return found
+
+    async def _iter_matching(
+        self, filters: Mapping[str, Any]
+    ) -> AsyncIterator[list[TestDomain]]:
+        """
+        Yields the tests matching checked filters, segment by segment.
+        """
+        await self.refresh()
+        for info in self._segments:
+            if info.may_match(filters):
+                yield [
+                    test
+                    for test in await self._read(info)
+                    if matches(test, filters)
+                ]
+
+    async def _read(self, info: SegmentInfo) -> list[TestDomain]:
+        """
+        Returns the tests of a segment, from the cache if possible, but
+        those of the deleted parts.
+        """
+        tests = self._cache.get(info.path)
+        if tests is None:
+            try:
+                tests = await asyncio.to_thread(read_segment, info)
+            except FileNotFoundError:
+                # Removed since the last scan, with all its tests deleted.
+                return []
+            self._cache[info.path] = tests
+            while len(self._cache) > self._cache_size:
+                self._cache.popitem(last=False)
+        self._cache.move_to_end(info.path)
+        if info.part_ids.isdisjoint(self._deleted):
+            return tests
+        return [test for test in tests if test.part_id not in self._deleted]
+
+    def _scan(self) -> tuple[list[SegmentInfo], frozenset[UUID]]:
+        """
+        Lists the segments of the directory, reading the headers of the
+        new or rewritten ones only, and the deleted parts.
+        """
+        assert self._path is not None
+        known = {info.path: info for info in self._segments}
+        segments = []
+        for path in self._path.glob(f"*{SUFFIX}"):
+            info = known.get(path)
+            try:
+                stat = path.stat()
+                if info is None or info.stamp != (
+                    stat.st_ino,
+                    stat.st_mtime_ns,
+                ):
+                    info = read_segment_info(path)
+            except FileNotFoundError:
+                continue
+            segments.append(info)
+        segments.sort(
+            key=lambda segment: (segment.min_timestamp, segment.path)
+        )
+        deleted = frozenset(
+            UUID(hex=path.name.removesuffix(TOMBSTONE_SUFFIX))
+            for path in self._list_tombstones()
+        )
+        return segments, deleted
+
+    def _list_tombstones(self) -> list[Path]:
+        assert self._path is not None
+        return list(self._path.glob(f"*{TOMBSTONE_SUFFIX}"))
+
+    def _write_tombstones(self, part_ids: Collection[UUID]) -> None:
+        assert self._path is not None
+        for part_id in part_ids:
+            (self._path / f"{part_id.hex}{TOMBSTONE_SUFFIX}").touch()
+
+    async def _archive_batch(
+        self, conn: AsyncConnection, cutoff: datetime
+    ) -> list[TestDomain]:
+        """
+        Moves a batch of tests to a new segment, in the transaction of the
+        connection, which holds the lock of the archive.
+
+        The temporary file is only removed if the deletion fails before the
+        commit: once the commit was sent, it is left to the recovery.
+        """
+        assert self._path is not None
+        res = await conn.execute(
+            SELECT_BATCH, {"cutoff": cutoff, "limit": self._batch_size}
+        )
+        tests = [TestDomain(*row) for row in res]
+        if not tests:
+            return tests
+        tmp = self._path / (
+            f"{tests[0].timestamp:%Y%m%dT%H%M%S}-{uuid4().hex[:12]}"
+            f"{TMP_SUFFIX}"
+        )
+        try:
+            await asyncio.to_thread(write_segment, tmp, tests)
+            await conn.execute(
+                DELETE_BATCH,
+                {"cutoff": cutoff, "ids": [test.id for test in tests]},
+            )
+            await conn.execute(bump_version_statement(Test))
+        except BaseException:
+            tmp.unlink(missing_ok=True)
+            raise
+        await conn.commit()
+        await asyncio.to_thread(self._promote, tmp)
+        if self._response_cache is not None:
+            self._response_cache.invalidate([Test])
+        return tests
+
+    async def _delete_orphans(self, conn: AsyncConnection) -> None:
+        """
+        Removes the archived tests of the deleted parts, tombstoned or
+        deleted otherwise, e.g. by SQL.
+        """
+        await self.refresh()
+        part_ids: set[UUID] = set()
+        for info in self._segments:
+            part_ids |= info.part_ids
+        if not part_ids:
+            return
+        res = await conn.execute(EXISTING_PARTS, {"ids": list(part_ids)})
+        deleted = part_ids - set(res.scalars())
+        if deleted:
+            await self._remove_parts(deleted)
+
+    def _promote(self, tmp: Path) -> SegmentInfo:
+        """
+        Renames a temporary file to a segment, once its tests were deleted.
+
+        The file may already have been renamed by the recovery of another
+        process, once the lock was released by the commit.
+        """
+        path = tmp.with_name(tmp.name.removesuffix(TMP_SUFFIX) + SUFFIX)
+        try:
+            tmp.replace(path)
+        except FileNotFoundError:
+            if not path.exists():
+                raise
+        return read_segment_info(path)
+
+    async def _recover_all(self, conn: AsyncConnection) -> None:
+        """
+        Recovers the temporary files, which were left by an interruption
+        as the transaction of the connection holds the lock of the archive.
+        """
+        assert self._path is not None
+        for tmp in sorted(self._path.glob(f"*{TMP_SUFFIX}")):
+            await self._recover(conn, tmp)
+
+    async def _recover(self, conn: AsyncConnection, tmp: Path) -> None:
+        """
+        Renames a temporary file whose tests were deleted from the table,
+        or which rewrites a segment, removes it otherwise.
+        """
+        try:
+            info = await asyncio.to_thread(read_segment_info, tmp)
+            first = (await asyncio.to_thread(read_segment, info))[0]
+        except (ValueError, OSError, zlib.error):
+            logger.warning("Removing the incomplete segment %s", tmp)
+            tmp.unlink()
+            return
+        in_table = await conn.scalar(
+            EXISTS_TEST, {"id": first.id, "timestamp": first.timestamp}
+        )
+        if in_table:
+            logger.warning("Removing the uncommitted segment %s", tmp)
+            tmp.unlink()
+            return
+        await asyncio.to_thread(self._promote, tmp)
+        logger.info("Recovered the segment %s", tmp)
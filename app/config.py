@@ -15,3 +15,68 @@ database_uri = PostgresDsn.build(
 @dataclass(frozen=True)
 class Settings:
     DATABASE_URI: str = database_uri
+    DATABASE_POOL_SIZE: int = int(os.getenv("DATABASE_POOL_SIZE", "5"))
+    DATABASE_MAX_OVERFLOW: int = int(os.getenv("DATABASE_MAX_OVERFLOW", "10"))
+    DATABASE_POOL_RECYCLE: int = int(os.getenv("DATABASE_POOL_RECYCLE", "-1"))
+    DATABASE_POOL_TIMEOUT: float = float(
+        os.getenv("DATABASE_POOL_TIMEOUT", "30")
+    )
+    DATABASE_POOL_PRE_PING: bool = (
+        os.getenv("DATABASE_POOL_PRE_PING", "true").lower() == "true"
+    )
+    DATABASE_STATEMENT_CACHE_SIZE: int = int(
+        os.getenv("DATABASE_STATEMENT_CACHE_SIZE", "100")
+    )
+    DATABASE_QUERY_CACHE_SIZE: int = int(
+        os.getenv("DATABASE_QUERY_CACHE_SIZE", "500")
+    )
+    DATABASE_REPLICA_URIS: tuple[str, ...] = tuple(
+        uri for uri in os.getenv("DATABASE_REPLICA_URIS", "").split(",") if uri
+    )
+    DATABASE_REPLICA_MAX_LAG: float = float(
+        os.getenv("DATABASE_REPLICA_MAX_LAG", "5")
+    )
+    DATABASE_REPLICA_CHECK_INTERVAL: float = float(
+        os.getenv("DATABASE_REPLICA_CHECK_INTERVAL", "1")
+    )
+    # "error" to refuse to start on a schema drift, "warn" to log it,
+    # "off" to skip the check.
+    SCHEMA_CHECK: str = os.getenv("SCHEMA_CHECK", "error")
+    # Monthly partitions of the test table created after the current one.
+    TEST_PARTITIONS_AHEAD: int = int(os.getenv("TEST_PARTITIONS_AHEAD", "3"))
+    # Months of tests kept, 0 to keep them all.
+    TEST_RETENTION_MONTHS: int = int(os.getenv("TEST_RETENTION_MONTHS", "0"))
+    # "detach" to keep the expired partitions as tables, "drop" to drop them.
+    TEST_EXPIRED_PARTITIONS: str = os.getenv(
+        "TEST_EXPIRED_PARTITIONS", "detach"
+    )
+    # Directory of the archived tests, empty to disable the archive.
+    TEST_ARCHIVE_PATH: str = os.getenv("TEST_ARCHIVE_PATH", "")
+    # Age, in days, of the tests moved to the archive.
+    TEST_ARCHIVE_AGE_DAYS: float = float(
+        os.getenv("TEST_ARCHIVE_AGE_DAYS", "365")
+    )
+    TEST_ARCHIVE_BATCH_SIZE: int = int(
+        os.getenv("TEST_ARCHIVE_BATCH_SIZE", "10000")
+    )
+    # Seconds between the archivings, 0 to never archive in the background.
+    TEST_ARCHIVE_INTERVAL: float = float(
+        os.getenv("TEST_ARCHIVE_INTERVAL", "3600")
+    )
+    # Number of decompressed segments kept in memory.
+    TEST_ARCHIVE_CACHE_SIZE: int = int(
+        os.getenv("TEST_ARCHIVE_CACHE_SIZE", "16")
+    )
+    # Number of part ids kept in the part index.
+    PART_INDEX_CACHE_SIZE: int = int(
+        os.getenv("PART_INDEX_CACHE_SIZE", "100000")
+    )
+    # Number of serialized responses cached by each API process.
+    RESPONSE_CACHE_SIZE: int = int(os.getenv("RESPONSE_CACHE_SIZE", "1024"))
+    # Seconds a cached response is served, 0 to disable the cache.
+    RESPONSE_CACHE_TTL: float = float(os.getenv("RESPONSE_CACHE_TTL", "5"))
+    # Seconds before its expiry from which a read cached response is
+    # rebuilt in the background.
+    RESPONSE_CACHE_REFRESH_AHEAD: float = float(
+        os.getenv("RESPONSE_CACHE_REFRESH_AHEAD", "1")
+    )
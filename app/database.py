@@ -1,6 +1,10 @@
+import asyncio
 from abc import abstractmethod
 from functools import cached_property
+from itertools import count
+from logging import getLogger
 
+from sqlalchemy import text
 from sqlalchemy.ext.asyncio import (
     AsyncEngine,
     AsyncSession,
@@ -10,6 +14,27 @@ from sqlalchemy.ext.asyncio import (
 
 from app.config import Settings
 from app.models import Base
+from app.pool import InstrumentedAsyncQueuePool, PoolMetrics
+
+logger = getLogger(__name__)
+
+# Replication lag of a standby in seconds, 0 for a server that is not a
+# standby and once a standby streaming from its primary replayed all it
+# received. When the WAL receiver stopped, or its status is hidden from the
+# user (see pg_read_all_stats), nothing tells the standby is up to date: the
+# lag is the age of the last replayed transaction, NULL if none was.
+REPLICA_LAG_QUERY = text(
+    """
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn()
+            AND EXISTS (
+                SELECT FROM pg_stat_wal_receiver WHERE status = 'streaming'
+            ) THEN 0
+        ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp())
+    END
+    """
+)
 
 
 class BaseDatabaseApp:
@@ -28,18 +53,45 @@ class BaseDatabaseApp:
         """Not implemented yet"""
 
 
+class Replica:
+    """
+    A read replica and its last known replication lag.
+
+    A replica is in rotation once its lag was measured under the
+    maximum lag.
+    """
+
+    def __init__(
+        self,
+        engine: AsyncEngine,
+        session_maker: async_sessionmaker[AsyncSession],
+    ) -> None:
+        self.engine = engine
+        self.session_maker = session_maker
+        self.lag: float | None = None
+        self.in_rotation = False
+
+
 class DatabaseApp(BaseDatabaseApp):
     """
     A class representing a database connection.
 
+    Writes go to the primary engine, read-only sessions are spread over
+    the replicas in rotation and fall back to the primary.
+
     Properties:
         engine (AsyncEngine | None): The database engine.
         session_maker (async_sessionmaker[AsyncSession]): The session maker object.
+        replicas (list[Replica]): The read replicas.
     """
 
     def __init__(self, engine: AsyncEngine | None = None) -> None:
         self._engine = engine
-        self._session_maker = self._create_session_maker()
+        self._session_maker = self._create_session_maker(engine)
+        self._replicas: list[Replica] = []
+        self._replica_max_lag = 0.0
+        self._replica_check_interval = 1.0
+        self._turns = count()
 
     @cached_property
     def engine(self) -> AsyncEngine | None:
@@ -49,6 +101,30 @@ class DatabaseApp(BaseDatabaseApp):
     def session_maker(self) -> async_sessionmaker[AsyncSession]:
         return self._session_maker
 
+    @property
+    def replicas(self) -> list[Replica]:
+        return self._replicas
+
+    @property
+    def read_your_writes_window(self) -> float:
+        """
+        The time, in seconds, during which a replica in rotation may not
+        show a write yet.
+        """
+        return self._replica_max_lag + self._replica_check_interval
+
+    @property
+    def pool_metrics(self) -> PoolMetrics | None:
+        """
+        The metrics of the connection pool, None without an instrumented pool.
+        """
+        if self._engine is None:
+            return None
+        pool = self._engine.pool
+        if not isinstance(pool, InstrumentedAsyncQueuePool):
+            return None
+        return pool.metrics
+
     def init_app(self, settings: Settings) -> None:
         """
         Initializes a new instance of the Database class.
@@ -56,16 +132,100 @@ class DatabaseApp(BaseDatabaseApp):
         Args:
             settings (Settings): The settings to use for the database connection.
         """
-        self._engine = self._create_engine(settings)
-        self._session_maker = self._create_session_maker()
+        self._engine = self._create_engine(settings, settings.DATABASE_URI)
+        self._session_maker = self._create_session_maker(self._engine)
+        self._replicas = []
+        for uri in settings.DATABASE_REPLICA_URIS:
+            engine = self._create_engine(settings, uri)
+            self._replicas.append(
+                Replica(engine, self._create_session_maker(engine))
+            )
+        self._replica_max_lag = settings.DATABASE_REPLICA_MAX_LAG
+        self._replica_check_interval = settings.DATABASE_REPLICA_CHECK_INTERVAL
+
+    def read_session_maker(self) -> async_sessionmaker[AsyncSession]:
+        """
+        Returns the session maker of the next replica in rotation,
+        the primary one when no replica is in rotation.
 
-    def _create_engine(self, settings: Settings) -> AsyncEngine:
+        Returns:
+            async_sessionmaker[AsyncSession]: A session maker for reads.
+        """
+        replicas = [
+            replica for replica in self._replicas if replica.in_rotation
+        ]
+        if not replicas:
+            return self._session_maker
+        return replicas[next(self._turns) % len(replicas)].session_maker
+
+    async def check_replicas(self) -> None:
+        """
+        Measures the lag of every replica and takes the ones lagging more
+        than the maximum lag, or unreachable, out of rotation.
+        """
+        for replica in self._replicas:
+            try:
+                async with replica.engine.connect() as conn:
+                    lag = await conn.scalar(REPLICA_LAG_QUERY)
+                replica.lag = float(lag) if lag is not None else None
+            except Exception:
+                logger.exception("Error checking the lag of a replica")
+                replica.lag = None
+            in_rotation = (
+                replica.lag is not None
+                and replica.lag <= self._replica_max_lag
+            )
+            if replica.in_rotation and not in_rotation:
+                logger.warning(
+                    "Replica taken out of rotation: %s", replica.lag
+                )
+            replica.in_rotation = in_rotation
+
+    async def dispose(self) -> None:
         """
-        Creates an async engine with the given database URI loaded in settings.
+        Closes the connections to the primary and to the replicas.
         """
-        return create_async_engine(settings.DATABASE_URI, pool_pre_ping=True)
+        for replica in self._replicas:
+            await replica.engine.dispose()
+        if self.engine is not None:
+            await self.engine.dispose()
+
+    async def monitor_replicas(self) -> None:
+        """
+        Checks the replicas every DATABASE_REPLICA_CHECK_INTERVAL seconds.
+        """
+        while True:
+            await self.check_replicas()
+            await asyncio.sleep(self._replica_check_interval)
+
+    def _create_engine(self, settings: Settings, uri: str) -> AsyncEngine:
+        """
+        Creates an async engine with the given database URI, pool and
+        statement cache settings, whose pool records its metrics.
+
+        The SQLAlchemy compiled cache holds DATABASE_QUERY_CACHE_SIZE
+        statements and every asyncpg connection keeps
+        DATABASE_STATEMENT_CACHE_SIZE prepared statements.
+        """
+        return create_async_engine(
+            uri,
+            poolclass=InstrumentedAsyncQueuePool,
+            pool_size=settings.DATABASE_POOL_SIZE,
+            max_overflow=settings.DATABASE_MAX_OVERFLOW,
+            pool_recycle=settings.DATABASE_POOL_RECYCLE,
+            pool_timeout=settings.DATABASE_POOL_TIMEOUT,
+            pool_pre_ping=settings.DATABASE_POOL_PRE_PING,
+            query_cache_size=settings.DATABASE_QUERY_CACHE_SIZE,
+            connect_args={
+                "prepared_statement_cache_size": (
+                    settings.DATABASE_STATEMENT_CACHE_SIZE
+                )
+            },
+        )
 
-    def _create_session_maker(self) -> async_sessionmaker[AsyncSession]:
+    def _create_session_maker(
+        self, engine: AsyncEngine | None
+    ) -> async_sessionmaker[AsyncSession]:
         """
         Creates an async session maker with the given engine and session settings.
 
@@ -76,7 +236,7 @@ class DatabaseApp(BaseDatabaseApp):
             autocommit=False,
             autoflush=False,
             future=True,
-            bind=self._engine,
+            bind=engine,
             expire_on_commit=False,  # settings this as True causes issues in async mode
         )
 
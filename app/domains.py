@@ -18,11 +18,24 @@ class PartJson(TypedDict):
     modified_timestamp: str
 
 
+class PartTestStatsJson(TypedDict):
+    part_id: str
+    passed: int
+    failed: int
+    total: int
+    pass_rate: float | None
+
+
 class BaseDomain(ABC):
     """
     Base class for Domain
+
+    The domains declare __slots__, so that a page of thousands of
+    domains does not hold a __dict__ per instance.
     """
 
+    __slots__ = ("_id",)
+
     def __init__(self, id: UUID) -> None:
         self._id = id
 
@@ -39,6 +52,8 @@ class BaseTestDomain(BaseDomain):
     Base class for TestDomain
     """
 
+    __slots__ = ("_part_id", "_timestamp", "_successful", "_data")
+
     def __init__(
         self,
         id: UUID,
@@ -105,6 +120,8 @@ class TestDomain(BaseTestDomain):
         Any additional information about the test.
     """
 
+    __slots__ = ()
+
     @property
     def part_id(self) -> UUID:
         """Getter for part_id
@@ -222,6 +239,8 @@ class TestDomain(BaseTestDomain):
 
 
 class BasePartDomain(BaseDomain):
+    __slots__ = ("_name", "_modified_timestamp")
+
     def __init__(
         self,
         id: UUID,
@@ -258,6 +277,8 @@ class PartDomain(BasePartDomain):
         The timestamp of when the part was last modified.
     """
 
+    __slots__ = ()
+
     @property
     def name(self) -> str:
         """Getter for name
@@ -321,3 +342,78 @@ class PartDomain(BasePartDomain):
                 and self._modified_timestamp == value.modified_timestamp
             )
         return False
+
+
+class PartTestStatsDomain(BaseDomain):
+    """A class representing the test counters of a part.
+
+    The id is the id of the part.
+
+    Attributes
+    ----------
+    passed : int
+        The number of successful tests of the part.
+    failed : int
+        The number of failed tests of the part.
+    """
+
+    __slots__ = ("_passed", "_failed")
+
+    def __init__(self, id: UUID, passed: int, failed: int) -> None:
+        super().__init__(id)
+        self._passed = passed
+        self._failed = failed
+
+    @property
+    def passed(self) -> int:
+        return self._passed
+
+    @property
+    def failed(self) -> int:
+        return self._failed
+
+    @property
+    def total(self) -> int:
+        return self._passed + self._failed
+
+    @property
+    def pass_rate(self) -> float | None:
+        """Getter for pass_rate
+
+        Returns
+        -------
+        float | None
+            The share of successful tests, None without any test
+        """
+
+        if not self.total:
+            return None
+        return self._passed / self.total
+
+    def to_dict(self) -> PartTestStatsJson:
+        """Converts the stats to a dict
+
+        Returns
+        -------
+        PartTestStatsJson
+            The stats as a dict
+        """
+        return {
+            "part_id": str(self._id),
+            "passed": self._passed,
+            "failed": self._failed,
+            "total": self.total,
+            "pass_rate": self.pass_rate,
+        }
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}(id={repr(self._id)}, passed={self._passed}, failed={self._failed})"  # noqa
+
+    def __eq__(self, value: object) -> bool:
+        if isinstance(value, PartTestStatsDomain):
+            return (
+                self._id == value.id
+                and self._passed == value.passed
+                and self._failed == value.failed
+            )
+        return False
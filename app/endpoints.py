@@ -1,17 +1,39 @@
 from uuid import UUID
 
-from fastapi import APIRouter, Depends
-from fastapi.responses import JSONResponse
+from fastapi import APIRouter, Depends, Header
+from fastapi.responses import Response
 from fastapi_class import View
 
-from app.exceptions import NoPartFound
-from app.schemas import PartRegistrationDTO, TestRegistrationDTO, TestUpdateDTO
+from app.domains import PartDomain, TestDomain
+from app.exceptions import (
+    ExportUnavailableError,
+    InvalidCursorError,
+    NoEntityFoundError,
+    NoPartFound,
+)
+from app.export import TExportFormat, stream_export
+from app.pagination import Page, decode_cursor, encode_cursor
+from app.responses import (
+    DomainJSONResponse,
+    TStreamFormat,
+    etag_matches,
+    make_etag,
+    not_modified,
+    stream_domains,
+)
+from app.schemas import (
+    PartRegistrationDTO,
+    TestFilterDTO,
+    TestRegistrationDTO,
+    TestUpdateDTO,
+)
 from app.service import (
     ServiceCreatePart,
     ServiceCreateTest,
     ServiceDeletePart,
     ServiceDeleteTest,
     ServiceShowPart,
+    ServiceShowPartStats,
     ServiceShowTest,
     ServiceUpdateTest,
 )
@@ -24,6 +46,26 @@ async def get_root() -> str:
     return "Welcome to the template api !!"
 
 
+def _page_response(
+    page: Page[PartDomain] | Page[TestDomain],
+) -> DomainJSONResponse:
+    """
+    Serializes a page of domains.
+
+    The cursor of the next page, if any, is sent in the X-Next-Cursor header.
+
+    Args:
+        page (Page): The page to serialize.
+
+    Returns:
+        DomainJSONResponse: A JSON response containing the serialized page.
+    """
+    response = DomainJSONResponse(content=page.items, status_code=200)
+    if page.next_cursor is not None:
+        response.headers["X-Next-Cursor"] = encode_cursor(page.next_cursor)
+    return response
+
+
 @View(router, path="/parts")
 class PartView:
     async def get(
@@ -31,7 +73,10 @@ class PartView:
         service: ServiceShowPart = Depends(ServiceShowPart),
         limit: int = 10,
         skip: int = 0,
-    ) -> JSONResponse:
+        cursor: str | None = None,
+        stream: TStreamFormat | None = None,
+        if_none_match: str | None = Header(None),
+    ) -> Response:
         """
         Retrieve all parts from the database.
 
@@ -39,18 +84,46 @@ class PartView:
            service (ServiceShowPart): The service to use for retrieving parts.
            limit (int): The maximum number of parts to retrieve.
            skip (int): The number of parts to skip.
+           cursor (str | None): The X-Next-Cursor of the previous page.
+                When given, skip is ignored and parts are paginated by
+                (modified_timestamp, id). An empty cursor starts at the first page.
+           stream (TStreamFormat | None): When given, the parts are streamed
+                as a chunked JSON array ("json") or as NDJSON ("ndjson").
+           if_none_match (str | None): The ETags of the parts the client has.
         Returns:
-            JSONResponse: A JSON response containing the serialized parts data.
+            Response: A JSON response containing the serialized parts data,
+                with the ETag of the parts version, or an empty 304 response
+                if it matches If-None-Match.
         """
-        parts = await service.show_parts(limit, skip)
-        content = [part.to_dict() for part in parts]
-        return JSONResponse(content=content, status_code=200)
+        etag = make_etag("parts", await service.parts_version())
+        if etag_matches(if_none_match, etag):
+            return not_modified(etag)
+        response: Response
+        if cursor is not None:
+            try:
+                page = await service.show_parts_page(
+                    limit, decode_cursor(cursor)
+                )
+            except InvalidCursorError:
+                return DomainJSONResponse(
+                    content={"Message": "Invalid cursor"}, status_code=400
+                )
+            response = _page_response(page)
+        elif stream is not None:
+            response = stream_domains(
+                service.stream_parts(limit, skip), stream
+            )
+        else:
+            parts = await service.show_parts(limit, skip)
+            response = DomainJSONResponse(content=parts, status_code=200)
+        response.headers["ETag"] = etag
+        return response
 
     async def post(
         self,
         part_dto: PartRegistrationDTO,
         service: ServiceCreatePart = Depends(ServiceCreatePart),
-    ) -> JSONResponse:
+    ) -> DomainJSONResponse:
         """
         Create a new part.
 
@@ -62,19 +135,18 @@ class PartView:
                 Defaults to ServiceCreatePart.
 
         Returns:
-            JSONResponse:
+            DomainJSONResponse:
                 The serialized content of the created part and a 201 status code.
         """
         part = await service.create_part(part_dto)
-        content = part.to_dict()
-        response = JSONResponse(content=content, status_code=201)
+        response = DomainJSONResponse(content=part, status_code=201)
         return response
 
     async def delete(
         self,
         id: UUID,
         service: ServiceDeletePart = Depends(ServiceDeletePart),
-    ) -> JSONResponse:
+    ) -> DomainJSONResponse:
         """
         Deletes a part with the given ID.
 
@@ -86,12 +158,72 @@ class PartView:
                 Defaults to ServiceDeletePart.
 
         Returns:
-            JSONResponse:
-                A JSON response indicating whether the part was deleted successfully.
+            DomainJSONResponse:
+                A JSON response indicating whether the part was deleted successfully,
+                with a 404 status code if the part does not exist.
         """
-        await service.delete_part(id)
+        try:
+            await service.delete_part(id)
+        except NoEntityFoundError:
+            return DomainJSONResponse(
+                content={"Message": "Part not found"}, status_code=404
+            )
         content = {"message": "Part deleted successfully"}
-        return JSONResponse(content=content, status_code=200)
+        return DomainJSONResponse(content=content, status_code=200)
+
+
+@View(router, path="/parts/stats")
+class PartsStatsView:
+    async def get(
+        self,
+        service: ServiceShowPartStats = Depends(ServiceShowPartStats),
+        limit: int = 10,
+        skip: int = 0,
+    ) -> DomainJSONResponse:
+        """
+        Retrieve the test counters of the parts.
+
+        Args:
+            service (ServiceShowPartStats): The service to use for retrieving
+                the counters.
+            limit (int): The maximum number of parts to retrieve.
+            skip (int): The number of parts to skip.
+
+        Returns:
+            DomainJSONResponse: A JSON response containing the passed, failed
+                and total tests and the pass rate of each part.
+        """
+        stats = await service.show_parts_stats(limit, skip)
+        return DomainJSONResponse(content=stats, status_code=200)
+
+
+@View(router, path="/parts/{id}/stats")
+class PartStatsView:
+    async def get(
+        self,
+        id: UUID,
+        service: ServiceShowPartStats = Depends(ServiceShowPartStats),
+    ) -> DomainJSONResponse:
+        """
+        Retrieve the test counters of a part.
+
+        Args:
+            id (UUID): The ID of the part.
+            service (ServiceShowPartStats): The service to use for retrieving
+                the counters.
+
+        Returns:
+            DomainJSONResponse: A JSON response containing the passed, failed
+                and total tests and the pass rate of the part,
+                with a 404 status code if the part does not exist.
+        """
+        try:
+            stats = await service.show_part_stats(id)
+        except NoEntityFoundError:
+            return DomainJSONResponse(
+                content={"Message": "Part not found"}, status_code=404
+            )
+        return DomainJSONResponse(content=stats, status_code=200)
 
 
 @View(router, path="/tests")
@@ -101,7 +233,11 @@ class TestView:
         service: ServiceShowTest = Depends(ServiceShowTest),
         limit: int = 10,
         skip: int = 0,
-    ) -> JSONResponse:
+        cursor: str | None = None,
+        stream: TStreamFormat | None = None,
+        if_none_match: str | None = Header(None),
+        filters: TestFilterDTO = Depends(),
+    ) -> Response:
         """
         Retrieve a list of tests.
 
@@ -109,19 +245,50 @@ class TestView:
             service (ServiceShowTest): An instance of ServiceShowTest.
             limit (int): The maximum number of tests to retrieve.
             skip (int): The number of tests to skip.
+            filters (TestFilterDTO): The part_id, successful, timestamp_from
+                and timestamp_to (excluded) query params the tests must
+                match.
+            cursor (str | None): The X-Next-Cursor of the previous page.
+                When given, skip is ignored and tests are paginated by
+                (timestamp, id). An empty cursor starts at the first page.
+            stream (TStreamFormat | None): When given, the tests are streamed
+                as a chunked JSON array ("json") or as NDJSON ("ndjson").
+            if_none_match (str | None): The ETags of the tests the client has.
 
         Returns:
-            JSONResponse: A JSON response containing the serialized content of the retrieved tests.
+            Response: A JSON response containing the serialized content of the retrieved tests,
+                with the ETag of the tests version, or an empty 304 response
+                if it matches If-None-Match.
         """
-        data = await service.show_tests(limit, skip)
-        content = [test.to_dict() for test in data]
-        return JSONResponse(content=content, status_code=200)
+        etag = make_etag("tests", await service.tests_version())
+        if etag_matches(if_none_match, etag):
+            return not_modified(etag)
+        response: Response
+        if cursor is not None:
+            try:
+                page = await service.show_tests_page(
+                    limit, decode_cursor(cursor), filters
+                )
+            except InvalidCursorError:
+                return DomainJSONResponse(
+                    content={"Message": "Invalid cursor"}, status_code=400
+                )
+            response = _page_response(page)
+        elif stream is not None:
+            response = stream_domains(
+                service.stream_tests(limit, skip, filters), stream
+            )
+        else:
+            data = await service.show_tests(limit, skip, filters)
+            response = DomainJSONResponse(content=data, status_code=200)
+        response.headers["ETag"] = etag
+        return response
 
     async def post(
         self,
         part_dto: TestRegistrationDTO,
         service: ServiceCreateTest = Depends(ServiceCreateTest),
-    ) -> JSONResponse:
+    ) -> DomainJSONResponse:
         """
         Create a new test.
 
@@ -132,15 +299,14 @@ class TestView:
                 The service used to create the test.
 
         Returns:
-            JSONResponse:
+            DomainJSONResponse:
                 The serialized test data with a 201 status code.
         """
         try:
             test = await service.create_test(part_dto)
-            content = test.to_dict()
-            response = JSONResponse(content=content, status_code=201)
+            response = DomainJSONResponse(content=test, status_code=201)
         except NoPartFound:
-            response = JSONResponse(
+            response = DomainJSONResponse(
                 content={"Message": "Part not found"}, status_code=404
             )
         return response
@@ -149,7 +315,7 @@ class TestView:
         self,
         test_dto: TestUpdateDTO,
         service: ServiceUpdateTest = Depends(ServiceUpdateTest),
-    ) -> JSONResponse:
+    ) -> DomainJSONResponse:
         """
         Update a test resource.
 
@@ -158,18 +324,23 @@ class TestView:
             service (ServiceUpdateTest): The service used to update the test data.
 
         Returns:
-            JSONResponse: The JSON response containing the updated test data.
+            DomainJSONResponse: The JSON response containing the updated test data,
+                with a 404 status code if the test does not exist.
         """
 
-        test = await service.update_data(test_dto)
-        content = test.to_dict()
-        return JSONResponse(content=content, status_code=200)
+        try:
+            test = await service.update_data(test_dto)
+        except NoEntityFoundError:
+            return DomainJSONResponse(
+                content={"Message": "Test not found"}, status_code=404
+            )
+        return DomainJSONResponse(content=test, status_code=200)
 
     async def delete(
         self,
         id: UUID,
         service: ServiceDeleteTest = Depends(ServiceDeleteTest),
-    ) -> JSONResponse:
+    ) -> DomainJSONResponse:
         """
         Deletes a test with the given ID.
 
@@ -181,8 +352,87 @@ class TestView:
                 Defaults to ServiceDeleteTest.
 
         Returns:
-            JSONResponse: A JSON response indicating whether the test was deleted successfully.
+            DomainJSONResponse: A JSON response indicating whether the test was deleted successfully,
+                with a 404 status code if the test does not exist.
         """
-        await service.delete_test(id)
+        try:
+            await service.delete_test(id)
+        except NoEntityFoundError:
+            return DomainJSONResponse(
+                content={"Message": "Test not found"}, status_code=404
+            )
         serialized_content = {"message": "Test deleted successfully"}
-        return JSONResponse(content=serialized_content, status_code=200)
+        return DomainJSONResponse(content=serialized_content, status_code=200)
+
+
+@View(router, path="/tests/export")
+class TestExportView:
+    async def get(
+        self,
+        format: TExportFormat,
+        service: ServiceShowTest = Depends(ServiceShowTest),
+        if_none_match: str | None = Header(None),
+        filters: TestFilterDTO = Depends(),
+    ) -> Response:
+        """
+        Export the history of the tests in a columnar format.
+
+        Args:
+            format (TExportFormat): "arrow" for an Arrow IPC stream,
+                "parquet" for a Parquet file.
+            service (ServiceShowTest): An instance of ServiceShowTest.
+            if_none_match (str | None): The ETags of the tests the client has.
+            filters (TestFilterDTO): The filters of the tests, as for the
+                list of tests.
+
+        Returns:
+            Response: A response streaming all the matching tests, with the
+                ETag of the tests version, an empty 304 response if it
+                matches If-None-Match, or a 501 response if the format
+                is not available.
+        """
+        etag = make_etag("tests", await service.tests_version())
+        if etag_matches(if_none_match, etag):
+            return not_modified(etag)
+        try:
+            response = stream_export(
+                service.export_tests(filters), format, "tests"
+            )
+        except ExportUnavailableError as error:
+            return DomainJSONResponse(
+                content={"Message": str(error)}, status_code=501
+            )
+        response.headers["ETag"] = etag
+        return response
+
+
+@View(router, path="/tests/batch")
+class TestBatchView:
+    async def post(
+        self,
+        test_dtos: list[TestRegistrationDTO],
+        service: ServiceCreateTest = Depends(ServiceCreateTest),
+    ) -> DomainJSONResponse:
+        """
+        Create several tests at once.
+
+        Args:
+            test_dtos (list[TestRegistrationDTO]):
+                The registration data of the tests.
+            service (ServiceCreateTest):
+                The service used to create the tests.
+
+        Returns:
+            DomainJSONResponse:
+                The per-item results, in the order of the request, with a 201
+                status code if every test was created and 207 otherwise.
+        """
+        tests = await service.create_tests(test_dtos)
+        content = [
+            {"status": 201, "test": test}
+            if test is not None
+            else {"status": 404, "Message": "Part not found"}
+            for test in tests
+        ]
+        status_code = 201 if None not in tests else 207
+        return DomainJSONResponse(content=content, status_code=status_code)
@@ -14,3 +14,35 @@ class NoPartFound(Exception):
 
     def __init__(self, message: str = "No part found") -> None:
         super().__init__(message)
+
+
+class SchemaVersionError(Exception):
+    """
+    Exception raised when the database schema is not at the expected revision.
+    """
+
+    def __init__(
+        self, message: str = "Unexpected database schema revision"
+    ) -> None:
+        super().__init__(message)
+
+
+class InvalidCursorError(Exception):
+    """
+    Exception raised when a pagination cursor cannot be decoded.
+    """
+
+    def __init__(self, message: str = "Invalid cursor") -> None:
+        super().__init__(message)
+
+
+class ExportUnavailableError(Exception):
+    """
+    Exception raised when the optional dependencies of an export format
+    are not installed.
+    """
+
+    def __init__(
+        self, message: str = "The export format is not available"
+    ) -> None:
+        super().__init__(message)
@@ -0,0 +1,220 @@
+"""
+Module for the export of the tests to columnar formats.
+
+The rows fetched from the server-side cursor are converted, column by
+column, to Arrow record batches, without building domains, and written as
+an Arrow IPC stream or as a Parquet file while they are fetched. The data
+documents are kept as a column of JSON strings. The conversion, the encoding
+and the compression run in worker threads, so that an export does not block
+the event loop.
+
+pyarrow is an optional dependency, installed with the "export" extra.
+"""
+import asyncio
+import io
+from functools import cache
+from typing import Any, AsyncIterator, Literal, Sequence
+
+from fastapi.responses import StreamingResponse
+
+from app.exceptions import ExportUnavailableError
+
+try:
+    import pyarrow as pa
+    import pyarrow.ipc as ipc
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = ipc = pq = None
+
+TExportFormat = Literal["arrow", "parquet"]
+
+MEDIA_TYPES: dict[TExportFormat, str] = {
+    "arrow": "application/vnd.apache.arrow.stream",
+    "parquet": "application/vnd.apache.parquet",
+}
+
+EXTENSIONS: dict[TExportFormat, str] = {
+    "arrow": "arrows",
+    "parquet": "parquet",
+}
+
+COLUMNS = ("id", "part_id", "timestamp", "successful", "data")
+
+# Number of rows buffered into each row group of a Parquet file.
+ROW_GROUP_SIZE = 64 * 1024
+
+Rows = Sequence[Sequence[Any]]
+
+
+def available() -> bool:
+    """
+    Tells whether pyarrow is installed.
+
+    Returns:
+        bool: True if the tests can be exported.
+    """
+    return pa is not None
+
+
+@cache
+def schema() -> Any:
+    """
+    Returns the Arrow schema of the exported tests.
+
+    Returns:
+        pyarrow.Schema: The ids as strings, the timestamps in microseconds
+            and the data documents as JSON strings.
+    """
+    return pa.schema(
+        [
+            pa.field("id", pa.string(), nullable=False),
+            pa.field("part_id", pa.string(), nullable=False),
+            pa.field("timestamp", pa.timestamp("us"), nullable=False),
+            pa.field("successful", pa.bool_(), nullable=False),
+            pa.field("data", pa.string()),
+        ]
+    )
+
+
+def record_batch(rows: Rows) -> Any:
+    """
+    Builds a record batch from rows holding the COLUMNS, in order, with
+    the data documents as JSON text.
+
+    The part ids, shared by many tests, are converted to strings once.
+
+    Args:
+        rows (Rows): The rows of the tests.
+
+    Returns:
+        pyarrow.RecordBatch: The record batch of the tests.
+    """
+    ids, part_ids, timestamps, successful, data = (
+        zip(*rows) if rows else ((),) * len(COLUMNS)
+    )
+    part_names = {part_id: str(part_id) for part_id in set(part_ids)}
+    return pa.RecordBatch.from_arrays(
+        [
+            pa.array([str(id) for id in ids], pa.string()),
+            pa.array([part_names[id] for id in part_ids], pa.string()),
+            pa.array(timestamps, pa.timestamp("us")),
+            pa.array(successful, pa.bool_()),
+            pa.array(data, pa.string()),
+        ],
+        schema=schema(),
+    )
+
+
+class _Sink(io.RawIOBase):
+    """
+    A write-only file keeping what is written until it is drained.
+
+    Its position is the number of bytes written since it was opened,
+    which the Parquet writer records in the footer.
+    """
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._chunks: list[bytes] = []
+        self._position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data: Any) -> int:
+        chunk = bytes(data)
+        self._chunks.append(chunk)
+        self._position += len(chunk)
+        return len(chunk)
+
+    def tell(self) -> int:
+        return self._position
+
+    def drain(self) -> bytes:
+        """
+        Returns the bytes written since the last drain.
+        """
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def _write_batch(writer: Any, rows: Rows) -> None:
+    writer.write_batch(record_batch(rows))
+
+
+def _write_row_group(writer: Any, batches: list[Any]) -> None:
+    writer.write_table(pa.Table.from_batches(batches))
+
+
+async def _iter_arrow(batches: AsyncIterator[Rows]) -> AsyncIterator[bytes]:
+    """
+    Writes the rows as an Arrow IPC stream, one record batch per batch.
+    """
+    sink = _Sink()
+    with ipc.new_stream(sink, schema()) as writer:
+        async for rows in batches:
+            await asyncio.to_thread(_write_batch, writer, rows)
+            yield sink.drain()
+    yield sink.drain()
+
+
+async def _iter_parquet(
+    batches: AsyncIterator[Rows],
+) -> AsyncIterator[bytes]:
+    """
+    Writes the rows as a Parquet file, in row groups of about
+    ROW_GROUP_SIZE rows.
+    """
+    sink = _Sink()
+    buffered: list[Any] = []
+    size = 0
+    with pq.ParquetWriter(sink, schema()) as writer:
+        async for rows in batches:
+            buffered.append(await asyncio.to_thread(record_batch, rows))
+            size += len(rows)
+            if size >= ROW_GROUP_SIZE:
+                await asyncio.to_thread(_write_row_group, writer, buffered)
+                buffered = []
+                size = 0
+                yield sink.drain()
+        if buffered:
+            await asyncio.to_thread(_write_row_group, writer, buffered)
+    yield sink.drain()
+
+
+def stream_export(
+    batches: AsyncIterator[Rows], format: TExportFormat, name: str
+) -> StreamingResponse:
+    """
+    Creates a response streaming the rows in a columnar format as they
+    are fetched.
+
+    Args:
+        batches (AsyncIterator[Rows]): The batches of rows to send.
+        format (TExportFormat): "arrow" for an Arrow IPC stream,
+            "parquet" for a Parquet file.
+        name (str): The name of the attached file, without extension.
+
+    Raises:
+        ExportUnavailableError: If pyarrow is not installed.
+
+    Returns:
+        StreamingResponse: A chunked response of the exported rows.
+    """
+    if not available():
+        raise ExportUnavailableError(
+            "pyarrow is not installed, install the export extra"
+        )
+    chunks = (
+        _iter_arrow(batches) if format == "arrow" else _iter_parquet(batches)
+    )
+    return StreamingResponse(
+        chunks,
+        media_type=MEDIA_TYPES[format],
+        headers={
+            "Content-Disposition": (
+                f'attachment; filename="{name}.{EXTENSIONS[format]}"'
+            )
+        },
+    )
@@ -0,0 +1,541 @@
+"""
+Command-line bulk loader for historical test results.
+
+The files are split into chunks of lines which are parsed by a pool of
+processes. Every parsed chunk is streamed with a binary COPY into an unlogged
+staging table, then merged into the test table with a single set-based
+statement which drops the rows referencing unknown parts and adds the
+inserted rows to the test counters of their parts. The chunk is
+committed together with its merge, after which the checkpoint is advanced, so
+an interrupted load resumes after the last committed chunk. The records
+without an id get one derived from their file and line, so that a chunk
+replayed after a crash between its commit and the checkpoint inserts, and
+counts, nothing twice.
+
+Usage:
+    python -m app.loader results/*.csv --checkpoint load.checkpoint
+"""
+import argparse
+import asyncio
+import csv
+import json
+import os
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from functools import cached_property
+from logging import basicConfig, getLogger
+from pathlib import Path
+from typing import Any, Iterator, Literal, NamedTuple, Sequence
+from uuid import UUID, uuid4, uuid5
+
+from sqlalchemy import Column, MetaData, Table, exists, func, not_, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.schema import CreateTable, DropTable
+
+from app.config import Settings
+from app.database import DatabaseApp
+from app.models import Part, PartTestStats, Test
+from app.repository import upsert_part_test_stats
+from app.versions import bump_version_statement
+
+logger = getLogger(__name__)
+
+TFormat = Literal["csv", "ndjson"]
+TRow = tuple[UUID, UUID, datetime, bool, str | None]
+
+COLUMNS = ("id", "part_id", "timestamp", "successful", "data")
+FORMATS: dict[str, TFormat] = {
+    ".csv": "csv",
+    ".ndjson": "ndjson",
+    ".jsonl": "ndjson",
+}
+
+# Namespace of the ids derived for the records without one.
+ID_NAMESPACE = UUID("5c3e8f0a-9b1d-4e27-a6f4-d80c2b7e91a3")
+
+
+class Chunk(NamedTuple):
+    """
+    Represents consecutive lines of a file.
+
+    Attributes:
+        lines (list[str]): The lines of the chunk.
+        end (int): The number of data lines of the file read up to the
+            end of the chunk.
+    """
+
+    lines: list[str]
+    end: int
+
+    @property
+    def start(self) -> int:
+        """
+        Returns the number of the first data line of the chunk.
+        """
+        return self.end - len(self.lines) + 1
+
+
+class ParsedChunk(NamedTuple):
+    """
+    Represents the rows parsed from a chunk and the number of invalid lines.
+    """
+
+    rows: list[TRow]
+    invalid: int
+
+
+@dataclass
+class LoadReport:
+    """
+    Represents the outcome of a load.
+    """
+
+    loaded: int = 0
+    rejected: int = 0
+    elapsed: float = 0.0
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.loaded / self.elapsed if self.elapsed else 0.0
+
+
+def parse_bool(value: Any) -> bool:
+    """
+    Parses a boolean written as a JSON boolean or as text.
+
+    Raises:
+        ValueError: If the value is not a boolean.
+    """
+    if isinstance(value, bool):
+        return value
+    text = str(value).strip().lower()
+    if text in ("true", "t", "1", "yes"):
+        return True
+    if text in ("false", "f", "0", "no"):
+        return False
+    raise ValueError(f"Invalid boolean: {value!r}")
+
+
+def parse_timestamp(value: Any) -> datetime:
+    """
+    Parses an ISO 8601 timestamp into a naive UTC datetime.
+
+    Raises:
+        ValueError: If the value is not an ISO 8601 timestamp.
+    """
+    timestamp = datetime.fromisoformat(str(value))
+    if timestamp.tzinfo is not None:
+        timestamp = timestamp.astimezone(timezone.utc).replace(tzinfo=None)
+    return timestamp
+
+
+def line_id(source: str, line: int) -> UUID:
+    """
+    Derives the id of the record of a data line from the file and the line
+    number, the same whenever the line is loaded again.
+    """
+    return uuid5(ID_NAMESPACE, f"{source}:{line}")
+
+
+def parse_record(record: dict[str, Any], default_id: UUID) -> TRow:
+    """
+    Parses a record into a row of the test table.
+
+    The default id is used when the record does not provide one and the
+    data is kept as JSON text, as expected by the COPY protocol.
+
+    Raises:
+        KeyError, TypeError, ValueError: If the record is invalid.
+    """
+    if not isinstance(record, dict):
+        raise ValueError(f"Invalid record: {record!r}")
+    id = UUID(str(record["id"])) if record.get("id") else default_id
+    data = record.get("data")
+    if isinstance(data, str):
+        data = json.loads(data) if data else None
+    if data is not None and not isinstance(data, dict):
+        raise ValueError(f"Invalid data: {data!r}")
+    return (
+        id,
+        UUID(str(record["part_id"])),
+        parse_timestamp(record["timestamp"]),
+        parse_bool(record["successful"]),
+        json.dumps(data) if data is not None else None,
+    )
+
+
+def number_records(
+    format: TFormat, header: list[str] | None, lines: list[str], start: int
+) -> Iterator[tuple[int, str | dict[str, Any]]]:
+    """
+    Yields the records of the lines of a chunk with their line numbers,
+    skipping the blank lines.
+    """
+    if format == "csv":
+        reader = csv.DictReader(lines, fieldnames=header)
+        for record in reader:
+            yield start + reader.line_num - 1, record
+    else:
+        for offset, line in enumerate(lines):
+            if line.strip():
+                yield start + offset, line
+
+
+def parse_chunk(
+    format: TFormat,
+    header: list[str] | None,
+    lines: list[str],
+    source: str,
+    start: int,
+) -> ParsedChunk:
+    """
+    Parses the lines of a chunk. This runs in the worker processes.
+
+    Args:
+        format (TFormat): The format of the lines.
+        header (list[str] | None): The CSV field names.
+        lines (list[str]): The lines to parse.
+        source (str): The resolved path of the file, to derive the
+            missing ids from.
+        start (int): The number of the first data line of the chunk.
+
+    Returns:
+        ParsedChunk: The parsed rows and the number of invalid lines.
+    """
+    rows = []
+    invalid = 0
+    for line, record in number_records(format, header, lines, start):
+        try:
+            if isinstance(record, str):
+                record = json.loads(record)
+            rows.append(parse_record(record, line_id(source, line)))
+        except (KeyError, TypeError, ValueError):
+            invalid += 1
+    return ParsedChunk(rows=rows, invalid=invalid)
+
+
+def read_header(path: Path, format: TFormat) -> list[str] | None:
+    """
+    Reads the CSV field names of a file.
+    """
+    if format != "csv":
+        return None
+    with path.open(newline="") as file:
+        return next(csv.reader([file.readline()]))
+
+
+def read_chunks(
+    path: Path, format: TFormat, chunk_size: int, skip: int = 0
+) -> Iterator[Chunk]:
+    """
+    Reads the data lines of a file by chunks.
+
+    Each record must fit on a single line.
+
+    Args:
+        path (Path): The file to read.
+        format (TFormat): The format of the file.
+        chunk_size (int): The maximum number of lines of a chunk.
+        skip (int): The number of data lines already loaded.
+
+    Yields:
+        Chunk: The next chunk of lines.
+    """
+    with path.open(newline="") as file:
+        if format == "csv":
+            file.readline()
+        position = 0
+        lines: list[str] = []
+        for line in file:
+            position += 1
+            if position <= skip:
+                continue
+            lines.append(line)
+            if len(lines) == chunk_size:
+                yield Chunk(lines=lines, end=position)
+                lines = []
+        if lines:
+            yield Chunk(lines=lines, end=position)
+
+
+class Checkpoint:
+    """
+    Persists the number of data lines loaded from each file.
+
+    Params:
+    ----
+        path (Path | None): The checkpoint file, None to disable resuming.
+    """
+
+    def __init__(self, path: Path | None) -> None:
+        self._path = path
+        self._positions: dict[str, int] = {}
+        if path is not None and path.exists():
+            self._positions = json.loads(path.read_text())
+
+    def position(self, file: Path) -> int:
+        """
+        Returns the number of data lines already loaded from a file.
+        """
+        return self._positions.get(str(file.resolve()), 0)
+
+    def save(self, file: Path, position: int) -> None:
+        """
+        Atomically records the number of data lines loaded from a file.
+        """
+        self._positions[str(file.resolve())] = position
+        if self._path is None:
+            return
+        tmp_path = self._path.with_name(f"{self._path.name}.tmp")
+        tmp_path.write_text(json.dumps(self._positions))
+        os.replace(tmp_path, self._path)
+
+
+class BulkLoader:
+    """
+    Loads test results into the database with binary COPY.
+
+    Params:
+    ----
+        engine (AsyncEngine): The engine of the database.
+        chunk_size (int): The number of lines parsed and merged together.
+        workers (int): The number of parsing processes.
+        checkpoint (Checkpoint | None): The checkpoint to resume from.
+    """
+
+    def __init__(
+        self,
+        engine: AsyncEngine,
+        chunk_size: int = 50_000,
+        workers: int = os.cpu_count() or 1,
+        checkpoint: Checkpoint | None = None,
+    ) -> None:
+        self._engine = engine
+        self._chunk_size = chunk_size
+        self._workers = workers
+        self._checkpoint = checkpoint or Checkpoint(None)
+        self._staging = Table(
+            f"{Test.__tablename__}_staging_{uuid4().hex[:8]}",
+            MetaData(),
+            *(Column(name, Test.__table__.c[name].type) for name in COLUMNS),
+            prefixes=["UNLOGGED"],
+        )
+
+    async def load(
+        self, paths: Sequence[Path], format: TFormat | None = None
+    ) -> LoadReport:
+        """
+        Loads the given files.
+
+        Args:
+            paths (Sequence[Path]): The files to load.
+            format (TFormat | None): The format of the files,
+                inferred from their suffix when None.
+
+        Returns:
+            LoadReport: The number of loaded and rejected rows.
+        """
+        report = LoadReport()
+        start = time.perf_counter()
+        async with self._engine.connect() as conn:
+            raw_connection = await conn.get_raw_connection()
+            driver = raw_connection.driver_connection
+            assert driver
+            await driver.execute(self._compile(CreateTable(self._staging)))
+            try:
+                with ProcessPoolExecutor(self._workers) as pool:
+                    for path in paths:
+                        file_format = format or FORMATS[path.suffix.lower()]
+                        await self._load_file(
+                            driver, pool, path, file_format, report, start
+                        )
+            finally:
+                await driver.execute(self._compile(DropTable(self._staging)))
+        report.elapsed = time.perf_counter() - start
+        return report
+
+    async def _load_file(
+        self,
+        driver: Any,
+        pool: ProcessPoolExecutor,
+        path: Path,
+        format: TFormat,
+        report: LoadReport,
+        start: float,
+    ) -> None:
+        """
+        Parses the chunks of a file in the pool and loads them in order.
+        """
+        header = read_header(path, format)
+        chunks = read_chunks(
+            path, format, self._chunk_size, self._checkpoint.position(path)
+        )
+        source = str(path.resolve())
+        pending: deque[tuple[int, Future[ParsedChunk]]] = deque()
+        for chunk in chunks:
+            future = pool.submit(
+                parse_chunk, format, header, chunk.lines, source, chunk.start
+            )
+            pending.append((chunk.end, future))
+            if len(pending) > self._workers:
+                await self._load_chunk(driver, path, pending.popleft(), report)
+                self._log_progress(path, report, start)
+        while pending:
+            await self._load_chunk(driver, path, pending.popleft(), report)
+            self._log_progress(path, report, start)
+
+    async def _load_chunk(
+        self,
+        driver: Any,
+        path: Path,
+        parsed: tuple[int, Future[ParsedChunk]],
+        report: LoadReport,
+    ) -> None:
+        """
+        Copies a parsed chunk into the staging table, merges it into the
+        test table and advances the checkpoint once committed.
+        """
+        end, future = parsed
+        chunk = await asyncio.wrap_future(future)
+        async with driver.transaction():
+            await driver.copy_records_to_table(
+                self._staging.name, records=chunk.rows, columns=COLUMNS
+            )
+            loaded = await driver.fetchval(self._merge_statement)
+            await driver.execute(f"TRUNCATE {self._staging.name}")
+            await driver.execute(self._bump_statement)
+        report.loaded += loaded
+        report.rejected += chunk.invalid + len(chunk.rows) - loaded
+        self._checkpoint.save(path, end)
+
+    @cached_property
+    def _merge_statement(self) -> str:
+        """
+        Returns the statement inserting the staged rows whose part exists,
+        adding them to the test counters of their parts and returning the
+        number of inserted rows.
+
+        The primary key of the partitioned test table includes the
+        timestamp, so the repeated ids are dropped here: the rows whose id
+        is already in the table, as well as the repeated ids of the chunk.
+        The archive is not looked up and concurrent loads do not see each
+        other's rows, the repositories tolerate the ids they repeat.
+        """
+        staged = (
+            select(*self._staging.c)
+            .join(Part, Part.id == self._staging.c.part_id)
+            .where(~exists().where(Test.id == self._staging.c.id))
+            .distinct(self._staging.c.id)
+            .order_by(self._staging.c.id)
+        )
+        inserted = (
+            insert(Test)
+            .from_select(list(COLUMNS), staged)
+            .on_conflict_do_nothing()
+            .returning(Test.part_id, Test.successful)
+            .cte("inserted")
+        )
+        counts = (
+            select(
+                inserted.c.part_id,
+                func.count().filter(inserted.c.successful),
+                func.count().filter(not_(inserted.c.successful)),
+            )
+            .group_by(inserted.c.part_id)
+            .order_by(inserted.c.part_id)
+        )
+        stats = upsert_part_test_stats(
+            insert(PartTestStats).from_select(
+                ["id", "passed", "failed"], counts
+            )
+        ).cte("stats")
+        merge = select(func.count()).select_from(inserted).add_cte(stats)
+        return self._compile(merge)
+
+    @cached_property
+    def _bump_statement(self) -> str:
+        """
+        Returns the statement incrementing the version of the test table.
+        """
+        return str(
+            bump_version_statement(Test).compile(
+                dialect=self._engine.dialect,
+                compile_kwargs={"literal_binds": True},
+            )
+        )
+
+    def _compile(self, statement: Any) -> str:
+        return str(statement.compile(dialect=self._engine.dialect))
+
+    def _log_progress(
+        self, path: Path, report: LoadReport, start: float
+    ) -> None:
+        elapsed = time.perf_counter() - start
+        logger.info(
+            "%s: %d rows loaded, %d rejected, %.0f rows/s",
+            path,
+            report.loaded,
+            report.rejected,
+            report.loaded / elapsed if elapsed else 0.0,
+        )
+
+
+async def _run(args: argparse.Namespace) -> LoadReport:
+    """
+    Loads the files with the database of the application settings.
+    """
+    db_app = DatabaseApp()
+    db_app.init_app(Settings())
+    assert db_app.engine
+    try:
+        loader = BulkLoader(
+            db_app.engine,
+            chunk_size=args.chunk_size,
+            workers=args.workers,
+            checkpoint=Checkpoint(args.checkpoint),
+        )
+        return await loader.load(args.paths, args.format)
+    finally:
+        await db_app.engine.dispose()
+
+
+def main(argv: Sequence[str] | None = None) -> None:
+    """
+    Entry point of the command-line loader.
+    """
+    parser = argparse.ArgumentParser(
+        prog="python -m app.loader",
+        description="Bulk load historical test results.",
+    )
+    parser.add_argument("paths", nargs="+", type=Path)
+    parser.add_argument(
+        "--format",
+        choices=sorted(set(FORMATS.values())),
+        help="Format of the files, inferred from their suffix by default.",
+    )
+    parser.add_argument("--chunk-size", type=int, default=50_000)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument(
+        "--checkpoint",
+        type=Path,
+        help="File recording the progress, to resume an interrupted load.",
+    )
+    args = parser.parse_args(argv)
+
+    basicConfig(level="INFO")
+    report = asyncio.run(_run(args))
+    logger.info(
+        "Done: %d rows loaded, %d rejected in %.1fs (%.0f rows/s)",
+        report.loaded,
+        report.rejected,
+        report.elapsed,
+        report.rows_per_second,
+    )
+
+
+if __name__ == "__main__":
+    main()
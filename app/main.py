@@ -1,11 +1,23 @@
 import asyncio
 
 from fastapi import APIRouter, FastAPI
+from sqlalchemy import select
 
 from app.config import Settings
 from app.endpoints import router
-from app.managers import db_app
-from app.models import Base
+from app.managers import (
+    RECENT_WRITE_COOKIE,
+    db_app,
+    part_index,
+    response_cache,
+    test_archive,
+    track_writes,
+)
+from app.models import Part, Test
+from app.response_cache import ResponseCacheMiddleware
+from app.schema import check_schema
+
+API_PREFIX = "/api/v1"
 
 
 class FastApiManager:
@@ -26,10 +38,12 @@ class FastApiManager:
             version (str, optional): The version of the application. Defaults to "0.1.0".
         """
         self._settings = settings
+        self._monitors: list[asyncio.Task[None]] = []
 
         self._app = FastAPI(
             title=title, openapi_url=openapi_url, version=version
         )
+        self._app.add_event_handler("shutdown", self.shutdown)
 
     @property
     def app(self) -> FastAPI:
@@ -51,31 +65,101 @@ class FastApiManager:
         """
         await self._setup_apps()
         await self._setup_blueprint()
+        await self._setup_middlewares()
+
+    async def shutdown(self) -> None:
+        """
+        Stops the background monitors, then closes the connections to the
+        databases.
+        """
+        for monitor in self._monitors:
+            monitor.cancel()
+        await asyncio.gather(*self._monitors, return_exceptions=True)
+        self._monitors.clear()
+        await db_app.dispose()
 
     async def _setup_blueprint(self) -> None:
         """
         Sets up the API blueprint with the necessary routers.
         """
-        root_router = APIRouter(prefix="/api/v1")
+        root_router = APIRouter(prefix=API_PREFIX)
         root_router.include_router(router)
 
         self.app.include_router(root_router)
 
+    async def _setup_middlewares(self) -> None:
+        """
+        Sets up the middlewares of the application.
+        """
+        self.app.middleware("http")(track_writes)
+        self.app.add_middleware(
+            ResponseCacheMiddleware,
+            cache=response_cache,
+            routes={f"{API_PREFIX}/parts": Part, f"{API_PREFIX}/tests": Test},
+            bypass_cookies=(RECENT_WRITE_COOKIE,),
+        )
+
     async def _setup_apps(self) -> None:
         """
         Set up the applications.
         """
         await self._setup_db()
+        await self._setup_archive()
+        await self._setup_replicas()
+        await self._setup_part_index()
+        response_cache.init_app(self._settings)
 
     async def _setup_db(self) -> None:
         """
-        Sets up the database connection and initializes the database schema.
+        Sets up the database connection and checks that the database schema
+        was migrated to the expected revision.
         """
         db_app.init_app(self._settings)
         assert db_app.engine
 
-        async with db_app.engine.begin() as conn:
-            await conn.run_sync(Base.metadata.create_all)
+        await check_schema(db_app.engine, self._settings.SCHEMA_CHECK)
+
+    async def _setup_archive(self) -> None:
+        """
+        Loads the archived tests and keeps archiving the old tests,
+        unless TEST_ARCHIVE_INTERVAL is 0.
+        """
+        test_archive.init_app(self._settings)
+        if not test_archive.enabled:
+            return
+        assert db_app.engine
+
+        await test_archive.load(db_app.engine)
+        if self._settings.TEST_ARCHIVE_INTERVAL <= 0:
+            return
+        self._monitors.append(
+            asyncio.create_task(test_archive.monitor(db_app.engine))
+        )
+
+    async def _setup_replicas(self) -> None:
+        """
+        Checks the read replicas and keeps monitoring their lag.
+        """
+        if not db_app.replicas:
+            return
+        await db_app.check_replicas()
+        self._monitors.append(asyncio.create_task(db_app.monitor_replicas()))
+
+    async def _setup_part_index(self) -> None:
+        """
+        Loads the ids of the last modified parts in the part index.
+        """
+        part_index.init_app(self._settings)
+        assert db_app.engine
+
+        async with db_app.engine.connect() as conn:
+            ids = await conn.stream_scalars(
+                select(Part.id)
+                .order_by(Part.modified_timestamp.desc())
+                .limit(part_index.cache_size)
+                .execution_options(yield_per=10_000)
+            )
+            await part_index.load(ids)
 
 
 def create_app() -> FastAPI:
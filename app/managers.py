@@ -1,11 +1,26 @@
 """
 Module for database managers.
 """
-from typing import AsyncGenerator
+from math import ceil
+from typing import AsyncGenerator, Awaitable, Callable
 
+from fastapi import Request, Response
+
+from app.archive import TestArchive
 from app.database import Database, DatabaseApp
+from app.part_index import PartIndex
+from app.response_cache import ResponseCache
 
 db_app = DatabaseApp()
+part_index = PartIndex()
+response_cache = ResponseCache()
+test_archive = TestArchive(response_cache=response_cache)
+
+# Cookie of the clients that wrote recently and read from the primary.
+RECENT_WRITE_COOKIE = "recent_write"
+
+# Methods that do not write.
+SAFE_METHODS = frozenset({"GET", "HEAD", "OPTIONS"})
 
 
 async def get_db() -> AsyncGenerator[Database, None]:
@@ -24,3 +39,55 @@ async def get_db() -> AsyncGenerator[Database, None]:
         yield db
     finally:
         await db.teardown_session()
+
+
+async def get_read_db(request: Request) -> AsyncGenerator[Database, None]:
+    """
+    Returns an asynchronous generator that yields a read-only Database object.
+
+    The session is bound to a replica in rotation, or to the primary when
+    the client wrote recently, so that it reads its own writes.
+
+    Yields:
+        Database: A Database object.
+    """
+    if RECENT_WRITE_COOKIE in request.cookies:
+        session_maker = db_app.session_maker
+    else:
+        session_maker = db_app.read_session_maker()
+    db = Database(session_maker())
+    try:
+        yield db
+    finally:
+        await db.teardown_session()
+
+
+async def track_writes(
+    request: Request, call_next: Callable[[Request], Awaitable[Response]]
+) -> Response:
+    """
+    Middleware marking the clients of successful writes, when reads may
+    go to replicas.
+
+    The cookie expires once the replicas in rotation show the write.
+
+    Args:
+        request (Request): The request.
+        call_next (Callable[[Request], Awaitable[Response]]): The endpoint.
+
+    Returns:
+        Response: The response of the endpoint.
+    """
+    response = await call_next(request)
+    if (
+        db_app.replicas
+        and request.method not in SAFE_METHODS
+        and response.status_code < 400
+    ):
+        response.set_cookie(
+            RECENT_WRITE_COOKIE,
+            "1",
+            max_age=ceil(db_app.read_your_writes_window),
+            httponly=True,
+        )
+    return response
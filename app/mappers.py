@@ -2,7 +2,8 @@
 Module for Mappers between entity and domain objects.
 """
 from abc import ABC, abstractmethod
-from typing import Generic, TypeVar
+from typing import Any, ClassVar, Generic, Iterable, Sequence, TypeVar
+from uuid import UUID
 
 from app.domains import BaseDomain, PartDomain, TestDomain
 from app.models import Base, Part, Test
@@ -14,20 +15,75 @@ TDomain = TypeVar("TDomain", bound=BaseDomain)
 class BaseEntityDomainMapper(ABC, Generic[TEntity, TDomain]):
     """
     Abstract base class for entity-domain mappers.
+
+    Attributes:
+        columns (tuple[str, ...]): The columns of the rows mapped by
+            row_to_domain, in order.
     """
 
+    columns: ClassVar[tuple[str, ...]]
+
     @abstractmethod
     def to_domain(self, entity: TEntity) -> TDomain:
         """
         Not implemented yet
         """
 
+    def to_domains(self, entities: Iterable[TEntity]) -> list[TDomain]:
+        """
+        Converts the entities of a result set to domain objects.
+
+        Args:
+            entities (Iterable[TEntity]): The entity objects to be converted.
+
+        Returns:
+            list[TDomain]: The converted domain objects.
+        """
+        return [self.to_domain(entity) for entity in entities]
+
+    @abstractmethod
+    def row_to_domain(self, row: Sequence[Any]) -> TDomain:
+        """
+        Not implemented yet
+        """
+
+    def rows_to_domains(self, rows: Iterable[Sequence[Any]]) -> list[TDomain]:
+        """
+        Converts the rows of a result set to domain objects.
+
+        Args:
+            rows (Iterable[Sequence[Any]]): The values of the columns.
+
+        Returns:
+            list[TDomain]: The converted domain objects.
+        """
+        return [self.row_to_domain(row) for row in rows]
+
     @abstractmethod
     def to_entity(self, domain: TDomain) -> TEntity:
         """
         Not implemented yet
         """
 
+    @abstractmethod
+    def to_row(self, domain: TDomain) -> tuple[Any, ...]:
+        """
+        Not implemented yet
+        """
+
+    def to_rows(self, domains: Iterable[TDomain]) -> list[tuple[Any, ...]]:
+        """
+        Converts domain objects to the values of the columns, for an
+        insert of many rows without entities.
+
+        Args:
+            domains (Iterable[TDomain]): The domain objects to be converted.
+
+        Returns:
+            list[tuple[Any, ...]]: The values of the columns, in order.
+        """
+        return [self.to_row(domain) for domain in domains]
+
     @abstractmethod
     def map_to_record(self, domain: TDomain, record: TEntity) -> None:
         """
@@ -40,6 +96,8 @@ class PartEntityDomainMapper(BaseEntityDomainMapper[Part, PartDomain]):
     Mapper for Part entity-domain.
     """
 
+    columns = ("id", "name", "modified_timestamp")
+
     def to_domain(self, entity: Part) -> PartDomain:
         """
         Converts an entity object to a domain object.
@@ -56,6 +114,19 @@ class PartEntityDomainMapper(BaseEntityDomainMapper[Part, PartDomain]):
             modified_timestamp=entity.modified_timestamp,
         )
 
+    def row_to_domain(self, row: Sequence[Any]) -> PartDomain:
+        """
+        Converts a row of the columns to a domain object.
+
+        Args:
+            row (Sequence[Any]): The values of the columns.
+
+        Returns:
+            PartDomain: The converted domain object.
+        """
+        id, name, modified_timestamp = row
+        return PartDomain(id, name, modified_timestamp)
+
     def to_entity(self, domain: PartDomain) -> Part:
         """
         Converts a PartDomain object to a Part object.
@@ -72,6 +143,18 @@ class PartEntityDomainMapper(BaseEntityDomainMapper[Part, PartDomain]):
             modified_timestamp=domain.modified_timestamp,
         )
 
+    def to_row(self, domain: PartDomain) -> tuple[Any, ...]:
+        """
+        Converts a PartDomain object to the values of the columns.
+
+        Args:
+            domain (PartDomain): The PartDomain object to be converted.
+
+        Returns:
+            tuple[Any, ...]: The values of the columns, in order.
+        """
+        return domain.id, domain.name, domain.modified_timestamp
+
     def map_to_record(self, domain: PartDomain, record: Part) -> None:
         """
         Maps the attributes from the PartDomain object to the Part object.
@@ -95,6 +178,8 @@ class TestEntityDomainMapper(BaseEntityDomainMapper[Test, TestDomain]):
     Mapper for Test entity-domain.
     """
 
+    columns = ("id", "part_id", "timestamp", "successful", "data")
+
     def to_domain(self, entity: Test) -> TestDomain:
         """
         Converts an entity object to a domain object.
@@ -113,6 +198,74 @@ class TestEntityDomainMapper(BaseEntityDomainMapper[Test, TestDomain]):
             timestamp=entity.timestamp,
         )
 
+    def to_domains(self, entities: Iterable[Test]) -> list[TestDomain]:
+        """
+        Converts the entities of a result set to domain objects.
+
+        The tests of a result set share a few parts: every domain object
+        references the first UUID read for its part id, so that the
+        duplicates read by the driver are freed with the entities. The
+        UUIDs are looked up by their int, whose hash is computed in C.
+
+        Args:
+            entities (Iterable[Test]): The entity objects to be converted.
+
+        Returns:
+            list[TestDomain]: The converted domain objects.
+        """
+        part_ids: dict[int, UUID] = {}
+        domains = []
+        for entity in entities:
+            part_id = entity.part_id
+            domains.append(
+                TestDomain(
+                    id=entity.id,
+                    part_id=part_ids.setdefault(part_id.int, part_id),
+                    data=entity.data,
+                    successful=entity.successful,
+                    timestamp=entity.timestamp,
+                )
+            )
+        return domains
+
+    def row_to_domain(self, row: Sequence[Any]) -> TestDomain:
+        """
+        Converts a row of the columns to a domain object.
+
+        Args:
+            row (Sequence[Any]): The values of the columns.
+
+        Returns:
+            TestDomain: The converted domain object.
+        """
+        id, part_id, timestamp, successful, data = row
+        return TestDomain(id, part_id, timestamp, successful, data)
+
+    def rows_to_domains(
+        self, rows: Iterable[Sequence[Any]]
+    ) -> list[TestDomain]:
+        """
+        Converts the rows of a result set to domain objects, sharing the
+        part ids as to_domains does.
+
+        Args:
+            rows (Iterable[Sequence[Any]]): The values of the columns.
+
+        Returns:
+            list[TestDomain]: The converted domain objects.
+        """
+        part_ids: dict[int, UUID] = {}
+        return [
+            TestDomain(
+                id,
+                part_ids.setdefault(part_id.int, part_id),
+                timestamp,
+                successful,
+                data,
+            )
+            for id, part_id, timestamp, successful, data in rows
+        ]
+
     def to_entity(self, domain: TestDomain) -> Test:
         """
         Converts a TestDomain object to a Test object.
@@ -131,6 +284,24 @@ class TestEntityDomainMapper(BaseEntityDomainMapper[Test, TestDomain]):
             timestamp=domain.timestamp,
         )
 
+    def to_row(self, domain: TestDomain) -> tuple[Any, ...]:
+        """
+        Converts a TestDomain object to the values of the columns.
+
+        Args:
+            domain (TestDomain): The TestDomain object to be converted.
+
+        Returns:
+            tuple[Any, ...]: The values of the columns, in order.
+        """
+        return (
+            domain.id,
+            domain.part_id,
+            domain.timestamp,
+            domain.successful,
+            domain.data,
+        )
+
     def map_to_record(self, domain: TestDomain, record: Test) -> None:
         """
         Maps the attributes from a TestDomain object to a Test object.
@@ -2,9 +2,22 @@ from datetime import datetime
 from typing import Any
 from uuid import UUID
 
-from sqlalchemy import JSON
 from sqlalchemy import UUID as UUID_
-from sqlalchemy import Boolean, DateTime, ForeignKey, String
+from sqlalchemy import (
+    BigInteger,
+    Boolean,
+    Column,
+    DateTime,
+    ForeignKey,
+    Index,
+    SmallInteger,
+    String,
+    Table,
+    event,
+    text,
+)
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.engine import Connection
 from sqlalchemy.orm import (
     DeclarativeBase,
     Mapped,
@@ -57,6 +70,10 @@ class Part(Base):
         The timestamp when Part was last modified
     """
 
+    __table_args__ = (
+        Index("ix_part_modified_timestamp_id", "modified_timestamp", "id"),
+    )
+
     name: Mapped[str] = mapped_column(String)
     modified_timestamp: Mapped[datetime] = mapped_column(
         DateTime(timezone=False)
@@ -87,14 +104,43 @@ class Test(Base):
             The result of the Test
         data: dict[str, str]
             Additional json data of the Test
+
+    The table is partitioned by month on the timestamp, which is therefore
+    part of the primary key. The rows outside of the monthly partitions
+    go to the default partition, see app.partitions.
+
+    The ids are therefore not unique in the database. The services
+    generate random ids and the bulk loader skips the ids already in the
+    table, but concurrent loads, or the load of an archived id, may repeat
+    one: the repositories then address the latest row of the id.
     """
 
+    __table_args__ = (
+        Index("ix_test_timestamp_id", "timestamp", "id"),
+        Index("ix_test_part_id_timestamp_id", "part_id", "timestamp", "id"),
+        Index(
+            "ix_test_failed_timestamp_id",
+            "timestamp",
+            "id",
+            postgresql_where=text("NOT successful"),
+        ),
+        Index(
+            "ix_test_data",
+            "data",
+            postgresql_using="gin",
+            postgresql_ops={"data": "jsonb_path_ops"},
+        ),
+        {"postgresql_partition_by": "RANGE (timestamp)"},
+    )
+
     part_id: Mapped[UUID] = mapped_column(
         UUID_(as_uuid=True), ForeignKey(Part.id, ondelete="CASCADE")
     )
-    timestamp: Mapped[datetime] = mapped_column(DateTime(timezone=False))
+    timestamp: Mapped[datetime] = mapped_column(
+        DateTime(timezone=False), primary_key=True
+    )
     successful: Mapped[bool] = mapped_column(Boolean)
-    data: Mapped[dict[Any, Any] | None] = mapped_column(JSON, nullable=True)
+    data: Mapped[dict[Any, Any] | None] = mapped_column(JSONB, nullable=True)
 
     def __init__(
         self,
@@ -109,3 +155,56 @@ class Test(Base):
         self.timestamp = timestamp
         self.successful = successful
         self.data = data
+
+
+@event.listens_for(Test.__table__, "after_create")
+def _create_default_partition(
+    target: Table, connection: Connection, **kwargs: Any
+) -> None:
+    """
+    Creates the default partition of the test table with the table,
+    the monthly partitions are created by app.partitions.
+    """
+    connection.execute(
+        text(
+            f"CREATE TABLE {target.name}_default "
+            f"PARTITION OF {target.name} DEFAULT"
+        )
+    )
+
+
+class PartTestStats(Base):
+    """
+    A class describing the test counters of a Part
+
+    Attributes
+    ----------
+        id: UUID
+            id of the Part
+        passed: int
+            The number of successful Tests of the Part
+        failed: int
+            The number of failed Tests of the Part
+    """
+
+    __tablename__ = "part_test_stats"
+
+    id: Mapped[UUID] = mapped_column(
+        UUID_(as_uuid=True),
+        ForeignKey(Part.id, ondelete="CASCADE"),
+        primary_key=True,
+    )
+    passed: Mapped[int] = mapped_column(BigInteger, default=0)
+    failed: Mapped[int] = mapped_column(BigInteger, default=0)
+
+
+# Version of every entity table, incremented by each unit of work writing
+# to it, so that the responses built from a table can be tagged cheaply.
+# A version is the sum of the counters of its shards, see app.versions.
+entity_version = Table(
+    "entity_version",
+    Base.metadata,
+    Column("name", String, primary_key=True),
+    Column("shard", SmallInteger, primary_key=True),
+    Column("version", BigInteger, nullable=False),
+)
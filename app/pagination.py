@@ -0,0 +1,70 @@
+"""
+Module for keyset (cursor) pagination.
+"""
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from datetime import datetime
+from typing import Generic, NamedTuple, TypeVar
+from uuid import UUID
+
+from app.domains import BaseDomain
+from app.exceptions import InvalidCursorError
+
+TDomain = TypeVar("TDomain", bound=BaseDomain)
+
+
+class Cursor(NamedTuple):
+    """
+    Represents the position of the last row of a page in the
+    (key, id) ordering.
+    """
+
+    key: datetime
+    id: UUID
+
+
+class Page(NamedTuple, Generic[TDomain]):
+    """
+    Represents a page of domains and the cursor of the next page.
+    """
+
+    items: list[TDomain]
+    next_cursor: Cursor | None
+
+
+def encode_cursor(cursor: Cursor) -> str:
+    """
+    Encodes a cursor into an opaque url-safe token.
+
+    Args:
+        cursor (Cursor): The cursor to encode.
+
+    Returns:
+        str: The opaque token.
+    """
+    payload = json.dumps([cursor.key.isoformat(), str(cursor.id)])
+    return urlsafe_b64encode(payload.encode()).decode()
+
+
+def decode_cursor(token: str) -> Cursor | None:
+    """
+    Decodes an opaque token into a cursor.
+
+    An empty token designates the first page.
+
+    Args:
+        token (str): The token to decode.
+
+    Raises:
+        InvalidCursorError: If the token is not a valid cursor.
+
+    Returns:
+        Cursor | None: The decoded cursor, None for the first page.
+    """
+    if not token:
+        return None
+    try:
+        key, id = json.loads(urlsafe_b64decode(token.encode()))
+        return Cursor(key=datetime.fromisoformat(key), id=UUID(id))
+    except (ValueError, TypeError):
+        raise InvalidCursorError()
@@ -0,0 +1,118 @@
+"""
+Module for the in-process index of the existing parts.
+"""
+from collections import OrderedDict
+from typing import AsyncIterable
+from uuid import UUID
+
+from app.config import Settings
+
+
+class PartIndex:
+    """
+    Tells whether a part exists without querying the database.
+
+    The ids of the recently used parts are kept in a bounded LRU cache,
+    warmed at startup with the last modified parts. A cached part is known
+    to exist. Any other part may have been created by another process or
+    by other means, so the answer is unknown and the database has to be
+    queried.
+
+    A part deleted by another process stays cached, the foreign key of the
+    tests still rejects it.
+    """
+
+    def __init__(self, cache_size: int = 100_000) -> None:
+        self._cache_size = cache_size
+        self._cache: OrderedDict[UUID, None] = OrderedDict()
+        self._loaded = False
+
+    @property
+    def loaded(self) -> bool:
+        return self._loaded
+
+    @property
+    def cache_size(self) -> int:
+        return self._cache_size
+
+    def init_app(self, settings: Settings) -> None:
+        """
+        Configures the index and forgets the known parts.
+
+        Args:
+            settings (Settings): The settings sizing the index.
+        """
+        self._cache_size = settings.PART_INDEX_CACHE_SIZE
+        self.clear()
+
+    def clear(self) -> None:
+        """
+        Forgets the known parts, until the index is loaded again.
+        """
+        self._cache.clear()
+        self._loaded = False
+
+    async def load(self, ids: AsyncIterable[UUID]) -> None:
+        """
+        Loads the ids of the last used parts.
+
+        Args:
+            ids (AsyncIterable[UUID]):
+                The ids of the parts, from the most to the least recently
+                used. Only the first cache_size ids are kept.
+        """
+        self._cache.clear()
+        async for id in ids:
+            if len(self._cache) >= self._cache_size:
+                break
+            self._cache[id] = None
+            self._cache.move_to_end(id, last=False)
+        self._loaded = True
+
+    def contains(self, id: UUID) -> bool | None:
+        """
+        Tells whether a part exists.
+
+        Args:
+            id (UUID): The id of the part.
+
+        Returns:
+            bool | None: True if the part is known to exist, None if the
+                database has to be queried.
+        """
+        if id in self._cache:
+            self._cache.move_to_end(id)
+            return True
+        return None
+
+    def add(self, id: UUID) -> None:
+        """
+        Adds a created part.
+
+        Args:
+            id (UUID): The id of the part.
+        """
+        self.remember(id)
+
+    def remember(self, id: UUID) -> None:
+        """
+        Caches the id of a part known to exist.
+
+        Args:
+            id (UUID): The id of the part.
+        """
+        self._cache[id] = None
+        self._cache.move_to_end(id)
+        if len(self._cache) > self._cache_size:
+            self._cache.popitem(last=False)
+
+    def discard(self, id: UUID) -> None:
+        """
+        Removes a deleted part.
+
+        The id is looked up in the database from now on.
+
+        Args:
+            id (UUID): The id of the part.
+        """
+        self._cache.pop(id, None)
@@ -0,0 +1,425 @@
+"""
+Module for the maintenance of the monthly partitions of the test table.
+
+The test table is partitioned by month on the timestamp, see app.models.
+The partitions of the current month and of the next months are created
+ahead of time, the rows outside of the monthly partitions, e.g. loaded
+from history, go to the default partition until their month is split off.
+The partitions older than the retention are detached, or dropped, so that
+expiring tests never deletes rows one by one. Their tests are subtracted
+from the test counters of the parts and the version of the test table is
+bumped in the same transaction.
+
+The maintenance is a single job, run once per deployment and then
+periodically, e.g. from cron, rather than by the instances of the
+application: it takes ACCESS EXCLUSIVE locks on the test table.
+
+    python -m app.partitions
+"""
+import argparse
+import asyncio
+import re
+from datetime import datetime
+from logging import basicConfig, getLogger
+from typing import Callable, Collection, Iterable, NamedTuple, Sequence
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine
+
+from app.config import Settings
+from app.database import DatabaseApp
+from app.models import PartTestStats, Test
+from app.versions import bump_version_statement
+
+logger = getLogger(__name__)
+
+TABLE = Test.__tablename__
+DEFAULT_PARTITION = f"{TABLE}_default"
+
+# Names of the partitions of the test table, attached or detached.
+PARTITION_NAME = re.compile(rf"{TABLE}_(default|y\d{{4}}m\d{{2}})")
+
+PARTITIONS_QUERY = text("""
+    SELECT child.relname, pg_get_expr(child.relpartbound, child.oid)
+    FROM pg_inherits
+    JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+    WHERE pg_inherits.inhparent = CAST(:table AS regclass)
+    """)
+
+BOUNDS = re.compile(r"FROM \('([^']+)'\) TO \('([^']+)'\)")
+
+STATS = PartTestStats.__tablename__
+
+
+class Partition(NamedTuple):
+    """
+    Represents a monthly partition of the test table.
+
+    Attributes:
+        name (str): The name of the partition.
+        start (datetime): The first month of the partition.
+        end (datetime): The first month after the partition.
+    """
+
+    name: str
+    start: datetime
+    end: datetime
+
+
+def month_start(timestamp: datetime) -> datetime:
+    """
+    Returns the start of the month of a timestamp.
+
+    Args:
+        timestamp (datetime): The timestamp.
+
+    Returns:
+        datetime: The first instant of its month.
+    """
+    return datetime(timestamp.year, timestamp.month, 1)
+
+
+def add_months(month: datetime, months: int) -> datetime:
+    """
+    Returns the start of the month a number of months after another.
+
+    Args:
+        month (datetime): The start of a month.
+        months (int): The number of months, negative to go back.
+
+    Returns:
+        datetime: The start of the shifted month.
+    """
+    year, index = divmod(month.year * 12 + month.month - 1 + months, 12)
+    return datetime(year, index + 1, 1)
+
+
+def partition_of(month: datetime) -> Partition:
+    """
+    Returns the partition holding the tests of a month.
+
+    Args:
+        month (datetime): The start of the month.
+
+    Returns:
+        Partition: The partition of the month.
+    """
+    return Partition(
+        f"{TABLE}_y{month:%Y}m{month:%m}", month, add_months(month, 1)
+    )
+
+
+def include_name(name: str | None, type_: str, parent_names: object) -> bool:
+    """
+    Tells alembic to ignore the partitions of the test table,
+    which are managed by the application rather than by the migrations.
+    """
+    return not (
+        type_ == "table"
+        and name is not None
+        and PARTITION_NAME.fullmatch(name)
+    )
+
+
+class PartitionManager:
+    """
+    Creates the monthly partitions of the test table ahead of time,
+    splits the months of the rows of the default partition off and
+    detaches, or drops, the partitions older than the retention.
+
+    The maintenance runs in a single transaction holding an advisory
+    lock, a maintenance started while another one runs is skipped.
+    The instances of the application see the version of the test table
+    bumped by the expiry.
+    """
+
+    def __init__(
+        self,
+        months_ahead: int = 3,
+        retention_months: int = 0,
+        expired: str = "detach",
+        clock: Callable[[], datetime] = datetime.utcnow,
+    ) -> None:
+        self._months_ahead = months_ahead
+        self._retention_months = retention_months
+        self._expired = expired
+        self._clock = clock
+
+    def init_app(self, settings: Settings) -> None:
+        """
+        Configures the manager.
+
+        Args:
+            settings (Settings): The settings of the partitions.
+        """
+        self._months_ahead = settings.TEST_PARTITIONS_AHEAD
+        self._retention_months = settings.TEST_RETENTION_MONTHS
+        self._expired = settings.TEST_EXPIRED_PARTITIONS
+
+    async def maintain(self, engine: AsyncEngine) -> bool:
+        """
+        Creates the missing partitions and expires the old ones.
+
+        Args:
+            engine (AsyncEngine): The engine of the database.
+
+        Returns:
+            bool: False if another maintenance was running.
+        """
+        current = month_start(self._clock())
+        cutoff = (
+            add_months(current, -self._retention_months)
+            if self._retention_months > 0
+            else None
+        )
+        async with engine.begin() as conn:
+            locked = await conn.scalar(
+                text("SELECT pg_try_advisory_xact_lock(hashtext(:name))"),
+                {"name": __name__},
+            )
+            if not locked:
+                logger.info("The test partitions are already maintained")
+                return False
+            partitions = await self.find_partitions(conn)
+            months = {
+                add_months(current, months)
+                for months in range(self._months_ahead + 1)
+            }
+            months.update(await self._find_default_months(conn))
+            months -= {partition.start for partition in partitions}
+            taken = await self._find_tables(
+                conn, [partition_of(month).name for month in months]
+            )
+            for month in sorted(months):
+                partition = partition_of(month)
+                if partition.name in taken:
+                    logger.warning(
+                        "Tests of %s left in %s, %s already exists",
+                        f"{month:%Y-%m}",
+                        DEFAULT_PARTITION,
+                        partition.name,
+                    )
+                    months.discard(month)
+            partitions += await self.create_partitions(conn, months)
+            expired = [
+                partition
+                for partition in partitions
+                if cutoff is not None and partition.end <= cutoff
+            ]
+            await self.expire_partitions(conn, expired)
+        return True
+
+    async def find_partitions(self, conn: AsyncConnection) -> list[Partition]:
+        """
+        Returns the attached monthly partitions, in order.
+
+        Args:
+            conn (AsyncConnection): A connection to the database.
+
+        Returns:
+            list[Partition]: The partitions, without the default one.
+        """
+        res = await conn.execute(PARTITIONS_QUERY, {"table": TABLE})
+        partitions = []
+        for name, bounds in res:
+            match = BOUNDS.search(bounds)
+            if match is None:
+                continue
+            start, end = map(datetime.fromisoformat, match.groups())
+            partitions.append(Partition(name, start, end))
+        return sorted(partitions, key=lambda partition: partition.start)
+
+    async def create_partitions(
+        self, conn: AsyncConnection, months: Collection[datetime]
+    ) -> list[Partition]:
+        """
+        Creates the partitions of the given months.
+
+        The rows of these months already in the default partition are
+        moved to the new partitions in a single statement, with the default
+        partition detached meanwhile, so that it is only scanned once.
+
+        Args:
+            conn (AsyncConnection): A connection in a transaction.
+            months (Collection[datetime]): The starts of the months.
+
+        Returns:
+            list[Partition]: The created partitions.
+        """
+        partitions = [partition_of(month) for month in sorted(months)]
+        if not partitions:
+            return []
+        in_default = await conn.scalar(
+            text(
+                "SELECT EXISTS (SELECT FROM "
+                "unnest(CAST(:months AS timestamp[])) AS month "
+                f"WHERE EXISTS (SELECT FROM {DEFAULT_PARTITION} "
+                "WHERE timestamp >= month "
+                "AND timestamp < month + interval '1 month'))"
+            ),
+            {"months": list(months)},
+        )
+        if in_default:
+            await conn.execute(
+                text(
+                    f"ALTER TABLE {TABLE} DETACH PARTITION {DEFAULT_PARTITION}"
+                )
+            )
+        for partition in partitions:
+            await conn.execute(
+                text(
+                    f"CREATE TABLE {partition.name} PARTITION OF {TABLE} "
+                    f"FOR VALUES FROM ('{partition.start.isoformat()}') "
+                    f"TO ('{partition.end.isoformat()}')"
+                )
+            )
+            logger.info("Created the test partition %s", partition.name)
+        if in_default:
+            moved = await conn.execute(
+                text(
+                    f"WITH moved AS (DELETE FROM {DEFAULT_PARTITION} "
+                    "WHERE date_trunc('month', timestamp) = ANY(:months) "
+                    f"RETURNING *) INSERT INTO {TABLE} SELECT * FROM moved"
+                ),
+                {"months": list(months)},
+            )
+            await conn.execute(
+                text(
+                    f"ALTER TABLE {TABLE} ATTACH PARTITION "
+                    f"{DEFAULT_PARTITION} DEFAULT"
+                )
+            )
+            logger.info(
+                "Moved %d tests from %s", moved.rowcount, DEFAULT_PARTITION
+            )
+        return partitions
+
+    async def expire_partitions(
+        self, conn: AsyncConnection, partitions: Iterable[Partition]
+    ) -> None:
+        """
+        Detaches the given partitions, and drops them unless
+        TEST_EXPIRED_PARTITIONS is "detach".
+
+        The tests of the partitions are subtracted from the test counters
+        of their parts and the version of the test table is bumped.
+
+        Args:
+            conn (AsyncConnection): A connection in a transaction.
+            partitions (Iterable[Partition]): The expired partitions.
+        """
+        partitions = list(partitions)
+        if not partitions:
+            return
+        for partition in partitions:
+            await self._subtract_stats(conn, partition)
+            await conn.execute(
+                text(f"ALTER TABLE {TABLE} DETACH PARTITION {partition.name}")
+            )
+            if self._expired == "drop":
+                await conn.execute(text(f"DROP TABLE {partition.name}"))
+            logger.info(
+                "Expired the test partition %s (%s)",
+                partition.name,
+                self._expired,
+            )
+        await conn.execute(bump_version_statement(Test))
+
+    async def _subtract_stats(
+        self, conn: AsyncConnection, partition: Partition
+    ) -> None:
+        """
+        Subtracts the tests of a partition from the test counters of their
+        parts, in part order so that concurrent writers do not deadlock.
+        """
+        await conn.execute(
+            text(
+                "WITH expired AS (SELECT part_id, "
+                "count(*) FILTER (WHERE successful) AS passed, "
+                "count(*) FILTER (WHERE NOT successful) AS failed "
+                f"FROM {partition.name} GROUP BY part_id), "
+                f"locked AS (SELECT id FROM {STATS} "
+                "WHERE id IN (SELECT part_id FROM expired) "
+                "ORDER BY id FOR UPDATE) "
+                f"UPDATE {STATS} SET passed = {STATS}.passed - expired.passed, "
+                f"failed = {STATS}.failed - expired.failed "
+                "FROM expired JOIN locked ON locked.id = expired.part_id "
+                f"WHERE {STATS}.id = expired.part_id"
+            )
+        )
+
+    async def _find_default_months(
+        self, conn: AsyncConnection
+    ) -> list[datetime]:
+        """
+        Returns the months of the rows of the default partition,
+        skipping from month to month on the timestamp index rather than
+        scanning the partition.
+        """
+        res = await conn.execute(
+            text(
+                "WITH RECURSIVE months(month) AS ("
+                "SELECT date_trunc('month', min(timestamp)) "
+                f"FROM {DEFAULT_PARTITION} "
+                "UNION ALL "
+                "SELECT (SELECT date_trunc('month', min(timestamp)) "
+                f"FROM {DEFAULT_PARTITION} "
+                "WHERE timestamp >= months.month + interval '1 month') "
+                "FROM months WHERE months.month IS NOT NULL) "
+                "SELECT month FROM months WHERE month IS NOT NULL"
+            )
+        )
+        return list(res.scalars())
+
+    async def _find_tables(
+        self, conn: AsyncConnection, names: Iterable[str]
+    ) -> set[str]:
+        """
+        Returns the given names of existing tables, such as the
+        detached partitions.
+        """
+        res = await conn.execute(
+            text(
+                "SELECT relname FROM pg_class "
+                "WHERE relkind IN ('r', 'p') AND relname = ANY(:names)"
+            ),
+            {"names": list(names)},
+        )
+        return set(res.scalars())
+
+
+async def _run() -> bool:
+    """
+    Maintains the partitions of the database of the application settings.
+    """
+    settings = Settings()
+    db_app = DatabaseApp()
+    db_app.init_app(settings)
+    assert db_app.engine
+    manager = PartitionManager()
+    manager.init_app(settings)
+    try:
+        return await manager.maintain(db_app.engine)
+    finally:
+        await db_app.engine.dispose()
+
+
+def main(argv: Sequence[str] | None = None) -> None:
+    """
+    Entry point of the partition maintenance job.
+    """
+    parser = argparse.ArgumentParser(
+        prog="python -m app.partitions",
+        description=(
+            "Create the monthly partitions of the test table ahead of time "
+            "and expire the old ones."
+        ),
+    )
+    parser.parse_args(argv)
+
+    basicConfig(level="INFO")
+    asyncio.run(_run())
+
+
+if __name__ == "__main__":
+    main()
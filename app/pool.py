@@ -0,0 +1,162 @@
+"""
+Module for the instrumented connection pool.
+"""
+from bisect import bisect_left
+from time import perf_counter
+from typing import Any, Sequence, cast
+
+from sqlalchemy.exc import TimeoutError
+from sqlalchemy.pool import AsyncAdaptedQueuePool, ConnectionPoolEntry
+
+# Upper bounds, in seconds, of the checkout wait histogram buckets.
+CHECKOUT_WAIT_BUCKETS = (
+    0.001,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+
+
+class Histogram:
+    """
+    Counts observed values in buckets of increasing upper bounds.
+
+    The last count is for the values above the last bound.
+    """
+
+    def __init__(self, bounds: Sequence[float]) -> None:
+        self._bounds = tuple(bounds)
+        self._counts = [0] * (len(self._bounds) + 1)
+        self._sum = 0.0
+
+    @property
+    def bounds(self) -> tuple[float, ...]:
+        return self._bounds
+
+    @property
+    def counts(self) -> list[int]:
+        return list(self._counts)
+
+    @property
+    def count(self) -> int:
+        return sum(self._counts)
+
+    @property
+    def sum(self) -> float:
+        return self._sum
+
+    def observe(self, value: float) -> None:
+        """
+        Records a value.
+
+        Args:
+            value (float): The observed value.
+        """
+        self._counts[bisect_left(self._bounds, value)] += 1
+        self._sum += value
+
+    def to_dict(self) -> dict[str, Any]:
+        """
+        Converts the histogram to a dict.
+
+        Returns:
+            dict[str, Any]: The bounds, counts, count and sum.
+        """
+        return {
+            "bounds": list(self._bounds),
+            "counts": self.counts,
+            "count": self.count,
+            "sum": self._sum,
+        }
+
+
+class PoolMetrics:
+    """
+    Records the saturation of a connection pool.
+
+    Attributes:
+        checkout_wait (Histogram): The time spent getting a connection,
+            opening it included.
+        overflows (int): The connections opened beyond the pool size.
+        timeouts (int): The checkouts that timed out.
+        checked_out (int): The connections currently checked out.
+        max_checked_out (int): The highest number of connections
+            checked out at once.
+    """
+
+    def __init__(self) -> None:
+        self.checkout_wait = Histogram(CHECKOUT_WAIT_BUCKETS)
+        self.overflows = 0
+        self.timeouts = 0
+        self.checked_out = 0
+        self.max_checked_out = 0
+
+    def to_dict(self) -> dict[str, Any]:
+        """
+        Converts the metrics to a dict.
+
+        Returns:
+            dict[str, Any]: The metrics by name.
+        """
+        return {
+            "checked_out": self.checked_out,
+            "max_checked_out": self.max_checked_out,
+            "overflows": self.overflows,
+            "timeouts": self.timeouts,
+            "checkout_wait": self.checkout_wait.to_dict(),
+        }
+
+
+class InstrumentedAsyncQueuePool(AsyncAdaptedQueuePool):
+    """
+    Async queue pool recording its metrics.
+
+    The metrics are kept when the pool is recreated,
+    e.g. when the engine is disposed.
+    """
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        self._metrics = PoolMetrics()
+
+    @property
+    def metrics(self) -> PoolMetrics:
+        return self._metrics
+
+    def recreate(self) -> "InstrumentedAsyncQueuePool":
+        pool = cast(InstrumentedAsyncQueuePool, super().recreate())
+        pool._metrics = self._metrics
+        return pool
+
+    def _do_get(self) -> ConnectionPoolEntry:
+        start = perf_counter()
+        try:
+            record = super()._do_get()
+        except TimeoutError:
+            self._metrics.timeouts += 1
+            raise
+        finally:
+            self._metrics.checkout_wait.observe(perf_counter() - start)
+        self._metrics.checked_out += 1
+        self._metrics.max_checked_out = max(
+            self._metrics.max_checked_out, self._metrics.checked_out
+        )
+        return record
+
+    def _do_return_conn(self, record: ConnectionPoolEntry) -> None:
+        self._metrics.checked_out -= 1
+        super()._do_return_conn(record)
+
+    def _inc_overflow(self) -> bool:
+        allowed = super()._inc_overflow()
+        if allowed and self._overflow > 0:
+            self._metrics.overflows += 1
+        return allowed
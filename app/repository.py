@@ -3,46 +3,105 @@ Global Reposiotory
 """
 from __future__ import annotations
 
+import heapq
 from abc import ABC
+from datetime import datetime
 from functools import cached_property
-from typing import Generic, Sequence, TypeVar
+from itertools import islice
+from typing import (
+    Any,
+    AsyncIterator,
+    Callable,
+    ClassVar,
+    Collection,
+    Generic,
+    Mapping,
+    Sequence,
+    TypeVar,
+    cast,
+)
 from uuid import UUID
 
-from sqlalchemy import select
+import orjson
+
+from sqlalchemy import (
+    BigInteger,
+    Text,
+    bindparam,
+    delete,
+    func,
+    not_,
+    select,
+    tuple_,
+    update,
+)
+from sqlalchemy.dialects.postgresql import JSONB, Insert, insert
+from sqlalchemy.engine import Row
 from sqlalchemy.exc import NoResultFound
-from sqlalchemy.sql.selectable import Select
+from sqlalchemy.sql.base import Executable
+from sqlalchemy.sql.dml import ReturningDelete, ReturningUpdate
+from sqlalchemy.sql.elements import ColumnElement
+from sqlalchemy.sql.selectable import ScalarSelect, Select
 
+from app.archive import TestArchive
 from app.database import Database
-from app.domains import BaseDomain, PartDomain, TestDomain
+from app.domains import (
+    BaseDomain,
+    PartDomain,
+    PartTestStatsDomain,
+    TestDomain,
+)
 from app.exceptions import NoEntityFoundError
 from app.mappers import (
     BaseEntityDomainMapper,
     PartEntityDomainMapper,
     TestEntityDomainMapper,
 )
-from app.models import Base, Part, Test
+from app.models import Base, Part, PartTestStats, Test
+from app.pagination import Cursor, Page
 from app.session import Session
+from app.versions import find_version
 
 TEntity = TypeVar("TEntity", bound=Base)
 TDomain = TypeVar("TDomain", bound=BaseDomain)
+TStatement = TypeVar("TStatement", bound=Executable)
+TSelect = TypeVar("TSelect", bound=Select[Any])
 
 
 class BaseRepository(ABC, Generic[TEntity, TDomain]):
     """
     Repository Pattern.
+
+    A read-only repository selects the columns of the mapper and maps the
+    rows straight to domains, without creating, instrumenting and
+    registering an entity per row. Its modifications and removals still
+    load the entities.
     """
 
+    # Number of rows fetched at once from the server-side cursor when streaming.
+    yield_per = 1_000
+
+    # Statements by entity type and name, built once with bound parameters
+    # and shared by all the repositories, so that SQLAlchemy finds them in
+    # its compiled cache without building and hashing them again.
+    _statements: ClassVar[dict[tuple[type[Base], str], Executable]] = {}
+
     def __init__(
         self,
         session: Session,
         db: Database,
         entity_type: type[TEntity],
         mapper: BaseEntityDomainMapper[TEntity, TDomain],
+        cursor_field: str,
+        read_only: bool = False,
     ) -> None:
         self._entity_type = entity_type
         self._session = session
         self._db = db
         self._mapper = mapper
+        self._cursor_field = cursor_field
+        self._read_only = read_only
+        self._identity_map: dict[UUID, TEntity] = {}
 
     @property
     def entity_type(self) -> type[TEntity]:
@@ -60,10 +119,59 @@ class BaseRepository(ABC, Generic[TEntity, TDomain]):
     def mapper(self) -> BaseEntityDomainMapper[TEntity, TDomain]:
         return self._mapper
 
+    @property
+    def cursor_field(self) -> str:
+        return self._cursor_field
+
+    @property
+    def read_only(self) -> bool:
+        return self._read_only
+
+    @property
+    def identity_map(self) -> dict[UUID, TEntity]:
+        return self._identity_map
+
     @cached_property
     def _select_table(self) -> Select[tuple[TEntity]]:
         return select(self._entity_type)
 
+    @cached_property
+    def _row_columns(self) -> list[ColumnElement[Any]]:
+        table = self._entity_type.__table__
+        return [table.c[name] for name in self._mapper.columns]
+
+    @cached_property
+    def _text_row_columns(self) -> list[ColumnElement[Any]]:
+        return [
+            (
+                column.cast(Text).label(column.name)
+                if isinstance(column.type, JSONB)
+                else column
+            )
+            for column in self._row_columns
+        ]
+
+    @cached_property
+    def _cursor_column(self) -> ColumnElement[datetime]:
+        return getattr(self._entity_type, self._cursor_field)
+
+    @cached_property
+    def _deleted_types(self) -> tuple[type[Base], ...]:
+        """
+        The entity type and the types whose rows reference it,
+        which a deletion may cascade to.
+        """
+        table = self._entity_type.__table__
+        referencing = (
+            mapper.class_
+            for mapper in Base.registry.mappers
+            if any(
+                foreign_key.column.table is table
+                for foreign_key in mapper.local_table.foreign_keys
+            )
+        )
+        return (self._entity_type, *referencing)
+
     def add(self, domain: TDomain) -> None:
         """
         Add a new domain.
@@ -76,8 +184,29 @@ class BaseRepository(ABC, Generic[TEntity, TDomain]):
         ----
         None
         """
-        record = self._mapper.to_entity(domain)
-        self._session.add(record)
+        self.add_all([domain])
+
+    def add_all(self, domains: Sequence[TDomain]) -> None:
+        """
+        Add new domains.
+
+        The domains are enlisted as rows, without entities, and inserted
+        with the other rows of the entity when the unit of work is saved,
+        in a single executemany.
+
+        Params:
+        ----
+        domains (Sequence[TDomain]): The domains to add.
+
+        Returns:
+        ----
+        None
+        """
+        self._session.insert(
+            self._entity_type,
+            self._mapper.columns,
+            self._mapper.to_rows(domains),
+        )
 
     async def modify(self, domain: TDomain) -> None:
         """
@@ -86,29 +215,103 @@ class BaseRepository(ABC, Generic[TEntity, TDomain]):
         This method modifies an existing domain by updating its properties
         with the values from the provided domain object.
 
+        The record already loaded by this repository is reused,
+        otherwise it is fetched.
+
         Parameters:
             domain (TDomain): The domain object to modify.
 
         Returns:
             None
         """
-        query = self._query_by_id(domain.id)
-        record = await self._find_first_record(query)
+        record = await self._find_record_by_id(domain.id)
         self._mapper.map_to_record(domain, record)
+        self._session.touch(self._entity_type)
 
     async def remove(self, domain: TDomain) -> None:
         """
         Remove a domain.
 
+        The record already loaded by this repository is reused,
+        otherwise it is fetched.
+
         Parameters:
             domain (TDomain): The domain to be removed.
 
         Returns:
             None
         """
-        query = self._query_by_id(domain.id)
-        record = await self._find_first_record(query)
+        record = await self._find_record_by_id(domain.id)
+        del self._identity_map[domain.id]
         self.session.remove(record)
+        self._session.touch(*self._deleted_types)
+
+    async def delete_by_id(self, id: UUID) -> TDomain:
+        """
+        Delete a domain by id in a single statement.
+
+        The row is deleted right away, within the transaction of the unit
+        of work, without loading it first, and returned by the database.
+
+        Params:
+        ----
+            id: UUID - The id of the domain to delete.
+
+        Raises:
+        ----
+            NoEntityFoundError: If no row has this id.
+
+        Returns:
+        ----
+            TDomain - The deleted domain.
+        """
+        query = self._statement("delete_by_id", self._build_delete_by_id)
+        res = await self._db.session.execute(query, {"id": id})
+        record = res.scalar_one_or_none()
+        if record is None:
+            raise NoEntityFoundError()
+        self._identity_map.pop(id, None)
+        self._session.touch(*self._deleted_types)
+        return self._mapper.to_domain(record)
+
+    async def update_by_id(
+        self, id: UUID, values: Mapping[str, Any]
+    ) -> TDomain:
+        """
+        Update the given columns of a domain in a single statement.
+
+        Only the given columns are written, the updated row is returned
+        by the database and mapped to the domain. Without any value to
+        set, the domain is only looked up.
+
+        Params:
+        ----
+            id: UUID - The id of the domain to update.
+            values: Mapping[str, Any] - The new values by column name.
+
+        Raises:
+        ----
+            NoEntityFoundError: If no row has this id.
+
+        Returns:
+        ----
+            TDomain - The updated domain.
+        """
+        if not values:
+            return await self.find_by_id(id)
+        columns = sorted(values)
+        query = self._statement(
+            f"update_by_id:{','.join(columns)}",
+            lambda: self._build_update_by_id(columns),
+        )
+        params = {f"new_{column}": values[column] for column in columns}
+        res = await self._db.session.execute(query, {"pk": id, **params})
+        record = res.scalar_one_or_none()
+        if record is None:
+            raise NoEntityFoundError()
+        self._identity_map[id] = record
+        self._session.touch(self._entity_type)
+        return self._mapper.to_domain(record)
 
     async def find_by_id(self, id: UUID) -> TDomain:
         """
@@ -122,41 +325,247 @@ class BaseRepository(ABC, Generic[TEntity, TDomain]):
         ----
             TDomain
         """
-        query = self._query_by_id(id)
-        domain = await self._find_first_domain(query)
-        return domain
+        if self._read_only and id not in self._identity_map:
+            query = self._statement(
+                "by_id:rows", lambda: self._as_rows(self._query_by_id())
+            )
+            conn = await self._db.session.connection()
+            res = await conn.execute(query, {"id": id})
+            row = res.one_or_none()
+            if row is None:
+                raise NoEntityFoundError()
+            return self._mapper.row_to_domain(row)
+        record = await self._find_record_by_id(id)
+        return self._mapper.to_domain(record)
 
-    async def find_all(self, limit: int, offset: int) -> list[TDomain]:
+    async def find_version(self) -> int:
+        """
+        Return the version of the table, which changes with every write.
+
+        Returns:
+        ----
+            int - The version, 0 if the table was never written.
+        """
+        return await find_version(self._db.session, self._entity_type)
+
+    async def find_existing_ids(
+        self, ids: Collection[UUID], lock: bool = False
+    ) -> set[UUID]:
+        """
+        Return the subset of the given ids that exist, in a single query.
+
+        Params:
+        ----
+            ids: Collection[UUID] - The ids to look for.
+            lock: bool - Whether to lock the rows found against deletion
+                (FOR KEY SHARE) until the end of the transaction.
+
+        Returns:
+        ----
+            set[UUID] - The ids found in the database.
+        """
+        if not ids:
+            return set()
+        query = (
+            self._statement("existing_ids:lock", self._build_locked_ids)
+            if lock
+            else self._statement("existing_ids", self._build_existing_ids)
+        )
+        res = await self._db.session.execute(query, {"ids": list(ids)})
+        return set(res.scalars().all())
+
+    async def find_all(
+        self,
+        limit: int,
+        offset: int,
+        filters: Mapping[str, Any] | None = None,
+    ) -> list[TDomain]:
         """
         Return all domains.
 
+        Params:
+        ----
+            limit: int - The maximum number of domains.
+            offset: int - The number of domains to skip.
+            filters: Mapping[str, Any] | None - The filters of the domains,
+                see _query_filtered.
+
         Returns:
         ----
             list[TDomain]
         """
-        query = self._select_table.limit(limit).offset(offset)
-        records = await self._find_all_records(query)
-        return [self._mapper.to_domain(record) for record in records]
+        if self._read_only:
+            query, params = self._query_filtered(
+                "all:rows", self._build_all_rows, filters
+            )
+            params.update(limit=limit, offset=offset)
+            rows = await self._find_all_rows(query, params)
+            return self._mapper.rows_to_domains(rows)
+        query, params = self._query_filtered("all", self._build_all, filters)
+        params.update(limit=limit, offset=offset)
+        records = await self._find_all_records(query, params)
+        self._register_all(records)
+        return self._mapper.to_domains(records)
 
-    async def _find_first_domain(
-        self, query: Select[tuple[TEntity]]
-    ) -> TDomain:
+    async def stream_all(
+        self,
+        limit: int,
+        offset: int,
+        filters: Mapping[str, Any] | None = None,
+    ) -> AsyncIterator[TDomain]:
         """
-        Find the first domain.
+        Stream all domains.
+
+        The records are fetched through a server-side cursor, yield_per rows
+        at a time, so that only one batch is held in memory.
+
+        Params:
+        ----
+            limit: int - The maximum number of domains.
+            offset: int - The number of domains to skip.
+            filters: Mapping[str, Any] | None - The filters of the domains,
+                see _query_filtered.
+
+        Returns:
+        ----
+            AsyncIterator[TDomain]
+        """
+        if self._read_only:
+            query, params = self._query_filtered(
+                "all:rows", self._build_all_rows, filters
+            )
+            params.update(limit=limit, offset=offset)
+            conn = await self._db.session.connection()
+            rows = await conn.stream(
+                query,
+                params,
+                execution_options={"yield_per": self.yield_per},
+            )
+            async for chunk in rows.partitions():
+                for domain in self._mapper.rows_to_domains(chunk):
+                    yield domain
+            return
+        query, params = self._query_filtered("all", self._build_all, filters)
+        params.update(limit=limit, offset=offset)
+        records = await self._db.session.stream_scalars(
+            query,
+            params,
+            execution_options={"yield_per": self.yield_per},
+        )
+        async for batch in records.partitions():
+            for domain in self._mapper.to_domains(batch):
+                yield domain
+
+    async def stream_rows(
+        self, filters: Mapping[str, Any] | None = None
+    ) -> AsyncIterator[Sequence[Sequence[Any]]]:
+        """
+        Stream the rows of all the records matching the filters, batch by
+        batch, without mapping them to domains.
+
+        The rows hold the columns of the mapper, in order, with the JSONB
+        documents as the JSON text sent by the database, so that they are
+        never decoded. They are fetched through a server-side cursor,
+        yield_per rows at a time.
+
+        Params:
+        ----
+            filters: Mapping[str, Any] | None - The filters of the records,
+                see _query_filtered.
+
+        Returns:
+        ----
+            AsyncIterator[Sequence[Sequence[Any]]] - The batches of rows.
+        """
+        query, params = self._query_filtered(
+            "all:text", self._build_all_text_rows, filters
+        )
+        conn = await self._db.session.connection()
+        rows = await conn.stream(
+            query, params, execution_options={"yield_per": self.yield_per}
+        )
+        async for batch in rows.partitions():
+            yield batch
+
+    async def find_page(
+        self,
+        limit: int,
+        cursor: Cursor | None = None,
+        filters: Mapping[str, Any] | None = None,
+    ) -> Page[TDomain]:
+        """
+        Return a page of domains ordered by (cursor field, id).
+
+        The page starts right after the given cursor, so that the
+        database seeks the (cursor field, id) index instead of
+        skipping the previous rows.
+
+        Params:
+        ----
+            limit: int - The maximum number of domains of the page.
+            cursor: Cursor | None - The position of the previous page,
+                None for the first page.
+            filters: Mapping[str, Any] | None - The filters of the domains,
+                see _query_filtered.
+
+        Returns:
+        ----
+            Page[TDomain] - The domains and the cursor of the next page.
+        """
+        query, params = self._query_page(cursor, filters, self._read_only)
+        params["limit"] = limit + 1
+        if cursor is not None:
+            params.update(key=cursor.key, id=cursor.id)
+        if self._read_only:
+            rows = await self._find_all_rows(query, params)
+            found = len(rows)
+            domains = self._mapper.rows_to_domains(rows[:limit])
+        else:
+            records = await self._find_all_records(query, params)
+            found = len(records)
+            self._register_all(records[:limit])
+            domains = self._mapper.to_domains(records[:limit])
+        next_cursor = None
+        if found > limit and domains:
+            last = domains[-1]
+            next_cursor = Cursor(getattr(last, self._cursor_field), last.id)
+        return Page(items=domains, next_cursor=next_cursor)
+
+    async def _find_record_by_id(self, id: UUID) -> TEntity:
+        """
+        Find a record by id, looking up the identity map first.
 
         Parameters:
         ----
-            :param query: query of the oauth.
+            :param id: id of the record.
 
         Returns:
         ----
-            TDomain: The first domain found.
+            TEntity: the record of the unit of work with this id.
         """
-        record = await self._find_first_record(query)
-        return self._mapper.to_domain(record)
+        record = self._identity_map.get(id)
+        if record is None:
+            query = self._query_by_id()
+            record = await self._find_first_record(query, {"id": id})
+            self._identity_map[id] = record
+        return record
+
+    def _register_all(self, records: Sequence[TEntity]) -> None:
+        """
+        Register loaded records in the identity map.
+
+        Records already in the map are kept, so that pending modifications
+        are not lost.
+
+        Parameters:
+        ----
+            :param records: the records loaded by a query.
+        """
+        for record in records:
+            self._identity_map.setdefault(record.id, record)
 
     async def _find_first_record(
-        self, query: Select[tuple[TEntity]]
+        self, query: Select[tuple[TEntity]], params: Mapping[str, Any]
     ) -> TEntity:
         """
         Find the first record.
@@ -164,12 +573,13 @@ class BaseRepository(ABC, Generic[TEntity, TDomain]):
         Parameters:
         ----
             :param query: query to get the first record.
+            :param params: values of the bound parameters of the query.
 
         Returns:
         ----
             TEntity: the first record found by the query.
         """
-        res = await self._db.session.execute(query)
+        res = await self._db.session.execute(query, params)
         try:
             record = res.scalar_one()
         except NoResultFound:
@@ -177,7 +587,7 @@ class BaseRepository(ABC, Generic[TEntity, TDomain]):
         return record
 
     async def _find_all_records(
-        self, query: Select[tuple[TEntity]]
+        self, query: Select[tuple[TEntity]], params: Mapping[str, Any]
     ) -> Sequence[TEntity]:
         """
         Find all records.
@@ -185,29 +595,264 @@ class BaseRepository(ABC, Generic[TEntity, TDomain]):
         Parameters:
         ----
             :param query: query to get all records.
+            :param params: values of the bound parameters of the query.
 
         Returns:
         ----
             list[TEntity]: the list of records found by the query.
         """
-        res = await self._db.session.execute(query)
+        res = await self._db.session.execute(query, params)
         records = res.scalars().all()
         return records
 
-    def _query_by_id(self, id: UUID) -> Select[tuple[TEntity]]:
+    async def _find_all_rows(
+        self, query: Select[Any], params: Mapping[str, Any]
+    ) -> Sequence[Row[Any]]:
         """
-        Get a query searching a record by id.
+        Find all rows, without loading entities.
+
+        The query is executed on the connection of the session, in its
+        transaction, so that the rows skip the ORM loading.
+
+        Parameters:
+        ----
+            :param query: query selecting the columns of the mapper.
+            :param params: values of the bound parameters of the query.
+
+        Returns:
+        ----
+            list[Row]: the list of rows found by the query.
+        """
+        conn = await self._db.session.connection()
+        res = await conn.execute(query, params)
+        return res.all()
+
+    def _statement(
+        self, name: str, build: Callable[[], TStatement]
+    ) -> TStatement:
+        """
+        Get a statement of the entity, building it on first use.
 
         Params:
         ----
-            id: UUID - The id of the record to search for.
+            name: str - The name of the statement.
+            build: Callable[[], TStatement] - Builds the statement.
+
+        Returns:
+        ----
+            TStatement - The statement shared by the repositories of the entity.
+        """
+        key = (self._entity_type, name)
+        statement = self._statements.get(key)
+        if statement is None:
+            statement = self._statements[key] = build()
+        return cast(TStatement, statement)
+
+    def _query_by_id(self) -> Select[tuple[TEntity]]:
+        """
+        Get a query searching a record by id.
+
+        The id is bound to the "id" parameter.
 
         Returns:
         ----
            Query[TEntity] - A query object that can be used to search for the record.
         """
-        query = self._select_table.filter(self._entity_type.id == id)
-        return query
+        return self._statement(
+            "by_id",
+            lambda: self._select_table.where(
+                self._entity_type.id == bindparam("id")
+            ),
+        )
+
+    def _query_page(
+        self,
+        cursor: Cursor | None,
+        filters: Mapping[str, Any] | None,
+        rows: bool = False,
+    ) -> tuple[Select[Any], dict[str, Any]]:
+        """
+        Get a query searching the page following a cursor.
+
+        The number of records is bound to the "limit" parameter and
+        the cursor to the "key" and "id" parameters.
+
+        Params:
+        ----
+            cursor: Cursor | None - The position of the previous page.
+            filters: Mapping[str, Any] | None - The filters of the records.
+            rows: bool - Whether to select the columns of the mapper
+                rather than the entities.
+
+        Returns:
+        ----
+           tuple[Query[TEntity], dict[str, Any]] - A query object selecting
+                the page records and the values of its filters.
+        """
+        name, build = (
+            ("first_page", self._build_first_page)
+            if cursor is None
+            else ("next_page", self._build_next_page)
+        )
+        if rows:
+            return self._query_filtered(
+                f"{name}:rows", lambda: self._as_rows(build()), filters
+            )
+        return self._query_filtered(name, build, filters)
+
+    def _query_filtered(
+        self,
+        name: str,
+        build: Callable[[], TSelect],
+        filters: Mapping[str, Any] | None,
+    ) -> tuple[TSelect, dict[str, Any]]:
+        """
+        Get a query restricted to the records matching the filters.
+
+        The filters are keyed by column name, a record matches when the
+        column equals the value. The "<cursor field>_from" and
+        "<cursor field>_to" filters select the records whose cursor field
+        is in the [from, to) window, the "<JSONB column>_contains" filters
+        the records whose document contains the value (@>). The filters set
+        to None are ignored.
+
+        The values are bound to "filter_<name>" parameters, except the
+        booleans which are part of the statement, so that the database
+        can use the partial indexes on their value.
+
+        Params:
+        ----
+            name: str - The name of the unfiltered statement.
+            build: Callable[[], TSelect] - Builds the unfiltered statement.
+            filters: Mapping[str, Any] | None - The filters of the records.
+
+        Raises:
+        ----
+            ValueError: If a filter is not a column of the entity.
+
+        Returns:
+        ----
+           tuple[TSelect, dict[str, Any]] - The statement restricted to
+                the matching records and the values of its parameters.
+        """
+        filters = {
+            key: value
+            for key, value in sorted((filters or {}).items())
+            if value is not None
+        }
+        if not filters:
+            return self._statement(name, build), {}
+        signature = ",".join(
+            f"{key}={value}" if isinstance(value, bool) else key
+            for key, value in filters.items()
+        )
+        query = self._statement(
+            f"{name}?{signature}",
+            lambda: build().where(
+                *(
+                    self._build_filter(key, value)
+                    for key, value in filters.items()
+                )
+            ),
+        )
+        params = {
+            f"filter_{key}": value
+            for key, value in filters.items()
+            if not isinstance(value, bool)
+        }
+        return query, params
+
+    def _build_filter(self, key: str, value: Any) -> ColumnElement[bool]:
+        param = f"filter_{key}"
+        if key == f"{self._cursor_field}_from":
+            return self._cursor_column >= bindparam(
+                param, type_=self._cursor_column.type
+            )
+        if key == f"{self._cursor_field}_to":
+            return self._cursor_column < bindparam(
+                param, type_=self._cursor_column.type
+            )
+        table = self._entity_type.__table__
+        document = table.c.get(key.removesuffix("_contains"))
+        if (
+            key.endswith("_contains")
+            and document is not None
+            and isinstance(document.type, JSONB)
+        ):
+            return document.contains(bindparam(param, type_=document.type))
+        column = table.c.get(key)
+        if column is None:
+            raise ValueError(f"Unknown filter: {key}")
+        if isinstance(value, bool):
+            return column if value else not_(column)
+        return column == bindparam(param, type_=column.type)
+
+    def _build_all(self) -> Select[tuple[TEntity]]:
+        return self._select_table.limit(bindparam("limit")).offset(
+            bindparam("offset")
+        )
+
+    def _build_all_rows(self) -> Select[Any]:
+        return self._as_rows(self._build_all())
+
+    def _build_all_text_rows(self) -> Select[Any]:
+        return self._select_table.with_only_columns(*self._text_row_columns)
+
+    def _as_rows(self, query: Select[tuple[TEntity]]) -> Select[Any]:
+        """
+        Get the same query selecting the columns of the mapper, in order,
+        instead of the entities.
+        """
+        return query.with_only_columns(*self._row_columns)
+
+    def _build_first_page(self) -> Select[tuple[TEntity]]:
+        return self._select_table.order_by(
+            self._cursor_column, self._entity_type.id
+        ).limit(bindparam("limit"))
+
+    def _build_next_page(self) -> Select[tuple[TEntity]]:
+        key = bindparam("key", type_=self._cursor_column.type)
+        id = bindparam("id", type_=self._entity_type.id.type)
+        # The row comparison alone does not prune partitions, the bound on
+        # the cursor field skips the partitions before the cursor.
+        return self._build_first_page().where(
+            self._cursor_column >= key,
+            tuple_(self._cursor_column, self._entity_type.id)
+            > tuple_(key, id),
+        )
+
+    def _build_existing_ids(self) -> Select[tuple[UUID]]:
+        return select(self._entity_type.id).where(
+            self._entity_type.id.in_(bindparam("ids", expanding=True))
+        )
+
+    def _build_locked_ids(self) -> Select[tuple[UUID]]:
+        return self._build_existing_ids().with_for_update(
+            read=True, key_share=True
+        )
+
+    def _build_delete_by_id(self) -> ReturningDelete[tuple[TEntity]]:
+        return (
+            delete(self._entity_type)
+            .where(self._entity_type.id == bindparam("id"))
+            .returning(self._entity_type)
+        )
+
+    def _build_update_by_id(
+        self, columns: Sequence[str]
+    ) -> ReturningUpdate[tuple[TEntity]]:
+        table = self._entity_type.__table__
+        values = {
+            column: bindparam(f"new_{column}", type_=table.c[column].type)
+            for column in columns
+        }
+        return (
+            update(self._entity_type)
+            .where(self._entity_type.id == bindparam("pk"))
+            .values(values)
+            .returning(self._entity_type)
+            .execution_options(populate_existing=True)
+        )
 
 
 class PartRepository(BaseRepository[Part, PartDomain]):
@@ -222,12 +867,16 @@ class PartRepository(BaseRepository[Part, PartDomain]):
 
     """
 
-    def __init__(self, db: Database, session: Session) -> None:
+    def __init__(
+        self, db: Database, session: Session, read_only: bool = False
+    ) -> None:
         super().__init__(
             db=db,
             session=session,
             entity_type=Part,
             mapper=PartEntityDomainMapper(),
+            cursor_field="modified_timestamp",
+            read_only=read_only,
         )
 
 
@@ -237,6 +886,11 @@ class TestRepository(BaseRepository[Test, TestDomain]):
 
     This class provides methods for interacting with the database and performing CRUD operations on Test entities.
 
+    The primary key of the partitioned test table is (id, timestamp), so
+    the database does not keep the ids unique. Should an id be repeated,
+    e.g. by concurrent bulk loads, the lookups, updates and deletes by id
+    address its latest row, the next one once it is deleted.
+
     Args:
         db (Database): The database connection.
         session (Session): The database session.
@@ -248,10 +902,507 @@ class TestRepository(BaseRepository[Test, TestDomain]):
         mapper (Mapper[Test, TestDomain]): The mapper for mapping between entity and domain models.
     """
 
-    def __init__(self, db: Database, session: Session) -> None:
+    def __init__(
+        self,
+        db: Database,
+        session: Session,
+        archive: TestArchive | None = None,
+        read_only: bool = False,
+    ) -> None:
         super().__init__(
             db=db,
             session=session,
             entity_type=Test,
             mapper=TestEntityDomainMapper(),
+            cursor_field="timestamp",
+            read_only=read_only,
+        )
+        self._archive = archive
+
+    @property
+    def archive(self) -> TestArchive | None:
+        return self._archive
+
+    async def find_by_id(self, id: UUID) -> TestDomain:
+        """
+        Return the test by id, looking it up in the archive if it is not
+        in the table.
+
+        Params:
+        ----
+            id: UUID
+
+        Raises:
+        ----
+            NoEntityFoundError: If no test has this id.
+
+        Returns:
+        ----
+            TestDomain
+        """
+        archive = self._archive
+        try:
+            return await super().find_by_id(id)
+        except NoEntityFoundError:
+            if archive is None:
+                raise
+            test = await archive.find_by_id(id)
+            if test is None:
+                raise
+            return test
+
+    async def find_all(
+        self,
+        limit: int,
+        offset: int,
+        filters: Mapping[str, Any] | None = None,
+    ) -> list[TestDomain]:
+        """
+        Return the tests of the table, followed by the archived tests.
+
+        Params:
+        ----
+            limit: int - The maximum number of tests.
+            offset: int - The number of tests to skip.
+            filters: Mapping[str, Any] | None - The filters of the tests,
+                see _query_filtered.
+
+        Returns:
+        ----
+            list[TestDomain]
+        """
+        tests = await super().find_all(limit, offset, filters)
+        if self._archive is None or len(tests) == limit:
+            return tests
+        return tests + await self._archive.find_all(
+            limit - len(tests),
+            await self._archive_offset(offset, len(tests), filters),
+            filters or {},
+        )
+
+    async def stream_all(
+        self,
+        limit: int,
+        offset: int,
+        filters: Mapping[str, Any] | None = None,
+    ) -> AsyncIterator[TestDomain]:
+        """
+        Stream the tests of the table, followed by the archived tests.
+
+        Params:
+        ----
+            limit: int - The maximum number of tests.
+            offset: int - The number of tests to skip.
+            filters: Mapping[str, Any] | None - The filters of the tests,
+                see _query_filtered.
+
+        Returns:
+        ----
+            AsyncIterator[TestDomain]
+        """
+        streamed = 0
+        async for test in super().stream_all(limit, offset, filters):
+            streamed += 1
+            yield test
+        if self._archive is None or streamed == limit:
+            return
+        archived = self._archive.stream_all(
+            limit - streamed,
+            await self._archive_offset(offset, streamed, filters),
+            filters or {},
+        )
+        async for test in archived:
+            yield test
+
+    async def stream_rows(
+        self, filters: Mapping[str, Any] | None = None
+    ) -> AsyncIterator[Sequence[Sequence[Any]]]:
+        """
+        Stream the rows of the tests of the table, followed by the rows of
+        the archived tests, segment by segment.
+
+        Params:
+        ----
+            filters: Mapping[str, Any] | None - The filters of the tests,
+                see _query_filtered.
+
+        Returns:
+        ----
+            AsyncIterator[Sequence[Sequence[Any]]] - The batches of rows.
+        """
+        async for batch in super().stream_rows(filters):
+            yield batch
+        if self._archive is None:
+            return
+        async for tests in self._archive.stream_segments(filters or {}):
+            yield [
+                (
+                    test.id,
+                    test.part_id,
+                    test.timestamp,
+                    test.successful,
+                    (
+                        None
+                        if test.data is None
+                        else orjson.dumps(test.data).decode()
+                    ),
+                )
+                for test in tests
+            ]
+
+    async def find_page(
+        self,
+        limit: int,
+        cursor: Cursor | None = None,
+        filters: Mapping[str, Any] | None = None,
+    ) -> Page[TestDomain]:
+        """
+        Return a page of tests ordered by (timestamp, id), the tests of
+        the table merged with the archived tests.
+
+        Params:
+        ----
+            limit: int - The maximum number of tests of the page.
+            cursor: Cursor | None - The position of the previous page,
+                None for the first page.
+            filters: Mapping[str, Any] | None - The filters of the tests,
+                see _query_filtered.
+
+        Returns:
+        ----
+            Page[TestDomain] - The tests and the cursor of the next page.
+        """
+        page = await super().find_page(limit, cursor, filters)
+        if self._archive is None:
+            return page
+        archived = await self._archive.find_page(
+            limit + 1, cursor, filters or {}
+        )
+        if not archived:
+            return page
+        merged = list(
+            islice(
+                heapq.merge(
+                    page.items,
+                    archived,
+                    key=lambda test: (test.timestamp, test.id),
+                ),
+                limit + 1,
+            )
+        )
+        tests = merged[:limit]
+        next_cursor = None
+        if (len(merged) > limit or page.next_cursor is not None) and tests:
+            next_cursor = Cursor(tests[-1].timestamp, tests[-1].id)
+        return Page(items=tests, next_cursor=next_cursor)
+
+    async def delete_archived(self, part_ids: Collection[UUID]) -> None:
+        """
+        Hide the archived tests of deleted parts, which the next archiving
+        removes from the segments.
+
+        Params:
+        ----
+            part_ids: Collection[UUID] - The ids of the deleted parts.
+
+        Returns:
+        ----
+            None
+        """
+        if self._archive is not None:
+            await self._archive.hide_parts(part_ids)
+
+    async def _archive_offset(
+        self, offset: int, found: int, filters: Mapping[str, Any] | None
+    ) -> int:
+        """
+        Return the number of archived tests to skip once the tests of the
+        table, of which found were returned after offset, are exhausted.
+        """
+        if found:
+            return 0
+        return max(0, offset - await self._count_table(filters))
+
+    async def _count_table(self, filters: Mapping[str, Any] | None) -> int:
+        """
+        Return the number of tests of the table matching the filters.
+
+        Filtered by part and result only, they are not counted in the
+        table but from the part test stats, which count the archived tests
+        too, less the archived tests counted by the archive.
+        """
+        assert self._archive is not None
+        filters = {
+            key: value
+            for key, value in (filters or {}).items()
+            if value is not None
+        }
+        if not set(filters) <= {"part_id", "successful"}:
+            query, params = self._query_filtered(
+                "count", self._build_count, filters
+            )
+            res = await self._db.session.execute(query, params)
+            return res.scalar_one()
+        part_id = filters.get("part_id")
+        if part_id is None:
+            results = self._statement("results", self._build_results)
+        else:
+            results = self._statement(
+                "results:part",
+                lambda: self._build_results().where(
+                    PartTestStats.id == bindparam("part_id")
+                ),
+            )
+        res = await self._db.session.execute(results, {"part_id": part_id})
+        passed, failed = res.one()
+        archived_passed, archived_failed = await self._archive.count_results(
+            part_id
+        )
+        passed -= archived_passed
+        failed -= archived_failed
+        if "successful" not in filters:
+            return passed + failed
+        return passed if filters["successful"] else failed
+
+    def _build_count(self) -> Select[tuple[int]]:
+        return select(func.count()).select_from(Test)
+
+    def _build_results(self) -> Select[tuple[int, int]]:
+        return select(
+            func.coalesce(func.sum(PartTestStats.passed), 0).cast(BigInteger),
+            func.coalesce(func.sum(PartTestStats.failed), 0).cast(BigInteger),
+        )
+
+    def _query_by_id(self) -> Select[tuple[Test]]:
+        return self._statement(
+            "by_id",
+            lambda: self._select_table.where(Test.id == bindparam("id"))
+            .order_by(Test.timestamp.desc())
+            .limit(1),
+        )
+
+    def _build_delete_by_id(self) -> ReturningDelete[tuple[Test]]:
+        return (
+            super()
+            ._build_delete_by_id()
+            .where(Test.timestamp == self._latest_timestamp("id"))
+        )
+
+    def _build_update_by_id(
+        self, columns: Sequence[str]
+    ) -> ReturningUpdate[tuple[Test]]:
+        return (
+            super()
+            ._build_update_by_id(columns)
+            .where(Test.timestamp == self._latest_timestamp("pk"))
+        )
+
+    def _latest_timestamp(self, name: str) -> ScalarSelect[datetime]:
+        """
+        Returns the timestamp of the latest row with the id bound to the
+        given parameter.
+        """
+        return (
+            select(Test.timestamp)
+            .where(Test.id == bindparam(name))
+            .order_by(Test.timestamp.desc())
+            .limit(1)
+            .scalar_subquery()
+        )
+
+    async def update_result_by_id(
+        self, id: UUID, values: Mapping[str, Any]
+    ) -> tuple[TestDomain, bool]:
+        """
+        Update the given columns of a test, its result among them, in a
+        single statement returning the previous result.
+
+        The row is locked before it is read, so that concurrent updates
+        are serialized and each one sees the result left by the previous
+        one.
+
+        Params:
+        ----
+            id: UUID - The id of the test.
+            values: Mapping[str, Any] - The new values by column name.
+
+        Raises:
+        ----
+            NoEntityFoundError: If no test has this id.
+
+        Returns:
+        ----
+            tuple[TestDomain, bool] - The updated test and its result
+                before the update.
+        """
+        columns = sorted(values)
+        query = self._statement(
+            f"update_result_by_id:{','.join(columns)}",
+            lambda: self._build_update_result_by_id(columns),
+        )
+        params = {f"new_{column}": values[column] for column in columns}
+        res = await self._db.session.execute(query, {"pk": id, **params})
+        row = res.one_or_none()
+        if row is None:
+            raise NoEntityFoundError()
+        record, previous = row
+        self._identity_map[id] = record
+        self._session.touch(Test)
+        return self._mapper.to_domain(record), previous
+
+    def _build_update_result_by_id(
+        self, columns: Sequence[str]
+    ) -> ReturningUpdate[tuple[Test, bool]]:
+        previous = (
+            select(Test.id, Test.timestamp, Test.successful)
+            .where(Test.id == bindparam("pk"))
+            .order_by(Test.timestamp.desc())
+            .limit(1)
+            .with_for_update()
+            .subquery("previous")
+        )
+        return cast(
+            ReturningUpdate[tuple[Test, bool]],
+            super()
+            ._build_update_by_id(columns)
+            .where(Test.timestamp == previous.c.timestamp)
+            .returning(previous.c.successful),
+        )
+
+
+def upsert_part_test_stats(statement: Insert) -> Insert:
+    """
+    Adds the inserted counters to the existing ones of the parts.
+
+    Params:
+    ----
+        statement: Insert - The insert of the counters of the parts.
+
+    Returns:
+    ----
+        Insert - The upsert.
+    """
+    return statement.on_conflict_do_update(
+        index_elements=[PartTestStats.id],
+        set_={
+            "passed": PartTestStats.passed + statement.excluded.passed,
+            "failed": PartTestStats.failed + statement.excluded.failed,
+        },
+    )
+
+
+class PartTestStatsRepository:
+    """
+    Repository of the test counters of the parts.
+
+    The counter changes are accumulated by part and written by the unit of
+    work when it is saved, in the transaction of the tests. The counters
+    are read with the parts, so that a part without any test reads zeros
+    and the test table is never scanned.
+
+    Args:
+        db (Database): The database connection.
+    """
+
+    _record = upsert_part_test_stats(insert(PartTestStats))
+
+    _select = select(
+        Part.id,
+        func.coalesce(PartTestStats.passed, 0),
+        func.coalesce(PartTestStats.failed, 0),
+    ).outerjoin(PartTestStats, PartTestStats.id == Part.id)
+
+    _find_by_part_id = _select.where(Part.id == bindparam("id"))
+
+    _find_all = (
+        _select.order_by(Part.modified_timestamp, Part.id)
+        .limit(bindparam("limit"))
+        .offset(bindparam("offset"))
+    )
+
+    def __init__(self, db: Database) -> None:
+        self._db = db
+        self._deltas: dict[UUID, tuple[int, int]] = {}
+
+    @property
+    def db(self) -> Database:
+        return self._db
+
+    @property
+    def deltas(self) -> dict[UUID, tuple[int, int]]:
+        return self._deltas
+
+    def record(self, part_id: UUID, successful: bool, count: int = 1) -> None:
+        """
+        Record tests added to, or removed from, a part.
+
+        Params:
+        ----
+            part_id: UUID - The id of the part.
+            successful: bool - The result of the tests.
+            count: int - The number of tests, negative when removed.
+        """
+        passed, failed = self._deltas.get(part_id, (0, 0))
+        if successful:
+            passed += count
+        else:
+            failed += count
+        self._deltas[part_id] = (passed, failed)
+
+    def discard(self) -> None:
+        """
+        Forget the recorded changes.
+        """
+        self._deltas.clear()
+
+    async def flush(self) -> None:
+        """
+        Write the recorded changes, in a single batched statement.
+        """
+        params = [
+            {"id": part_id, "passed": passed, "failed": failed}
+            for part_id, (passed, failed) in sorted(self._deltas.items())
+            if passed or failed
+        ]
+        self._deltas.clear()
+        if params:
+            await self._db.session.execute(self._record, params)
+
+    async def find_by_part_id(self, part_id: UUID) -> PartTestStatsDomain:
+        """
+        Return the counters of a part.
+
+        Params:
+        ----
+            part_id: UUID - The id of the part.
+
+        Raises:
+        ----
+            NoEntityFoundError: If the part does not exist.
+
+        Returns:
+        ----
+            PartTestStatsDomain
+        """
+        res = await self._db.session.execute(
+            self._find_by_part_id, {"id": part_id}
+        )
+        row = res.one_or_none()
+        if row is None:
+            raise NoEntityFoundError()
+        return PartTestStatsDomain(*row)
+
+    async def find_all(
+        self, limit: int, offset: int
+    ) -> list[PartTestStatsDomain]:
+        """
+        Return the counters of the parts, in the order of the parts.
+
+        Returns:
+        ----
+            list[PartTestStatsDomain]
+        """
+        res = await self._db.session.execute(
+            self._find_all, {"limit": limit, "offset": offset}
         )
+        return [PartTestStatsDomain(*row) for row in res]
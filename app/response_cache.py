@@ -0,0 +1,341 @@
+"""
+Module for the in-process cache of the list responses.
+"""
+import asyncio
+from collections import OrderedDict
+from logging import getLogger
+from time import monotonic
+from typing import Callable, Collection, Iterable, Mapping, NamedTuple
+from urllib.parse import parse_qsl
+
+from starlette.requests import HTTPConnection
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.config import Settings
+from app.models import Base
+from app.responses import etag_matches
+
+logger = getLogger(__name__)
+
+TCacheKey = tuple[str, tuple[tuple[str, str], ...]]
+
+
+class CachedResponse(NamedTuple):
+    """
+    Represents a serialized response.
+    """
+
+    status: int
+    headers: list[tuple[bytes, bytes]]
+    body: bytes
+
+
+class CacheEntry:
+    """
+    Represents a cached response, the entity type it was built from and
+    its expiry.
+    """
+
+    def __init__(
+        self,
+        response: CachedResponse,
+        entity_type: type[Base],
+        expires_at: float,
+    ) -> None:
+        self.response = response
+        self.entity_type = entity_type
+        self.expires_at = expires_at
+        self.refreshing = False
+
+
+class ResponseCache:
+    """
+    A bounded cache of serialized responses with a TTL and LRU eviction.
+
+    The entries are tagged with the entity type they were built from and
+    invalidated when a unit of work saves changes to this type. An entry
+    read in the last REFRESH_AHEAD seconds of its life is flagged once
+    for refresh, so that hot entries are rebuilt before they expire.
+
+    Every invalidation bumps the generation of the entity type, a response
+    built from an older generation is not stored.
+
+    The cache only sees the writes of this process.
+    """
+
+    def __init__(
+        self,
+        max_size: int = 1024,
+        ttl: float = 5.0,
+        refresh_ahead: float = 1.0,
+        clock: Callable[[], float] = monotonic,
+    ) -> None:
+        self._max_size = max_size
+        self._ttl = ttl
+        self._refresh_ahead = refresh_ahead
+        self._clock = clock
+        self._entries: OrderedDict[TCacheKey, CacheEntry] = OrderedDict()
+        self._generations: dict[type[Base], int] = {}
+
+    @property
+    def enabled(self) -> bool:
+        return self._max_size > 0 and self._ttl > 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def init_app(self, settings: Settings) -> None:
+        """
+        Configures the cache and forgets the cached responses.
+
+        Args:
+            settings (Settings): The settings sizing the cache.
+        """
+        self._max_size = settings.RESPONSE_CACHE_SIZE
+        self._ttl = settings.RESPONSE_CACHE_TTL
+        self._refresh_ahead = settings.RESPONSE_CACHE_REFRESH_AHEAD
+        self.clear()
+
+    def clear(self) -> None:
+        """
+        Forgets the cached responses.
+        """
+        self._entries.clear()
+
+    def generation(self, entity_type: type[Base]) -> int:
+        """
+        Returns the number of invalidations of an entity type.
+
+        Args:
+            entity_type (type[Base]): The entity type.
+
+        Returns:
+            int: The current generation.
+        """
+        return self._generations.get(entity_type, 0)
+
+    def get(self, key: TCacheKey) -> tuple[CachedResponse, bool] | None:
+        """
+        Returns a cached response.
+
+        Args:
+            key (TCacheKey): The route and the sorted query params.
+
+        Returns:
+            tuple[CachedResponse, bool] | None: The response and whether
+                the caller should refresh it, None if it is not cached.
+        """
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        now = self._clock()
+        if now >= entry.expires_at:
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        refresh = (
+            not entry.refreshing
+            and now >= entry.expires_at - self._refresh_ahead
+        )
+        if refresh:
+            entry.refreshing = True
+        return entry.response, refresh
+
+    def put(
+        self,
+        key: TCacheKey,
+        entity_type: type[Base],
+        response: CachedResponse,
+        generation: int,
+    ) -> None:
+        """
+        Caches a response, unless the entity type was invalidated since
+        the response was built.
+
+        Args:
+            key (TCacheKey): The route and the sorted query params.
+            entity_type (type[Base]): The entity type of the response.
+            response (CachedResponse): The response.
+            generation (int): The generation of the entity type when the
+                response was built.
+        """
+        if generation != self.generation(entity_type):
+            return
+        self._entries[key] = CacheEntry(
+            response, entity_type, self._clock() + self._ttl
+        )
+        self._entries.move_to_end(key)
+        while len(self._entries) > self._max_size:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, entity_types: Iterable[type[Base]]) -> None:
+        """
+        Removes the responses built from the given entity types.
+
+        Args:
+            entity_types (Iterable[type[Base]]): The modified entity types.
+        """
+        entity_types = set(entity_types)
+        if not entity_types:
+            return
+        for entity_type in entity_types:
+            self._generations[entity_type] = self.generation(entity_type) + 1
+        for key in [
+            key
+            for key, entry in self._entries.items()
+            if entry.entity_type in entity_types
+        ]:
+            del self._entries[key]
+
+
+async def _empty_receive() -> Message:
+    return {"type": "http.request", "body": b"", "more_body": False}
+
+
+class ResponseCacheMiddleware:
+    """
+    Answers the GET requests of the cached routes from the cache,
+    before any dependency, and so any database session, is set up.
+
+    The streamed responses and the requests carrying one of the bypass
+    cookies are neither answered from nor stored in the cache.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        cache: ResponseCache,
+        routes: Mapping[str, type[Base]],
+        bypass_cookies: Collection[str] = (),
+    ) -> None:
+        self._app = app
+        self._cache = cache
+        self._routes = routes
+        self._bypass_cookies = bypass_cookies
+        self._refreshes: set[asyncio.Task[None]] = set()
+
+    async def __call__(
+        self, scope: Scope, receive: Receive, send: Send
+    ) -> None:
+        entity_type = self._cached_entity_type(scope)
+        if entity_type is None:
+            await self._app(scope, receive, send)
+            return
+        query = parse_qsl(
+            scope["query_string"].decode("latin-1"), keep_blank_values=True
+        )
+        if any(name == "stream" for name, _ in query):
+            await self._app(scope, receive, send)
+            return
+        key: TCacheKey = (scope["path"], tuple(sorted(query)))
+        cached = self._cache.get(key)
+        if cached is None:
+            await self._call(scope, receive, send, key, entity_type)
+            return
+        response, refresh = cached
+        if refresh:
+            task = asyncio.create_task(
+                self._call(dict(scope), _empty_receive, None, key, entity_type)
+            )
+            self._refreshes.add(task)
+            task.add_done_callback(self._refreshes.discard)
+        await self._send(send, response, self._if_none_match(scope))
+
+    def _cached_entity_type(self, scope: Scope) -> type[Base] | None:
+        """
+        Returns the entity type of a cacheable request, None otherwise.
+        """
+        if scope["type"] != "http" or scope["method"] != "GET":
+            return None
+        if not self._cache.enabled:
+            return None
+        entity_type = self._routes.get(scope["path"])
+        if entity_type is None:
+            return None
+        cookies = HTTPConnection(scope).cookies
+        if any(cookie in cookies for cookie in self._bypass_cookies):
+            return None
+        return entity_type
+
+    async def _call(
+        self,
+        scope: Scope,
+        receive: Receive,
+        send: Send | None,
+        key: TCacheKey,
+        entity_type: type[Base],
+    ) -> None:
+        """
+        Calls the application and caches its response if successful.
+
+        Without send, the response is only cached, to refresh an entry.
+        """
+        generation = self._cache.generation(entity_type)
+        status = 0
+        headers: list[tuple[bytes, bytes]] = []
+        body = bytearray()
+
+        async def capture(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                headers.extend(
+                    (name, value)
+                    for name, value in message.get("headers", [])
+                    if name.lower() != b"set-cookie"
+                )
+            elif message["type"] == "http.response.body":
+                body.extend(message.get("body", b""))
+            if send is not None:
+                await send(message)
+
+        try:
+            await self._app(scope, receive, capture)
+        except Exception:
+            if send is not None:
+                raise
+            logger.exception("Error refreshing a cached response")
+            return
+        if status == 200:
+            self._cache.put(
+                key,
+                entity_type,
+                CachedResponse(status, headers, bytes(body)),
+                generation,
+            )
+
+    def _if_none_match(self, scope: Scope) -> str | None:
+        """
+        Returns the If-None-Match header of a request, if any.
+        """
+        return HTTPConnection(scope).headers.get("if-none-match")
+
+    async def _send(
+        self,
+        send: Send,
+        response: CachedResponse,
+        if_none_match: str | None,
+    ) -> None:
+        """
+        Sends a cached response, or an empty 304 response if its ETag
+        matches If-None-Match.
+        """
+        etag = dict(response.headers).get(b"etag")
+        if etag is not None and etag_matches(if_none_match, etag.decode()):
+            await send(
+                {
+                    "type": "http.response.start",
+                    "status": 304,
+                    "headers": [(b"etag", etag)],
+                }
+            )
+            await send({"type": "http.response.body", "body": b""})
+            return
+        await send(
+            {
+                "type": "http.response.start",
+                "status": response.status,
+                "headers": response.headers,
+            }
+        )
+        await send({"type": "http.response.body", "body": response.body})
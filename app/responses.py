@@ -0,0 +1,179 @@
+"""
+Module for the responses serializing domains.
+"""
+from datetime import datetime
+from typing import Any, AsyncIterator, Literal, Mapping, Protocol
+from uuid import UUID
+
+import orjson
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+
+TStreamFormat = Literal["json", "ndjson"]
+
+MEDIA_TYPES: dict[TStreamFormat, str] = {
+    "json": "application/json",
+    "ndjson": "application/x-ndjson",
+}
+
+# Size above which the buffered rows are sent as one chunk of the body.
+CHUNK_SIZE = 64 * 1024
+
+
+def make_etag(name: str, version: int) -> str:
+    """
+    Returns the strong entity tag of a response built from a table version.
+
+    Args:
+        name (str): The name of the table.
+        version (int): The version of the table.
+
+    Returns:
+        str: The quoted entity tag.
+    """
+    return f'"{name}-{version}"'
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """
+    Tells whether an If-None-Match header matches an entity tag,
+    with the weak comparison of RFC 9110.
+
+    Args:
+        if_none_match (str | None): The If-None-Match header, if any.
+        etag (str): The entity tag of the current representation.
+
+    Returns:
+        bool: True if the client already has the representation.
+    """
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return any(
+        tag.strip().removeprefix("W/") == etag.removeprefix("W/")
+        for tag in if_none_match.split(",")
+    )
+
+
+def not_modified(etag: str) -> Response:
+    """
+    Creates an empty 304 Not Modified response.
+
+    Args:
+        etag (str): The entity tag of the current representation.
+
+    Returns:
+        Response: The response.
+    """
+    return Response(status_code=304, headers={"ETag": etag})
+
+
+class SerializableDomain(Protocol):
+    def to_dict(self) -> Mapping[str, Any]:
+        """Converts the domain to a dict"""
+
+
+def _default(obj: Any) -> Any:
+    """
+    Serializes the objects orjson does not know, i.e. the domains, the
+    UUID subclasses, such as the UUIDs returned by asyncpg, and the
+    datetimes, which are sent as str() formats them, e.g.
+    "2021-01-01 00:00:00", rather than in orjson's ISO 8601 format.
+    """
+    if isinstance(obj, (UUID, datetime)):
+        return str(obj)
+    try:
+        return obj.to_dict()
+    except AttributeError:
+        raise TypeError(f"Type is not JSON serializable: {type(obj)}")
+
+
+def dumps(content: Any) -> bytes:
+    """
+    Serializes content made of JSON values and domains.
+
+    The domains are serialized from their to_dict(), whose UUIDs and
+    timestamps are formatted by str(), in C, rather than by a callback
+    each, see benchmarks.bench_responses.
+
+    Args:
+        content (Any): The content to serialize.
+
+    Returns:
+        bytes: The JSON document.
+    """
+    return orjson.dumps(
+        content, default=_default, option=orjson.OPT_PASSTHROUGH_DATETIME
+    )
+
+
+class DomainJSONResponse(JSONResponse):
+    """
+    JSON response serializing its content, domains included, with orjson.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+async def _iter_json_array(
+    domains: AsyncIterator[SerializableDomain],
+) -> AsyncIterator[bytes]:
+    """
+    Serializes the domains as the items of a JSON array.
+    """
+    separator = b"["
+    async for domain in domains:
+        yield separator + dumps(domain)
+        separator = b","
+    yield b"[]" if separator == b"[" else b"]"
+
+
+async def _iter_ndjson(
+    domains: AsyncIterator[SerializableDomain],
+) -> AsyncIterator[bytes]:
+    """
+    Serializes the domains as newline-delimited JSON.
+    """
+    async for domain in domains:
+        yield dumps(domain) + b"\n"
+
+
+async def _iter_chunks(
+    fragments: AsyncIterator[bytes],
+) -> AsyncIterator[bytes]:
+    """
+    Groups the serialized fragments into chunks of about CHUNK_SIZE bytes.
+    """
+    buffer = bytearray()
+    async for fragment in fragments:
+        buffer += fragment
+        if len(buffer) >= CHUNK_SIZE:
+            yield bytes(buffer)
+            buffer.clear()
+    if buffer:
+        yield bytes(buffer)
+
+
+def stream_domains(
+    domains: AsyncIterator[SerializableDomain], format: TStreamFormat
+) -> StreamingResponse:
+    """
+    Creates a response streaming the domains as they are fetched.
+
+    Args:
+        domains (AsyncIterator[SerializableDomain]): The domains to send.
+        format (TStreamFormat): "json" for a JSON array,
+            "ndjson" for newline-delimited JSON.
+
+    Returns:
+        StreamingResponse: A chunked response of the serialized domains.
+    """
+    fragments = (
+        _iter_json_array(domains)
+        if format == "json"
+        else _iter_ndjson(domains)
+    )
+    return StreamingResponse(
+        _iter_chunks(fragments), media_type=MEDIA_TYPES[format]
+    )
@@ -0,0 +1,82 @@
+"""
+Module for the check of the database schema revision.
+
+The schema is only created and migrated by alembic, e.g. by
+`alembic upgrade head` in start_app.sh. At startup, the application compares
+the revision stamped by alembic with the head of the migrations it ships
+with, in a single query and without any DDL.
+"""
+from functools import cache
+from logging import getLogger
+from pathlib import Path
+
+from alembic.script import ScriptDirectory
+from sqlalchemy import text
+from sqlalchemy.exc import ProgrammingError
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine
+
+from app.exceptions import SchemaVersionError
+
+logger = getLogger(__name__)
+
+MIGRATIONS_PATH = Path(__file__).resolve().parent.parent / "alembic"
+
+REVISION_QUERY = text("SELECT version_num FROM alembic_version")
+
+
+@cache
+def expected_revisions() -> frozenset[str]:
+    """
+    Returns the head revisions of the migrations.
+
+    Returns:
+        frozenset[str]: The revisions the database is expected to be at.
+    """
+    return frozenset(ScriptDirectory(str(MIGRATIONS_PATH)).get_heads())
+
+
+async def find_revisions(conn: AsyncConnection) -> frozenset[str]:
+    """
+    Returns the revisions stamped in the database.
+
+    Args:
+        conn (AsyncConnection): A connection to the database.
+
+    Returns:
+        frozenset[str]: The revisions, empty if the database was never
+            migrated.
+    """
+    try:
+        res = await conn.execute(REVISION_QUERY)
+    except ProgrammingError:
+        return frozenset()
+    return frozenset(res.scalars())
+
+
+async def check_schema(engine: AsyncEngine, mode: str = "error") -> None:
+    """
+    Checks that the database schema is at the head of the migrations.
+
+    Args:
+        engine (AsyncEngine): The engine of the database.
+        mode (str): "error" to raise on a drift, "warn" to log it,
+            "off" to skip the check.
+
+    Raises:
+        SchemaVersionError: If the schema is not at the expected revision
+            in "error" mode.
+    """
+    if mode == "off":
+        return
+    expected = expected_revisions()
+    async with engine.connect() as conn:
+        found = await find_revisions(conn)
+    if found == expected:
+        return
+    message = (
+        f"Database schema at revision {', '.join(sorted(found)) or 'none'}, "
+        f"expected {', '.join(sorted(expected))}: run `alembic upgrade head`"
+    )
+    if mode == "error":
+        raise SchemaVersionError(message)
+    logger.warning(message)
@@ -1,10 +1,39 @@
+import json
 from datetime import datetime
-from typing import Any
+from typing import Any, Callable, Iterator
 from uuid import UUID
 
 from pydantic import BaseModel
 
 
+class JsonObject:
+    """
+    A JSON object, given as a JSON document in a query param.
+
+    Unlike Json, an already parsed dict is accepted as well, and the type
+    stays a scalar query param for FastAPI.
+    """
+
+    @classmethod
+    def __get_validators__(cls) -> Iterator[Callable[[Any], Any]]:
+        yield cls.validate
+
+    @classmethod
+    def __modify_schema__(cls, field_schema: dict[str, Any]) -> None:
+        field_schema.update(type="string", format="json-string")
+
+    @classmethod
+    def validate(cls, value: Any) -> dict[str, Any]:
+        if isinstance(value, (str, bytes)):
+            try:
+                value = json.loads(value)
+            except ValueError:
+                raise ValueError("Invalid JSON")
+        if not isinstance(value, dict):
+            raise ValueError("Must be a JSON object")
+        return value
+
+
 class PartRegistrationDTO(BaseModel):
     name: str
 
@@ -25,3 +54,11 @@ class TestUpdateDTO(BaseModel):
     successful: bool | None
     data: dict[str, Any] | None
     timestamp: datetime | None
+
+
+class TestFilterDTO(BaseModel):
+    part_id: UUID | None
+    successful: bool | None
+    timestamp_from: datetime | None
+    timestamp_to: datetime | None
+    data_contains: JsonObject | None
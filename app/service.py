@@ -1,14 +1,32 @@
 from abc import ABC, abstractmethod
 from datetime import datetime
-from typing import Generic, TypeVar
+from logging import getLogger
+from typing import Any, AsyncIterator, Generic, Sequence, TypeVar
 from uuid import UUID, uuid4
 
 from fastapi import Depends
-
-from app.domains import PartDomain, TestDomain
-from app.exceptions import NoEntityFoundError, NoPartFound
-from app.schemas import PartRegistrationDTO, TestRegistrationDTO, TestUpdateDTO
-from app.unit_of_work import BaseUnitOfWork, TestUnitOfWork
+from sqlalchemy.exc import IntegrityError
+
+from app.domains import PartDomain, PartTestStatsDomain, TestDomain
+from app.exceptions import NoPartFound
+from app.managers import part_index
+from app.pagination import Cursor, Page
+from app.schemas import (
+    PartRegistrationDTO,
+    TestFilterDTO,
+    TestRegistrationDTO,
+    TestUpdateDTO,
+)
+from app.unit_of_work import (
+    BaseUnitOfWork,
+    ReadTestUnitOfWork,
+    TestUnitOfWork,
+)
+
+logger = getLogger(__name__)
+
+# SQLSTATE of a foreign key violation.
+FOREIGN_KEY_VIOLATION = "23503"
 
 TUnitOfWork = TypeVar("TUnitOfWork", bound=BaseUnitOfWork)
 
@@ -67,6 +85,7 @@ class ServiceCreatePart(BaseServiceCreatePart):
         part = self._generate_part(part_dto)
         self._unit_of_work.part_repository.add(part)
         await self._unit_of_work.save()
+        part_index.add(part.id)
         return part
 
     def _generate_part(self, part_dto: PartRegistrationDTO) -> PartDomain:
@@ -104,25 +123,155 @@ class BaseServiceCreateTest(BaseService[TestUnitOfWork]):
     async def create_test(self, test_dto: TestRegistrationDTO) -> TestDomain:
         """Not implemented yet"""
 
+    @abstractmethod
+    async def create_tests(
+        self, test_dtos: list[TestRegistrationDTO]
+    ) -> list[TestDomain | None]:
+        """Not implemented yet"""
+
 
 class ServiceCreateTest(BaseServiceCreateTest):
+    # Insert the test without looking the part up first, the foreign key
+    # of the test rejects unknown parts.
+    optimistic = True
+
     async def create_test(self, test_dto: TestRegistrationDTO) -> TestDomain:
         """
         Creates a new test using the provided TestRegistrationDTO.
 
+        In optimistic mode, the test is inserted right away and the foreign
+        key of the test rejects an unknown part.
+
         Args:
             test_dto (TestRegistrationDTO):
                 The DTO containing the information for the new test.
 
+        Raises:
+            NoPartFound: If the part does not exist.
+
         Returns:
-            None
+            TestDomain: The created test.
         """
-        await self._validate_part_id(test_dto.part_id)
+        if not self.optimistic:
+            await self._validate_part_id(test_dto.part_id)
         test = self._generate_test(test_dto)
         self._unit_of_work.test_repository.add(test)
-        await self._unit_of_work.save()
+        self._record_test(test)
+        await self._save_test()
+        part_index.remember(test.part_id)
         return test
 
+    async def create_tests(
+        self, test_dtos: list[TestRegistrationDTO]
+    ) -> list[TestDomain | None]:
+        """
+        Creates the tests of the provided TestRegistrationDTOs in a single
+        transaction.
+
+        The part ids missing from the part index are validated with one
+        query and the tests whose part does not exist are skipped. If a
+        cached part was deleted in the meantime, the foreign key rejects
+        the batch: the part ids are then validated again, locked until the
+        commit, and the remaining tests are saved.
+
+        Args:
+            test_dtos (list[TestRegistrationDTO]):
+                The DTOs containing the information for the new tests.
+
+        Returns:
+            list[TestDomain | None]:
+                The created tests, in the order of the DTOs,
+                None where the part does not exist.
+        """
+        part_ids = await self._find_existing_part_ids(
+            {test_dto.part_id for test_dto in test_dtos}
+        )
+        tests = [
+            self._generate_test(test_dto)
+            if test_dto.part_id in part_ids
+            else None
+            for test_dto in test_dtos
+        ]
+        try:
+            await self._save_tests(tests)
+        except IntegrityError as e:
+            if not _is_foreign_key_violation(e):
+                raise
+            tests = await self._revalidate_tests(tests)
+            await self._save_tests(tests)
+        return tests
+
+    async def _save_tests(self, tests: list[TestDomain | None]) -> None:
+        """
+        Saves the created tests, if any.
+
+        Args:
+            tests (list[TestDomain | None]): The tests, None where skipped.
+        """
+        created = [test for test in tests if test is not None]
+        if created:
+            self._unit_of_work.test_repository.add_all(created)
+            for test in created:
+                self._record_test(test)
+            await self._unit_of_work.save()
+
+    async def _revalidate_tests(
+        self, tests: list[TestDomain | None]
+    ) -> list[TestDomain | None]:
+        """
+        Skips the tests whose part no longer exists, after the foreign key
+        rejected them.
+
+        The changes of the failed save are discarded and the part ids are
+        looked up in the database, bypassing the part index. The parts found
+        are locked against deletion until the tests are committed.
+
+        Args:
+            tests (list[TestDomain | None]): The tests, None where skipped.
+
+        Returns:
+            list[TestDomain | None]: The tests, None where the part does
+                not exist.
+        """
+        self._unit_of_work.discard()
+        part_ids = {test.part_id for test in tests if test is not None}
+        for part_id in part_ids:
+            part_index.discard(part_id)
+        found = await self._unit_of_work.part_repository.find_existing_ids(
+            part_ids, lock=True
+        )
+        for part_id in found:
+            part_index.remember(part_id)
+        return [
+            test if test is not None and test.part_id in found else None
+            for test in tests
+        ]
+
+    def _record_test(self, test: TestDomain) -> None:
+        """
+        Records a created test in the counters of its part.
+
+        Args:
+            test (TestDomain): The created test.
+        """
+        self._unit_of_work.part_test_stats_repository.record(
+            test.part_id, test.successful
+        )
+
+    async def _save_test(self) -> None:
+        """
+        Saves the created test.
+
+        Raises:
+            NoPartFound: If the foreign key rejected the part of the test.
+        """
+        try:
+            await self._unit_of_work.save()
+        except IntegrityError as e:
+            if _is_foreign_key_violation(e):
+                raise NoPartFound() from e
+            raise
+
     async def _validate_part_id(self, part_id: UUID) -> None:
         """
         Validates that the provided part_id exists in the database.
@@ -130,14 +279,38 @@ class ServiceCreateTest(BaseServiceCreateTest):
         Args:
             part_id (uuid4): The part_id to validate.
 
-        Returns:
-            bool: True if the part_id exists, False otherwise.
+        Raises:
+            NoPartFound: If the part does not exist.
         """
-        try:
-            await self._unit_of_work.part_repository.find_by_id(part_id)
-        except NoEntityFoundError:
+        if part_id not in await self._find_existing_part_ids({part_id}):
             raise NoPartFound()
 
+    async def _find_existing_part_ids(self, part_ids: set[UUID]) -> set[UUID]:
+        """
+        Returns the subset of the provided part ids that exist.
+
+        Only the ids the part index cannot tell about are queried,
+        the parts found are then remembered by the index.
+
+        Args:
+            part_ids (set[UUID]): The part ids to look for.
+
+        Returns:
+            set[UUID]: The ids of the existing parts.
+        """
+        known = {part_id: part_index.contains(part_id) for part_id in part_ids}
+        unknown = {
+            part_id for part_id, exists in known.items() if exists is None
+        }
+        found = set()
+        if unknown:
+            found = await self._unit_of_work.part_repository.find_existing_ids(
+                unknown
+            )
+            for part_id in found:
+                part_index.remember(part_id)
+        return found | {part_id for part_id, exists in known.items() if exists}
+
     def _generate_test(self, test_dto: TestRegistrationDTO) -> TestDomain:
         """
         Generates a TestDomain object based on the provided TestRegistrationDTO.
@@ -159,13 +332,14 @@ class ServiceCreateTest(BaseServiceCreateTest):
 
 class BaseServiceShowPart(BaseService[TestUnitOfWork]):
     def __init__(
-        self, unit_of_work: TestUnitOfWork = Depends(TestUnitOfWork)
+        self, unit_of_work: TestUnitOfWork = Depends(ReadTestUnitOfWork)
     ) -> None:
         """
         Initializes an instance of MyClass.
 
         Args:
-            unit_of_work (TestUnitOfWork, optional): An instance of TestUnitOfWork. Defaults to Depends(TestUnitOfWork).
+            unit_of_work (TestUnitOfWork, optional): An instance of TestUnitOfWork.
+                Defaults to Depends(ReadTestUnitOfWork), reading from a replica.
         """
         super().__init__(unit_of_work)
 
@@ -173,6 +347,22 @@ class BaseServiceShowPart(BaseService[TestUnitOfWork]):
     async def show_parts(self, limit: int, offset: int) -> list[PartDomain]:
         """Not implemented yet"""
 
+    @abstractmethod
+    def stream_parts(
+        self, limit: int, offset: int
+    ) -> AsyncIterator[PartDomain]:
+        """Not implemented yet"""
+
+    @abstractmethod
+    async def show_parts_page(
+        self, limit: int, cursor: Cursor | None
+    ) -> Page[PartDomain]:
+        """Not implemented yet"""
+
+    @abstractmethod
+    async def parts_version(self) -> int:
+        """Not implemented yet"""
+
 
 class ServiceShowPart(BaseServiceShowPart):
     async def show_parts(self, limit: int, offset: int) -> list[PartDomain]:
@@ -189,29 +379,105 @@ class ServiceShowPart(BaseServiceShowPart):
         )
         return list_parts
 
+    async def stream_parts(
+        self, limit: int, offset: int
+    ) -> AsyncIterator[PartDomain]:
+        """
+        Streams all PartDomain objects without loading them all at once.
+
+        Yields:
+            PartDomain: The next retrieved PartDomain object.
+        """
+        repository = self._unit_of_work.part_repository
+        async for part in repository.stream_all(limit=limit, offset=offset):
+            yield part
+
+    async def show_parts_page(
+        self, limit: int, cursor: Cursor | None
+    ) -> Page[PartDomain]:
+        """
+        Retrieves the page of PartDomain objects following the cursor.
+
+        Args:
+            limit (int): The maximum number of parts of the page.
+            cursor (Cursor | None): The cursor of the previous page.
+
+        Returns:
+            Page[PartDomain]:
+                The retrieved PartDomain objects and the next cursor.
+        """
+        page = await self._unit_of_work.part_repository.find_page(
+            limit=limit, cursor=cursor
+        )
+        return page
+
+    async def parts_version(self) -> int:
+        """
+        Retrieves the version of the parts, which changes with every write.
+
+        Returns:
+            int: The version of the parts.
+        """
+        return await self._unit_of_work.part_repository.find_version()
+
 
 class BaseServiceShowTest(BaseService[TestUnitOfWork]):
     def __init__(
-        self, unit_of_work: TestUnitOfWork = Depends(TestUnitOfWork)
+        self, unit_of_work: TestUnitOfWork = Depends(ReadTestUnitOfWork)
     ) -> None:
         """
         Initializes an instance of MyClass.
 
         Args:
             unit_of_work (TestUnitOfWork, optional):
-                An instance of TestUnitOfWork. Defaults to Depends(TestUnitOfWork).
+                An instance of TestUnitOfWork.
+                Defaults to Depends(ReadTestUnitOfWork), reading from a replica.
         """
         super().__init__(unit_of_work)
 
     @abstractmethod
-    async def show_tests(self, limit: int, offset: int) -> list[TestDomain]:
+    async def show_tests(
+        self, limit: int, offset: int, filters: TestFilterDTO | None = None
+    ) -> list[TestDomain]:
+        """Not implemented yet"""
+
+    @abstractmethod
+    def stream_tests(
+        self, limit: int, offset: int, filters: TestFilterDTO | None = None
+    ) -> AsyncIterator[TestDomain]:
+        """Not implemented yet"""
+
+    @abstractmethod
+    async def show_tests_page(
+        self,
+        limit: int,
+        cursor: Cursor | None,
+        filters: TestFilterDTO | None = None,
+    ) -> Page[TestDomain]:
+        """Not implemented yet"""
+
+    @abstractmethod
+    def export_tests(
+        self, filters: TestFilterDTO | None = None
+    ) -> AsyncIterator[Sequence[Sequence[Any]]]:
+        """Not implemented yet"""
+
+    @abstractmethod
+    async def tests_version(self) -> int:
         """Not implemented yet"""
 
 
 class ServiceShowTest(BaseServiceShowTest):
-    async def show_tests(self, limit: int, offset: int) -> list[TestDomain]:
+    async def show_tests(
+        self, limit: int, offset: int, filters: TestFilterDTO | None = None
+    ) -> list[TestDomain]:
         """
-        Retrieves all TestDomain objects
+        Retrieves all TestDomain objects matching the filters.
+
+        Args:
+            limit (int): The maximum number of tests to retrieve.
+            offset (int): The number of tests to skip.
+            filters (TestFilterDTO | None): The filters of the tests.
 
         Returns:
             list[TestDomain]:
@@ -219,10 +485,150 @@ class ServiceShowTest(BaseServiceShowTest):
         """
 
         list_tests = await self._unit_of_work.test_repository.find_all(
-            limit=limit, offset=offset
+            limit=limit, offset=offset, filters=self._get_filters(filters)
         )
         return list_tests
 
+    async def stream_tests(
+        self, limit: int, offset: int, filters: TestFilterDTO | None = None
+    ) -> AsyncIterator[TestDomain]:
+        """
+        Streams all TestDomain objects matching the filters without loading
+        them all at once.
+
+        Yields:
+            TestDomain: The next retrieved TestDomain object.
+        """
+        repository = self._unit_of_work.test_repository
+        async for test in repository.stream_all(
+            limit=limit, offset=offset, filters=self._get_filters(filters)
+        ):
+            yield test
+
+    async def show_tests_page(
+        self,
+        limit: int,
+        cursor: Cursor | None,
+        filters: TestFilterDTO | None = None,
+    ) -> Page[TestDomain]:
+        """
+        Retrieves the page of TestDomain objects matching the filters
+        following the cursor.
+
+        Args:
+            limit (int): The maximum number of tests of the page.
+            cursor (Cursor | None): The cursor of the previous page.
+            filters (TestFilterDTO | None): The filters of the tests.
+
+        Returns:
+            Page[TestDomain]:
+                The retrieved TestDomain objects and the next cursor.
+        """
+        page = await self._unit_of_work.test_repository.find_page(
+            limit=limit, cursor=cursor, filters=self._get_filters(filters)
+        )
+        return page
+
+    async def export_tests(
+        self, filters: TestFilterDTO | None = None
+    ) -> AsyncIterator[Sequence[Sequence[Any]]]:
+        """
+        Streams the rows of all the tests matching the filters, batch by
+        batch, without building TestDomain objects.
+
+        Args:
+            filters (TestFilterDTO | None): The filters of the tests.
+
+        Yields:
+            Sequence[Sequence[Any]]: The next batch of rows, holding the id,
+                part_id, timestamp, successful and data, as JSON text, of
+                the tests.
+        """
+        repository = self._unit_of_work.test_repository
+        async for rows in repository.stream_rows(self._get_filters(filters)):
+            yield rows
+
+    def _get_filters(self, filters: TestFilterDTO | None) -> dict[str, Any]:
+        """
+        Get the values of the filters provided in the DTO.
+
+        Args:
+            filters (TestFilterDTO | None): The filters of the tests.
+
+        Returns:
+            dict[str, Any]: The values of the filters by name.
+        """
+        if filters is None:
+            return {}
+        return filters.dict(exclude_none=True)
+
+    async def tests_version(self) -> int:
+        """
+        Retrieves the version of the tests, which changes with every write.
+
+        Returns:
+            int: The version of the tests.
+        """
+        return await self._unit_of_work.test_repository.find_version()
+
+
+class BaseServiceShowPartStats(BaseService[TestUnitOfWork]):
+    def __init__(
+        self, unit_of_work: TestUnitOfWork = Depends(ReadTestUnitOfWork)
+    ) -> None:
+        """
+        Initializes an instance of MyClass.
+
+        Args:
+            unit_of_work (TestUnitOfWork, optional): An instance of TestUnitOfWork.
+                Defaults to Depends(ReadTestUnitOfWork), reading from a replica.
+        """
+        super().__init__(unit_of_work)
+
+    @abstractmethod
+    async def show_part_stats(self, part_id: UUID) -> PartTestStatsDomain:
+        """Not implemented yet"""
+
+    @abstractmethod
+    async def show_parts_stats(
+        self, limit: int, offset: int
+    ) -> list[PartTestStatsDomain]:
+        """Not implemented yet"""
+
+
+class ServiceShowPartStats(BaseServiceShowPartStats):
+    async def show_part_stats(self, part_id: UUID) -> PartTestStatsDomain:
+        """
+        Retrieves the test counters of a part.
+
+        Args:
+            part_id (UUID): The id of the part.
+
+        Raises:
+            NoEntityFoundError: If the part does not exist.
+
+        Returns:
+            PartTestStatsDomain: The counters of the part.
+        """
+        repository = self._unit_of_work.part_test_stats_repository
+        return await repository.find_by_part_id(part_id)
+
+    async def show_parts_stats(
+        self, limit: int, offset: int
+    ) -> list[PartTestStatsDomain]:
+        """
+        Retrieves the test counters of the parts, in the order of the parts.
+
+        Args:
+            limit (int): The maximum number of parts to retrieve.
+            offset (int): The number of parts to skip.
+
+        Returns:
+            list[PartTestStatsDomain]: The counters of the parts.
+        """
+        repository = self._unit_of_work.part_test_stats_repository
+        return await repository.find_all(limit, offset)
+
 
 class BaseServiceDeletePart(BaseService[TestUnitOfWork]):
     def __init__(
@@ -250,12 +656,23 @@ class ServiceDeletePart(BaseServiceDeletePart):
             id (UUID):
                 The id of the part to be deleted.
 
+        The archived tests of the part are hidden once its deletion is
+        committed, and removed from the segments by the next archiving,
+        which also removes them if hiding them failed.
+
+        Raises:
+            NoEntityFoundError: If the part does not exist.
+
         Returns:
             None
         """
-        part = await self._unit_of_work.part_repository.find_by_id(id)
-        await self._unit_of_work.part_repository.remove(part)
+        await self._unit_of_work.part_repository.delete_by_id(id)
         await self._unit_of_work.save()
+        part_index.discard(id)
+        try:
+            await self._unit_of_work.test_repository.delete_archived([id])
+        except Exception:
+            logger.exception("Error hiding the archived tests of %s", id)
 
 
 class BaseServiceDeleteTest(BaseService[TestUnitOfWork]):
@@ -284,11 +701,16 @@ class ServiceDeleteTest(BaseServiceDeleteTest):
             id (UUID):
                 The id of the test to be deleted.
 
+        Raises:
+            NoEntityFoundError: If the test does not exist.
+
         Returns:
             None
         """
-        test = await self._unit_of_work.test_repository.find_by_id(id)
-        await self._unit_of_work.test_repository.remove(test)
+        test = await self._unit_of_work.test_repository.delete_by_id(id)
+        self._unit_of_work.part_test_stats_repository.record(
+            test.part_id, test.successful, -1
+        )
         await self._unit_of_work.save()
 
 
@@ -318,107 +740,67 @@ class ServiceUpdateTest(BaseServiceChangeTest):
         """
         Updates a test using the provided TestUpdateDTO.
 
+        Only the fields given in the DTO are written, in a single
+        UPDATE ... RETURNING statement. When the result is given, the
+        statement also returns the previous one, so that the counters of
+        the part only move when the result actually flips.
+
         Args:
             dto (TestUpdateDTO):
                 The DTO containing the information for the test update.
 
-        Returns:
-            None
-        """
-        test = await self._get_test(dto)
-        await self._update_data(test, dto)
-        await self._save(test)
-        return test
-
-    async def _update_data(self, test: TestDomain, dto: TestUpdateDTO) -> None:
-        """
-        Update the data for a given test using the provided DTO.
-
-        Args:
-            test: The test object to update.
-            dto: The DTO containing the updated data.
+        Raises:
+            NoEntityFoundError: If the test does not exist.
 
         Returns:
-            None
-        """
-        await self._update_extra(test, dto)
-        await self._update_state(test, dto)
-        await self._update_timestamp(test, dto)
-
-    async def _save(self, test: TestDomain) -> None:
-        """
-        Saves the given TestDomain object by modifying it in the test repository and saving the changes.
-
-        Args:
-            test (TestDomain): The TestDomain object to be saved.
-
-        Returns:
-            None
-        """
-        await self._unit_of_work.test_repository.modify(test)
+            TestDomain: The updated test.
+        """
+        values = self._get_values(dto)
+        repository = self._unit_of_work.test_repository
+        if "successful" in values:
+            test, previous = await repository.update_result_by_id(
+                dto.id, values
+            )
+            self._flip_result(test, previous)
+        else:
+            test = await repository.update_by_id(dto.id, values)
         await self._unit_of_work.save()
+        return test
 
-    async def _update_extra(
-        self, test: TestDomain, dto: TestUpdateDTO
-    ) -> None:
+    def _flip_result(self, test: TestDomain, previous: bool) -> None:
         """
-        Update the extra information of a test.
+        Moves the counters of the part of a test if its result changed.
 
         Args:
-            test (TestDomain): The test domain object to update.
-            dto (TestUpdateDTO): The DTO containing the updated data.
-
-        Returns:
-            None
+            test (TestDomain): The updated test.
+            previous (bool): The result of the test before the update.
         """
-        if dto.data:
-            test.set_data(dto.data)
+        if test.successful is not previous:
+            stats = self._unit_of_work.part_test_stats_repository
+            stats.record(test.part_id, test.successful)
+            stats.record(test.part_id, previous, -1)
 
-    async def _update_state(
-        self, test: TestDomain, dto: TestUpdateDTO
-    ) -> None:
+    def _get_values(self, dto: TestUpdateDTO) -> dict[str, Any]:
         """
-        Update the state of the test based on the provided DTO.
+        Get the new values of the fields provided in the DTO.
 
         Args:
-            test (TestDomain): The test domain object to update.
-            dto (TestUpdateDTO): The DTO containing the updated information.
+            dto (TestUpdateDTO): The DTO containing the updated data.
 
         Returns:
-            None
-        """
-        if dto.successful:
-            test.set_success_state(dto.successful)
-
-    async def _update_timestamp(
-        self, test: TestDomain, dto: TestUpdateDTO
-    ) -> None:
+            dict[str, Any]: The new values by field name.
         """
-        Update the timestamp of a test.
-
-        Args:
-            test (TestDomain): The test domain object.
-            dto (TestUpdateDTO): The DTO containing the updated timestamp.
+        return dto.dict(exclude={"id"}, exclude_none=True)
 
-        Returns:
-            None
-        """
-        if dto.timestamp:
-            test.set_timestamp(dto.timestamp)
 
-    async def _get_test(
-        self,
-        dto: TestUpdateDTO,
-    ) -> TestDomain:
-        """
-        Retrieves a test using the provided id.
+def _is_foreign_key_violation(error: IntegrityError) -> bool:
+    """
+    Tells whether an integrity error is a foreign key violation.
 
-        Args:
-            id (UUID):
-                The id of the test to be retrieved.
+    Args:
+        error (IntegrityError): The error raised by the database.
 
-        Returns:
-            TestDomain
-        """
-        test = await self._unit_of_work.test_repository.find_by_id(dto.id)
-        return test
+    Returns:
+        bool: True if a foreign key was violated.
+    """
+    return getattr(error.orig, "sqlstate", None) == FOREIGN_KEY_VIOLATION
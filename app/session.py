@@ -2,7 +2,7 @@
 This module defines the Session Manager and related classes.
 """
 from abc import ABC, abstractmethod
-from typing import Literal, NamedTuple
+from typing import Any, Iterable, Literal, NamedTuple
 
 from app.models import Base
 
@@ -16,6 +16,16 @@ class SessionEntity(NamedTuple):
     operation: Literal["add", "remove"]
 
 
+class SessionRows(NamedTuple):
+    """
+    Represents the rows of an entity type enlisted for insertion in the
+    session, without entities.
+    """
+
+    columns: tuple[str, ...]
+    rows: list[tuple[Any, ...]]
+
+
 TSession = list[SessionEntity]
 
 
@@ -29,6 +39,16 @@ class SessionBase(ABC):
     def session(self) -> TSession:
         """Returns the session entities."""
 
+    @property
+    @abstractmethod
+    def touched(self) -> set[type[Base]]:
+        """Returns the entity types modified in the session."""
+
+    @property
+    @abstractmethod
+    def inserts(self) -> dict[type[Base], SessionRows]:
+        """Returns the rows to insert by entity type."""
+
     @abstractmethod
     def remove(self, item: Base) -> None:
         """Removes an entity from the session."""
@@ -37,6 +57,19 @@ class SessionBase(ABC):
     def add(self, item: Base) -> None:
         """Adds an entity to the session."""
 
+    @abstractmethod
+    def insert(
+        self,
+        entity_type: type[Base],
+        columns: tuple[str, ...],
+        rows: Iterable[tuple[Any, ...]],
+    ) -> None:
+        """Adds rows to insert to the session."""
+
+    @abstractmethod
+    def touch(self, *entity_types: type[Base]) -> None:
+        """Marks entity types as modified."""
+
 
 class Session(SessionBase):
     """
@@ -45,24 +78,44 @@ class Session(SessionBase):
     Attributes:
     ----
         _session (TSession): The list of session entities.
+        _touched (set[type[Base]]): The entity types modified in the session,
+            by the session entities or by statements run directly.
+        _inserts (dict[type[Base], SessionRows]): The rows to insert by
+            entity type.
 
     Methods:
     ----
         session() -> TSession: Returns the session entities.
+        touched() -> set[type[Base]]: Returns the modified entity types.
+        inserts() -> dict[type[Base], SessionRows]: Returns the rows to insert.
         add(item: Base) -> None: Adds an entity to the session.
         remove(item: Base) -> None: Removes an entity from the session.
+        insert(entity_type, columns, rows) -> None: Adds rows to insert.
+        touch(*entity_types: type[Base]) -> None: Marks entity types as modified.
     """
 
     _session: TSession
 
     def __init__(self) -> None:
         self._session = []
+        self._touched: set[type[Base]] = set()
+        self._inserts: dict[type[Base], SessionRows] = {}
 
     @property
     def session(self) -> TSession:
         """Returns the session entities."""
         return self._session
 
+    @property
+    def touched(self) -> set[type[Base]]:
+        """Returns the entity types modified in the session."""
+        return self._touched
+
+    @property
+    def inserts(self) -> dict[type[Base], SessionRows]:
+        """Returns the rows to insert by entity type."""
+        return self._inserts
+
     def add(self, item: Base) -> None:
         """
         Adds an entity to the session.
@@ -77,6 +130,7 @@ class Session(SessionBase):
         """
         session_entity = SessionEntity(entity=item, operation="add")
         self._session.append(session_entity)
+        self._touched.add(type(item))
 
     def remove(self, item: Base) -> None:
         """
@@ -92,3 +146,46 @@ class Session(SessionBase):
         """
         session_entity = SessionEntity(entity=item, operation="remove")
         self._session.append(session_entity)
+        self._touched.add(type(item))
+
+    def insert(
+        self,
+        entity_type: type[Base],
+        columns: tuple[str, ...],
+        rows: Iterable[tuple[Any, ...]],
+    ) -> None:
+        """
+        Adds rows to insert to the session, inserted together with the
+        other rows of their entity type.
+
+        Params:
+        ----
+           entity_type (type[Base]): The entity type of the rows.
+           columns (tuple[str, ...]): The columns of the rows, in order.
+           rows (Iterable[tuple[Any, ...]]): The values of the columns.
+
+        Returns:
+        ----
+           None.
+        """
+        pending = self._inserts.get(entity_type)
+        if pending is None:
+            self._inserts[entity_type] = SessionRows(columns, list(rows))
+        else:
+            assert pending.columns == columns
+            pending.rows.extend(rows)
+        self._touched.add(entity_type)
+
+    def touch(self, *entity_types: type[Base]) -> None:
+        """
+        Marks entity types as modified, e.g. by a statement run directly.
+
+        Params:
+        ----
+           entity_types (type[Base]): The modified entity types.
+
+        Returns:
+        ----
+           None.
+        """
+        self._touched.update(entity_types)
@@ -1,13 +1,20 @@
 from abc import ABC, abstractmethod
 from logging import getLogger
+from typing import ClassVar
 
 from fastapi import Depends
+from sqlalchemy import insert
 
 from app.database import Database
-from app.managers import get_db
+from app.managers import get_db, get_read_db, response_cache, test_archive
 from app.models import Base
-from app.repository import PartRepository, TestRepository
+from app.repository import (
+    PartRepository,
+    PartTestStatsRepository,
+    TestRepository,
+)
 from app.session import Session, SessionEntity
+from app.versions import bump_versions
 
 logger = getLogger(__name__)
 
@@ -62,12 +69,26 @@ class BaseUnitOfWork(ABC):
             await self._db.rollback()
             raise e
 
+    def discard(self) -> None:
+        """
+        Forget the pending changes, e.g. after a failed save before
+        enlisting the changes again.
+        """
+        self._session.session.clear()
+        self._session.inserts.clear()
+        self._session.touched.clear()
+
     async def _save(self) -> None:
         """
-        Save all changes persistently.
+        Save all changes persistently, bump the versions of the modified
+        entity types and invalidate their cached responses.
         """
         await self._process_all_entities()
+        await self._flush()
+        await self._bump_versions()
         await self._commit()
+        response_cache.invalidate(self._session.touched)
+        self._session.touched.clear()
 
     async def _process_all_entities(self) -> None:
         """
@@ -135,6 +156,43 @@ class BaseUnitOfWork(ABC):
             await self._db.rollback()
             raise e
 
+    async def _flush(self) -> None:
+        """
+        Write the pending changes, before the versions are bumped so that
+        the version rows are only locked for the rest of the transaction,
+        i.e. the commit.
+        """
+        await self._insert_rows()
+        await self._db.session.flush()
+
+    async def _insert_rows(self) -> None:
+        """
+        Insert the rows enlisted in the session, with one executemany per
+        entity type, the referenced tables first.
+        """
+        inserts = self._session.inserts
+        if not inserts:
+            return
+        tables = [table.name for table in Base.metadata.sorted_tables]
+        conn = await self._db.session.connection()
+        for entity_type, pending in sorted(
+            inserts.items(),
+            key=lambda item: tables.index(item[0].__tablename__),
+        ):
+            await conn.execute(
+                insert(entity_type),
+                [dict(zip(pending.columns, row)) for row in pending.rows],
+            )
+        inserts.clear()
+
+    async def _bump_versions(self) -> None:
+        """
+        Increment the versions of the modified entity types.
+        """
+        if not self._session.touched:
+            return
+        await bump_versions(self._db.session, self._session.touched)
+
     async def _commit(self) -> None:
         """
         Commit changes to the database.
@@ -158,6 +216,11 @@ class AbstractTestUnitOfWork(BaseUnitOfWork):
     def test_repository(self) -> TestRepository:
         """Test Repository"""
 
+    @property
+    @abstractmethod
+    def part_test_stats_repository(self) -> PartTestStatsRepository:
+        """Part Test Stats Repository"""
+
 
 class TestUnitOfWork(AbstractTestUnitOfWork):
     """
@@ -174,8 +237,14 @@ class TestUnitOfWork(AbstractTestUnitOfWork):
             The Part Repository.
         test_repository: TestRepository
             The Test Repository.
+        part_test_stats_repository: PartTestStatsRepository
+            The repository of the test counters of the parts, written
+            when the unit of work is saved.
     """
 
+    # Whether the repositories map rows to domains without loading entities.
+    read_only: ClassVar[bool] = False
+
     def __init__(
         self,
         session: Session = Depends(Session),
@@ -184,11 +253,15 @@ class TestUnitOfWork(AbstractTestUnitOfWork):
         super().__init__(session, db)
 
         self._part_repository = PartRepository(
-            db=self._db, session=self._session
+            db=self._db, session=self._session, read_only=self.read_only
         )
         self._test_repository = TestRepository(
-            db=self._db, session=self._session
+            db=self._db,
+            session=self._session,
+            archive=test_archive if test_archive.enabled else None,
+            read_only=self.read_only,
         )
+        self._part_test_stats_repository = PartTestStatsRepository(db=self._db)
 
     @property
     def part_repository(self) -> PartRepository:
@@ -208,3 +281,44 @@ class TestUnitOfWork(AbstractTestUnitOfWork):
             TestRepository: The test repository object.
         """
         return self._test_repository
+
+    @property
+    def part_test_stats_repository(self) -> PartTestStatsRepository:
+        """
+        Returns the repository of the test counters of the parts.
+
+        Returns:
+            PartTestStatsRepository: The part test stats repository object.
+        """
+        return self._part_test_stats_repository
+
+    def discard(self) -> None:
+        """
+        Forget the pending changes and the recorded test counters.
+        """
+        super().discard()
+        self._part_test_stats_repository.discard()
+
+    async def _flush(self) -> None:
+        """
+        Write the pending changes and the recorded test counters.
+        """
+        await super()._flush()
+        await self._part_test_stats_repository.flush()
+
+
+class ReadTestUnitOfWork(TestUnitOfWork):
+    """
+    Unit of work of the read-only use cases, whose session is bound
+    to a read replica when possible, and whose repositories read rows
+    without loading entities.
+    """
+
+    read_only = True
+
+    def __init__(
+        self,
+        session: Session = Depends(Session),
+        db: Database = Depends(get_read_db),
+    ) -> None:
+        super().__init__(session, db)
@@ -0,0 +1,104 @@
+"""
+Module for the versions of the entity tables.
+
+The version of a table changes with every committed write to it, so that
+a response built from the table can be tagged without reading its rows.
+
+A version is the sum of SHARDS counters. Each transaction increments the
+counter of its connection, so that concurrent writers to the same table
+rarely wait on each other's row lock. The increment is transactional: a
+version only changes once the write is committed, unlike a sequence.
+"""
+from typing import Any, Iterable
+
+from sqlalchemy import BigInteger, bindparam, func, select
+from sqlalchemy.dialects.postgresql import Insert, insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import Base, entity_version
+
+# Number of counters of each version.
+SHARDS = 16
+
+
+def _bump(name: Any) -> Insert:
+    """
+    Returns the statement incrementing the counter of a version picked by
+    the backend of the connection, created at 1.
+    """
+    return (
+        insert(entity_version)
+        .values(name=name, shard=func.pg_backend_pid() % SHARDS, version=1)
+        .on_conflict_do_update(
+            index_elements=[entity_version.c.name, entity_version.c.shard],
+            set_={"version": entity_version.c.version + 1},
+        )
+    )
+
+
+BUMP_VERSION = _bump(bindparam("name"))
+
+FIND_VERSION = select(
+    func.sum(entity_version.c.version).cast(BigInteger)
+).where(entity_version.c.name == bindparam("name"))
+
+
+def version_name(entity_type: type[Base]) -> str:
+    """
+    Returns the name of the version of an entity type, its table name.
+
+    Args:
+        entity_type (type[Base]): The entity type.
+
+    Returns:
+        str: The version name.
+    """
+    return entity_type.__tablename__
+
+
+def bump_version_statement(entity_type: type[Base]) -> Insert:
+    """
+    Returns the statement incrementing the version of an entity type.
+
+    Args:
+        entity_type (type[Base]): The entity type.
+
+    Returns:
+        Insert: The statement, without bound parameters.
+    """
+    return _bump(version_name(entity_type))
+
+
+async def bump_versions(
+    session: AsyncSession, entity_types: Iterable[type[Base]]
+) -> None:
+    """
+    Increments the versions of entity types within the current transaction.
+
+    The counters are locked until the transaction ends, in name order so
+    that concurrent writers sharing a counter do not deadlock.
+
+    Args:
+        session (AsyncSession): The session of the transaction.
+        entity_types (Iterable[type[Base]]): The modified entity types.
+    """
+    names = sorted({version_name(entity_type) for entity_type in entity_types})
+    for name in names:
+        await session.execute(BUMP_VERSION, {"name": name})
+
+
+async def find_version(session: AsyncSession, entity_type: type[Base]) -> int:
+    """
+    Returns the version of an entity type, 0 if it was never written.
+
+    Args:
+        session (AsyncSession): The session to read with.
+        entity_type (type[Base]): The entity type.
+
+    Returns:
+        int: The version.
+    """
+    version = await session.scalar(
+        FIND_VERSION, {"name": version_name(entity_type)}
+    )
+    return version or 0
@@ -0,0 +1,140 @@
+"""
+Benchmark of the construction of test domains from entities.
+
+Compares the domains with a per-instance __dict__, mapped row by row as
+the repositories used to, with the slotted TestDomain built by
+TestEntityDomainMapper.to_domains, which interns the part ids of a result
+set. Reports the bytes retained per domain once the entities are freed,
+UUIDs included, and the time to map a result set.
+
+Usage:
+    python -m benchmarks.bench_domains [--rows 10000] [--parts 100]
+"""
+import argparse
+import gc
+import random
+import tracemalloc
+from datetime import datetime, timedelta
+from timeit import Timer
+from typing import Any, Callable, Sequence
+from uuid import UUID
+
+from app.mappers import TestEntityDomainMapper
+from app.models import Test
+
+
+class _DictDomain:
+    def __init__(self, id: UUID) -> None:
+        self._id = id
+
+
+class _DictTestDomain(_DictDomain):
+    """
+    A test domain holding its values in a __dict__, as before __slots__.
+    """
+
+    def __init__(
+        self,
+        id: UUID,
+        part_id: UUID,
+        timestamp: datetime,
+        successful: bool,
+        data: dict[Any, Any] | None = None,
+    ) -> None:
+        super().__init__(id)
+        self._part_id = part_id
+        self._timestamp = timestamp
+        self._successful = successful
+        self._data = data
+
+
+def _make_entities(rows: int, parts: int) -> list[Test]:
+    """
+    Returns entities as loaded from the database: every row holds its own
+    UUID object for its part id.
+    """
+    rng = random.Random(0)
+    part_ids = [rng.getrandbits(128) for _ in range(parts)]
+    start = datetime(2020, 1, 1)
+    return [
+        Test(
+            id=UUID(int=rng.getrandbits(128), version=4),
+            part_id=UUID(int=rng.choice(part_ids), version=4),
+            timestamp=start + timedelta(seconds=rng.randrange(10**8)),
+            successful=rng.random() < 0.9,
+            data={"type": "height", "priority": str(rng.randrange(5))},
+        )
+        for _ in range(rows)
+    ]
+
+
+def _dict_domains(entities: Sequence[Test]) -> list[Any]:
+    return [
+        _DictTestDomain(
+            id=entity.id,
+            part_id=entity.part_id,
+            data=entity.data,
+            successful=entity.successful,
+            timestamp=entity.timestamp,
+        )
+        for entity in entities
+    ]
+
+
+def _slotted_domains(entities: Sequence[Test]) -> list[Any]:
+    return TestEntityDomainMapper().to_domains(entities)
+
+
+def _bytes_per_domain(
+    build: Callable[[Sequence[Test]], list[Any]], rows: int, parts: int
+) -> float:
+    """
+    Returns the bytes retained per domain, allocated while loading the
+    entities and building the domains, once the entities are freed.
+
+    The data dicts and timestamps are shared with the entities and
+    counted the same way for both layouts.
+    """
+    gc.collect()
+    tracemalloc.start()
+    entities = _make_entities(rows, parts)
+    domains = build(entities)
+    del entities
+    gc.collect()
+    retained, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    assert len(domains) == rows
+    return retained / rows
+
+
+def _time(
+    build: Callable[[Sequence[Test]], list[Any]],
+    entities: Sequence[Test],
+    repeat: int,
+) -> float:
+    """
+    Returns the best time, in seconds, of mapping the entities once.
+    """
+    timer = Timer(lambda: build(entities))
+    number, _ = timer.autorange()
+    return min(timer.repeat(repeat, number)) / number
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=10_000)
+    parser.add_argument("--parts", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    builds = {"dict": _dict_domains, "slots": _slotted_domains}
+    entities = _make_entities(args.rows, args.parts)
+    print(f"{'domain':<8}{'bytes/domain':>14}{'to_domain':>16}")
+    for name, build in builds.items():
+        size = _bytes_per_domain(build, args.rows, args.parts)
+        elapsed = _time(build, entities, args.repeat)
+        print(f"{name:<8}{size:>14.0f}{elapsed * 1e3:>14.3f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+Benchmark of the export of the test history.
+
+Compares the NDJSON stream of the tests, mapped to domains and serialized
+one by one, with the Arrow IPC and Parquet exports, which build columnar
+record batches from the rows of the server-side cursor. The tests are
+inserted in a transaction which is rolled back at the end, the whole
+table is exported. The columnar formats are skipped when pyarrow is not
+installed.
+
+Usage:
+    python -m benchmarks.bench_export [--rows 10000] [--database-uri URI]
+"""
+import argparse
+import asyncio
+import gc
+import time
+from typing import AsyncIterator, Callable
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from app import export
+from app.config import Settings
+from app.database import Database
+from app.models import Test
+from app.repository import TestRepository
+from app.responses import _iter_chunks, _iter_ndjson
+from app.session import Session
+from benchmarks.bench_reads import _insert
+
+TExporter = Callable[[TestRepository], AsyncIterator[bytes]]
+
+
+def _ndjson(repository: TestRepository) -> AsyncIterator[bytes]:
+    return _iter_chunks(_iter_ndjson(repository.stream_all(10**9, 0)))
+
+
+def _arrow(repository: TestRepository) -> AsyncIterator[bytes]:
+    return export._iter_arrow(repository.stream_rows())
+
+
+def _parquet(repository: TestRepository) -> AsyncIterator[bytes]:
+    return export._iter_parquet(repository.stream_rows())
+
+
+async def _measure(
+    session: AsyncSession, exporter: TExporter, repeat: int
+) -> tuple[float, int]:
+    """
+    Returns the best time, in seconds, of exporting the tests and the
+    size of the export, in bytes.
+    """
+    best = float("inf")
+    size = 0
+    for _ in range(repeat):
+        session.expunge_all()
+        gc.collect()
+        repository = TestRepository(
+            db=Database(session), session=Session(), read_only=True
+        )
+        started = time.perf_counter()
+        size = 0
+        async for chunk in exporter(repository):
+            size += len(chunk)
+        best = min(best, time.perf_counter() - started)
+    return best, size
+
+
+async def _run(args: argparse.Namespace) -> None:
+    exporters: dict[str, TExporter] = {"ndjson": _ndjson}
+    if export.available():
+        exporters.update(arrow=_arrow, parquet=_parquet)
+    engine = create_async_engine(args.database_uri)
+    try:
+        async with engine.connect() as conn:
+            await conn.begin()
+            session = AsyncSession(bind=conn)
+            await _insert(session, args.rows, args.parts)
+            res = await session.execute(select(func.count()).select_from(Test))
+            rows = res.scalar_one()
+            print(f"{'format':<10}{'rows/s':>12}{'bytes':>14}")
+            for name, exporter in exporters.items():
+                elapsed, size = await _measure(session, exporter, args.repeat)
+                print(f"{name:<10}{rows / elapsed:>12,.0f}{size:>14,}")
+            await conn.rollback()
+    finally:
+        await engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=10_000)
+    parser.add_argument("--parts", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--database-uri", default=Settings().DATABASE_URI)
+    args = parser.parse_args()
+    asyncio.run(_run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+"""
+Benchmark of the insertion of tests by a unit of work.
+
+Compares the entities added to the session and flushed by the ORM with
+the rows enlisted by the repository and inserted in one executemany.
+The tests are inserted in a transaction which is rolled back at the end.
+
+Usage:
+    python -m benchmarks.bench_inserts [--rows 10000] [--database-uri URI]
+"""
+import argparse
+import asyncio
+import gc
+import random
+import time
+from datetime import datetime, timedelta
+from typing import Callable
+from uuid import UUID
+
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from app.config import Settings
+from app.database import Database
+from app.domains import TestDomain
+from app.mappers import TestEntityDomainMapper
+from app.models import Part
+from app.session import Session
+from app.unit_of_work import TestUnitOfWork
+
+
+def _make_tests(
+    rng: random.Random, rows: int, part_ids: list[UUID]
+) -> list[TestDomain]:
+    start = datetime(2020, 1, 1)
+    return [
+        TestDomain(
+            id=UUID(int=rng.getrandbits(128), version=4),
+            part_id=rng.choice(part_ids),
+            timestamp=start + timedelta(seconds=rng.randrange(10**8)),
+            successful=rng.random() < 0.9,
+            data={"type": "height", "priority": str(rng.randrange(5))},
+        )
+        for _ in range(rows)
+    ]
+
+
+def _add_entities(
+    unit_of_work: TestUnitOfWork, tests: list[TestDomain]
+) -> None:
+    mapper = TestEntityDomainMapper()
+    for test in tests:
+        unit_of_work.session.add(mapper.to_entity(test))
+
+
+def _add_rows(unit_of_work: TestUnitOfWork, tests: list[TestDomain]) -> None:
+    unit_of_work.test_repository.add_all(tests)
+
+
+async def _rows_per_second(
+    session: AsyncSession,
+    add: Callable[[TestUnitOfWork, list[TestDomain]], None],
+    batches: list[list[TestDomain]],
+) -> float:
+    """
+    Returns the best rate, in rows per second, of adding and saving a
+    batch of tests.
+    """
+    best = float("inf")
+    for tests in batches:
+        session.expunge_all()
+        gc.collect()
+        unit_of_work = TestUnitOfWork(Session(), Database(session))
+        started = time.perf_counter()
+        add(unit_of_work, tests)
+        await unit_of_work.save()
+        best = min(best, time.perf_counter() - started)
+    return len(batches[0]) / best
+
+
+async def _run(args: argparse.Namespace) -> None:
+    rng = random.Random(0)
+    part_ids = [
+        UUID(int=rng.getrandbits(128), version=4) for _ in range(args.parts)
+    ]
+    paths = {"entities": _add_entities, "rows": _add_rows}
+    batches = {
+        name: [
+            _make_tests(rng, args.rows, part_ids) for _ in range(args.repeat)
+        ]
+        for name in paths
+    }
+    engine = create_async_engine(args.database_uri)
+    try:
+        async with engine.connect() as conn:
+            await conn.begin()
+            session = AsyncSession(bind=conn, expire_on_commit=False)
+            await session.execute(
+                insert(Part),
+                [
+                    {
+                        "id": id,
+                        "name": f"Part {i}",
+                        "modified_timestamp": datetime(2020, 1, 1),
+                    }
+                    for i, id in enumerate(part_ids)
+                ],
+            )
+            print(f"{'insert':<12}{'rows/s':>12}")
+            for name, add in paths.items():
+                rate = await _rows_per_second(session, add, batches[name])
+                print(f"{name:<12}{rate:>12,.0f}")
+            await conn.rollback()
+    finally:
+        await engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=10_000)
+    parser.add_argument("--parts", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--database-uri", default=Settings().DATABASE_URI)
+    args = parser.parse_args()
+    asyncio.run(_run(args))
+
+
+if __name__ == "__main__":
+    main()
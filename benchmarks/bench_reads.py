@@ -0,0 +1,106 @@
+"""
+Benchmark of the listing of tests by the repository.
+
+Compares the repository loading the entities with the read-only
+repository mapping the rows straight to domains. The tests are inserted
+in a transaction which is rolled back at the end.
+
+Usage:
+    python -m benchmarks.bench_reads [--rows 10000] [--database-uri URI]
+"""
+import argparse
+import asyncio
+import gc
+import random
+import time
+from datetime import datetime, timedelta
+from uuid import UUID
+
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from app.config import Settings
+from app.database import Database
+from app.models import Part, Test
+from app.repository import TestRepository
+from app.session import Session
+
+
+async def _insert(session: AsyncSession, rows: int, parts: int) -> None:
+    rng = random.Random(0)
+    start = datetime(2020, 1, 1)
+    part_ids = [
+        UUID(int=rng.getrandbits(128), version=4) for _ in range(parts)
+    ]
+    await session.execute(
+        insert(Part),
+        [
+            {"id": id, "name": f"Part {i}", "modified_timestamp": start}
+            for i, id in enumerate(part_ids)
+        ],
+    )
+    await session.execute(
+        insert(Test),
+        [
+            {
+                "id": UUID(int=rng.getrandbits(128), version=4),
+                "part_id": rng.choice(part_ids),
+                "timestamp": start + timedelta(seconds=rng.randrange(10**8)),
+                "successful": rng.random() < 0.9,
+                "data": {"type": "height", "priority": str(rng.randrange(5))},
+            }
+            for _ in range(rows)
+        ],
+    )
+
+
+async def _rows_per_second(
+    session: AsyncSession, rows: int, read_only: bool, repeat: int
+) -> float:
+    """
+    Returns the best rate, in rows per second, of listing the tests.
+    """
+    best = float("inf")
+    for _ in range(repeat):
+        session.expunge_all()
+        gc.collect()
+        repository = TestRepository(
+            db=Database(session), session=Session(), read_only=read_only
+        )
+        started = time.perf_counter()
+        tests = await repository.find_all(rows, 0)
+        best = min(best, time.perf_counter() - started)
+        assert len(tests) >= rows
+    return rows / best
+
+
+async def _run(args: argparse.Namespace) -> None:
+    engine = create_async_engine(args.database_uri)
+    try:
+        async with engine.connect() as conn:
+            await conn.begin()
+            session = AsyncSession(bind=conn)
+            await _insert(session, args.rows, args.parts)
+            print(f"{'repository':<12}{'rows/s':>12}")
+            for name, read_only in (("entities", False), ("rows", True)):
+                rate = await _rows_per_second(
+                    session, args.rows, read_only, args.repeat
+                )
+                print(f"{name:<12}{rate:>12,.0f}")
+            await conn.rollback()
+    finally:
+        await engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=10_000)
+    parser.add_argument("--parts", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--database-uri", default=Settings().DATABASE_URI)
+    args = parser.parse_args()
+    asyncio.run(_run(args))
+
+
+if __name__ == "__main__":
+    main()
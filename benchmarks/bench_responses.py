@@ -0,0 +1,117 @@
+"""
+Benchmark of the serialization of a page of domains.
+
+Compares the stdlib JSONResponse of the to_dict() dicts with the
+DomainJSONResponse, for pages of tests and parts. The domains are mapped
+from rows holding the UUIDs as asyncpg returns them, a subclass of
+uuid.UUID.
+
+Usage:
+    python -m benchmarks.bench_responses [--rows 1000] [--repeat 5]
+"""
+import argparse
+import random
+from datetime import datetime, timedelta
+from timeit import Timer
+from typing import Any, Callable, Sequence
+from uuid import UUID
+
+from asyncpg.pgproto.pgproto import UUID as DriverUUID
+from fastapi.responses import JSONResponse
+
+from app.domains import PartDomain, TestDomain
+from app.mappers import (
+    BaseEntityDomainMapper,
+    PartEntityDomainMapper,
+    TestEntityDomainMapper,
+)
+from app.responses import DomainJSONResponse
+
+TRows = list[tuple[Any, ...]]
+TRender = Callable[[BaseEntityDomainMapper, TRows], bytes]
+
+
+def _uuid(rng: random.Random) -> DriverUUID:
+    return DriverUUID(UUID(int=rng.getrandbits(128), version=4).bytes)
+
+
+def _make_test_rows(rows: int) -> TRows:
+    rng = random.Random(0)
+    start = datetime(2020, 1, 1)
+    part_ids = [_uuid(rng) for _ in range(max(1, rows // 50))]
+    return [
+        (
+            _uuid(rng),
+            DriverUUID(rng.choice(part_ids).bytes),
+            start + timedelta(seconds=rng.randrange(10**8)),
+            rng.random() < 0.9,
+            {"type": "height", "priority": str(rng.randrange(5))},
+        )
+        for _ in range(rows)
+    ]
+
+
+def _make_part_rows(rows: int) -> TRows:
+    rng = random.Random(0)
+    start = datetime(2020, 1, 1)
+    return [
+        (
+            _uuid(rng),
+            f"Part {i}",
+            start + timedelta(seconds=rng.randrange(10**8)),
+        )
+        for i in range(rows)
+    ]
+
+
+def _stdlib(mapper: BaseEntityDomainMapper, rows: TRows) -> bytes:
+    domains: Sequence[TestDomain | PartDomain] = mapper.rows_to_domains(rows)
+    content = [domain.to_dict() for domain in domains]
+    return JSONResponse(content=content, status_code=200).body
+
+
+def _orjson(mapper: BaseEntityDomainMapper, rows: TRows) -> bytes:
+    domains = mapper.rows_to_domains(rows)
+    return DomainJSONResponse(content=domains, status_code=200).body
+
+
+def _time(
+    render: TRender,
+    mapper: BaseEntityDomainMapper,
+    rows: TRows,
+    repeat: int,
+) -> float:
+    """
+    Returns the best time, in seconds, of mapping and rendering the page
+    once.
+    """
+    timer = Timer(lambda: render(mapper, rows))
+    number, _ = timer.autorange()
+    return min(timer.repeat(repeat, number)) / number
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    pages: dict[str, tuple[BaseEntityDomainMapper, TRows]] = {
+        "tests": (TestEntityDomainMapper(), _make_test_rows(args.rows)),
+        "parts": (PartEntityDomainMapper(), _make_part_rows(args.rows)),
+    }
+    renders: dict[str, TRender] = {
+        "JSONResponse": _stdlib,
+        "DomainJSON": _orjson,
+    }
+    print(f"{'page':<8}" + "".join(f"{name:>16}" for name in renders))
+    for page, (mapper, rows) in pages.items():
+        times = [
+            _time(render, mapper, rows, args.repeat)
+            for render in renders.values()
+        ]
+        print(f"{page:<8}" + "".join(f"{t * 1e3:>14.3f}ms" for t in times))
+
+
+if __name__ == "__main__":
+    main()
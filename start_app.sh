@@ -14,4 +14,5 @@ cd "$(get_absolute_path "$0")" || exit 1
 [[ "${HOST:-}" ]] && host="${HOST}"
 [[ "${PORT:-}" ]] && port="${PORT}"
 poetry run alembic upgrade head
+poetry run maintain-partitions
 poetry run uvicorn --host "${host}" --port "${port}" --reload app.main:create_app
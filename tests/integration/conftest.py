@@ -5,7 +5,7 @@ down the test environment.
 import os
 import random
 from datetime import datetime, timedelta
-from typing import AsyncGenerator
+from typing import Any, AsyncGenerator
 from uuid import UUID
 
 import pytest
@@ -13,6 +13,7 @@ import pytest_asyncio
 from fastapi import FastAPI
 from httpx import AsyncClient
 from pydantic import PostgresDsn
+from sqlalchemy import func, insert, not_, select, text
 from sqlalchemy.ext.asyncio import (
     AsyncEngine,
     AsyncSession,
@@ -21,7 +22,9 @@ from sqlalchemy.ext.asyncio import (
 
 from app.config import Settings
 from app.main import FastApiManager
-from app.models import Base, Part, Test
+from app.managers import part_index
+from app.models import Base, Part, PartTestStats, Test
+from app.schema import expected_revisions
 
 
 @pytest.fixture
@@ -32,8 +35,16 @@ def seed() -> int:
     return 0
 
 
+@pytest.fixture(autouse=True)
+def clear_part_index() -> None:
+    """
+    Forgets the parts known by the part index of a previous test.
+    """
+    part_index.clear()
+
+
 @pytest.fixture
-def setup_base_sqlalchemy_class():
+def setup_base_sqlalchemy_class() -> type[Any]:
     """
     Setups a base SQLAlchemy class for testing.
     """
@@ -81,7 +92,7 @@ def app_manager(settings: Settings) -> FastApiManager:
 
 
 @pytest_asyncio.fixture()
-async def engine(settings: Settings):
+async def engine(settings: Settings) -> AsyncGenerator[AsyncEngine, None]:
     """
     Creates an async engine using the provided test database settings and yields it.
     After the engine is used, it is disposed of.
@@ -92,7 +103,9 @@ async def engine(settings: Settings):
 
 
 @pytest_asyncio.fixture
-async def db_session(engine: AsyncEngine):
+async def db_session(
+    engine: AsyncEngine,
+) -> AsyncGenerator[AsyncSession, None]:
     """
     Context manager that provides a database session to the decorated coroutine.
     """
@@ -104,14 +117,14 @@ async def db_session(engine: AsyncEngine):
 
 
 @pytest.fixture
-def part_entities(seed):
+def part_entities(seed: int) -> list[Part]:
     """
     Generates a list of 100 Part entities with random UUIDs, names, and modified timestamps.
 
     Returns:
         list: A list of Part entities.
     """
-    random.seed(seed)  # type: ignore
+    random.seed(seed)
     stack = []
     for _ in range(100):
         id = UUID(int=random.getrandbits(128))
@@ -130,7 +143,7 @@ def part_entities(seed):
 
 
 @pytest.fixture
-def test_entities(part_entities: list[Part], seed: int):
+def test_entities(part_entities: list[Part], seed: int) -> list[Test]:
     """
     Generate a list of 1000 Test objects with random data.
 
@@ -140,7 +153,7 @@ def test_entities(part_entities: list[Part], seed: int):
     Returns:
         list[Test]: A list of 1000 Test objects with random data.
     """
-    random.seed(seed)  # type: ignore
+    random.seed(seed)
 
     stack = []
     for _ in range(1000):
@@ -182,6 +195,17 @@ async def load_tests(
     test_entities: list[Test], db_session: AsyncSession
 ) -> None:
     db_session.add_all(test_entities)
+    await db_session.flush()
+    await db_session.execute(
+        insert(PartTestStats).from_select(
+            ["id", "passed", "failed"],
+            select(
+                Test.part_id,
+                func.count().filter(Test.successful),
+                func.count().filter(not_(Test.successful)),
+            ).group_by(Test.part_id),
+        )
+    )
     await db_session.commit()
 
 
@@ -193,20 +217,36 @@ def load_data(load_parts: None, load_tests: None) -> None:
 @pytest_asyncio.fixture
 async def reset_db(engine: AsyncEngine) -> None:
     """
-    Reinitialises the database by dropping all tables and recreating them.
+    Reinitialises the database by dropping all tables and recreating them,
+    stamped at the head of the migrations.
     """
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.drop_all)
         await conn.run_sync(Base.metadata.create_all)
+        await conn.execute(text("DROP TABLE IF EXISTS alembic_version"))
+        await conn.execute(
+            text(
+                "CREATE TABLE alembic_version "
+                "(version_num VARCHAR(32) PRIMARY KEY)"
+            )
+        )
+        for revision in expected_revisions():
+            await conn.execute(
+                text("INSERT INTO alembic_version VALUES (:revision)"),
+                {"revision": revision},
+            )
 
 
 @pytest_asyncio.fixture
-async def app(app_manager: FastApiManager, reset_db) -> FastAPI:
+async def app(
+    app_manager: FastApiManager, reset_db: None
+) -> AsyncGenerator[FastAPI, None]:
     """
     Sets up the FastAPI application for testing.
     """
     await app_manager.init_app()
-    return app_manager.app
+    yield app_manager.app
+    await app_manager.shutdown()
 
 
 @pytest_asyncio.fixture
@@ -1,19 +1,26 @@
+import json
 import pytest_asyncio
 import pytest
-from unittest.mock import MagicMock
+from typing import AsyncIterator
+from unittest.mock import MagicMock, PropertyMock, patch
 from uuid import UUID
 import datetime
 from fastapi import FastAPI
 from httpx import AsyncClient
-from app.domains import PartDomain, TestDomain
+from app.database import DatabaseApp
+from app.domains import PartDomain, PartTestStatsDomain, TestDomain
 from sqlalchemy.ext.asyncio import AsyncSession
-from app.exceptions import NoPartFound
+from app.exceptions import NoEntityFoundError, NoPartFound
+from app.managers import RECENT_WRITE_COOKIE
+from app.pagination import Cursor, Page, encode_cursor
+from app.schemas import TestFilterDTO
 from app.service import (
     ServiceCreatePart,
     ServiceCreateTest,
     ServiceDeletePart,
     ServiceDeleteTest,
     ServiceShowPart,
+    ServiceShowPartStats,
     ServiceShowTest,
     ServiceUpdateTest,
 )
@@ -268,6 +275,26 @@ class TestPartPost(BaseIntegrationTestEndpoint):
 
         assert response.status_code == 201
         assert response.json() == part.to_dict()
+        assert RECENT_WRITE_COOKIE not in response.cookies
+
+    @pytest.mark.asyncio
+    async def test_post_with_replicas(self):
+        self._service_post_mock.create_part.return_value = PartDomain(
+            id=UUID("e3e70682-c209-4cac-629f-6fbed82c07cd"),
+            name="part_1",
+            modified_timestamp=datetime.datetime(2010, 5, 17, 15, 25, 58),
+        )
+
+        with patch.object(
+            DatabaseApp, "replicas", new_callable=PropertyMock
+        ) as replicas:
+            replicas.return_value = [MagicMock()]
+            response = await self._client.post(
+                "/parts", json={"name": "part_1"}
+            )
+
+        assert response.status_code == 201
+        assert response.cookies[RECENT_WRITE_COOKIE] == "1"
 
 
 class TestPartDelete(BaseIntegrationTestEndpoint):
@@ -300,6 +327,17 @@ class TestPartDelete(BaseIntegrationTestEndpoint):
         assert response.json() == {"message": "Part deleted successfully"}
         self._service_delete_mock.delete_part.assert_called_once_with(id)
 
+    @pytest.mark.asyncio
+    async def test_delete_missing(self):
+        self._service_delete_mock.delete_part.side_effect = NoEntityFoundError
+        id = UUID("e3e70682-c209-4cac-629f-6fbed82c07cd")
+
+        response = await self._client.delete(f"/parts?id={id}")
+
+        assert response.status_code == 404
+        assert response.json() == {"Message": "Part not found"}
+        assert RECENT_WRITE_COOKIE not in response.cookies
+
 
 class TestTestList(BaseIntegrationTestEndpoint):
     @pytest.fixture(autouse=True)
@@ -617,6 +655,16 @@ class TestTestDelete(BaseIntegrationTestEndpoint):
         assert response.json() == {"message": "Test deleted successfully"}
         self._service_delete_mock.delete_test.assert_called_once_with(id)
 
+    @pytest.mark.asyncio
+    async def test_delete_missing(self):
+        self._service_delete_mock.delete_test.side_effect = NoEntityFoundError
+        id = UUID("f3e70682-d209-4cac-629f-6fbed82c07cd")
+
+        response = await self._client.delete(f"/tests?id={id}")
+
+        assert response.status_code == 404
+        assert response.json() == {"Message": "Test not found"}
+
 
 class TestTestPatch(BaseIntegrationTestEndpoint):
     @pytest.fixture(autouse=True)
@@ -704,3 +752,621 @@ class TestTestPatch(BaseIntegrationTestEndpoint):
         Test the side effect of patching a resource.
         """
         self._service.update_data.assert_called_once()
+
+    @pytest.mark.asyncio
+    async def test_patch_missing(self):
+        self._service.update_data.side_effect = NoEntityFoundError
+
+        response = await self._client.patch(
+            "/tests",
+            json={
+                "id": "f3e70682-d209-4cac-629f-6fbed82c07cd",
+                "successful": True,
+            },
+        )
+
+        assert response.status_code == 404
+        assert response.json() == {"Message": "Test not found"}
+
+
+class TestPartPage(BaseIntegrationTestEndpoint):
+    @pytest.fixture(autouse=True)
+    def _patch_services(self, app: FastAPI):
+        self._service_list_mock = MagicMock(ServiceShowPart)
+        app.dependency_overrides[
+            ServiceShowPart
+        ] = lambda: self._service_list_mock
+
+    @pytest.fixture(autouse=True)
+    def _setup_part(self):
+        self._part = PartDomain(
+            id=UUID("e3e70682-c209-4cac-629f-6fbed82c07cd"),
+            name="Part 53",
+            modified_timestamp=datetime.datetime(2010, 5, 17, 15, 25, 58),
+        )
+        self._cursor = Cursor(
+            key=self._part.modified_timestamp, id=self._part.id
+        )
+
+    @pytest.mark.asyncio
+    async def test_first_page(self):
+        self._service_list_mock.show_parts_page.return_value = Page(
+            items=[self._part], next_cursor=self._cursor
+        )
+
+        response = await self._client.get("/parts?limit=1&cursor=")
+
+        assert response.status_code == 200
+        assert response.json() == [self._part.to_dict()]
+        assert response.headers["X-Next-Cursor"] == encode_cursor(
+            self._cursor
+        )
+        self._service_list_mock.show_parts_page.assert_called_once_with(
+            1, None
+        )
+
+    @pytest.mark.asyncio
+    async def test_last_page(self):
+        self._service_list_mock.show_parts_page.return_value = Page(
+            items=[self._part], next_cursor=None
+        )
+
+        response = await self._client.get(
+            f"/parts?limit=5&cursor={encode_cursor(self._cursor)}"
+        )
+
+        assert response.status_code == 200
+        assert response.json() == [self._part.to_dict()]
+        assert "X-Next-Cursor" not in response.headers
+        self._service_list_mock.show_parts_page.assert_called_once_with(
+            5, self._cursor
+        )
+
+    @pytest.mark.asyncio
+    async def test_invalid_cursor(self):
+        response = await self._client.get("/parts?cursor=not-a-cursor")
+
+        assert response.status_code == 400
+        assert response.json() == {"Message": "Invalid cursor"}
+        self._service_list_mock.show_parts_page.assert_not_called()
+
+
+class TestTestPage(BaseIntegrationTestEndpoint):
+    @pytest.fixture(autouse=True)
+    def _patch_services(self, app: FastAPI):
+        self._service_list_mock = MagicMock(ServiceShowTest)
+        app.dependency_overrides[
+            ServiceShowTest
+        ] = lambda: self._service_list_mock
+
+    @pytest.mark.asyncio
+    async def test_page(self):
+        test = TestDomain(
+            id=UUID("f3e70682-d209-4cac-629f-6fbed82c07cd"),
+            part_id=UUID("7f411fed-1e70-e799-33a1-d1c2ad4ab155"),
+            timestamp=datetime.datetime(2014, 5, 11, 10, 23, 44),
+            successful=False,
+            data={"type": "height", "priority": "2"},
+        )
+        cursor = Cursor(key=test.timestamp, id=test.id)
+        self._service_list_mock.show_tests_page.return_value = Page(
+            items=[test], next_cursor=cursor
+        )
+
+        response = await self._client.get("/tests?limit=1&cursor=")
+
+        assert response.status_code == 200
+        assert response.json() == [test.to_dict()]
+        assert response.headers["X-Next-Cursor"] == encode_cursor(cursor)
+        self._service_list_mock.show_tests_page.assert_called_once_with(
+            1, None, TestFilterDTO()
+        )
+
+
+async def _aiter(items: list) -> AsyncIterator:
+    for item in items:
+        yield item
+
+
+class TestPartStream(BaseIntegrationTestEndpoint):
+    @pytest.fixture(autouse=True)
+    def _patch_services(self, app: FastAPI):
+        self._service_list_mock = MagicMock(ServiceShowPart)
+        app.dependency_overrides[
+            ServiceShowPart
+        ] = lambda: self._service_list_mock
+
+    @pytest.fixture(autouse=True)
+    def _setup_parts(self):
+        self._parts = [
+            PartDomain(
+                id=UUID("e3e70682-c209-4cac-629f-6fbed82c07cd"),
+                name="Part 53",
+                modified_timestamp=datetime.datetime(2010, 5, 17, 15, 25, 58),
+            ),
+            PartDomain(
+                id=UUID("f728b4fa-4248-5e3a-0a5d-2f346baa9455"),
+                name="Part 94",
+                modified_timestamp=datetime.datetime(2012, 5, 11, 19, 5, 49),
+            ),
+        ]
+        self._service_list_mock.stream_parts.return_value = _aiter(
+            self._parts
+        )
+
+    @pytest.mark.asyncio
+    async def test_stream_json(self):
+        response = await self._client.get("/parts?limit=2&stream=json")
+
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "application/json"
+        assert response.json() == [part.to_dict() for part in self._parts]
+        self._service_list_mock.stream_parts.assert_called_once_with(2, 0)
+        self._service_list_mock.show_parts.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_stream_ndjson(self):
+        response = await self._client.get("/parts?skip=3&stream=ndjson")
+
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "application/x-ndjson"
+        assert [
+            json.loads(line) for line in response.text.splitlines()
+        ] == [part.to_dict() for part in self._parts]
+        self._service_list_mock.stream_parts.assert_called_once_with(10, 3)
+
+    @pytest.mark.asyncio
+    async def test_invalid_format(self):
+        response = await self._client.get("/parts?stream=xml")
+
+        assert response.status_code == 422
+        self._service_list_mock.stream_parts.assert_not_called()
+
+
+class TestTestStream(BaseIntegrationTestEndpoint):
+    @pytest.fixture(autouse=True)
+    def _patch_services(self, app: FastAPI):
+        self._service_list_mock = MagicMock(ServiceShowTest)
+        app.dependency_overrides[
+            ServiceShowTest
+        ] = lambda: self._service_list_mock
+
+    @pytest.mark.asyncio
+    async def test_stream_ndjson(self):
+        test = TestDomain(
+            id=UUID("f3e70682-d209-4cac-629f-6fbed82c07cd"),
+            part_id=UUID("7f411fed-1e70-e799-33a1-d1c2ad4ab155"),
+            timestamp=datetime.datetime(2014, 5, 11, 10, 23, 44),
+            successful=False,
+            data={"type": "height", "priority": "2"},
+        )
+        self._service_list_mock.stream_tests.return_value = _aiter([test])
+
+        response = await self._client.get("/tests?limit=1&stream=ndjson")
+
+        assert response.status_code == 200
+        assert response.text.endswith("\n")
+        assert json.loads(response.text) == test.to_dict()
+        self._service_list_mock.stream_tests.assert_called_once_with(
+            1, 0, TestFilterDTO()
+        )
+
+
+class TestTestExport(BaseIntegrationTestEndpoint):
+    @pytest.fixture(autouse=True)
+    def _patch_services(self, app: FastAPI):
+        self._service_list_mock = MagicMock(ServiceShowTest)
+        app.dependency_overrides[
+            ServiceShowTest
+        ] = lambda: self._service_list_mock
+
+    @pytest.fixture(autouse=True)
+    def _setup_rows(self):
+        self._rows = [
+            (
+                UUID("f3e70682-d209-4cac-629f-6fbed82c07cd"),
+                UUID("7f411fed-1e70-e799-33a1-d1c2ad4ab155"),
+                datetime.datetime(2014, 5, 11, 10, 23, 44),
+                False,
+                '{"type": "height", "priority": "2"}',
+            ),
+            (
+                UUID("e3e70682-c209-4cac-629f-6fbed82c07cd"),
+                UUID("7f411fed-1e70-e799-33a1-d1c2ad4ab155"),
+                datetime.datetime(2015, 1, 2, 3, 4, 5, 678),
+                True,
+                None,
+            ),
+        ]
+        self._service_list_mock.export_tests.return_value = _aiter(
+            [self._rows[:1], self._rows[1:]]
+        )
+
+    def _expected(self) -> list[dict]:
+        return [
+            {
+                "id": str(id),
+                "part_id": str(part_id),
+                "timestamp": timestamp,
+                "successful": successful,
+                "data": data,
+            }
+            for id, part_id, timestamp, successful, data in self._rows
+        ]
+
+    @pytest.mark.asyncio
+    async def test_export_arrow(self):
+        pyarrow = pytest.importorskip("pyarrow")
+
+        response = await self._client.get(
+            "/tests/export?format=arrow&successful=false"
+        )
+
+        assert response.status_code == 200
+        assert response.headers["content-type"] == (
+            "application/vnd.apache.arrow.stream"
+        )
+        assert "tests.arrows" in response.headers["content-disposition"]
+        table = pyarrow.ipc.open_stream(response.content).read_all()
+        assert table.to_pylist() == self._expected()
+        self._service_list_mock.export_tests.assert_called_once_with(
+            TestFilterDTO(successful=False)
+        )
+
+    @pytest.mark.asyncio
+    async def test_export_parquet(self):
+        pyarrow = pytest.importorskip("pyarrow")
+        parquet = pytest.importorskip("pyarrow.parquet")
+
+        response = await self._client.get("/tests/export?format=parquet")
+
+        assert response.status_code == 200
+        assert response.headers["content-type"] == (
+            "application/vnd.apache.parquet"
+        )
+        table = parquet.read_table(pyarrow.BufferReader(response.content))
+        assert table.to_pylist() == self._expected()
+
+    @pytest.mark.asyncio
+    async def test_export_unavailable(self, monkeypatch: pytest.MonkeyPatch):
+        monkeypatch.setattr("app.export.pa", None)
+
+        response = await self._client.get("/tests/export?format=parquet")
+
+        assert response.status_code == 501
+        assert "pyarrow" in response.json()["Message"]
+
+    @pytest.mark.asyncio
+    async def test_invalid_format(self):
+        response = await self._client.get("/tests/export?format=csv")
+
+        assert response.status_code == 422
+        self._service_list_mock.export_tests.assert_not_called()
+
+
+class TestTestBatchPost(BaseIntegrationTestEndpoint):
+    @pytest.fixture(autouse=True)
+    def _patch_services(self, app: FastAPI):
+        self._service_post_mock = MagicMock(ServiceCreateTest)
+        app.dependency_overrides[
+            ServiceCreateTest
+        ] = lambda: self._service_post_mock
+
+    @pytest.fixture(autouse=True)
+    def _setup_test(self):
+        self._test = TestDomain(
+            id=UUID("f3e70682-d209-4cac-629f-6fbed82c07cd"),
+            part_id=UUID("e3e70682-c209-4cac-629f-6fbed82c07cd"),
+            timestamp=datetime.datetime(2014, 5, 11, 10, 23, 44),
+            successful=True,
+            data={"type": "height"},
+        )
+        self._payload = [
+            {
+                "part_id": "e3e70682-c209-4cac-629f-6fbed82c07cd",
+                "successful": True,
+                "data": {"type": "height"},
+            },
+            {
+                "part_id": "275f275c-c3f3-f74d-d386-1b58194665d3",
+                "successful": False,
+                "data": None,
+            },
+        ]
+
+    @pytest.mark.asyncio
+    async def test_post_partial(self):
+        self._service_post_mock.create_tests.return_value = [self._test, None]
+
+        response = await self._client.post("/tests/batch", json=self._payload)
+
+        assert response.status_code == 207
+        assert response.json() == [
+            {"status": 201, "test": self._test.to_dict()},
+            {"status": 404, "Message": "Part not found"},
+        ]
+        self._service_post_mock.create_tests.assert_called_once()
+
+    @pytest.mark.asyncio
+    async def test_post_all_created(self):
+        self._service_post_mock.create_tests.return_value = [self._test]
+
+        response = await self._client.post(
+            "/tests/batch", json=self._payload[:1]
+        )
+
+        assert response.status_code == 201
+        assert response.json() == [
+            {"status": 201, "test": self._test.to_dict()}
+        ]
+
+
+class TestResponseCache(BaseIntegrationTestEndpoint):
+    @pytest.fixture(autouse=True)
+    def _patch_services(self, app: FastAPI):
+        self._service_list_mock = MagicMock(ServiceShowPart)
+        self._service_list_mock.show_parts.return_value = [
+            PartDomain(
+                id=UUID("e3e70682-c209-4cac-629f-6fbed82c07cd"),
+                name="Part 53",
+                modified_timestamp=datetime.datetime(2010, 5, 17, 15, 25, 58),
+            )
+        ]
+        app.dependency_overrides[
+            ServiceShowPart
+        ] = lambda: self._service_list_mock
+
+    @pytest.mark.asyncio
+    async def test_cached(self):
+        first = await self._client.get("/parts?limit=1")
+        second = await self._client.get("/parts?limit=1")
+
+        assert first.status_code == second.status_code == 200
+        assert first.content == second.content
+        self._service_list_mock.show_parts.assert_called_once_with(1, 0)
+
+    @pytest.mark.asyncio
+    async def test_recent_write_not_cached(self):
+        self._client.cookies.set(RECENT_WRITE_COOKIE, "1")
+
+        await self._client.get("/parts?limit=1")
+        await self._client.get("/parts?limit=1")
+
+        assert self._service_list_mock.show_parts.call_count == 2
+
+
+class TestResponseCacheInvalidation(BaseIntegrationTestEndpoint):
+    @pytest.mark.asyncio
+    async def test_invalidated_on_save(self, load_parts: None):
+        before = await self._client.get("/parts?limit=1000")
+
+        response = await self._client.post("/parts", json={"name": "new"})
+        self._client.cookies.clear()
+        after = await self._client.get("/parts?limit=1000")
+
+        assert response.status_code == 201
+        assert len(after.json()) == len(before.json()) + 1
+        assert response.json() in after.json()
+
+    @pytest.mark.asyncio
+    async def test_etag_changed_on_save(self, load_parts: None):
+        before = await self._client.get("/parts")
+        etag = before.headers["etag"]
+        not_modified = await self._client.get(
+            "/parts", headers={"If-None-Match": etag}
+        )
+
+        await self._client.post("/parts", json={"name": "new"})
+        self._client.cookies.clear()
+        after = await self._client.get(
+            "/parts", headers={"If-None-Match": etag}
+        )
+
+        assert not_modified.status_code == 304
+        assert after.status_code == 200
+        assert after.headers["etag"] != etag
+
+
+class TestETag(BaseIntegrationTestEndpoint):
+    @pytest.fixture(autouse=True)
+    def _patch_services(self, app: FastAPI):
+        self._service_part_mock = MagicMock(ServiceShowPart)
+        self._service_part_mock.parts_version.return_value = 3
+        self._service_part_mock.show_parts.return_value = []
+        self._service_test_mock = MagicMock(ServiceShowTest)
+        self._service_test_mock.tests_version.return_value = 7
+        self._service_test_mock.show_tests.return_value = []
+        app.dependency_overrides[
+            ServiceShowPart
+        ] = lambda: self._service_part_mock
+        app.dependency_overrides[
+            ServiceShowTest
+        ] = lambda: self._service_test_mock
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize(
+        "path, etag", [("/parts", '"parts-3"'), ("/tests", '"tests-7"')]
+    )
+    async def test_etag(self, path: str, etag: str):
+        response = await self._client.get(path)
+
+        assert response.status_code == 200
+        assert response.headers["etag"] == etag
+
+    @pytest.mark.asyncio
+    async def test_not_modified(self):
+        response = await self._client.get(
+            "/parts?limit=3", headers={"If-None-Match": '"parts-3"'}
+        )
+
+        assert response.status_code == 304
+        assert response.headers["etag"] == '"parts-3"'
+        assert response.content == b""
+        self._service_part_mock.show_parts.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_modified(self):
+        response = await self._client.get(
+            "/tests?limit=3", headers={"If-None-Match": '"tests-6"'}
+        )
+
+        assert response.status_code == 200
+        assert response.headers["etag"] == '"tests-7"'
+        self._service_test_mock.show_tests.assert_called_once_with(
+            3, 0, TestFilterDTO()
+        )
+
+    @pytest.mark.asyncio
+    async def test_filtered_tests(self):
+        response = await self._client.get(
+            "/tests?part_id=e3e70682-c209-4cac-629f-6fbed82c07cd"
+            "&successful=false&timestamp_from=2021-01-01T00:00:00"
+        )
+
+        assert response.status_code == 200
+        self._service_test_mock.show_tests.assert_called_once_with(
+            10,
+            0,
+            TestFilterDTO(
+                part_id=UUID("e3e70682-c209-4cac-629f-6fbed82c07cd"),
+                successful=False,
+                timestamp_from=datetime.datetime(2021, 1, 1),
+            ),
+        )
+
+    @pytest.mark.asyncio
+    async def test_data_contains(self):
+        response = await self._client.get(
+            "/tests", params={"data_contains": '{"station": "B3"}'}
+        )
+
+        assert response.status_code == 200
+        self._service_test_mock.show_tests.assert_called_once_with(
+            10, 0, TestFilterDTO(data_contains={"station": "B3"})
+        )
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize(
+        "query_string",
+        ["part_id=invalid", "data_contains={invalid", "data_contains=[1]"],
+    )
+    async def test_invalid_filter(self, query_string: str):
+        response = await self._client.get(f"/tests?{query_string}")
+
+        assert response.status_code == 422
+
+
+class TestPartStats(BaseIntegrationTestEndpoint):
+    @pytest.fixture(autouse=True)
+    def _patch_services(self, app: FastAPI):
+        self._service_stats_mock = MagicMock(ServiceShowPartStats)
+        app.dependency_overrides[
+            ServiceShowPartStats
+        ] = lambda: self._service_stats_mock
+        self._stats = PartTestStatsDomain(
+            id=UUID("e3e70682-c209-4cac-629f-6fbed82c07cd"),
+            passed=3,
+            failed=1,
+        )
+
+    @pytest.mark.asyncio
+    async def test_part_stats(self):
+        self._service_stats_mock.show_part_stats.return_value = self._stats
+
+        response = await self._client.get(f"/parts/{self._stats.id}/stats")
+
+        assert response.status_code == 200
+        assert response.json() == {
+            "part_id": "e3e70682-c209-4cac-629f-6fbed82c07cd",
+            "passed": 3,
+            "failed": 1,
+            "total": 4,
+            "pass_rate": 0.75,
+        }
+        self._service_stats_mock.show_part_stats.assert_called_once_with(
+            self._stats.id
+        )
+
+    @pytest.mark.asyncio
+    async def test_part_stats_missing(self):
+        self._service_stats_mock.show_part_stats.side_effect = (
+            NoEntityFoundError
+        )
+
+        response = await self._client.get(f"/parts/{self._stats.id}/stats")
+
+        assert response.status_code == 404
+        assert response.json() == {"Message": "Part not found"}
+
+    @pytest.mark.asyncio
+    async def test_parts_stats(self):
+        self._service_stats_mock.show_parts_stats.return_value = [
+            self._stats
+        ]
+
+        response = await self._client.get("/parts/stats?limit=5&skip=2")
+
+        assert response.status_code == 200
+        assert response.json() == [self._stats.to_dict()]
+        self._service_stats_mock.show_parts_stats.assert_called_once_with(
+            5, 2
+        )
+
+
+class TestPartStatsConsistency(BaseIntegrationTestEndpoint):
+    @pytest_asyncio.fixture(autouse=True)
+    async def _setup_part(self, setup_client: None, load_data: None):
+        part = (await self._client.post("/parts", json={"name": "new"})).json()
+        self._part_id = part["id"]
+
+    async def _post_test(self, successful: bool) -> str:
+        response = await self._client.post(
+            "/tests",
+            json={
+                "part_id": self._part_id,
+                "successful": successful,
+                "data": None,
+            },
+        )
+        return response.json()["id"]
+
+    async def _get_stats(self) -> dict:
+        response = await self._client.get(f"/parts/{self._part_id}/stats")
+        return response.json()
+
+    @pytest.mark.asyncio
+    async def test_new_part(self):
+        assert await self._get_stats() == {
+            "part_id": self._part_id,
+            "passed": 0,
+            "failed": 0,
+            "total": 0,
+            "pass_rate": None,
+        }
+
+    @pytest.mark.asyncio
+    async def test_writes(self):
+        passed = await self._post_test(True)
+        await self._post_test(True)
+        failed = await self._post_test(False)
+        await self._client.patch(
+            "/tests", json={"id": passed, "successful": False}
+        )
+        await self._client.patch(
+            "/tests", json={"id": passed, "successful": False}
+        )
+        await self._client.delete(f"/tests?id={failed}")
+
+        stats = await self._get_stats()
+
+        assert stats["passed"] == 1
+        assert stats["failed"] == 1
+        assert stats["pass_rate"] == 0.5
+
+    @pytest.mark.asyncio
+    async def test_seeded_parts(self):
+        response = await self._client.get("/parts/stats?limit=1000")
+
+        stats = response.json()
+        assert len(stats) == 101
+        assert sum(part["total"] for part in stats) == 1000
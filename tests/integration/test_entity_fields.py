@@ -15,9 +15,9 @@ from typing import Any
 from uuid import UUID
 
 import pytest
-from sqlalchemy import JSON
 from sqlalchemy import UUID as UUID_
 from sqlalchemy import Boolean, DateTime, ForeignKey, String
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import Mapped, mapped_column
 
 from app.models import Part, Test
@@ -91,10 +91,12 @@ class TestTestEntity:
             part_id: Mapped[UUID] = mapped_column(
                 UUID_(as_uuid=True), ForeignKey("part.id")
             )
-            timestamp: Mapped[datetime] = mapped_column(DateTime())
+            timestamp: Mapped[datetime] = mapped_column(
+                DateTime(), primary_key=True
+            )
             successful: Mapped[bool] = mapped_column(Boolean)
             data: Mapped[dict[Any, Any] | None] = mapped_column(
-                JSON, nullable=True
+                JSONB, nullable=True
             )
 
         self._table = FakeTestEntity
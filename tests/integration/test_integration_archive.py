@@ -0,0 +1,314 @@
+from datetime import datetime, timedelta
+from math import ceil
+from pathlib import Path
+from typing import Any
+from unittest.mock import Mock, call
+from uuid import UUID
+
+import orjson
+import pytest
+import pytest_asyncio
+from sqlalchemy import delete, func, select
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+
+from app.archive import (
+    TMP_SUFFIX,
+    TOMBSTONE_SUFFIX,
+    TRY_LOCK,
+    TestArchive,
+    write_segment,
+)
+from app.database import Database
+from app.domains import TestDomain
+from app.exceptions import NoEntityFoundError
+from app.models import Part, Test
+from app.pagination import Cursor
+from app.repository import TestRepository
+from app.response_cache import ResponseCache
+from app.session import Session
+from app.versions import find_version
+
+CUTOFF = datetime(2018, 1, 1)
+
+
+class TestIntegrationArchive:
+    @pytest_asyncio.fixture(autouse=True)
+    async def _setup_archive(
+        self,
+        engine: AsyncEngine,
+        db_session: AsyncSession,
+        reset_db: None,
+        load_data: None,
+        tmp_path: Path,
+    ):
+        self._engine = engine
+        self._path = tmp_path
+        self._db = Database(db_session)
+        res = await db_session.execute(select(Test))
+        self._tests = sorted(
+            (
+                TestDomain(
+                    id=test.id,
+                    part_id=test.part_id,
+                    timestamp=test.timestamp,
+                    successful=test.successful,
+                    data=test.data,
+                )
+                for test in res.scalars()
+            ),
+            key=lambda test: (test.timestamp, test.id),
+        )
+        await db_session.commit()
+        self._archive = self._new_archive()
+        await self._archive.load(engine)
+        self._archived = await self._archive.archive(engine)
+        self._repository = TestRepository(
+            db=self._db, session=Session(), archive=self._archive
+        )
+
+    def _new_archive(self) -> TestArchive:
+        return TestArchive(
+            path=self._path,
+            age=timedelta(0),
+            batch_size=100,
+            clock=lambda: CUTOFF,
+        )
+
+    def _expected(self, filters: dict[str, Any]) -> list[TestDomain]:
+        return [
+            test
+            for test in self._tests
+            if all(
+                getattr(test, key) == value for key, value in filters.items()
+            )
+        ]
+
+    @pytest.mark.asyncio
+    async def test_archive_moves_tests(self):
+        old = [test for test in self._tests if test.timestamp < CUTOFF]
+        count = await self._db.session.scalar(
+            select(func.count()).select_from(Test)
+        )
+        archived = self._archive.segments
+
+        assert self._archived == len(old) > 100
+        assert count == len(self._tests) - len(old)
+        assert sum(info.size for info in archived) == len(old)
+        assert max(info.max_timestamp for info in archived) < CUTOFF
+        assert not list(self._path.glob(f"*{TMP_SUFFIX}"))
+
+    @pytest.mark.asyncio
+    async def test_archive_again(self):
+        assert await self._archive.archive(self._engine) == 0
+
+    @pytest.mark.asyncio
+    async def test_archive_bumps_version(self):
+        version = await find_version(self._db.session, Test)
+        cache = Mock(ResponseCache)
+        archive = TestArchive(
+            path=self._path,
+            age=timedelta(0),
+            batch_size=100,
+            clock=lambda: datetime(2100, 1, 1),
+            response_cache=cache,
+        )
+
+        archived = await archive.archive(self._engine)
+
+        batches = ceil(archived / 100)
+        assert batches
+        assert await find_version(self._db.session, Test) == version + batches
+        assert cache.invalidate.call_args_list == [call([Test])] * batches
+
+    @pytest.mark.asyncio
+    async def test_load(self):
+        archive = self._new_archive()
+
+        await archive.load(self._engine)
+
+        assert archive.segments == self._archive.segments
+
+    @pytest.mark.asyncio
+    async def test_find_by_id(self):
+        old = next(test for test in self._tests if test.timestamp < CUTOFF)
+        new = self._tests[-1]
+
+        assert await self._repository.find_by_id(old.id) == old
+        assert await self._repository.find_by_id(new.id) == new
+        with pytest.raises(NoEntityFoundError):
+            await self._repository.find_by_id(UUID(int=0))
+
+    @pytest.mark.asyncio
+    async def test_archived_read_only(self):
+        old = next(test for test in self._tests if test.timestamp < CUTOFF)
+
+        with pytest.raises(NoEntityFoundError):
+            await self._repository.delete_by_id(old.id)
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize(
+        "filters", [{}, {"successful": True}, {"successful": False}]
+    )
+    @pytest.mark.parametrize("offset", [0, 150, 900])
+    async def test_find_all(self, filters: dict[str, Any], offset: int):
+        expected = self._expected(filters)
+
+        tests = await self._repository.find_all(2000, 0, filters)
+        window = await self._repository.find_all(100, offset, filters)
+
+        assert sorted(tests, key=lambda test: test.id) == sorted(
+            expected, key=lambda test: test.id
+        )
+        stop = offset + 100
+        assert window == tests[offset:stop]
+
+    @pytest.mark.asyncio
+    async def test_count_table(self):
+        part_id = self._tests[0].part_id
+        for filters in (
+            {},
+            {"successful": False},
+            {"part_id": part_id},
+            {"part_id": part_id, "successful": True},
+        ):
+            query, params = self._repository._query_filtered(
+                "count", self._repository._build_count, filters
+            )
+            res = await self._db.session.execute(query, params)
+
+            assert await self._repository._count_table(filters) == (
+                res.scalar_one()
+            )
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("offset", [0, 150, 900])
+    async def test_stream_all(self, offset: int):
+        tests = await self._repository.find_all(2000, 0, {})
+
+        streamed = [
+            test async for test in self._repository.stream_all(100, offset, {})
+        ]
+
+        stop = offset + 100
+        assert streamed == tests[offset:stop]
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("filters", [{}, {"successful": False}])
+    async def test_stream_rows(self, filters: dict[str, Any]):
+        rows = [
+            row
+            async for batch in self._repository.stream_rows(filters)
+            for row in batch
+        ]
+
+        assert sorted(
+            (timestamp, id, part_id, successful, orjson.loads(data))
+            for id, part_id, timestamp, successful, data in rows
+        ) == [
+            (test.timestamp, test.id, test.part_id, test.successful, test.data)
+            for test in self._expected(filters)
+        ]
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("filters", [{}, {"successful": False}])
+    async def test_find_page(self, filters: dict[str, Any]):
+        tests: list[TestDomain] = []
+        cursor: Cursor | None = None
+        while True:
+            page = await self._repository.find_page(70, cursor, filters)
+            tests += page.items
+            cursor = page.next_cursor
+            if cursor is None:
+                break
+
+        assert tests == self._expected(filters)
+
+    @pytest.mark.asyncio
+    async def test_recover_committed(self):
+        old = next(test for test in self._tests if test.timestamp < CUTOFF)
+        tmp = self._path / f"recovered{TMP_SUFFIX}"
+        write_segment(
+            tmp,
+            [
+                TestDomain(
+                    id=UUID(int=1),
+                    part_id=old.part_id,
+                    timestamp=old.timestamp,
+                    successful=old.successful,
+                    data=old.data,
+                )
+            ],
+        )
+        archive = self._new_archive()
+
+        await archive.load(self._engine)
+
+        assert not tmp.exists()
+        assert len(archive.segments) == len(self._archive.segments) + 1
+
+    @pytest.mark.asyncio
+    async def test_recover_uncommitted(self):
+        new = self._tests[-1]
+        tmp = self._path / f"uncommitted{TMP_SUFFIX}"
+        write_segment(tmp, [new])
+        archive = self._new_archive()
+
+        await archive.load(self._engine)
+
+        assert not tmp.exists()
+        assert archive.segments == self._archive.segments
+
+    @pytest.mark.asyncio
+    async def test_recover_locked(self):
+        tmp = self._path / f"in-progress{TMP_SUFFIX}"
+        write_segment(tmp, [self._tests[-1]])
+        archive = self._new_archive()
+
+        async with self._engine.begin() as conn:
+            assert await conn.scalar(TRY_LOCK)
+            await archive.load(self._engine)
+            assert await archive.archive(self._engine) == 0
+
+        assert tmp.exists()
+        assert archive.segments == self._archive.segments
+
+    @pytest.mark.asyncio
+    async def test_delete_archived(self):
+        part_id = next(
+            test.part_id for test in self._tests if test.timestamp < CUTOFF
+        )
+        await self._db.session.execute(delete(Part).where(Part.id == part_id))
+        await self._db.commit()
+
+        await self._repository.delete_archived([part_id])
+
+        archived = [test for test in self._tests if test.timestamp < CUTOFF]
+        kept = [test for test in archived if test.part_id != part_id]
+        other = self._new_archive()
+        for archive in (self._archive, other):
+            assert await archive.count({"part_id": part_id}) == 0
+            assert await archive.count({}) == len(kept)
+            assert await archive.find_all(2000, 0, {}) == kept
+        assert sum(info.size for info in other.segments) == len(archived)
+
+        await other.archive(self._engine)
+
+        assert sum(info.size for info in other.segments) == len(kept)
+        assert not list(self._path.glob(f"*{TOMBSTONE_SUFFIX}"))
+        assert await self._archive.find_all(2000, 0, {}) == kept
+
+    @pytest.mark.asyncio
+    async def test_archive_deletes_orphans(self):
+        part_id = next(
+            test.part_id for test in self._tests if test.timestamp < CUTOFF
+        )
+        async with self._engine.begin() as conn:
+            await conn.execute(delete(Part).where(Part.id == part_id))
+        other = self._new_archive()
+        await other.load(self._engine)
+
+        await other.archive(self._engine)
+
+        filters = {"part_id": part_id}
+        assert await self._archive.find_all(2000, 0, filters) == []
+        assert await self._repository.find_all(2000, 0, filters) == []
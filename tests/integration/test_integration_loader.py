@@ -0,0 +1,121 @@
+import json
+from pathlib import Path
+
+import pytest
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+
+from app.loader import BulkLoader, Checkpoint
+from app.models import Part, PartTestStats, Test
+from app.versions import find_version
+
+
+class TestBulkLoader:
+    @pytest.fixture(autouse=True)
+    def _setup_files(
+        self,
+        tmp_path: Path,
+        part_entities: list[Part],
+        reset_db: None,
+        load_parts: None,
+    ):
+        self._csv = tmp_path / "tests.csv"
+        self._csv.write_text(
+            "part_id,timestamp,successful,data\n"
+            + "".join(
+                f'{part.id},2022-01-01T00:00:00,1,"{{""n"": {i}}}"\n'
+                for i, part in enumerate(part_entities)
+            )
+            + "00000000-0000-0000-0000-000000000000,2022-01-01,1,\n"
+            + "invalid\n"
+        )
+        self._ndjson = tmp_path / "tests.ndjson"
+        self._ndjson.write_text(
+            "".join(
+                json.dumps(
+                    {
+                        "part_id": str(part.id),
+                        "timestamp": "2022-01-02T00:00:00",
+                        "successful": False,
+                    }
+                )
+                + "\n"
+                for part in part_entities[:10]
+            )
+        )
+        self._checkpoint = tmp_path / "load.checkpoint"
+
+    async def _count_tests(self, engine: AsyncEngine) -> int:
+        async with AsyncSession(engine) as session:
+            res = await session.execute(select(func.count(Test.id)))
+            return res.scalar_one()
+
+    @pytest.mark.asyncio
+    async def test_load(self, engine: AsyncEngine):
+        loader = BulkLoader(
+            engine,
+            chunk_size=15,
+            workers=2,
+            checkpoint=Checkpoint(self._checkpoint),
+        )
+
+        report = await loader.load([self._csv, self._ndjson])
+
+        assert report.loaded == 110
+        assert report.rejected == 2
+        assert await self._count_tests(engine) == 110
+        async with AsyncSession(engine) as session:
+            assert await find_version(session, Test) > 0
+            res = await session.execute(
+                select(
+                    func.sum(PartTestStats.passed),
+                    func.sum(PartTestStats.failed),
+                )
+            )
+            assert res.one() == (100, 10)
+
+    @pytest.mark.asyncio
+    async def test_resume(self, engine: AsyncEngine):
+        await BulkLoader(
+            engine, chunk_size=15, checkpoint=Checkpoint(self._checkpoint)
+        ).load([self._csv])
+
+        report = await BulkLoader(
+            engine, chunk_size=15, checkpoint=Checkpoint(self._checkpoint)
+        ).load([self._csv, self._ndjson])
+
+        assert report.loaded == 10
+        assert await self._count_tests(engine) == 110
+
+    @pytest.mark.asyncio
+    async def test_load_keeps_ids_unique(
+        self, engine: AsyncEngine, tmp_path: Path, part_entities: list[Part]
+    ):
+        id = "12345678-1234-5678-1234-567812345678"
+        path = tmp_path / "duplicates.csv"
+        path.write_text(
+            "id,part_id,timestamp,successful,data\n"
+            f"{id},{part_entities[0].id},2022-01-01,1,\n"
+            f"{id},{part_entities[0].id},2022-02-01,1,\n"
+        )
+        await BulkLoader(engine, chunk_size=1, workers=1).load([path])
+
+        report = await BulkLoader(engine, chunk_size=2, workers=1).load([path])
+
+        assert report.loaded == 0
+        assert report.rejected == 2
+        assert await self._count_tests(engine) == 1
+
+    @pytest.mark.asyncio
+    async def test_replay(self, engine: AsyncEngine):
+        await BulkLoader(engine, chunk_size=15, workers=1).load([self._csv])
+
+        report = await BulkLoader(engine, chunk_size=15, workers=1).load(
+            [self._csv]
+        )
+
+        assert report.loaded == 0
+        assert await self._count_tests(engine) == 100
+        async with AsyncSession(engine) as session:
+            res = await session.execute(select(func.sum(PartTestStats.passed)))
+            assert res.scalar_one() == 100
@@ -0,0 +1,233 @@
+import re
+from datetime import datetime
+from typing import Any, AsyncGenerator
+from uuid import UUID
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import func, select, text
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+
+from app.database import Database
+from app.models import PartTestStats, Test
+from app.pagination import Cursor
+from app.partitions import DEFAULT_PARTITION, PartitionManager
+from app.repository import TestRepository
+from app.session import Session
+from app.versions import find_version
+
+
+class TestIntegrationPartitionManager:
+    @pytest_asyncio.fixture(autouse=True)
+    async def _setup_engine(
+        self, engine: AsyncEngine, reset_db: None, load_data: None
+    ) -> AsyncGenerator[None, None]:
+        self._engine = engine
+        yield
+        async with engine.begin() as conn:
+            for name in await self._find_tables(conn):
+                await conn.execute(text(f"DROP TABLE IF EXISTS {name}"))
+
+    def _manager(self, **kwargs) -> PartitionManager:
+        return PartitionManager(clock=lambda: datetime(2030, 1, 15), **kwargs)
+
+    async def _find_tables(self, conn) -> list[str]:
+        res = await conn.execute(
+            text(
+                "SELECT relname FROM pg_class WHERE relkind = 'r' "
+                "AND relname ~ '^test_y[0-9]{4}m[0-9]{2}$' ORDER BY relname"
+            )
+        )
+        return list(res.scalars())
+
+    async def _find_partitions(self) -> list[str]:
+        async with self._engine.connect() as conn:
+            partitions = await PartitionManager().find_partitions(conn)
+        return [partition.name for partition in partitions]
+
+    async def _count(self, table: str) -> int:
+        async with self._engine.connect() as conn:
+            return await conn.scalar(text(f"SELECT count(*) FROM {table}"))
+
+    @pytest.mark.asyncio
+    async def test_maintain_creates_ahead(self):
+        await self._manager(months_ahead=2).maintain(self._engine)
+
+        partitions = await self._find_partitions()
+        assert partitions[-3:] == [
+            "test_y2030m01",
+            "test_y2030m02",
+            "test_y2030m03",
+        ]
+
+    @pytest.mark.asyncio
+    async def test_maintain_splits_default(self):
+        total = await self._count("test")
+        assert await self._count(DEFAULT_PARTITION) == total
+
+        await self._manager().maintain(self._engine)
+
+        assert await self._count(DEFAULT_PARTITION) == 0
+        assert await self._count("test") == total
+        async with self._engine.connect() as conn:
+            misplaced = await conn.scalar(
+                text(
+                    "SELECT count(*) FROM test WHERE tableoid::regclass::text "
+                    "<> 'test_y' || to_char(timestamp, 'YYYY\"m\"MM')"
+                )
+            )
+        assert misplaced == 0
+
+    @pytest.mark.asyncio
+    async def test_maintain_idempotent(self):
+        await self._manager().maintain(self._engine)
+        partitions = await self._find_partitions()
+
+        await self._manager().maintain(self._engine)
+
+        assert await self._find_partitions() == partitions
+
+    @pytest.mark.asyncio
+    async def test_maintain_detaches_expired(self):
+        await self._manager(retention_months=1).maintain(self._engine)
+
+        assert await self._find_partitions() == [
+            "test_y2030m01",
+            "test_y2030m02",
+            "test_y2030m03",
+            "test_y2030m04",
+        ]
+        assert await self._count("test") == 0
+        async with self._engine.connect() as conn:
+            detached = await self._find_tables(conn)
+        assert "test_y2020m01" in detached
+
+    @pytest.mark.asyncio
+    async def test_maintain_expired_updates_stats(
+        self, db_session: AsyncSession
+    ):
+        version = await find_version(db_session, Test)
+        totals = await db_session.execute(
+            select(
+                func.sum(PartTestStats.passed), func.sum(PartTestStats.failed)
+            )
+        )
+        assert all(totals.one())
+        await db_session.commit()
+
+        await self._manager(retention_months=1).maintain(self._engine)
+
+        res = await db_session.execute(
+            select(PartTestStats.passed, PartTestStats.failed)
+        )
+        assert set(res) == {(0, 0)}
+        assert await find_version(db_session, Test) == version + 1
+
+    @pytest.mark.asyncio
+    async def test_maintain_without_expired(self, db_session: AsyncSession):
+        version = await find_version(db_session, Test)
+        await db_session.commit()
+
+        await self._manager().maintain(self._engine)
+
+        assert await find_version(db_session, Test) == version
+
+    @pytest.mark.asyncio
+    async def test_maintain_skips_when_running(self):
+        async with self._engine.begin() as conn:
+            await conn.execute(
+                text("SELECT pg_advisory_xact_lock(hashtext(:name))"),
+                {"name": "app.partitions"},
+            )
+
+            assert not await self._manager().maintain(self._engine)
+
+        assert "test_y2030m01" not in await self._find_partitions()
+        assert await self._manager().maintain(self._engine)
+        assert "test_y2030m01" in await self._find_partitions()
+
+    @pytest.mark.asyncio
+    async def test_maintain_drops_expired(self):
+        await self._manager(retention_months=1, expired="drop").maintain(
+            self._engine
+        )
+
+        async with self._engine.connect() as conn:
+            tables = await self._find_tables(conn)
+        assert tables == await self._find_partitions()
+
+    @pytest.mark.asyncio
+    async def test_maintain_keeps_detached_rows(
+        self, db_session: AsyncSession
+    ):
+        await self._manager(retention_months=1).maintain(self._engine)
+        db_session.add(
+            Test(
+                id=UUID(int=1),
+                part_id=UUID("3e37952d-30bc-ab0e-d857-010255d44936"),
+                timestamp=datetime(2020, 1, 2),
+                successful=True,
+            )
+        )
+        await db_session.commit()
+
+        await self._manager(retention_months=1).maintain(self._engine)
+
+        assert await self._count(DEFAULT_PARTITION) == 1
+
+
+class TestIntegrationPartitionPruning:
+    @pytest_asyncio.fixture(autouse=True)
+    async def _setup_repository(
+        self,
+        engine: AsyncEngine,
+        db_session: AsyncSession,
+        reset_db: None,
+        load_data: None,
+    ):
+        await PartitionManager().maintain(engine)
+        self._db = Database(db_session)
+        self._repository = TestRepository(self._db, Session())
+
+    async def _scanned(
+        self, cursor: Cursor | None, filters: dict[str, Any]
+    ) -> set[str]:
+        """
+        Returns the monthly partitions scanned for a page.
+        """
+        query, params = self._repository._query_page(cursor, filters)
+        if cursor is not None:
+            params.update(key=cursor.key, id=cursor.id)
+        sql = (
+            query.limit(10)
+            .params(**params)
+            .compile(
+                dialect=self._db.session.bind.dialect,
+                compile_kwargs={"literal_binds": True},
+            )
+        )
+        res = await self._db.session.execute(text(f"EXPLAIN {sql}"))
+        plan = "\n".join(row[0] for row in res)
+        return set(re.findall(r"\bon (test_y\d{4}m\d{2})\b", plan))
+
+    @pytest.mark.asyncio
+    async def test_window_prunes_partitions(self):
+        scanned = await self._scanned(
+            None,
+            {
+                "timestamp_from": datetime(2020, 3, 1),
+                "timestamp_to": datetime(2020, 5, 1),
+            },
+        )
+
+        assert scanned == {"test_y2020m03", "test_y2020m04"}
+
+    @pytest.mark.asyncio
+    async def test_cursor_prunes_partitions(self):
+        last = await self._db.session.scalar(select(func.max(Test.timestamp)))
+        assert last is not None
+
+        scanned = await self._scanned(Cursor(last, UUID(int=0)), {})
+
+        assert f"test_y{last:%Y}m{last:%m}" in scanned
+        assert all(name >= f"test_y{last:%Y}m{last:%m}" for name in scanned)
@@ -1,16 +1,55 @@
+import asyncio
+import json
+import re
 from datetime import datetime
 from typing import Any
 from uuid import UUID
 
 import pytest
-from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
 
 from app.database import Database
 from app.domains import PartDomain, PartJson, TestDomain
+from app.exceptions import NoEntityFoundError
+from app.pagination import Cursor
 from app.repository import PartRepository, TestRepository
 from app.session import Session
 
 
+def _matches(test: TestDomain, filters: dict[str, Any]) -> bool:
+    checks = {
+        "part_id": lambda value: test.part_id == value,
+        "successful": lambda value: test.successful is value,
+        "timestamp_from": lambda value: test.timestamp >= value,
+        "timestamp_to": lambda value: test.timestamp < value,
+        "data_contains": lambda value: test.data is not None
+        and value.items() <= test.data.items(),
+    }
+    return all(checks[key](value) for key, value in filters.items())
+
+
+async def _plan_indexes(session: AsyncSession, plan: str) -> set[str]:
+    """
+    Returns the indexes scanned by a plan, named after the index of the
+    partitioned table when scanning one of its partitions.
+    """
+    names = re.findall(
+        r"Index (?:Only )?Scan (?:Backward )?(?:using|on) (\w+)", plan
+    )
+    res = await session.execute(
+        text(
+            "SELECT coalesce(parent.relname, child.relname) "
+            "FROM pg_class child "
+            "LEFT JOIN pg_inherits ON inhrelid = child.oid "
+            "LEFT JOIN pg_class parent ON parent.oid = inhparent "
+            "WHERE child.relname = ANY(:names)"
+        ),
+        {"names": names},
+    )
+    return set(res.scalars())
+
+
 class BaseIntegrationTest:
     @pytest.fixture(autouse=True)
     def _setup_db(
@@ -223,6 +262,119 @@ class TestIntegrationPartRepository(BaseIntegrationTest):
         data = await self._repository.find_all(limit, offset)
         assert data == expected_data
 
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("limit", [7, 25, 100])
+    async def test_find_page(self, limit: int):
+        parts: list[PartDomain] = []
+        cursor: Cursor | None = None
+        while True:
+            page = await self._repository.find_page(limit, cursor)
+            assert len(page.items) <= limit
+            parts.extend(page.items)
+            cursor = page.next_cursor
+            if cursor is None:
+                break
+
+        keys = [(part.modified_timestamp, part.id) for part in parts]
+        assert keys == sorted(keys)
+        assert len(set(keys)) == 100
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("limit, offset", [(10, 0), (100, 0), (30, 80)])
+    async def test_stream_all(self, limit: int, offset: int):
+        self._repository.yield_per = 7
+        streamed = [
+            part async for part in self._repository.stream_all(limit, offset)
+        ]
+        assert streamed == await self._repository.find_all(limit, offset)
+
+
+class TestIntegrationStatements(BaseIntegrationTest):
+    @pytest.mark.asyncio
+    async def test_statements_shared(self):
+        first = TestRepository(db=self._db, session=self._session)
+        second = TestRepository(db=self._db, session=Session())
+        id = UUID("0641ff10-6866-bda9-f4d7-d57a923c6b6c")
+
+        assert await first.find_by_id(id) == await second.find_by_id(id)
+        assert await first.find_all(5, 0) == await second.find_all(5, 0)
+
+        part_repository = PartRepository(db=self._db, session=self._session)
+        assert first._query_by_id() is second._query_by_id()
+        assert first._query_by_id() is not part_repository._query_by_id()
+
+
+class TestIntegrationReadOnlyRepository(BaseIntegrationTest):
+    """
+    The read-only repositories read the same domains as the repositories
+    loading entities, without loading any.
+    """
+
+    @pytest.fixture(autouse=True, params=[PartRepository, TestRepository])
+    def _setup_repositories(self, request, _setup_db, _setup_session):
+        self._repository = request.param(
+            db=self._db, session=self._session, read_only=True
+        )
+        self._loading = request.param(db=self._db, session=Session())
+
+    def _assert_no_entities(self):
+        assert not self._repository.identity_map
+        assert not self._db.session.identity_map
+
+    @pytest.mark.asyncio
+    async def test_find_by_id(self):
+        (expected,) = await self._loading.find_all(1, 50)
+        self._db.session.expunge_all()
+
+        domain = await self._repository.find_by_id(expected.id)
+
+        assert domain == expected
+        self._assert_no_entities()
+        with pytest.raises(NoEntityFoundError):
+            await self._repository.find_by_id(UUID(int=0))
+
+    @pytest.mark.asyncio
+    async def test_find_all(self):
+        expected = await self._loading.find_all(100, 50)
+        self._db.session.expunge_all()
+
+        assert await self._repository.find_all(100, 50) == expected
+        self._assert_no_entities()
+
+    @pytest.mark.asyncio
+    async def test_find_page(self):
+        cursor = None
+        for _ in range(3):
+            expected = await self._loading.find_page(30, cursor)
+            self._db.session.expunge_all()
+
+            page = await self._repository.find_page(30, cursor)
+
+            assert page == expected
+            cursor = page.next_cursor
+        self._assert_no_entities()
+
+    @pytest.mark.asyncio
+    async def test_stream_all(self):
+        self._repository.yield_per = 16
+        expected = await self._loading.find_all(100, 10)
+        self._db.session.expunge_all()
+
+        streamed = [
+            domain async for domain in self._repository.stream_all(100, 10)
+        ]
+
+        assert streamed == expected
+        self._assert_no_entities()
+
+    @pytest.mark.asyncio
+    async def test_modify(self):
+        (domain,) = await self._repository.find_all(1, 0)
+
+        await self._repository.modify(domain)
+
+        assert domain.id in self._repository.identity_map
+
 
 class TestIntegrationTestRepository(BaseIntegrationTest):
     @pytest.fixture(autouse=True)
@@ -600,3 +752,237 @@ class TestIntegrationTestRepository(BaseIntegrationTest):
     ):
         data = await self._repository.find_all(limit, offset)
         assert data == expected_data
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("limit", [10, 333])
+    async def test_find_page(self, limit: int):
+        tests: list[TestDomain] = []
+        cursor: Cursor | None = None
+        while True:
+            page = await self._repository.find_page(limit, cursor)
+            assert len(page.items) <= limit
+            tests.extend(page.items)
+            cursor = page.next_cursor
+            if cursor is None:
+                break
+
+        keys = [(test.timestamp, test.id) for test in tests]
+        assert keys == sorted(keys)
+        assert len(set(keys)) == 1000
+
+    @pytest.mark.asyncio
+    async def test_stream_all(self):
+        self._repository.yield_per = 64
+        streamed = [
+            test async for test in self._repository.stream_all(1000, 0)
+        ]
+        assert streamed == await self._repository.find_all(1000, 0)
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize(
+        "filters",
+        [
+            {"part_id": UUID("3e37952d-30bc-ab0e-d857-010255d44936")},
+            {"successful": False},
+            {"successful": True, "timestamp_from": datetime(2021, 1, 1)},
+            {"data_contains": {"type": "quality", "priority": "1"}},
+            {
+                "timestamp_from": datetime(2015, 1, 1),
+                "timestamp_to": datetime(2016, 1, 1),
+            },
+        ],
+    )
+    async def test_find_all_filtered(self, filters: dict[str, Any]):
+        tests = await self._repository.find_all(1000, 0)
+        expected = [test for test in tests if _matches(test, filters)]
+
+        data = await self._repository.find_all(1000, 0, filters)
+
+        assert expected
+        assert sorted(data, key=lambda test: test.id) == sorted(
+            expected, key=lambda test: test.id
+        )
+
+    @pytest.mark.asyncio
+    async def test_find_page_filtered(self):
+        filters = {"successful": False, "timestamp_to": datetime(2020, 1, 1)}
+        expected = await self._repository.find_all(1000, 0, filters)
+        tests: list[TestDomain] = []
+        cursor: Cursor | None = None
+        while True:
+            page = await self._repository.find_page(7, cursor, filters)
+            tests.extend(page.items)
+            cursor = page.next_cursor
+            if cursor is None:
+                break
+
+        assert len(tests) == len(expected)
+        assert {test.id for test in tests} == {test.id for test in expected}
+
+    @pytest.mark.asyncio
+    async def test_stream_all_filtered(self):
+        filters = {"part_id": UUID("3e37952d-30bc-ab0e-d857-010255d44936")}
+        streamed = [
+            test
+            async for test in self._repository.stream_all(1000, 0, filters)
+        ]
+        assert streamed == await self._repository.find_all(1000, 0, filters)
+
+    @pytest.mark.asyncio
+    async def test_stream_rows(self):
+        filters = {"part_id": UUID("3e37952d-30bc-ab0e-d857-010255d44936")}
+        self._repository.yield_per = 7
+        batches = [
+            batch async for batch in self._repository.stream_rows(filters)
+        ]
+
+        assert all(len(batch) <= 7 for batch in batches)
+        rows = [row for batch in batches for row in batch]
+        tests = await self._repository.find_all(1000, 0, filters)
+        assert [
+            (id, part_id, timestamp, successful, json.loads(data))
+            for id, part_id, timestamp, successful, data in rows
+        ] == [
+            (
+                test.id,
+                test.part_id,
+                test.timestamp,
+                test.successful,
+                test.data,
+            )
+            for test in tests
+        ]
+        assert all(isinstance(row[4], str) for row in rows)
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize(
+        "filters, index",
+        [
+            (
+                {"part_id": UUID("3e37952d-30bc-ab0e-d857-010255d44936")},
+                "ix_test_part_id_timestamp_id",
+            ),
+            ({"successful": False}, "ix_test_failed_timestamp_id"),
+        ],
+    )
+    async def test_filtered_page_uses_index(
+        self, filters: dict[str, Any], index: str
+    ):
+        query, params = self._repository._query_page(None, filters)
+        sql = (
+            query.limit(10)
+            .params(**params)
+            .compile(
+                dialect=self._db.session.bind.dialect,
+                compile_kwargs={"literal_binds": True},
+            )
+        )
+        session = self._db.session
+        await session.execute(text("SET LOCAL enable_seqscan = off"))
+
+        res = await session.execute(text(f"EXPLAIN {sql}"))
+
+        plan = "\n".join(row[0] for row in res)
+        assert index in await _plan_indexes(session, plan)
+
+    @pytest.mark.asyncio
+    async def test_data_contains_uses_index(self):
+        query, params = self._repository._query_filtered(
+            "all",
+            self._repository._build_all,
+            {"data_contains": {"type": "quality"}},
+        )
+        compiled = query.limit(10).compile(
+            dialect=self._db.session.bind.dialect
+        )
+        session = self._db.session
+        await session.execute(text("SET LOCAL enable_seqscan = off"))
+        conn = await session.connection()
+
+        # A JSONB value has no literal rendering, so the params are bound.
+        values = {
+            **compiled.params,
+            "filter_data_contains": json.dumps(params["filter_data_contains"]),
+        }
+        res = await conn.exec_driver_sql(
+            f"EXPLAIN {compiled}",
+            tuple(values[name] for name in compiled.positiontup or ()),
+        )
+
+        plan = "\n".join(row[0] for row in res)
+        assert "ix_test_data" in await _plan_indexes(session, plan)
+
+    @pytest.mark.asyncio
+    async def test_update_result_by_id_after_concurrent_update(
+        self, engine: AsyncEngine
+    ):
+        id = UUID("0641ff10-6866-bda9-f4d7-d57a923c6b6c")
+        test, previous = await self._repository.update_result_by_id(
+            id, {"successful": True}
+        )
+        assert test.successful and previous is False
+
+        async with AsyncSession(engine) as session:
+            repository = TestRepository(
+                db=Database(session), session=Session()
+            )
+            update = asyncio.create_task(
+                repository.update_result_by_id(id, {"successful": True})
+            )
+            await asyncio.sleep(0.2)
+            assert not update.done()
+            await self._db.session.commit()
+            test, previous = await update
+
+        assert test.successful and previous is True
+
+    @pytest.fixture
+    async def _repeated_id(self) -> UUID:
+        id = UUID("0641ff10-6866-bda9-f4d7-d57a923c6b6c")
+        await self._db.session.execute(
+            text(
+                "INSERT INTO test (id, part_id, timestamp, successful) "
+                "SELECT id, part_id, timestamp + interval '1 day', true "
+                "FROM test WHERE id = :id"
+            ),
+            {"id": id},
+        )
+        return id
+
+    @pytest.mark.asyncio
+    async def test_find_by_repeated_id(self, _repeated_id: UUID):
+        test = await self._repository.find_by_id(_repeated_id)
+
+        assert test.timestamp == datetime(2021, 12, 23, 10, 42, 55)
+
+    @pytest.mark.asyncio
+    async def test_update_by_repeated_id(self, _repeated_id: UUID):
+        test = await self._repository.update_by_id(
+            _repeated_id, {"data": {"type": "width"}}
+        )
+        assert test.timestamp == datetime(2021, 12, 23, 10, 42, 55)
+
+        test, previous = await self._repository.update_result_by_id(
+            _repeated_id, {"successful": False}
+        )
+        assert test.timestamp == datetime(2021, 12, 23, 10, 42, 55)
+        assert previous is True
+
+        res = await self._db.session.execute(
+            text("SELECT data FROM test WHERE id = :id ORDER BY timestamp"),
+            {"id": _repeated_id},
+        )
+        assert list(res.scalars()) == [
+            {"type": "height", "priority": "3"},
+            {"type": "width"},
+        ]
+
+    @pytest.mark.asyncio
+    async def test_delete_by_repeated_id(self, _repeated_id: UUID):
+        latest = await self._repository.delete_by_id(_repeated_id)
+        previous = await self._repository.delete_by_id(_repeated_id)
+
+        assert latest.timestamp == datetime(2021, 12, 23, 10, 42, 55)
+        assert previous.timestamp == datetime(2021, 12, 22, 10, 42, 55)
+        with pytest.raises(NoEntityFoundError):
+            await self._repository.delete_by_id(_repeated_id)
@@ -0,0 +1,148 @@
+import asyncio
+import logging
+import os
+import sys
+from pathlib import Path
+
+import pytest
+from alembic.autogenerate import compare_metadata
+from alembic.migration import MigrationContext
+from sqlalchemy import text
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.config import Settings
+from app.exceptions import SchemaVersionError
+from app.main import FastApiManager
+from app.models import Base
+from app.partitions import include_name
+from app.schema import MIGRATIONS_PATH, check_schema, expected_revisions
+
+
+def test_single_head():
+    assert len(expected_revisions()) == 1
+
+
+class TestIntegrationCheckSchema:
+    @pytest.fixture(autouse=True)
+    def _setup_engine(self, engine: AsyncEngine, reset_db: None):
+        self._engine = engine
+
+    async def _set_revision(self, revision: str) -> None:
+        async with self._engine.begin() as conn:
+            await conn.execute(
+                text("UPDATE alembic_version SET version_num = :revision"),
+                {"revision": revision},
+            )
+
+    @pytest.mark.asyncio
+    async def test_check_schema(self):
+        await check_schema(self._engine)
+
+    @pytest.mark.asyncio
+    async def test_check_schema_drift(self):
+        await self._set_revision("9ddadf84c339")
+
+        with pytest.raises(SchemaVersionError, match="9ddadf84c339"):
+            await check_schema(self._engine)
+
+    @pytest.mark.asyncio
+    async def test_check_schema_warn(self, caplog: pytest.LogCaptureFixture):
+        await self._set_revision("9ddadf84c339")
+
+        with caplog.at_level(logging.WARNING, logger="app.schema"):
+            await check_schema(self._engine, "warn")
+
+        assert "alembic upgrade head" in caplog.text
+
+    @pytest.mark.asyncio
+    async def test_check_schema_off(self):
+        await self._set_revision("9ddadf84c339")
+
+        await check_schema(self._engine, "off")
+
+    @pytest.mark.asyncio
+    async def test_not_migrated(self, app_manager: FastApiManager):
+        async with self._engine.begin() as conn:
+            await conn.execute(text("DROP TABLE alembic_version"))
+
+        try:
+            with pytest.raises(SchemaVersionError, match="revision none"):
+                await app_manager.init_app()
+        finally:
+            await app_manager.shutdown()
+
+
+# Tables created by create_all before the schema was migrated.
+CREATE_ALL_TABLES = [
+    "CREATE TABLE part (name VARCHAR NOT NULL, "
+    "modified_timestamp TIMESTAMP WITHOUT TIME ZONE NOT NULL, "
+    "id UUID NOT NULL, PRIMARY KEY (id))",
+    "CREATE TABLE test (part_id UUID NOT NULL, "
+    "timestamp TIMESTAMP WITHOUT TIME ZONE NOT NULL, "
+    "successful BOOLEAN NOT NULL, data JSON, id UUID NOT NULL, "
+    "PRIMARY KEY (id), "
+    "FOREIGN KEY(part_id) REFERENCES part (id) ON DELETE CASCADE)",
+]
+
+
+class TestIntegrationMigrations:
+    @pytest.fixture(autouse=True)
+    async def _drop_all(self, engine: AsyncEngine, reset_db: None):
+        self._engine = engine
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.drop_all)
+            await conn.execute(text("DROP TABLE alembic_version"))
+
+    async def _alembic(self, settings: Settings, *args: str) -> None:
+        url = make_url(settings.DATABASE_URI)
+        process = await asyncio.create_subprocess_exec(
+            sys.executable,
+            "-m",
+            "alembic",
+            *args,
+            cwd=Path(MIGRATIONS_PATH).parent,
+            env={
+                **os.environ,
+                "POSTGRES_USER": url.username or "",
+                "POSTGRES_PASSWORD": url.password or "",
+                "POSTGRES_SERVER": url.host or "",
+                "POSTGRES_DB": url.database or "",
+            },
+        )
+        assert await process.wait() == 0
+
+    async def _assert_matches_models(self) -> None:
+        engine = self._engine
+        async with engine.connect() as conn:
+            diff = await conn.run_sync(
+                lambda sync_conn: compare_metadata(
+                    MigrationContext.configure(
+                        sync_conn,
+                        opts={
+                            "compare_type": True,
+                            "include_name": include_name,
+                        },
+                    ),
+                    Base.metadata,
+                )
+            )
+        assert diff == []
+        await check_schema(engine)
+
+    @pytest.mark.asyncio
+    async def test_migrations_match_models(self, settings: Settings):
+        await self._alembic(settings, "upgrade", "head")
+
+        await self._assert_matches_models()
+
+    @pytest.mark.asyncio
+    async def test_stamp_created_tables(self, settings: Settings):
+        async with self._engine.begin() as conn:
+            for statement in CREATE_ALL_TABLES:
+                await conn.execute(text(statement))
+
+        await self._alembic(settings, "stamp", "2f6a8c1d4e70")
+        await self._alembic(settings, "upgrade", "head")
+
+        await self._assert_matches_models()
@@ -3,11 +3,26 @@ from unittest.mock import patch
 from uuid import UUID
 
 import pytest
+import pytest_asyncio
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.database import Database
-from app.schemas import PartRegistrationDTO
-from app.service import ServiceCreatePart
+from app.exceptions import NoEntityFoundError, NoPartFound
+from app.main import FastApiManager
+from app.managers import part_index
+from app.models import Part
+from app.schemas import (
+    PartRegistrationDTO,
+    TestRegistrationDTO,
+    TestUpdateDTO,
+)
+from app.service import (
+    ServiceCreatePart,
+    ServiceCreateTest,
+    ServiceDeletePart,
+    ServiceDeleteTest,
+    ServiceUpdateTest,
+)
 from app.session import Session
 from app.unit_of_work import TestUnitOfWork
 
@@ -57,3 +72,186 @@ class TestServiceCreatePart(BaseTestIntegrationService):
         assert part_domain.id == UUID("12345678123456781234567812345678")
         assert part_domain.name == "part_201"
         assert part_domain.modified_timestamp == datetime(2020, 1, 1)
+
+
+class TestServiceCreateTest(BaseTestIntegrationService):
+    @pytest.fixture(autouse=True)
+    def _setup_service(self, unit_of_work):
+        self._service = ServiceCreateTest(self._unit_of_work)
+
+    @pytest.mark.asyncio
+    async def test_create_tests(self):
+        dtos = [
+            TestRegistrationDTO(
+                part_id=UUID("e3e70682-c209-4cac-629f-6fbed82c07cd"),
+                successful=True,
+                data={"type": "quality"},
+            ),
+            TestRegistrationDTO(
+                part_id=UUID("00000000-0000-0000-0000-000000000000"),
+                successful=False,
+                data=None,
+            ),
+        ]
+
+        tests = await self._service.create_tests(dtos)
+
+        assert tests[1] is None
+        assert tests[0] is not None
+        test = await self._unit_of_work.test_repository.find_by_id(
+            tests[0].id
+        )
+        assert test.part_id == UUID("e3e70682-c209-4cac-629f-6fbed82c07cd")
+        assert test.data == {"type": "quality"}
+
+    @pytest.mark.asyncio
+    async def test_create_tests_for_deleted_cached_part(self):
+        part_id = UUID("e3e70682-c209-4cac-629f-6fbed82c07cd")
+        deleted_part_id = UUID("00000000-0000-0000-0000-000000000000")
+        part_index.remember(part_id)
+        part_index.remember(deleted_part_id)
+        stats = await self._unit_of_work.part_test_stats_repository.find_by_part_id(  # noqa
+            part_id
+        )
+        dtos = [
+            TestRegistrationDTO(part_id=part_id, successful=True, data=None),
+            TestRegistrationDTO(
+                part_id=deleted_part_id, successful=True, data=None
+            ),
+        ]
+
+        with patch(
+            "app.service.uuid4", side_effect=[UUID(int=1), UUID(int=2)]
+        ):
+            tests = await self._service.create_tests(dtos)
+
+        assert tests[0] is not None
+        assert tests[1] is None
+        assert part_index.contains(part_id) is True
+        assert part_index.contains(deleted_part_id) is None
+        test = await self._unit_of_work.test_repository.find_by_id(
+            tests[0].id
+        )
+        assert test.part_id == part_id
+        new_stats = await self._unit_of_work.part_test_stats_repository.find_by_part_id(  # noqa
+            part_id
+        )
+        assert new_stats.passed == stats.passed + 1
+
+    @pytest.mark.asyncio
+    async def test_create_test_for_missing_part(self):
+        with pytest.raises(NoPartFound):
+            await self._service.create_test(
+                TestRegistrationDTO(
+                    part_id=UUID("00000000-0000-0000-0000-000000000000"),
+                    successful=True,
+                    data=None,
+                )
+            )
+
+        with pytest.raises(NoEntityFoundError):
+            await self._unit_of_work.test_repository.find_by_id(
+                UUID("12345678123456781234567812345678")
+            )
+
+    @pytest_asyncio.fixture
+    async def _init_app(self, app_manager: FastApiManager):
+        await app_manager.init_app()
+        yield
+        await app_manager.shutdown()
+
+    @pytest.mark.asyncio
+    async def test_create_test_with_loaded_part_index(
+        self, _init_app, part_entities: list[Part]
+    ):
+        assert part_index.loaded
+        assert all(part_index.contains(part.id) for part in part_entities)
+        part_id = part_entities[0].id
+        test = await self._service.create_test(
+            TestRegistrationDTO(part_id=part_id, successful=True, data=None)
+        )
+        assert test.part_id == part_id
+
+
+class TestServiceDeletePart(BaseTestIntegrationService):
+    @pytest.fixture(autouse=True)
+    def _setup_service(self, unit_of_work):
+        self._service = ServiceDeletePart(self._unit_of_work)
+
+    @pytest.mark.asyncio
+    async def test_delete_part(self):
+        id = UUID("e3e70682-c209-4cac-629f-6fbed82c07cd")
+
+        await self._service.delete_part(id)
+
+        with pytest.raises(NoEntityFoundError):
+            await self._unit_of_work.part_repository.find_by_id(id)
+
+    @pytest.mark.asyncio
+    async def test_delete_missing_part(self):
+        with pytest.raises(NoEntityFoundError):
+            await self._service.delete_part(
+                UUID("00000000-0000-0000-0000-000000000000")
+            )
+
+
+class TestServiceDeleteTest(BaseTestIntegrationService):
+    @pytest.fixture(autouse=True)
+    def _setup_service(self, unit_of_work):
+        self._service = ServiceDeleteTest(self._unit_of_work)
+
+    @pytest.mark.asyncio
+    async def test_delete_test(self):
+        id = UUID("0641ff10-6866-bda9-f4d7-d57a923c6b6c")
+        await self._unit_of_work.test_repository.find_by_id(id)
+
+        await self._service.delete_test(id)
+
+        with pytest.raises(NoEntityFoundError):
+            await self._unit_of_work.test_repository.find_by_id(id)
+
+    @pytest.mark.asyncio
+    async def test_delete_missing_test(self):
+        with pytest.raises(NoEntityFoundError):
+            await self._service.delete_test(
+                UUID("00000000-0000-0000-0000-000000000000")
+            )
+
+
+class TestServiceUpdateTest(BaseTestIntegrationService):
+    @pytest.fixture(autouse=True)
+    def _setup_service(self, unit_of_work):
+        self._service = ServiceUpdateTest(self._unit_of_work)
+
+    @pytest.mark.asyncio
+    async def test_update_data(self):
+        id = UUID("0641ff10-6866-bda9-f4d7-d57a923c6b6c")
+        before = await self._unit_of_work.test_repository.find_by_id(id)
+
+        test = await self._service.update_data(
+            TestUpdateDTO(
+                id=id,
+                successful=not before.successful,
+                data=None,
+                timestamp=datetime(2023, 3, 4),
+            )
+        )
+
+        assert test.successful is not before.successful
+        assert test.timestamp == datetime(2023, 3, 4)
+        assert test.data == before.data
+        assert test.part_id == before.part_id
+        found = await self._unit_of_work.test_repository.find_by_id(id)
+        assert found == test
+
+    @pytest.mark.asyncio
+    async def test_update_missing_test(self):
+        with pytest.raises(NoEntityFoundError):
+            await self._service.update_data(
+                TestUpdateDTO(
+                    id=UUID("00000000-0000-0000-0000-000000000000"),
+                    successful=True,
+                    data=None,
+                    timestamp=None,
+                )
+            )
@@ -3,13 +3,15 @@ from uuid import UUID
 
 import pytest
 import pytest_asyncio
-from sqlalchemy import select, text
+from sqlalchemy import insert, select, text
 from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
 
 from app.database import Database
-from app.models import Part
+from app.domains import PartDomain, TestDomain
+from app.models import Part, Test, entity_version
 from app.session import Session
 from app.unit_of_work import TestUnitOfWork
+from app.versions import SHARDS, find_version
 
 
 class BaseIntegrationUOWTest:
@@ -81,3 +83,60 @@ class TestTestUnitOfWork(BaseIntegrationUOWTest):
         )
 
         assert res.scalar() is None
+        assert await find_version(self._test_db, Part) == 1
+
+    @pytest.mark.asyncio
+    async def test_save_bumps_one_shard(self):
+        await self._test_db.execute(
+            insert(entity_version),
+            [
+                {"name": "part", "shard": shard, "version": 5}
+                for shard in range(SHARDS)
+            ],
+        )
+        await self._test_db.commit()
+
+        await self._unit_of_work.save()
+
+        assert await find_version(self._test_db, Part) == 5 * SHARDS + 1
+        res = await self._test_db.execute(
+            select(entity_version.c.version).where(
+                entity_version.c.name == "part"
+            )
+        )
+        assert sorted(res.scalars()) == [5] * (SHARDS - 1) + [6]
+
+
+class TestTestUnitOfWorkInserts(BaseIntegrationUOWTest):
+    @pytest.fixture(autouse=True)
+    def _setup_unit_of_work(self, _setup_db, _setup_session):
+        self._unit_of_work = TestUnitOfWork(db=self._db, session=self._session)
+
+    @pytest.mark.asyncio
+    async def test_save_inserts_rows(self):
+        part = PartDomain(
+            id=UUID(int=1),
+            name="part",
+            modified_timestamp=datetime(2022, 1, 1),
+        )
+        tests = [
+            TestDomain(
+                id=UUID(int=index),
+                part_id=part.id,
+                timestamp=datetime(2022, 1, 2),
+                successful=bool(index % 2),
+                data={"index": index},
+            )
+            for index in range(10, 20)
+        ]
+        self._unit_of_work.test_repository.add_all(tests)
+        self._unit_of_work.part_repository.add(part)
+
+        await self._unit_of_work.save()
+
+        res = await self._test_db.execute(
+            select(Test.id, Test.data).where(Test.part_id == part.id)
+        )
+        assert sorted(res.all()) == [(test.id, test.data) for test in tests]
+        assert await find_version(self._test_db, Part) == 1
+        assert await find_version(self._test_db, Test) == 1
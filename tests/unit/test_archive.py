@@ -0,0 +1,349 @@
+from datetime import datetime, timedelta
+from pathlib import Path
+from random import getrandbits
+from unittest.mock import patch
+from uuid import UUID
+
+import orjson
+import pytest
+
+from app.archive import (
+    MAGIC,
+    TMP_SUFFIX,
+    IdFilter,
+    SegmentInfo,
+    TestArchive,
+    _contains,
+    check_filters,
+    find_in_segment,
+    matches,
+    read_segment,
+    read_segment_info,
+    remove_parts,
+    write_segment,
+)
+from app.domains import TestDomain
+from app.pagination import Cursor
+
+
+def _test(index: int, part: int = 1, **kwargs) -> TestDomain:
+    values = {
+        "id": UUID(int=index),
+        "part_id": UUID(int=part),
+        "timestamp": datetime(2020, 1, 1) + timedelta(hours=index),
+        "successful": bool(index % 2),
+        "data": {"index": index, "tags": ["a", str(index)]},
+    }
+    values.update(kwargs)
+    return TestDomain(**values)
+
+
+def _archive(path: Path, *segments: list[TestDomain]) -> TestArchive:
+    for number, tests in enumerate(segments):
+        write_segment(path / f"{number}.seg", tests)
+    return TestArchive(path=path)
+
+
+def test_write_read_segment(tmp_path: Path):
+    tests = [_test(3, part=7), _test(1, part=2), _test(2, data=None)]
+
+    info = write_segment(tmp_path / "0.seg", tests)
+
+    assert info.size == 3
+    assert info.part_ids == {UUID(int=1), UUID(int=2), UUID(int=7)}
+    assert info.min_timestamp == tests[1].timestamp
+    assert info.max_timestamp == tests[0].timestamp
+    assert read_segment(info) == [tests[1], tests[2], tests[0]]
+
+
+def test_write_segment_microseconds(tmp_path: Path):
+    test = _test(1, timestamp=datetime(1969, 12, 31, 23, 59, 59, 999999))
+
+    info = write_segment(tmp_path / "0.seg", [test])
+
+    assert read_segment(info) == [test]
+
+
+def test_segment_counts(tmp_path: Path):
+    tests = [_test(i, part=1 + i % 2) for i in range(5)]
+
+    info = write_segment(tmp_path / "0.seg", tests)
+
+    assert info.part_counts == {UUID(int=1): (0, 3), UUID(int=2): (2, 0)}
+    assert all(info.may_contain(test.id) for test in tests)
+
+
+def test_read_segment_info_without_counts(tmp_path: Path):
+    # Written before the header held the counts and the id filter.
+    path = tmp_path / "0.seg"
+    tests = [_test(i, part=1 + i % 2) for i in range(5)]
+    write_segment(path, tests)
+    raw = path.read_bytes()
+    start = len(MAGIC) + 4
+    end = start + int.from_bytes(raw[len(MAGIC):][:4], "little")
+    header = orjson.loads(raw[start:end])
+    for key in ("part_ids", "part_counts", "id_filter_hashes"):
+        del header[key]
+    del header["columns"][-1]
+    legacy = orjson.dumps(header)
+    path.write_bytes(
+        MAGIC + len(legacy).to_bytes(4, "little") + legacy + raw[end:]
+    )
+
+    info = read_segment_info(path)
+
+    assert info.part_counts == {UUID(int=1): (0, 3), UUID(int=2): (2, 0)}
+    assert info.id_filter is None and info.may_contain(UUID(int=9))
+    assert read_segment(info) == tests
+
+
+def test_id_filter():
+    ids = [UUID(int=getrandbits(128)) for _ in range(1000)]
+    others = [UUID(int=getrandbits(128)) for _ in range(1000)]
+
+    id_filter = IdFilter.build(ids)
+
+    assert all(id_filter.may_contain(id) for id in ids)
+    assert sum(id_filter.may_contain(id) for id in others) < 50
+
+
+def test_read_rewritten_segment(tmp_path: Path):
+    path = tmp_path / "0.seg"
+    info = write_segment(path, [_test(i) for i in range(5)])
+    tests = [_test(i, part=2) for i in range(5, 7)]
+    write_segment(tmp_path / f"0{TMP_SUFFIX}", tests).path.replace(path)
+
+    assert read_segment(info) == tests
+
+
+@pytest.mark.parametrize(
+    "part_ids, kept", [({UUID(int=2)}, [0, 2]), ({UUID(int=9)}, [0, 1, 2, 3])]
+)
+def test_remove_parts(tmp_path: Path, part_ids: set[UUID], kept: list[int]):
+    info = write_segment(
+        tmp_path / "0.seg", [_test(i, part=1 + i % 2) for i in range(4)]
+    )
+
+    removed = remove_parts(info, part_ids)
+
+    assert removed == 4 - len(kept)
+    assert read_segment(read_segment_info(info.path)) == [
+        _test(i, part=1 + i % 2) for i in kept
+    ]
+    assert not list(tmp_path.glob(f"*{TMP_SUFFIX}"))
+
+
+def test_remove_parts_empty(tmp_path: Path):
+    info = write_segment(tmp_path / "0.seg", [_test(0), _test(1)])
+
+    assert remove_parts(info, {UUID(int=1)}) == 2
+    assert not info.path.exists()
+
+
+def test_find_in_segment(tmp_path: Path):
+    info = write_segment(tmp_path / "0.seg", [_test(i) for i in range(5)])
+
+    assert find_in_segment(info, UUID(int=3)) == 3
+    assert find_in_segment(info, UUID(int=9)) is None
+
+
+def test_find_in_segment_unaligned(tmp_path: Path):
+    # The id of the second test contains the bytes of the searched id
+    # astride the first and second ids.
+    searched = UUID(bytes=bytes(8) + bytes(range(1, 9)))
+    first = UUID(bytes=bytes(16))
+    second = UUID(bytes=bytes(range(1, 9)) + bytes(8))
+    info = write_segment(
+        tmp_path / "0.seg",
+        [_test(0, id=first), _test(1, id=second)],
+    )
+
+    assert find_in_segment(info, searched) is None
+
+
+@pytest.mark.parametrize(
+    "filters, expected",
+    [
+        ({}, True),
+        ({"part_id": UUID(int=5)}, True),
+        ({"part_id": UUID(int=6)}, False),
+        ({"timestamp_from": datetime(2020, 2, 28)}, True),
+        ({"timestamp_from": datetime(2020, 3, 2)}, False),
+        ({"timestamp_to": datetime(2020, 2, 1)}, False),
+        ({"timestamp_to": datetime(2020, 2, 2)}, True),
+    ],
+)
+def test_may_match(filters, expected):
+    info = SegmentInfo(
+        path=Path("0.seg"),
+        size=1,
+        min_timestamp=datetime(2020, 2, 1),
+        max_timestamp=datetime(2020, 3, 1),
+        columns={},
+        part_ids=frozenset({UUID(int=1), UUID(int=5), UUID(int=10)}),
+        stamp=(0, 0),
+        part_counts={},
+        id_filter=None,
+    )
+
+    assert info.may_match(filters) is expected
+
+
+@pytest.mark.parametrize(
+    "document, value, expected",
+    [
+        ({"a": 1, "b": 2}, {"a": 1}, True),
+        ({"a": 1}, {"a": 2}, False),
+        ({"a": {"b": [1, 2]}}, {"a": {"b": [2]}}, True),
+        ({"a": [1, 2]}, {"a": 1}, False),
+        ([1, [2, 3]], [[3]], True),
+        ([1, 2], 1, True),
+        ([[1, 2]], [1], False),
+        ([1, True], 1, True),
+        ([True], 1, False),
+        ({"a": 1.0}, {"a": 1}, True),
+        (None, {"a": 1}, False),
+    ],
+)
+def test_contains(document, value, expected):
+    assert _contains(document, value) is expected
+
+
+def test_matches():
+    test = _test(1)
+
+    assert matches(test, {"successful": True, "part_id": UUID(int=1)})
+    assert not matches(test, {"successful": False})
+    assert not matches(test, {"timestamp_from": datetime(2020, 1, 2)})
+    assert matches(test, {"data_contains": {"tags": ["1"]}})
+
+
+def test_check_filters():
+    assert check_filters({"part_id": None, "successful": True}) == {
+        "successful": True
+    }
+    with pytest.raises(ValueError, match="Unknown filter: name"):
+        check_filters({"name": "x"})
+
+
+@pytest.mark.asyncio
+async def test_find_by_id(tmp_path: Path):
+    archive = _archive(
+        tmp_path, [_test(i) for i in range(3)], [_test(i) for i in range(3, 6)]
+    )
+
+    with patch("app.archive.find_in_segment", wraps=find_in_segment) as find:
+        assert await archive.find_by_id(UUID(int=4)) == _test(4)
+
+    # The id filter of the first segment rules it out.
+    assert [call.args[0].path.name for call in find.call_args_list] == [
+        "1.seg"
+    ]
+    assert await archive.find_by_id(UUID(int=9)) is None
+
+
+@pytest.mark.asyncio
+async def test_find_all(tmp_path: Path):
+    archive = _archive(
+        tmp_path, [_test(i) for i in range(3)], [_test(i) for i in range(3, 6)]
+    )
+
+    assert await archive.find_all(3, 2, {}) == [_test(i) for i in (2, 3, 4)]
+    assert await archive.find_all(2, 1, {"successful": True}) == [
+        _test(3),
+        _test(5),
+    ]
+    assert await archive.count({"successful": False}) == 3
+
+
+@pytest.mark.asyncio
+async def test_stream_all(tmp_path: Path):
+    archive = _archive(
+        tmp_path, [_test(i) for i in range(3)], [_test(i) for i in range(3, 6)]
+    )
+
+    streamed = [test async for test in archive.stream_all(3, 2, {})]
+
+    assert streamed == [_test(i) for i in (2, 3, 4)]
+
+
+@pytest.mark.asyncio
+async def test_find_page_merges_segments(tmp_path: Path):
+    # The segments overlap in time, the pages are ordered across them.
+    archive = _archive(
+        tmp_path,
+        [_test(i) for i in range(0, 10, 2)],
+        [_test(i) for i in range(1, 10, 2)],
+    )
+
+    first = await archive.find_page(4, None, {})
+    last = first[-1]
+    second = await archive.find_page(10, Cursor(last.timestamp, last.id), {})
+
+    assert first == [_test(i) for i in range(4)]
+    assert second == [_test(i) for i in range(4, 10)]
+
+
+@pytest.mark.asyncio
+async def test_hide_parts(tmp_path: Path):
+    tests = [_test(i, part=i % 2 + 1) for i in range(6)]
+    archive = _archive(tmp_path, tests[:3], tests[3:])
+    # Another process, which sees the tombstone once it rescans.
+    other = TestArchive(path=tmp_path)
+    assert await other.count({}) == 6
+
+    await archive.hide_parts([UUID(int=1)])
+
+    kept = [test for test in tests if test.part_id == UUID(int=2)]
+    for reader in (archive, other):
+        assert await reader.find_all(6, 1, {}) == kept[1:]
+        assert await reader.count({}) == 3
+        assert await reader.find_by_id(UUID(int=0)) is None
+        assert await reader.find_page(6, None, {}) == kept
+    assert sum(info.size for info in archive.segments) == 6
+
+
+@pytest.mark.asyncio
+async def test_read_cache(tmp_path: Path):
+    archive = _archive(tmp_path, [_test(0)], [_test(1)], [_test(2)])
+    archive._cache_size = 2
+
+    await archive.find_all(3, 0, {})
+
+    assert list(archive._cache) == [tmp_path / "1.seg", tmp_path / "2.seg"]
+
+
+@pytest.mark.asyncio
+async def test_refresh(tmp_path: Path):
+    archive = _archive(tmp_path, [_test(0)], [_test(1)])
+    assert await archive.find_all(3, 0, {}) == [_test(0), _test(1)]
+
+    # Written, rewritten and removed by other processes.
+    write_segment(tmp_path / "2.seg", [_test(2)])
+    remove_parts(read_segment_info(tmp_path / "1.seg"), {UUID(int=1)})
+    write_segment(tmp_path / f"0{TMP_SUFFIX}", [_test(3)]).path.replace(
+        tmp_path / "0.seg"
+    )
+
+    assert await archive.find_all(3, 0, {}) == [_test(2), _test(3)]
+    assert [info.path.name for info in archive.segments] == ["2.seg", "0.seg"]
+
+
+def test_promote(tmp_path: Path):
+    tmp = tmp_path / f"0{TMP_SUFFIX}"
+    write_segment(tmp, [_test(0)])
+
+    info = TestArchive(path=tmp_path)._promote(tmp)
+
+    assert info.path == tmp_path / "0.seg"
+    assert not tmp.exists()
+
+
+def test_promote_recovered(tmp_path: Path):
+    # Renamed by the recovery of another process.
+    tmp = tmp_path / f"0{TMP_SUFFIX}"
+    write_segment(tmp, [_test(0)]).path.replace(tmp_path / "0.seg")
+
+    info = TestArchive(path=tmp_path)._promote(tmp)
+
+    assert info.path == tmp_path / "0.seg"
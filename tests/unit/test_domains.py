@@ -3,7 +3,7 @@ from uuid import UUID
 
 import pytest
 
-from app.domains import PartDomain, TestDomain
+from app.domains import PartDomain, PartTestStatsDomain, TestDomain
 
 
 class TestTestDomain:
@@ -182,3 +182,93 @@ class TestPartDomain:
             name="part_1",
             modified_timestamp=datetime(2021, 1, 1),
         )
+
+
+class TestPartTestStatsDomain:
+    """
+    Test suite for the PartTestStatsDomain entity.
+    """
+
+    @pytest.fixture(autouse=True)
+    def _setup_domain(self):
+        """
+        Set up a PartTestStatsDomain instance with predefined values
+        for testing purposes.
+        """
+        self._domain = PartTestStatsDomain(
+            UUID("00000000-0000-0000-0000-000000000000"), 3, 1
+        )
+
+    def test_constructor(self):
+        """
+        Test the constructor of the Domain class.
+        """
+        assert self._domain.id == UUID("00000000-0000-0000-0000-000000000000")
+        assert self._domain.passed == 3
+        assert self._domain.failed == 1
+        assert self._domain.total == 4
+        assert self._domain.pass_rate == 0.75
+
+    def test_pass_rate_without_tests(self):
+        """
+        Test that the pass rate of a part without tests is None.
+        """
+        domain = PartTestStatsDomain(
+            UUID("00000000-0000-0000-0000-000000000000"), 0, 0
+        )
+        assert domain.total == 0
+        assert domain.pass_rate is None
+
+    def test_to_dict(self):
+        """
+        Test the to_dict method of the Domain class.
+        """
+        assert self._domain.to_dict() == {
+            "part_id": "00000000-0000-0000-0000-000000000000",
+            "passed": 3,
+            "failed": 1,
+            "total": 4,
+            "pass_rate": 0.75,
+        }
+
+    def test_repr(self):
+        """
+        Test the __repr__ method of the Domain class.
+        """
+        assert repr(self._domain) == (
+            "PartTestStatsDomain("
+            "id=UUID('00000000-0000-0000-0000-000000000000'), "
+            "passed=3, failed=1)"
+        )
+
+    def test_eq(self):
+        """
+        Test the __eq__ method of the Domain class.
+        """
+        assert self._domain == PartTestStatsDomain(
+            id=UUID("00000000-0000-0000-0000-000000000000"),
+            passed=3,
+            failed=1,
+        )
+        assert self._domain != PartTestStatsDomain(
+            id=UUID("00000000-0000-0000-0000-000000000000"),
+            passed=3,
+            failed=2,
+        )
+
+
+@pytest.mark.parametrize(
+    "domain",
+    [
+        TestDomain(UUID(int=0), UUID(int=1), datetime(2021, 1, 1), True),
+        PartDomain(UUID(int=0), "part_1", datetime(2021, 1, 1)),
+        PartTestStatsDomain(UUID(int=0), 1, 2),
+    ],
+)
+def test_slots(domain):
+    """
+    Test that the domains hold their values in slots, without a __dict__.
+    """
+    assert not hasattr(domain, "__dict__")
+    with pytest.raises(AttributeError):
+        domain.extra = 1
@@ -0,0 +1,120 @@
+import asyncio
+from datetime import datetime
+from typing import AsyncIterator
+from unittest.mock import patch
+from uuid import UUID
+
+import pytest
+
+from app.export import ROW_GROUP_SIZE, _iter_arrow, _iter_parquet, record_batch
+
+pa = pytest.importorskip("pyarrow")
+parquet = pytest.importorskip("pyarrow.parquet")
+
+PART_ID = UUID("7f411fed-1e70-e799-33a1-d1c2ad4ab155")
+
+
+def _rows(count: int) -> list[tuple]:
+    return [
+        (
+            UUID(int=index),
+            PART_ID,
+            datetime(2020, 1, 1, 0, 0, index % 60),
+            index % 2 == 0,
+            f'{{"index": {index}}}',
+        )
+        for index in range(count)
+    ]
+
+
+async def _aiter(items: list) -> AsyncIterator:
+    for item in items:
+        yield item
+
+
+async def _collect(chunks: AsyncIterator[bytes]) -> bytes:
+    return b"".join([chunk async for chunk in chunks])
+
+
+class TestRecordBatch:
+    def test_columns(self):
+        batch = record_batch(_rows(3))
+
+        assert batch.schema.names == [
+            "id",
+            "part_id",
+            "timestamp",
+            "successful",
+            "data",
+        ]
+        assert batch.to_pylist()[1] == {
+            "id": str(UUID(int=1)),
+            "part_id": str(PART_ID),
+            "timestamp": datetime(2020, 1, 1, 0, 0, 1),
+            "successful": False,
+            "data": '{"index": 1}',
+        }
+
+    def test_empty(self):
+        assert record_batch([]).num_rows == 0
+
+
+class TestIterArrow:
+    @pytest.mark.asyncio
+    async def test_batches(self):
+        rows = _rows(10)
+
+        content = await _collect(_iter_arrow(_aiter([rows[:4], rows[4:]])))
+
+        reader = pa.ipc.open_stream(content)
+        assert [batch.num_rows for batch in reader] == [4, 6]
+
+    @pytest.mark.asyncio
+    async def test_writes_in_thread(self):
+        with patch(
+            "app.export.asyncio.to_thread", wraps=asyncio.to_thread
+        ) as to_thread:
+            await _collect(_iter_arrow(_aiter([_rows(3), _rows(2)])))
+
+        assert to_thread.call_count == 2
+
+    @pytest.mark.asyncio
+    async def test_empty(self):
+        content = await _collect(_iter_arrow(_aiter([])))
+
+        assert pa.ipc.open_stream(content).read_all().num_rows == 0
+
+
+class TestIterParquet:
+    @pytest.mark.asyncio
+    async def test_row_groups(self):
+        rows = _rows(ROW_GROUP_SIZE + 1000)
+        batches = []
+        for start in range(0, len(rows), 1000):
+            end = start + 1000
+            batches.append(rows[start:end])
+
+        content = await _collect(_iter_parquet(_aiter(batches)))
+
+        file = parquet.ParquetFile(pa.BufferReader(content))
+        assert file.metadata.num_rows == len(rows)
+        assert file.metadata.num_row_groups == 2
+        assert file.read().column("data").to_pylist() == [
+            row[4] for row in rows
+        ]
+
+    @pytest.mark.asyncio
+    async def test_writes_in_thread(self):
+        with patch(
+            "app.export.asyncio.to_thread", wraps=asyncio.to_thread
+        ) as to_thread:
+            await _collect(_iter_parquet(_aiter([_rows(3), _rows(2)])))
+
+        # A conversion per batch, then the single row group.
+        assert to_thread.call_count == 3
+
+    @pytest.mark.asyncio
+    async def test_empty(self):
+        content = await _collect(_iter_parquet(_aiter([])))
+
+        assert parquet.read_table(pa.BufferReader(content)).num_rows == 0
@@ -0,0 +1,142 @@
+import json
+from datetime import datetime
+from pathlib import Path
+from uuid import UUID
+
+import pytest
+
+from app.loader import (
+    Checkpoint,
+    line_id,
+    parse_bool,
+    parse_chunk,
+    parse_record,
+    parse_timestamp,
+    read_chunks,
+)
+
+
+class TestParsing:
+    @pytest.mark.parametrize(
+        "value, expected",
+        [(True, True), ("true", True), ("1", True), ("F", False), (0, False)],
+    )
+    def test_parse_bool(self, value, expected: bool):
+        assert parse_bool(value) is expected
+
+    def test_parse_bool_invalid(self):
+        with pytest.raises(ValueError):
+            parse_bool("maybe")
+
+    @pytest.mark.parametrize(
+        "value, expected",
+        [
+            ("2021-01-01T10:00:00", datetime(2021, 1, 1, 10)),
+            ("2021-01-01 10:00:00", datetime(2021, 1, 1, 10)),
+            ("2021-01-01T12:00:00+02:00", datetime(2021, 1, 1, 10)),
+        ],
+    )
+    def test_parse_timestamp(self, value: str, expected: datetime):
+        assert parse_timestamp(value) == expected
+
+    def test_parse_record(self):
+        row = parse_record(
+            {
+                "id": "00000000-0000-0000-0000-000000000001",
+                "part_id": "00000000-0000-0000-0000-000000000002",
+                "timestamp": "2021-01-01T10:00:00",
+                "successful": "false",
+                "data": '{"type": "weight"}',
+            },
+            UUID(int=3),
+        )
+        assert row == (
+            UUID("00000000-0000-0000-0000-000000000001"),
+            UUID("00000000-0000-0000-0000-000000000002"),
+            datetime(2021, 1, 1, 10),
+            False,
+            '{"type": "weight"}',
+        )
+
+    def test_parse_record_default_id(self):
+        row = parse_record(
+            {
+                "part_id": "00000000-0000-0000-0000-000000000002",
+                "timestamp": "2021-01-01T10:00:00",
+                "successful": True,
+            },
+            UUID(int=3),
+        )
+        assert row[0] == UUID(int=3)
+        assert row[4] is None
+
+    def test_line_id(self):
+        assert line_id("/data/a.csv", 1) == line_id("/data/a.csv", 1)
+        assert line_id("/data/a.csv", 1) != line_id("/data/a.csv", 2)
+        assert line_id("/data/a.csv", 1) != line_id("/data/b.csv", 1)
+
+    def test_parse_csv_chunk(self):
+        header = ["part_id", "timestamp", "successful", "data"]
+        lines = [
+            '00000000-0000-0000-0000-000000000002,2021-01-01,1,"{""a"": 1}"\n',
+            "not-a-uuid,2021-01-01,1,\n",
+            "00000000-0000-0000-0000-000000000002,2021-01-02,0,\n",
+        ]
+        chunk = parse_chunk("csv", header, lines, "/data/a.csv", 11)
+        assert len(chunk.rows) == 2
+        assert chunk.rows[0][4] == '{"a": 1}'
+        assert [row[0] for row in chunk.rows] == [
+            line_id("/data/a.csv", 11),
+            line_id("/data/a.csv", 13),
+        ]
+        assert chunk.invalid == 1
+
+    def test_parse_ndjson_chunk(self):
+        record = {
+            "part_id": "00000000-0000-0000-0000-000000000002",
+            "timestamp": "2021-01-01T10:00:00",
+            "successful": True,
+            "data": {"a": 1},
+        }
+        lines = [
+            json.dumps(record),
+            "{broken",
+            "[1, 2]",
+            "",
+            json.dumps(record),
+        ]
+        chunk = parse_chunk("ndjson", None, lines, "/data/a.ndjson", 1)
+        assert len(chunk.rows) == 2
+        assert [row[0] for row in chunk.rows] == [
+            line_id("/data/a.ndjson", 1),
+            line_id("/data/a.ndjson", 5),
+        ]
+        assert chunk.invalid == 2
+
+
+class TestReading:
+    @pytest.fixture(autouse=True)
+    def _setup_file(self, tmp_path: Path):
+        self._path = tmp_path / "tests.csv"
+        self._path.write_text(
+            "part_id,timestamp,successful\n"
+            + "".join(f"{i},2021-01-01,1\n" for i in range(7))
+        )
+
+    @pytest.mark.parametrize(
+        "skip, expected_ends", [(0, [3, 6, 7]), (3, [6, 7]), (7, [])]
+    )
+    def test_read_chunks(self, skip: int, expected_ends: list[int]):
+        chunks = list(read_chunks(self._path, "csv", 3, skip))
+        assert [chunk.end for chunk in chunks] == expected_ends
+        starts = [skip + 1] + [chunk.end + 1 for chunk in chunks[:-1]]
+        assert [chunk.start for chunk in chunks] == starts[: len(chunks)]
+        assert sum(len(chunk.lines) for chunk in chunks) == 7 - skip
+
+    def test_checkpoint(self, tmp_path: Path):
+        checkpoint = Checkpoint(tmp_path / "load.checkpoint")
+        assert checkpoint.position(self._path) == 0
+        checkpoint.save(self._path, 6)
+
+        resumed = Checkpoint(tmp_path / "load.checkpoint")
+        assert resumed.position(self._path) == 6
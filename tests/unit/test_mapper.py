@@ -46,6 +46,18 @@ class TestPartEntityDomainMapper:
         assert domain.name == "standard"
         assert domain.modified_timestamp == datetime(2021, 1, 2)
 
+    def test_row_to_domain(self):
+        """
+        Test the row_to_domain method of the PartEntityDomainMapper class.
+        """
+        row = tuple(
+            getattr(self._entity, name) for name in self._mapper.columns
+        )
+
+        domain = self._mapper.row_to_domain(row)
+
+        assert domain == self._mapper.to_domain(self._entity)
+
     def test_to_entity(self):
         """
         Test the to_entity method of the PartEntityDomainMapper class.
@@ -55,6 +67,21 @@ class TestPartEntityDomainMapper:
         assert entity.name == "premium"
         assert entity.modified_timestamp == datetime(2021, 1, 1)
 
+    def test_to_rows(self):
+        """
+        Test the to_rows method of the PartEntityDomainMapper class.
+        """
+        rows = self._mapper.to_rows([self._domain])
+
+        assert rows == [
+            (
+                UUID("00000000-0000-0000-0000-000000000000"),
+                "premium",
+                datetime(2021, 1, 1),
+            )
+        ]
+        assert self._mapper.row_to_domain(rows[0]) == self._domain
+
     def test_to_entity_with_modified_timestamp(self):
         """
         Test the to_entity method of the PartEntityDomainMapper class.
@@ -110,6 +137,66 @@ class TestTestEntityMapper:
         assert domain.successful is False
         assert domain.data == {"type": "standard"}
 
+    def test_row_to_domain(self):
+        """
+        Test the row_to_domain method of the TestEntityDomainMapper class.
+        """
+        row = tuple(
+            getattr(self._entity, name) for name in self._mapper.columns
+        )
+
+        domain = self._mapper.row_to_domain(row)
+
+        assert domain == self._mapper.to_domain(self._entity)
+
+    def test_rows_to_domains_interns_part_ids(self):
+        """
+        Test that the domains of the rows of a result set share their
+        part ids.
+        """
+        rows = [
+            (
+                UUID(int=index),
+                UUID(int=index % 2),
+                datetime(2021, 2, 1),
+                True,
+                None,
+            )
+            for index in range(4)
+        ]
+
+        domains = self._mapper.rows_to_domains(rows)
+
+        assert [domain.id for domain in domains] == [
+            UUID(int=index) for index in range(4)
+        ]
+        assert domains[1].part_id == UUID(int=1)
+        assert domains[1].part_id is domains[3].part_id
+
+    def test_to_domains_interns_part_ids(self):
+        """
+        Test that the domains of a result set share their part ids.
+        """
+        entities = [
+            Test(
+                id=UUID(int=index),
+                part_id=UUID(int=index % 2),
+                timestamp=datetime(2021, 2, 1),
+                successful=True,
+            )
+            for index in range(4)
+        ]
+
+        domains = self._mapper.to_domains(entities)
+
+        assert [domain.id for domain in domains] == [
+            UUID(int=index) for index in range(4)
+        ]
+        assert domains[0].part_id == UUID(int=0)
+        assert domains[0].part_id is domains[2].part_id
+        assert domains[1].part_id is domains[3].part_id
+        assert entities[2].part_id is not entities[0].part_id
+
     def test_to_entity(self):
         """
         Test the to_entity method of the TestEntityDomainMapper class.
@@ -121,6 +208,23 @@ class TestTestEntityMapper:
         assert entity.successful is True
         assert entity.data == {"type": "premium"}
 
+    def test_to_rows(self):
+        """
+        Test the to_rows method of the TestEntityDomainMapper class.
+        """
+        rows = self._mapper.to_rows([self._domain])
+
+        assert rows == [
+            (
+                UUID("00000000-0000-0000-0000-000000000000"),
+                UUID("00000000-0000-0000-0000-000000000001"),
+                datetime(2021, 1, 1),
+                True,
+                {"type": "premium"},
+            )
+        ]
+        assert self._mapper.row_to_domain(rows[0]) == self._domain
+
     def test_to_entity_with_modified_timestamp(self):
         """
         Test the to_entity method of the TestEntityDomainMapper class.
@@ -0,0 +1,44 @@
+from datetime import datetime
+from uuid import UUID
+
+import pytest
+
+from app.exceptions import InvalidCursorError
+from app.pagination import Cursor, decode_cursor, encode_cursor
+
+
+class TestCursor:
+    @pytest.mark.parametrize(
+        "cursor",
+        [
+            Cursor(
+                key=datetime(2021, 1, 1),
+                id=UUID("00000000-0000-0000-0000-000000000000"),
+            ),
+            Cursor(
+                key=datetime(2018, 12, 26, 19, 57, 9, 1234),
+                id=UUID("9e4d6e3c-1846-d424-c17c-627923c6612f"),
+            ),
+        ],
+    )
+    def test_round_trip(self, cursor: Cursor):
+        """
+        Test that a decoded token gives back the encoded cursor.
+        """
+        assert decode_cursor(encode_cursor(cursor)) == cursor
+
+    def test_empty_token(self):
+        """
+        Test that an empty token designates the first page.
+        """
+        assert decode_cursor("") is None
+
+    @pytest.mark.parametrize(
+        "token", ["not-a-cursor", "WzFd", "WyJhIiwgImIiXQ==", "e30="]
+    )
+    def test_invalid_token(self, token: str):
+        """
+        Test that malformed tokens raise InvalidCursorError.
+        """
+        with pytest.raises(InvalidCursorError):
+            decode_cursor(token)
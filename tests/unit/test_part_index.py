@@ -0,0 +1,91 @@
+from typing import AsyncIterator, Iterable
+from uuid import UUID, uuid4
+
+import pytest
+
+from app.config import Settings
+from app.part_index import PartIndex
+
+
+async def _aiter(ids: Iterable[UUID]) -> AsyncIterator[UUID]:
+    for id in ids:
+        yield id
+
+
+class TestPartIndex:
+    @pytest.fixture(autouse=True)
+    def _setup_index(self):
+        self._index = PartIndex(cache_size=2)
+
+    def test_not_loaded(self):
+        assert not self._index.loaded
+        assert self._index.contains(uuid4()) is None
+
+    @pytest.mark.asyncio
+    async def test_load(self):
+        ids = [uuid4() for _ in range(3)]
+
+        await self._index.load(_aiter(ids))
+
+        assert self._index.loaded
+        assert self._index.contains(ids[0]) is True
+        assert self._index.contains(ids[1]) is True
+        assert self._index.contains(ids[2]) is None
+
+    @pytest.mark.asyncio
+    async def test_load_keeps_most_recently_used(self):
+        first, second = uuid4(), uuid4()
+        await self._index.load(_aiter([first, second]))
+
+        self._index.remember(uuid4())
+
+        assert self._index.contains(first) is True
+        assert self._index.contains(second) is None
+
+    @pytest.mark.asyncio
+    async def test_unknown_after_load(self):
+        await self._index.load(_aiter([uuid4()]))
+
+        assert self._index.contains(uuid4()) is None
+
+    @pytest.mark.asyncio
+    async def test_add(self):
+        await self._index.load(_aiter([]))
+        id = uuid4()
+
+        self._index.add(id)
+
+        assert self._index.contains(id) is True
+
+    def test_remember_evicts_least_recently_used(self):
+        first, second, third = uuid4(), uuid4(), uuid4()
+        self._index.remember(first)
+        self._index.remember(second)
+        self._index.contains(first)
+
+        self._index.remember(third)
+
+        assert self._index.contains(first) is True
+        assert self._index.contains(second) is None
+        assert self._index.contains(third) is True
+
+    @pytest.mark.asyncio
+    async def test_discard(self):
+        id = uuid4()
+        await self._index.load(_aiter([id]))
+
+        self._index.discard(id)
+
+        assert self._index.contains(id) is None
+
+    @pytest.mark.asyncio
+    async def test_init_app(self):
+        await self._index.load(_aiter([uuid4()]))
+
+        self._index.init_app(Settings(PART_INDEX_CACHE_SIZE=1))
+
+        assert not self._index.loaded
+        self._index.remember(uuid4())
+        id = uuid4()
+        self._index.remember(id)
+        assert self._index.contains(id) is True
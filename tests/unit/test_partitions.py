@@ -0,0 +1,49 @@
+from datetime import datetime
+
+import pytest
+
+from app.partitions import (
+    Partition,
+    add_months,
+    include_name,
+    month_start,
+    partition_of,
+)
+
+
+def test_month_start():
+    assert month_start(datetime(2024, 2, 29, 23, 59)) == datetime(2024, 2, 1)
+
+
+@pytest.mark.parametrize(
+    "months, expected",
+    [
+        (0, datetime(2024, 11, 1)),
+        (1, datetime(2024, 12, 1)),
+        (2, datetime(2025, 1, 1)),
+        (14, datetime(2026, 1, 1)),
+        (-11, datetime(2023, 12, 1)),
+    ],
+)
+def test_add_months(months: int, expected: datetime):
+    assert add_months(datetime(2024, 11, 1), months) == expected
+
+
+def test_partition_of():
+    assert partition_of(datetime(2024, 12, 1)) == Partition(
+        "test_y2024m12", datetime(2024, 12, 1), datetime(2025, 1, 1)
+    )
+
+
+@pytest.mark.parametrize(
+    "name, type_, expected",
+    [
+        ("test", "table", True),
+        ("test_default", "table", False),
+        ("test_y2024m01", "table", False),
+        ("test_y2024m01_pkey", "index", True),
+        ("part_test_stats", "table", True),
+    ],
+)
+def test_include_name(name: str, type_: str, expected: bool):
+    assert include_name(name, type_, {}) is expected
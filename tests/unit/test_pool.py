@@ -0,0 +1,48 @@
+import pytest
+
+from app.pool import Histogram, PoolMetrics
+
+
+class TestHistogram:
+    @pytest.fixture(autouse=True)
+    def _setup_histogram(self) -> None:
+        self._histogram = Histogram([0.1, 1.0])
+
+    def test_empty(self) -> None:
+        assert self._histogram.counts == [0, 0, 0]
+        assert self._histogram.count == 0
+        assert self._histogram.sum == 0
+
+    @pytest.mark.parametrize(
+        "value, counts",
+        [
+            (0.01, [1, 0, 0]),
+            (0.1, [1, 0, 0]),
+            (0.5, [0, 1, 0]),
+            (3, [0, 0, 1]),
+        ],
+    )
+    def test_observe(self, value: float, counts: list[int]) -> None:
+        self._histogram.observe(value)
+        assert self._histogram.counts == counts
+        assert self._histogram.count == 1
+        assert self._histogram.sum == value
+
+    def test_to_dict(self) -> None:
+        self._histogram.observe(0.5)
+        assert self._histogram.to_dict() == {
+            "bounds": [0.1, 1.0],
+            "counts": [0, 1, 0],
+            "count": 1,
+            "sum": 0.5,
+        }
+
+
+def test_pool_metrics_to_dict() -> None:
+    metrics = PoolMetrics()
+    metrics.overflows = 2
+    data = metrics.to_dict()
+    assert data["overflows"] == 2
+    assert data["timeouts"] == 0
+    assert data["checked_out"] == 0
+    assert data["checkout_wait"]["count"] == 0
@@ -1,4 +1,6 @@
-from unittest.mock import Mock, patch
+from datetime import datetime
+from unittest.mock import AsyncMock, Mock, patch
+from uuid import uuid4
 
 import pytest
 from sqlalchemy import Result, Select
@@ -6,11 +8,16 @@ from sqlalchemy.exc import NoResultFound
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.database import Database
-from app.domains import BaseDomain
+from app.domains import BaseDomain, PartTestStatsDomain
 from app.exceptions import NoEntityFoundError
 from app.mappers import PartEntityDomainMapper, TestEntityDomainMapper
-from app.models import Part, Test
-from app.repository import BaseRepository, PartRepository, TestRepository
+from app.models import Part, PartTestStats, Test
+from app.repository import (
+    BaseRepository,
+    PartRepository,
+    PartTestStatsRepository,
+    TestRepository,
+)
 from app.session import Session
 
 
@@ -22,14 +29,51 @@ class BaseTestRepository:
         with patch(
             "app.repository.select",
             return_value=Mock(Select),
-        ):
+        ), patch.dict(BaseRepository._statements, clear=True):
             yield
 
     def test_add(self):
         domain = Mock(BaseDomain)
+        self._repository.mapper.to_rows.side_effect = lambda domains: [
+            (domain.id,) for domain in domains
+        ]
         self._repository.add(domain)
-        assert len(self._repository.session.session) == 1
-        assert self._repository.session.session[0].operation == "add"
+        assert self._repository.session.session == []
+        pending = self._repository.session.inserts[
+            self._repository.entity_type
+        ]
+        assert pending.rows == [(domain.id,)]
+
+    def test_add_all(self):
+        domains = [Mock(BaseDomain), Mock(BaseDomain)]
+        self._repository.mapper.to_rows.side_effect = lambda domains: [
+            (domain.id,) for domain in domains
+        ]
+        self._repository.add_all(domains)
+        assert self._repository.session.session == []
+        pending = self._repository.session.inserts[
+            self._repository.entity_type
+        ]
+        assert pending.columns == self._repository.mapper.columns
+        assert pending.rows == [(domain.id,) for domain in domains]
+        assert self._repository.entity_type in self._repository.session.touched
+
+    @pytest.mark.asyncio
+    async def test_find_version(self):
+        self._repository.db.session.scalar.return_value = 5
+
+        assert await self._repository.find_version() == 5
+
+    @pytest.mark.asyncio
+    async def test_find_version_never_written(self):
+        self._repository.db.session.scalar.return_value = None
+
+        assert await self._repository.find_version() == 0
+
+    @pytest.mark.asyncio
+    async def test_find_existing_ids_empty(self):
+        assert await self._repository.find_existing_ids(set()) == set()
+        self._repository.db.session.execute.assert_not_called()
 
     @pytest.mark.asyncio
     async def test_remove(self):
@@ -48,6 +92,123 @@ class BaseTestRepository:
         with pytest.raises(NoEntityFoundError):
             await self._repository.modify(domain)
 
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize(
+        "count, expected_count, has_next", [(2, 2, False), (4, 3, True)]
+    )
+    async def test_find_page(
+        self, count: int, expected_count: int, has_next: bool
+    ):
+        mock_result = Mock(Result)
+        mock_result.scalars.return_value.all.return_value = count * [Mock()]
+        self._repository.db.session.execute.return_value = mock_result
+        self._repository.mapper.to_domains.side_effect = lambda records: [
+            Mock() for _ in records
+        ]
+
+        page = await self._repository.find_page(limit=3)
+
+        assert len(page.items) == expected_count
+        assert (page.next_cursor is not None) is has_next
+
+    @pytest.mark.asyncio
+    async def test_modify_loaded_record(self):
+        mock_result = Mock(Result)
+        record = mock_result.scalar_one.return_value
+        self._repository.db.session.execute.return_value = mock_result
+        self._repository.mapper.to_domain.return_value = Mock(
+            BaseDomain, id=record.id
+        )
+        domain = await self._repository.find_by_id(record.id)
+
+        await self._repository.modify(domain)
+
+        self._repository.db.session.execute.assert_called_once()
+        self._repository.mapper.map_to_record.assert_called_once_with(
+            domain, record
+        )
+        assert self._repository.session.touched == {
+            self._repository.entity_type
+        }
+
+    @pytest.mark.asyncio
+    async def test_remove_loaded_record(self):
+        mock_result = Mock(Result)
+        record = mock_result.scalar_one.return_value
+        self._repository.db.session.execute.return_value = mock_result
+        self._repository.mapper.to_domain.return_value = Mock(
+            BaseDomain, id=record.id
+        )
+        domain = await self._repository.find_by_id(record.id)
+
+        await self._repository.remove(domain)
+
+        self._repository.db.session.execute.assert_called_once()
+        assert self._repository.session.session[0].entity == record
+        assert domain.id not in self._repository.identity_map
+
+    def test_add_not_registered(self):
+        domain = Mock(BaseDomain)
+        self._repository.mapper.to_rows.return_value = [(domain.id,)]
+        self._repository.add(domain)
+        assert self._repository.identity_map == {}
+
+    @pytest.mark.asyncio
+    async def test_delete_by_id(self):
+        domain = Mock(BaseDomain)
+        self._repository.identity_map[domain.id] = Mock()
+        mock_result = Mock(Result)
+        mock_result.scalar_one_or_none.return_value = domain.id
+        self._repository.db.session.execute.return_value = mock_result
+
+        deleted = await self._repository.delete_by_id(domain.id)
+
+        self._repository.db.session.execute.assert_called_once()
+        self._repository.mapper.to_domain.assert_called_once_with(domain.id)
+        assert deleted == self._repository.mapper.to_domain.return_value
+        assert domain.id not in self._repository.identity_map
+        assert len(self._repository.session.session) == 0
+        assert self._repository.entity_type in self._repository.session.touched
+
+    @pytest.mark.asyncio
+    async def test_fail_delete_by_id(self):
+        mock_result = Mock(Result)
+        mock_result.scalar_one_or_none.return_value = None
+        self._repository.db.session.execute.return_value = mock_result
+
+        with pytest.raises(NoEntityFoundError):
+            await self._repository.delete_by_id(Mock(BaseDomain).id)
+
+    @pytest.mark.asyncio
+    async def test_update_by_id(self):
+        mock_result = Mock(Result)
+        record = mock_result.scalar_one_or_none.return_value
+        self._repository.db.session.execute.return_value = mock_result
+
+        domain = await self._repository.update_by_id(
+            record.id, {self._repository.cursor_field: datetime(2020, 1, 1)}
+        )
+
+        self._repository.db.session.execute.assert_called_once()
+        self._repository.mapper.to_domain.assert_called_once_with(record)
+        assert domain == self._repository.mapper.to_domain.return_value
+        assert self._repository.identity_map[record.id] == record
+        assert self._repository.session.touched == {
+            self._repository.entity_type
+        }
+
+    @pytest.mark.asyncio
+    async def test_fail_update_by_id(self):
+        mock_result = Mock(Result)
+        mock_result.scalar_one_or_none.return_value = None
+        self._repository.db.session.execute.return_value = mock_result
+
+        with pytest.raises(NoEntityFoundError):
+            await self._repository.update_by_id(
+                Mock(BaseDomain).id,
+                {self._repository.cursor_field: datetime(2020, 1, 1)},
+            )
+
     @pytest.mark.asyncio
     async def test_fail_remove(self):
         domain = Mock(BaseDomain)
@@ -80,6 +241,19 @@ class TestPartRepository(BaseTestRepository):
         assert isinstance(self._repository.mapper, PartEntityDomainMapper)
         assert isinstance(self._repository.session, Session)
 
+    @pytest.mark.asyncio
+    async def test_delete_by_id_touches_tests(self):
+        mock_result = Mock(Result)
+        self._repository.db.session.execute.return_value = mock_result
+
+        await self._repository.delete_by_id(mock_result.scalar_one_or_none())
+
+        assert self._repository.session.touched == {
+            Part,
+            Test,
+            PartTestStats,
+        }
+
 
 class TestTestRepository(BaseTestRepository):
     @pytest.fixture(autouse=True)
@@ -102,3 +276,165 @@ class TestTestRepository(BaseTestRepository):
         assert isinstance(self._repository.mapper, TestEntityDomainMapper)
         assert isinstance(self._repository.session, Session)
         assert isinstance(self._repository.db, Database)
+
+    def test_query_filtered(self):
+        part_id = uuid4()
+        build = Mock(return_value=Mock(Select))
+
+        _, params = self._repository._query_filtered(
+            "all",
+            build,
+            {
+                "part_id": part_id,
+                "successful": False,
+                "timestamp_from": datetime(2020, 1, 1),
+                "timestamp_to": None,
+            },
+        )
+
+        clauses = build.return_value.where.call_args.args
+        sql = " AND ".join(str(clause) for clause in clauses)
+        assert "test.part_id = :filter_part_id" in sql
+        assert "NOT test.successful" in sql
+        assert "test.timestamp >= :filter_timestamp_from" in sql
+        assert "timestamp_to" not in sql
+        assert params == {
+            "filter_part_id": part_id,
+            "filter_timestamp_from": datetime(2020, 1, 1),
+        }
+
+    def test_query_filtered_shared(self):
+        first, _ = self._repository._query_filtered(
+            "all", self._repository._build_all, {"part_id": uuid4()}
+        )
+        second, _ = self._repository._query_filtered(
+            "all", self._repository._build_all, {"part_id": uuid4()}
+        )
+        unfiltered, params = self._repository._query_filtered(
+            "all", self._repository._build_all, {"part_id": None}
+        )
+
+        assert first is second
+        assert unfiltered is self._repository._statement(
+            "all", self._repository._build_all
+        )
+        assert params == {}
+
+    def test_query_filtered_data_contains(self):
+        build = Mock(return_value=Mock(Select))
+
+        _, params = self._repository._query_filtered(
+            "all", build, {"data_contains": {"station": "B3"}}
+        )
+
+        (clause,) = build.return_value.where.call_args.args
+        assert str(clause) == "test.data @> :filter_data_contains"
+        assert params == {"filter_data_contains": {"station": "B3"}}
+
+    def test_query_filtered_unknown(self):
+        with pytest.raises(ValueError):
+            self._repository._query_filtered(
+                "all", self._repository._build_all, {"unknown": 1}
+            )
+
+    @pytest.mark.asyncio
+    @patch.object(TestRepository, "_build_update_result_by_id")
+    async def test_update_result_by_id(self, _build: Mock):
+        id = uuid4()
+        record = Mock(Test)
+        mock_result = Mock(Result)
+        mock_result.one_or_none.return_value = (record, False)
+        self._repository.db.session.execute.return_value = mock_result
+
+        test, previous = await self._repository.update_result_by_id(
+            id, {"successful": True}
+        )
+
+        self._repository.mapper.to_domain.assert_called_once_with(record)
+        assert test == self._repository.mapper.to_domain.return_value
+        assert previous is False
+        params = self._repository.db.session.execute.call_args.args[1]
+        assert params == {"pk": id, "new_successful": True}
+        assert self._repository.identity_map[id] is record
+        assert self._repository.session.touched == {Test}
+
+    @pytest.mark.asyncio
+    @patch.object(TestRepository, "_build_update_result_by_id")
+    async def test_update_result_by_id_missing(self, _build: Mock):
+        mock_result = Mock(Result)
+        mock_result.one_or_none.return_value = None
+        self._repository.db.session.execute.return_value = mock_result
+
+        with pytest.raises(NoEntityFoundError):
+            await self._repository.update_result_by_id(
+                uuid4(), {"successful": True}
+            )
+        assert self._repository.session.touched == set()
+
+
+class TestPartTestStatsRepository:
+    @pytest.fixture(autouse=True)
+    def _setup_repository(self):
+        self._repository = PartTestStatsRepository(
+            db=Mock(Database, session=AsyncMock(AsyncSession))
+        )
+
+    def test_record(self):
+        part_id = uuid4()
+
+        self._repository.record(part_id, True)
+        self._repository.record(part_id, True)
+        self._repository.record(part_id, False, -1)
+
+        assert self._repository.deltas == {part_id: (2, -1)}
+
+    def test_discard(self):
+        self._repository.record(uuid4(), True)
+
+        self._repository.discard()
+
+        assert self._repository.deltas == {}
+
+    @pytest.mark.asyncio
+    async def test_flush(self):
+        first, second, unchanged = sorted(uuid4() for _ in range(3))
+        self._repository.record(second, False)
+        self._repository.record(first, True)
+        self._repository.record(unchanged, True)
+        self._repository.record(unchanged, True, -1)
+
+        await self._repository.flush()
+
+        execute = self._repository.db.session.execute
+        execute.assert_awaited_once()
+        assert execute.call_args.args[1] == [
+            {"id": first, "passed": 1, "failed": 0},
+            {"id": second, "passed": 0, "failed": 1},
+        ]
+        assert self._repository.deltas == {}
+
+    @pytest.mark.asyncio
+    async def test_flush_without_changes(self):
+        await self._repository.flush()
+
+        self._repository.db.session.execute.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_find_by_part_id(self):
+        part_id = uuid4()
+        mock_result = Mock(Result)
+        mock_result.one_or_none.return_value = (part_id, 2, 1)
+        self._repository.db.session.execute.return_value = mock_result
+
+        stats = await self._repository.find_by_part_id(part_id)
+
+        assert stats == PartTestStatsDomain(part_id, 2, 1)
+
+    @pytest.mark.asyncio
+    async def test_fail_find_by_part_id(self):
+        mock_result = Mock(Result)
+        mock_result.one_or_none.return_value = None
+        self._repository.db.session.execute.return_value = mock_result
+
+        with pytest.raises(NoEntityFoundError):
+            await self._repository.find_by_part_id(uuid4())
@@ -0,0 +1,211 @@
+import asyncio
+from typing import Any
+
+import pytest
+from starlette.types import Message, Receive, Scope, Send
+
+from app.models import Part, Test
+from app.response_cache import (
+    CachedResponse,
+    ResponseCache,
+    ResponseCacheMiddleware,
+)
+
+RESPONSE = CachedResponse(200, [(b"content-type", b"application/json")], b"[]")
+
+
+class Clock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class TestResponseCache:
+    @pytest.fixture(autouse=True)
+    def _setup_cache(self):
+        self._clock = Clock()
+        self._cache = ResponseCache(
+            max_size=2, ttl=10, refresh_ahead=2, clock=self._clock
+        )
+
+    def test_miss(self):
+        assert self._cache.get(("/parts", ())) is None
+
+    def test_hit(self):
+        self._cache.put(("/parts", ()), Part, RESPONSE, 0)
+        assert self._cache.get(("/parts", ())) == (RESPONSE, False)
+
+    def test_expired(self):
+        self._cache.put(("/parts", ()), Part, RESPONSE, 0)
+        self._clock.now = 10
+        assert self._cache.get(("/parts", ())) is None
+        assert len(self._cache) == 0
+
+    def test_refresh_ahead_once(self):
+        self._cache.put(("/parts", ()), Part, RESPONSE, 0)
+        self._clock.now = 8
+        assert self._cache.get(("/parts", ())) == (RESPONSE, True)
+        assert self._cache.get(("/parts", ())) == (RESPONSE, False)
+
+    def test_lru_eviction(self):
+        self._cache.put(("/parts", ()), Part, RESPONSE, 0)
+        self._cache.put(("/tests", ()), Test, RESPONSE, 0)
+        self._cache.get(("/parts", ()))
+        self._cache.put(("/parts", (("limit", "5"),)), Part, RESPONSE, 0)
+
+        assert len(self._cache) == 2
+        assert self._cache.get(("/tests", ())) is None
+        assert self._cache.get(("/parts", ())) is not None
+
+    def test_invalidate(self):
+        self._cache.put(("/parts", ()), Part, RESPONSE, 0)
+        self._cache.put(("/tests", ()), Test, RESPONSE, 0)
+
+        self._cache.invalidate({Part})
+
+        assert self._cache.get(("/parts", ())) is None
+        assert self._cache.get(("/tests", ())) is not None
+        assert self._cache.generation(Part) == 1
+        assert self._cache.generation(Test) == 0
+
+    def test_put_after_invalidation(self):
+        generation = self._cache.generation(Part)
+        self._cache.invalidate({Part})
+
+        self._cache.put(("/parts", ()), Part, RESPONSE, generation)
+
+        assert self._cache.get(("/parts", ())) is None
+
+    @pytest.mark.parametrize("max_size, ttl", [(0, 10), (2, 0)])
+    def test_disabled(self, max_size: int, ttl: float):
+        assert not ResponseCache(max_size=max_size, ttl=ttl).enabled
+
+
+class TestResponseCacheMiddleware:
+    @pytest.fixture(autouse=True)
+    def _setup_middleware(self):
+        self._clock = Clock()
+        self._cache = ResponseCache(
+            max_size=10, ttl=10, refresh_ahead=2, clock=self._clock
+        )
+        self._calls = 0
+        self._status = 200
+        self._middleware = ResponseCacheMiddleware(
+            self._app,
+            cache=self._cache,
+            routes={"/api/v1/parts": Part},
+            bypass_cookies=("recent_write",),
+        )
+
+    async def _app(self, scope: Scope, receive: Receive, send: Send) -> None:
+        self._calls += 1
+        await send(
+            {
+                "type": "http.response.start",
+                "status": self._status,
+                "headers": [
+                    (b"content-type", b"application/json"),
+                    (b"etag", b'"parts-1"'),
+                    (b"set-cookie", b"session=1"),
+                ],
+            }
+        )
+        body = f"[{self._calls}]".encode()
+        await send({"type": "http.response.body", "body": body})
+
+    async def _get(
+        self,
+        path: str = "/api/v1/parts",
+        query_string: bytes = b"limit=5&skip=0",
+        headers: list[tuple[bytes, bytes]] | None = None,
+        method: str = "GET",
+    ) -> list[Message]:
+        scope: dict[str, Any] = {
+            "type": "http",
+            "method": method,
+            "path": path,
+            "query_string": query_string,
+            "headers": headers or [],
+        }
+        messages: list[Message] = []
+
+        async def receive() -> Message:
+            return {"type": "http.request", "body": b""}
+
+        async def send(message: Message) -> None:
+            messages.append(message)
+
+        await self._middleware(scope, receive, send)
+        return messages
+
+    @pytest.mark.asyncio
+    async def test_hit(self):
+        first = await self._get(query_string=b"limit=5&skip=0")
+        second = await self._get(query_string=b"skip=0&limit=5")
+
+        assert self._calls == 1
+        assert first[1]["body"] == second[1]["body"] == b"[1]"
+        assert second[0]["headers"] == [
+            (b"content-type", b"application/json"),
+            (b"etag", b'"parts-1"'),
+        ]
+
+    @pytest.mark.asyncio
+    async def test_hit_not_modified(self):
+        await self._get()
+        messages = await self._get(headers=[(b"if-none-match", b'"parts-1"')])
+
+        assert self._calls == 1
+        assert messages[0]["status"] == 304
+        assert messages[0]["headers"] == [(b"etag", b'"parts-1"')]
+        assert messages[1]["body"] == b""
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize(
+        "kwargs",
+        [
+            {"path": "/api/v1/tests"},
+            {"method": "POST"},
+            {"query_string": b"stream=ndjson"},
+            {"headers": [(b"cookie", b"recent_write=1")]},
+        ],
+    )
+    async def test_not_cached(self, kwargs: dict[str, Any]):
+        await self._get(**kwargs)
+        await self._get(**kwargs)
+
+        assert self._calls == 2
+        assert len(self._cache) == 0
+
+    @pytest.mark.asyncio
+    async def test_error_not_cached(self):
+        self._status = 500
+        await self._get()
+        await self._get()
+
+        assert self._calls == 2
+
+    @pytest.mark.asyncio
+    async def test_invalidated(self):
+        await self._get()
+        self._cache.invalidate({Part})
+        messages = await self._get()
+
+        assert self._calls == 2
+        assert messages[1]["body"] == b"[2]"
+
+    @pytest.mark.asyncio
+    async def test_refresh_ahead(self):
+        await self._get()
+        self._clock.now = 9
+        messages = await self._get()
+        await asyncio.sleep(0)
+
+        assert messages[1]["body"] == b"[1]"
+        assert self._calls == 2
+        self._clock.now = 12
+        messages = await self._get()
+        assert messages[1]["body"] == b"[2]"
+        assert self._calls == 2
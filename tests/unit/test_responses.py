@@ -0,0 +1,146 @@
+import json
+from datetime import datetime, timezone
+from typing import Any, AsyncIterator
+from unittest.mock import Mock, patch
+from uuid import UUID
+
+import pytest
+
+from app.domains import PartDomain, TestDomain
+from app.responses import (
+    DomainJSONResponse,
+    dumps,
+    etag_matches,
+    make_etag,
+    not_modified,
+    stream_domains,
+)
+
+
+async def _aiter(dicts: list[dict[str, Any]]) -> AsyncIterator[Mock]:
+    for data in dicts:
+        yield Mock(to_dict=Mock(return_value=data))
+
+
+async def _read_body(dicts: list[dict[str, Any]], format: Any) -> list[bytes]:
+    response = stream_domains(_aiter(dicts), format)
+    return [chunk async for chunk in response.body_iterator]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("count", [0, 1, 3])
+async def test_stream_json(count: int):
+    dicts = [{"id": i} for i in range(count)]
+    chunks = await _read_body(dicts, "json")
+    assert json.loads(b"".join(chunks)) == dicts
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("count", [0, 1, 3])
+async def test_stream_ndjson(count: int):
+    dicts = [{"id": i} for i in range(count)]
+    chunks = await _read_body(dicts, "ndjson")
+    lines = b"".join(chunks).splitlines()
+    assert [json.loads(line) for line in lines] == dicts
+
+
+@pytest.mark.parametrize(
+    "format, media_type",
+    [("json", "application/json"), ("ndjson", "application/x-ndjson")],
+)
+def test_media_type(format: Any, media_type: str):
+    response = stream_domains(_aiter([]), format)
+    assert response.media_type == media_type
+
+
+@pytest.mark.asyncio
+async def test_stream_chunks():
+    dicts = [{"id": i} for i in range(10)]
+    with patch("app.responses.CHUNK_SIZE", 30):
+        chunks = await _read_body(dicts, "ndjson")
+    assert 1 < len(chunks) < len(dicts)
+    assert all(len(chunk) >= 30 for chunk in chunks[:-1])
+
+
+@pytest.mark.parametrize(
+    "domain",
+    [
+        TestDomain(
+            UUID("00000000-0000-0000-0000-000000000000"),
+            UUID("00000000-0000-0000-0000-000000000001"),
+            datetime(2021, 1, 1, 12, 30, 15, 250),
+            True,
+            {"name": "template_api"},
+        ),
+        PartDomain(
+            UUID("00000000-0000-0000-0000-000000000000"),
+            "part_1",
+            datetime(2021, 1, 1, tzinfo=timezone.utc),
+        ),
+    ],
+)
+def test_dumps_domain(domain: TestDomain | PartDomain):
+    assert json.loads(dumps(domain)) == domain.to_dict()
+    assert json.loads(dumps([domain])) == [domain.to_dict()]
+
+
+def test_dumps_uuid_subclass():
+    class SubUUID(UUID):
+        pass
+
+    id = SubUUID("00000000-0000-0000-0000-000000000001")
+    assert dumps([id]) == b'["00000000-0000-0000-0000-000000000001"]'
+
+
+def test_dumps_not_serializable():
+    with pytest.raises(TypeError):
+        dumps(object())
+
+
+def test_domain_json_response():
+    part = PartDomain(
+        UUID("00000000-0000-0000-0000-000000000000"),
+        "part_1",
+        datetime(2021, 1, 1),
+    )
+    response = DomainJSONResponse(content={"part": part}, status_code=201)
+    assert response.status_code == 201
+    assert response.media_type == "application/json"
+    assert response.body == (
+        b'{"part":{"id":"00000000-0000-0000-0000-000000000000",'
+        b'"name":"part_1","modified_timestamp":"2021-01-01 00:00:00"}}'
+    )
+
+
+def test_dumps_datetime():
+    assert dumps({"at": datetime(2021, 1, 1, 12, 30, 15, 250)}) == (
+        b'{"at":"2021-01-01 12:30:15.000250"}'
+    )
+
+
+def test_make_etag():
+    assert make_etag("parts", 3) == '"parts-3"'
+
+
+@pytest.mark.parametrize(
+    "if_none_match, matches",
+    [
+        (None, False),
+        ("", False),
+        ('"parts-3"', True),
+        ('W/"parts-3"', True),
+        ('"parts-2", "parts-3"', True),
+        ('"parts-2"', False),
+        ('"tests-3"', False),
+        ("*", True),
+    ],
+)
+def test_etag_matches(if_none_match: str | None, matches: bool):
+    assert etag_matches(if_none_match, '"parts-3"') is matches
+
+
+def test_not_modified():
+    response = not_modified('"parts-3"')
+    assert response.status_code == 304
+    assert response.headers["etag"] == '"parts-3"'
+    assert response.body == b""
@@ -1,26 +1,46 @@
 from datetime import datetime
-from typing import Any
+from typing import Any, AsyncIterator, Iterable
 from unittest.mock import AsyncMock, Mock, patch
 from uuid import UUID
 
 import pytest
 import pytest_asyncio
-
-from app.domains import PartDomain, TestDomain
-from app.repository import PartRepository, TestRepository
-from app.schemas import PartRegistrationDTO, TestRegistrationDTO, TestUpdateDTO
+from sqlalchemy.exc import IntegrityError
+
+from app.database import Database
+from app.domains import PartDomain, PartTestStatsDomain, TestDomain
+from app.exceptions import NoEntityFoundError, NoPartFound
+from app.pagination import Cursor, Page
+from app.part_index import PartIndex
+from app.repository import (
+    PartRepository,
+    PartTestStatsRepository,
+    TestRepository,
+)
+from app.schemas import (
+    PartRegistrationDTO,
+    TestFilterDTO,
+    TestRegistrationDTO,
+    TestUpdateDTO,
+)
 from app.service import (
     ServiceCreatePart,
     ServiceCreateTest,
     ServiceDeletePart,
     ServiceDeleteTest,
     ServiceShowPart,
+    ServiceShowPartStats,
     ServiceShowTest,
     ServiceUpdateTest,
 )
 from app.unit_of_work import TestUnitOfWork
 
 
+async def _aiter(items: Iterable[Any]) -> AsyncIterator[Any]:
+    for item in items:
+        yield item
+
+
 class BaseTestService:
     @pytest.fixture(autouse=True)
     def _patch_uuid4(self):
@@ -36,12 +56,20 @@ class BaseTestService:
             _mock.utcnow.return_value = datetime(2020, 1, 1)
             yield
 
+    @pytest.fixture(autouse=True)
+    def _patch_part_index(self):
+        self._part_index = PartIndex()
+        with patch("app.service.part_index", self._part_index):
+            yield
+
     @pytest.fixture(autouse=True)
     def _setup_unit_of_work(self):
         self._unit_of_work = Mock(
             TestUnitOfWork,
+            db=AsyncMock(Database),
             test_repository=AsyncMock(TestRepository),
             part_repository=AsyncMock(PartRepository),
+            part_test_stats_repository=AsyncMock(PartTestStatsRepository),
         )
 
 
@@ -74,6 +102,7 @@ class TestServiceCreatePart(BaseTestService):
         assert part.id == UUID("12345678123456781234567812345678")
         assert part.name == "part_201"
         assert part.modified_timestamp == datetime(2020, 1, 1)
+        assert self._part_index.contains(part.id) is True
 
 
 class TestServiceCreateTest(BaseTestService):
@@ -94,6 +123,9 @@ class TestServiceCreateTest(BaseTestService):
             successful=False,
             data={"test": "data"},
         )
+        self._unit_of_work.part_repository.find_existing_ids.return_value = {
+            UUID("12345678123456781234567822345678")
+        }
 
         test = await self._service.create_test(dto)
 
@@ -113,6 +145,275 @@ class TestServiceCreateTest(BaseTestService):
         assert test.timestamp == datetime(2020, 1, 1)
         assert test.successful is False
         assert test.data == {"test": "data"}
+        assert self._part_index.contains(test.part_id) is True
+        stats = self._unit_of_work.part_test_stats_repository
+        stats.record.assert_called_once_with(test.part_id, False)
+
+    @pytest.mark.asyncio
+    async def test_create_test_for_known_part(self):
+        """
+        Test that the part of a test is not queried when the part index
+        knows it.
+        """
+        part_id = UUID("12345678123456781234567822345678")
+        self._part_index.remember(part_id)
+        dto = Mock(
+            TestRegistrationDTO, part_id=part_id, successful=True, data=None
+        )
+
+        test = await self._service.create_test(dto)
+
+        assert test.part_id == part_id
+        self._unit_of_work.part_repository.find_existing_ids.assert_not_called()  # noqa
+        self._unit_of_work.part_repository.find_by_id.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_create_test_without_part_query(self):
+        """
+        Test that the part is not queried in optimistic mode.
+        """
+        dto = Mock(
+            TestRegistrationDTO,
+            part_id=UUID("12345678123456781234567822345678"),
+            successful=True,
+            data=None,
+        )
+
+        await self._service.create_test(dto)
+
+        self._unit_of_work.part_repository.find_existing_ids.assert_not_called()  # noqa
+        self._unit_of_work.save.assert_called_once()
+        assert self._part_index.contains(dto.part_id) is True
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize(
+        "sqlstate, error",
+        [("23503", NoPartFound), ("23505", IntegrityError)],
+    )
+    async def test_create_test_integrity_error(
+        self, sqlstate: str, error: type[Exception]
+    ):
+        """
+        Test that a foreign key violation is raised as NoPartFound
+        and that other integrity errors are raised as they are.
+        """
+        self._unit_of_work.save.side_effect = IntegrityError(
+            "INSERT", None, Mock(sqlstate=sqlstate)
+        )
+        dto = Mock(
+            TestRegistrationDTO,
+            part_id=UUID("12345678123456781234567822345678"),
+            successful=True,
+            data=None,
+        )
+
+        with pytest.raises(error):
+            await self._service.create_test(dto)
+
+        assert self._part_index.contains(dto.part_id) is None
+
+    @pytest.mark.asyncio
+    async def test_create_test_for_part_missing_from_index(self):
+        """
+        Test that the part index is not consulted in optimistic mode,
+        a part missing from it may have been created by another process.
+        """
+        await self._part_index.load(_aiter([]))
+        dto = Mock(
+            TestRegistrationDTO,
+            part_id=UUID("12345678123456781234567822345678"),
+            successful=True,
+            data=None,
+        )
+
+        with patch.object(self._part_index, "contains") as contains:
+            await self._service.create_test(dto)
+
+        contains.assert_not_called()
+        self._unit_of_work.save.assert_called_once()
+        assert self._part_index.contains(dto.part_id) is True
+
+    @pytest.mark.asyncio
+    async def test_create_test_for_missing_part(self):
+        """
+        Test that the part is queried first when not in optimistic mode.
+        """
+        self._service.optimistic = False
+        self._unit_of_work.part_repository.find_existing_ids.return_value = (
+            set()
+        )
+        dto = Mock(
+            TestRegistrationDTO,
+            part_id=UUID("12345678123456781234567822345678"),
+            successful=True,
+            data=None,
+        )
+
+        with pytest.raises(NoPartFound):
+            await self._service.create_test(dto)
+
+        self._unit_of_work.part_repository.find_existing_ids.assert_called_once_with(  # noqa
+            {dto.part_id}
+        )
+        self._unit_of_work.save.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_create_tests(self):
+        """
+        Test that create_tests validates every part id with one query and
+        only adds the tests whose part exists.
+        """
+        known_part_id = UUID("12345678123456781234567822345678")
+        unknown_part_id = UUID("12345678123456781234567832345678")
+        self._unit_of_work.part_repository.find_existing_ids.return_value = {
+            known_part_id
+        }
+        dtos = [
+            Mock(
+                TestRegistrationDTO,
+                part_id=part_id,
+                successful=True,
+                data=None,
+            )
+            for part_id in (known_part_id, unknown_part_id, known_part_id)
+        ]
+
+        tests = await self._service.create_tests(dtos)
+
+        self._unit_of_work.part_repository.find_existing_ids.assert_called_once_with(  # noqa
+            {known_part_id, unknown_part_id}
+        )
+        assert tests[1] is None
+        assert tests[0] is not None and tests[0].part_id == known_part_id
+        assert tests[2] is not None and tests[2].part_id == known_part_id
+        self._unit_of_work.test_repository.add_all.assert_called_once_with(
+            [tests[0], tests[2]]
+        )
+        self._unit_of_work.save.assert_called_once()
+        stats = self._unit_of_work.part_test_stats_repository
+        assert stats.record.call_count == 2
+        stats.record.assert_called_with(known_part_id, True)
+
+    @pytest.mark.asyncio
+    async def test_create_tests_with_loaded_part_index(self):
+        """
+        Test that only the part ids missing from the part index
+        are queried.
+        """
+        known_part_id = UUID("12345678123456781234567822345678")
+        missing_part_id = UUID("12345678123456781234567832345678")
+        unknown_part_id = UUID("12345678123456781234567842345678")
+        await self._part_index.load(_aiter([known_part_id]))
+        self._unit_of_work.part_repository.find_existing_ids.return_value = {
+            unknown_part_id
+        }
+        dtos = [
+            Mock(
+                TestRegistrationDTO,
+                part_id=part_id,
+                successful=True,
+                data=None,
+            )
+            for part_id in (known_part_id, missing_part_id, unknown_part_id)
+        ]
+
+        tests = await self._service.create_tests(dtos)
+
+        self._unit_of_work.part_repository.find_existing_ids.assert_called_once_with(  # noqa
+            {missing_part_id, unknown_part_id}
+        )
+        assert tests[0] is not None
+        assert tests[1] is None
+        assert tests[2] is not None
+        assert self._part_index.contains(unknown_part_id) is True
+
+    @pytest.mark.asyncio
+    async def test_create_tests_for_deleted_cached_part(self):
+        """
+        Test that the part ids are validated again, with a lock, when the
+        foreign key rejects a cached part, and that the tests of the other
+        parts are saved.
+        """
+        part_id = UUID("12345678123456781234567822345678")
+        deleted_part_id = UUID("12345678123456781234567832345678")
+        self._part_index.remember(part_id)
+        self._part_index.remember(deleted_part_id)
+        self._unit_of_work.save.side_effect = [
+            IntegrityError("INSERT", None, Mock(sqlstate="23503")),
+            None,
+        ]
+        self._unit_of_work.part_repository.find_existing_ids.return_value = {
+            part_id
+        }
+        dtos = [
+            Mock(
+                TestRegistrationDTO,
+                part_id=id,
+                successful=True,
+                data=None,
+            )
+            for id in (part_id, deleted_part_id)
+        ]
+
+        tests = await self._service.create_tests(dtos)
+
+        assert tests[0] is not None
+        assert tests[1] is None
+        self._unit_of_work.discard.assert_called_once()
+        self._unit_of_work.part_repository.find_existing_ids.assert_called_once_with(  # noqa
+            {part_id, deleted_part_id}, lock=True
+        )
+        self._unit_of_work.test_repository.add_all.assert_called_with(
+            [tests[0]]
+        )
+        assert self._unit_of_work.save.call_count == 2
+        assert self._part_index.contains(part_id) is True
+        assert self._part_index.contains(deleted_part_id) is None
+
+    @pytest.mark.asyncio
+    async def test_create_tests_integrity_error(self):
+        """
+        Test that integrity errors other than a foreign key violation are
+        raised as they are.
+        """
+        self._unit_of_work.part_repository.find_existing_ids.return_value = {
+            UUID("12345678123456781234567822345678")
+        }
+        self._unit_of_work.save.side_effect = IntegrityError(
+            "INSERT", None, Mock(sqlstate="23505")
+        )
+        dto = Mock(
+            TestRegistrationDTO,
+            part_id=UUID("12345678123456781234567822345678"),
+            successful=True,
+            data=None,
+        )
+
+        with pytest.raises(IntegrityError):
+            await self._service.create_tests([dto])
+
+        self._unit_of_work.discard.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_create_tests_without_known_part(self):
+        """
+        Test that nothing is saved when no part exists.
+        """
+        self._unit_of_work.part_repository.find_existing_ids.return_value = (
+            set()
+        )
+        dto = Mock(
+            TestRegistrationDTO,
+            part_id=UUID("12345678123456781234567822345678"),
+            successful=True,
+            data=None,
+        )
+
+        tests = await self._service.create_tests([dto])
+
+        assert tests == [None]
+        self._unit_of_work.test_repository.add_all.assert_not_called()
+        self._unit_of_work.save.assert_not_called()
 
 
 class TestServiceShowPart(BaseTestService):
@@ -153,6 +454,57 @@ class TestServiceShowPart(BaseTestService):
 
         assert len(parts) == limit
 
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize(
+        "cursor",
+        [
+            None,
+            Cursor(
+                key=datetime(2021, 1, 1),
+                id=UUID("12345678123456781234567812345678"),
+            ),
+        ],
+    )
+    async def test_show_parts_page(self, cursor: Cursor | None) -> None:
+        """
+        Test that show_parts_page returns the page found by the part repository.
+        """
+        page = Page(items=[Mock(PartDomain)], next_cursor=None)
+        self._unit_of_work.part_repository.find_page.return_value = page
+
+        result = await self._service.show_parts_page(10, cursor)
+
+        self._unit_of_work.part_repository.find_page.assert_called_once_with(
+            limit=10, cursor=cursor
+        )
+        assert result == page
+
+    @pytest.mark.asyncio
+    async def test_parts_version(self) -> None:
+        """
+        Test that parts_version returns the version of the part repository.
+        """
+        self._unit_of_work.part_repository.find_version.return_value = 3
+
+        assert await self._service.parts_version() == 3
+
+    @pytest.mark.asyncio
+    async def test_stream_parts(self) -> None:
+        """
+        Test that stream_parts yields the parts streamed by the part repository.
+        """
+        parts = [Mock(PartDomain), Mock(PartDomain)]
+        self._unit_of_work.part_repository.stream_all = Mock(
+            return_value=_aiter(parts)
+        )
+
+        result = [part async for part in self._service.stream_parts(2, 1)]
+
+        self._unit_of_work.part_repository.stream_all.assert_called_once_with(
+            limit=2, offset=1
+        )
+        assert result == parts
+
 
 class TestServiceShowTest(BaseTestService):
     @pytest.fixture(autouse=True)
@@ -176,10 +528,91 @@ class TestServiceShowTest(BaseTestService):
         tests = await self._service.show_tests(limit, offset)
 
         self._unit_of_work.test_repository.find_all.assert_called_once_with(
-            limit=limit, offset=offset
+            limit=limit, offset=offset, filters={}
         )
         assert len(tests) == limit
 
+    @pytest.mark.asyncio
+    async def test_show_tests_filtered(self) -> None:
+        """
+        Test that only the filters provided in the DTO are passed
+        to the test repository.
+        """
+        part_id = UUID("12345678123456781234567812345678")
+        filters = TestFilterDTO(part_id=part_id, successful=False)
+
+        await self._service.show_tests(5, 0, filters)
+
+        self._unit_of_work.test_repository.find_all.assert_called_once_with(
+            limit=5,
+            offset=0,
+            filters={"part_id": part_id, "successful": False},
+        )
+
+    @pytest.mark.asyncio
+    async def test_show_tests_page(self) -> None:
+        """
+        Test that show_tests_page returns the page found by the test repository.
+        """
+        cursor = Cursor(
+            key=datetime(2021, 1, 1),
+            id=UUID("12345678123456781234567812345678"),
+        )
+        page = Page(items=[Mock(TestDomain)], next_cursor=cursor)
+        self._unit_of_work.test_repository.find_page.return_value = page
+
+        result = await self._service.show_tests_page(5, cursor)
+
+        self._unit_of_work.test_repository.find_page.assert_called_once_with(
+            limit=5, cursor=cursor, filters={}
+        )
+        assert result == page
+
+    @pytest.mark.asyncio
+    async def test_tests_version(self) -> None:
+        """
+        Test that tests_version returns the version of the test repository.
+        """
+        self._unit_of_work.test_repository.find_version.return_value = 4
+
+        assert await self._service.tests_version() == 4
+
+    @pytest.mark.asyncio
+    async def test_stream_tests(self) -> None:
+        """
+        Test that stream_tests yields the tests streamed by the test repository.
+        """
+        tests = [Mock(TestDomain), Mock(TestDomain)]
+        self._unit_of_work.test_repository.stream_all = Mock(
+            return_value=_aiter(tests)
+        )
+
+        result = [test async for test in self._service.stream_tests(5, 0)]
+
+        self._unit_of_work.test_repository.stream_all.assert_called_once_with(
+            limit=5, offset=0, filters={}
+        )
+        assert result == tests
+
+    @pytest.mark.asyncio
+    async def test_export_tests(self) -> None:
+        """
+        Test that export_tests yields the batches of rows streamed by the
+        test repository.
+        """
+        batches = [[Mock(), Mock()], [Mock()]]
+        self._unit_of_work.test_repository.stream_rows = Mock(
+            return_value=_aiter(batches)
+        )
+        filters = TestFilterDTO(successful=False)
+
+        result = [rows async for rows in self._service.export_tests(filters)]
+
+        self._unit_of_work.test_repository.stream_rows.assert_called_once_with(
+            {"successful": False}
+        )
+        assert result == batches
+
 
 class TestServiceDeletePart(BaseTestService):
     @pytest.fixture(autouse=True)
@@ -199,19 +632,35 @@ class TestServiceDeletePart(BaseTestService):
     )
     async def test_delete_part(self, id: UUID):
         """
-        Test that the delete_part method of the service calls the delete method of the part repository
+        Test that the delete_part method of the service calls the delete_by_id method of the part repository
         with the correct arguments.
         """
-        part = Mock(PartDomain)
-        self._unit_of_work.part_repository.find_by_id.return_value = part
+        self._part_index.remember(id)
 
         await self._service.delete_part(id)
 
-        self._unit_of_work.part_repository.find_by_id.assert_called_once_with(
-            id
-        )
-        self._unit_of_work.part_repository.remove.assert_called_once_with(part)
+        repository = self._unit_of_work.part_repository
+        repository.delete_by_id.assert_called_once_with(id)
+        repository.find_by_id.assert_not_called()
         self._unit_of_work.save.assert_called_once()
+        assert self._part_index.contains(id) is None
+        archive = self._unit_of_work.test_repository
+        archive.delete_archived.assert_called_once_with([id])
+
+    @pytest.mark.asyncio
+    async def test_delete_part_archive_error(self):
+        """
+        Test that the part stays deleted when its archived tests cannot be
+        hidden, their removal is left to the next archiving.
+        """
+        id = UUID("12345678123456781234567812345678")
+        archive = self._unit_of_work.test_repository
+        archive.delete_archived.side_effect = OSError("disk")
+
+        await self._service.delete_part(id)
+
+        self._unit_of_work.save.assert_called_once()
+        archive.delete_archived.assert_called_once_with([id])
 
 
 class TestServiceDeleteTest(BaseTestService):
@@ -232,20 +681,35 @@ class TestServiceDeleteTest(BaseTestService):
     )
     async def test_delete_test(self, id: UUID):
         """
-        Test that the delete_test method of the service calls the delete method of the test repository
+        Test that the delete_test method of the service calls the delete_by_id method of the test repository
         with the correct arguments.
         """
-        test = Mock(TestDomain)
-        self._unit_of_work.test_repository.find_by_id.return_value = test
-
         await self._service.delete_test(id)
 
-        self._unit_of_work.test_repository.find_by_id.assert_called_once_with(
-            id
-        )
-        self._unit_of_work.test_repository.remove.assert_called_once_with(test)
+        repository = self._unit_of_work.test_repository
+        repository.delete_by_id.assert_called_once_with(id)
+        repository.find_by_id.assert_not_called()
         self._unit_of_work.save.assert_called_once()
 
+    @pytest.mark.asyncio
+    async def test_delete_test_records_stats(self):
+        """
+        Test that the deleted test is removed from the counters of its part.
+        """
+        test = TestDomain(
+            id=UUID("32345678123456781234567812345678"),
+            part_id=UUID("47654321876543218765432187654323"),
+            timestamp=datetime(2021, 1, 1),
+            successful=False,
+            data=None,
+        )
+        self._unit_of_work.test_repository.delete_by_id.return_value = test
+
+        await self._service.delete_test(test.id)
+
+        stats = self._unit_of_work.part_test_stats_repository
+        stats.record.assert_called_once_with(test.part_id, False, -1)
+
 
 class TestServiceUpdateTest(BaseTestService):
     @pytest.fixture(autouse=True)
@@ -266,7 +730,7 @@ class TestServiceUpdateTest(BaseTestService):
             part_id=UUID("47654321876543218765432187654323"),
             timestamp=datetime(2021, 1, 1),
             successful=True,
-            data={"type": "standard", "name": "test"},
+            data={"type": "titan", "name": "test"},
         )
 
     @pytest.fixture
@@ -274,8 +738,7 @@ class TestServiceUpdateTest(BaseTestService):
         """
         Set up a test domain
         """
-        self._dto = Mock(
-            TestUpdateDTO,
+        self._dto = TestUpdateDTO(
             id=UUID("47654321876543218765432187654321"),
             successful=None,
             timestamp=None,
@@ -284,93 +747,210 @@ class TestServiceUpdateTest(BaseTestService):
 
     @pytest_asyncio.fixture
     async def _setup_update_data(self, _setup_test, _setup_dto):
-        self._unit_of_work.test_repository.find_by_id.return_value = self._test
+        self._unit_of_work.test_repository.update_by_id.return_value = (
+            self._test
+        )
         self._updated_test = await self._service.update_data(self._dto)
 
     @pytest.mark.asyncio
     @pytest.mark.parametrize(
-        "domain, dto, timestamp, success, data",
+        "dto, values",
         [
             (
-                TestDomain(
-                    id=UUID("47654321876543218765432187654321"),
-                    part_id=UUID("47654321876543218765432187654323"),
-                    timestamp=datetime(2019, 1, 1),
-                    successful=True,
-                    data={"type": "standard", "name": "test"},
-                ),
-                Mock(
-                    TestUpdateDTO,
+                TestUpdateDTO(
                     id=UUID("47654321876543218765432187654321"),
                     successful=None,
                     timestamp=None,
                     data={"type": "titan", "name": "test"},
                 ),
-                datetime(2019, 1, 1),
-                True,
-                {"type": "titan", "name": "test"},
+                {"data": {"type": "titan", "name": "test"}},
             ),
             (
-                TestDomain(
+                TestUpdateDTO(
                     id=UUID("47654321876543218765432187654321"),
-                    part_id=UUID("47654321876543218765432187654323"),
-                    timestamp=datetime(2022, 1, 1),
-                    successful=False,
-                    data={"type": "standard", "name": "test"},
-                ),
-                Mock(
-                    TestUpdateDTO,
-                    id=UUID("47654321876543218765432187654321"),
-                    successful=True,
-                    timestamp=datetime(2021, 1, 1),
+                    successful=None,
+                    timestamp=None,
                     data=None,
                 ),
-                datetime(2021, 1, 1),
-                True,
-                {"type": "standard", "name": "test"},
+                {},
             ),
         ],
     )
     async def test_update_data(
-        self,
-        domain: TestDomain,
-        dto: TestUpdateDTO,
-        timestamp: datetime | None,
-        success: bool | None,
-        data: dict[Any, Any] | None,
+        self, dto: TestUpdateDTO, values: dict[str, Any]
     ):
         """
-        Test that the delete_test method of the service calls the delete method of the test repository
-        with the correct arguments.
+        Test that the update_data method of the service only updates
+        the fields provided in the DTO.
         """
-        self._unit_of_work.test_repository.find_by_id.return_value = domain
-        test = await self._service.update_data(dto)
+        await self._service.update_data(dto)
 
-        assert test.id == UUID("47654321876543218765432187654321")
-        assert test.part_id == UUID("47654321876543218765432187654323")
-        assert test.timestamp == timestamp
-        assert test.successful is success
-        assert test.data == data
+        repository = self._unit_of_work.test_repository
+        repository.update_by_id.assert_called_once_with(
+            UUID("47654321876543218765432187654321"), values
+        )
+        repository.update_result_by_id.assert_not_called()
 
-    async def test_update_data_side_effects_repository_called(
-        self, _setup_update_data
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize(
+        "dto, values",
+        [
+            (
+                TestUpdateDTO(
+                    id=UUID("47654321876543218765432187654321"),
+                    successful=True,
+                    timestamp=datetime(2021, 1, 1),
+                    data=None,
+                ),
+                {"successful": True, "timestamp": datetime(2021, 1, 1)},
+            ),
+            (
+                TestUpdateDTO(
+                    id=UUID("47654321876543218765432187654321"),
+                    successful=False,
+                    timestamp=None,
+                    data=None,
+                ),
+                {"successful": False},
+            ),
+        ],
+    )
+    async def test_update_data_with_result(
+        self, _setup_test, dto: TestUpdateDTO, values: dict[str, Any]
     ):
         """
-        Test side effects while updating data.
+        Test that a given result is written along with the other fields,
+        in a single update.
         """
+        repository = self._unit_of_work.test_repository
+        repository.update_result_by_id.return_value = (self._test, True)
+
+        assert await self._service.update_data(dto) is self._test
 
-        self._unit_of_work.test_repository.find_by_id.assert_called_once_with(
-            UUID("47654321876543218765432187654321")
+        repository.update_result_by_id.assert_called_once_with(
+            UUID("47654321876543218765432187654321"), values
         )
+        repository.update_by_id.assert_not_called()
 
-    async def test_update_data_side_effects_modify_called(
+    async def test_update_data_returns_updated_test(self, _setup_update_data):
+        """
+        Test that the test returned by the repository is returned.
+        """
+        assert self._updated_test is self._test
+
+    async def test_update_data_side_effects_not_loaded(
         self, _setup_update_data
     ):
-        self._unit_of_work.test_repository.modify.assert_called_once_with(
-            self._updated_test
-        )
+        """
+        Test that the test is not loaded before being updated.
+        """
+        self._unit_of_work.test_repository.find_by_id.assert_not_called()
+        self._unit_of_work.test_repository.modify.assert_not_called()
 
     async def test_update_data_side_effects_persistance_called(
         self, _setup_update_data
     ):
         self._unit_of_work.save.assert_called_once()
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("successful", [True, False])
+    async def test_update_data_flips_result(
+        self, _setup_test, successful: bool
+    ):
+        """
+        Test that a changed result moves the counters of the part.
+        """
+        part_id = UUID("47654321876543218765432187654323")
+        self._test.set_success_state(successful)
+        repository = self._unit_of_work.test_repository
+        repository.update_result_by_id.return_value = (
+            self._test,
+            not successful,
+        )
+        dto = TestUpdateDTO(
+            id=UUID("47654321876543218765432187654321"),
+            successful=successful,
+            timestamp=None,
+            data=None,
+        )
+
+        await self._service.update_data(dto)
+
+        stats = self._unit_of_work.part_test_stats_repository
+        assert stats.record.call_args_list == [
+            ((part_id, successful),),
+            ((part_id, not successful, -1),),
+        ]
+
+    @pytest.mark.asyncio
+    async def test_update_data_same_result(self, _setup_test):
+        """
+        Test that the counters do not move when the result is unchanged.
+        """
+        self._unit_of_work.test_repository.update_result_by_id.return_value = (
+            self._test,
+            True,
+        )
+        dto = TestUpdateDTO(
+            id=UUID("47654321876543218765432187654321"),
+            successful=True,
+            timestamp=None,
+            data=None,
+        )
+
+        await self._service.update_data(dto)
+
+        stats = self._unit_of_work.part_test_stats_repository
+        stats.record.assert_not_called()
+
+    async def test_update_data_without_result(self, _setup_update_data):
+        """
+        Test that the result is not touched when it is not updated.
+        """
+        repository = self._unit_of_work.test_repository
+        repository.update_result_by_id.assert_not_called()
+
+
+class TestServiceShowPartStats(BaseTestService):
+    @pytest.fixture(autouse=True)
+    def _setup_service(self, _setup_unit_of_work):
+        self._service = ServiceShowPartStats(self._unit_of_work)
+
+    @pytest.mark.asyncio
+    async def test_show_part_stats(self) -> None:
+        """
+        Test that show_part_stats returns the counters of the part.
+        """
+        part_id = UUID("47654321876543218765432187654323")
+        stats = PartTestStatsDomain(id=part_id, passed=3, failed=1)
+        repository = self._unit_of_work.part_test_stats_repository
+        repository.find_by_part_id.return_value = stats
+
+        assert await self._service.show_part_stats(part_id) == stats
+        repository.find_by_part_id.assert_called_once_with(part_id)
+
+    @pytest.mark.asyncio
+    async def test_show_part_stats_missing_part(self) -> None:
+        """
+        Test that show_part_stats raises when the part does not exist.
+        """
+        repository = self._unit_of_work.part_test_stats_repository
+        repository.find_by_part_id.side_effect = NoEntityFoundError()
+
+        with pytest.raises(NoEntityFoundError):
+            await self._service.show_part_stats(
+                UUID("47654321876543218765432187654323")
+            )
+
+    @pytest.mark.asyncio
+    async def test_show_parts_stats(self) -> None:
+        """
+        Test that show_parts_stats returns the counters found by the
+        repository.
+        """
+        stats = [Mock(PartTestStatsDomain), Mock(PartTestStatsDomain)]
+        repository = self._unit_of_work.part_test_stats_repository
+        repository.find_all.return_value = stats
+
+        assert await self._service.show_parts_stats(5, 2) == stats
+        repository.find_all.assert_called_once_with(5, 2)
@@ -2,8 +2,8 @@ from unittest.mock import Mock
 
 import pytest
 
-from app.models import Base
-from app.session import Session, SessionEntity
+from app.models import Base, Part, Test
+from app.session import Session, SessionEntity, SessionRows
 
 
 class TestSession:
@@ -13,6 +13,8 @@ class TestSession:
 
     def test_constructor(self):
         assert self._session.session == []
+        assert self._session.touched == set()
+        assert self._session.inserts == {}
 
     def test_add(self):
         entity = Mock(Base)
@@ -20,6 +22,7 @@ class TestSession:
         assert self._session.session == [
             SessionEntity(entity=entity, operation="add")
         ]
+        assert self._session.touched == {type(entity)}
 
     def test_remove(self):
         entity = Mock(Base)
@@ -27,3 +30,18 @@ class TestSession:
         assert self._session.session == [
             SessionEntity(entity=entity, operation="remove")
         ]
+        assert self._session.touched == {type(entity)}
+
+    def test_touch(self):
+        self._session.touch(Part, Test)
+        assert self._session.session == []
+        assert self._session.touched == {Part, Test}
+
+    def test_insert(self):
+        self._session.insert(Part, ("id", "name"), [(1, "a")])
+        self._session.insert(Part, ("id", "name"), iter([(2, "b")]))
+        assert self._session.session == []
+        assert self._session.inserts == {
+            Part: SessionRows(("id", "name"), [(1, "a"), (2, "b")])
+        }
+        assert self._session.touched == {Part}
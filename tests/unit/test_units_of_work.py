@@ -1,11 +1,18 @@
-from unittest.mock import Mock, patch
+from unittest.mock import AsyncMock, Mock, patch
 
 import pytest
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.repository import PartRepository, TestRepository
-from app.session import Session
-from app.unit_of_work import TestUnitOfWork
+from app.database import Database
+from app.models import Part, Test
+from app.repository import (
+    PartRepository,
+    PartTestStatsRepository,
+    TestRepository,
+)
+from app.response_cache import ResponseCache
+from app.session import Session, SessionRows
+from app.unit_of_work import ReadTestUnitOfWork, TestUnitOfWork
 
 
 class TestTestUnitsOfWork:
@@ -33,6 +40,14 @@ class TestTestUnitsOfWork:
         ):
             yield
 
+    @pytest.fixture(autouse=True)
+    def _patch_part_test_stats_repository(self):
+        with patch(
+            "app.unit_of_work.PartTestStatsRepository",
+            return_value=AsyncMock(PartTestStatsRepository),
+        ):
+            yield
+
     @pytest.fixture(autouse=True)
     def _setup_unit_of_work(self):
         self._uow = TestUnitOfWork(self._session, self._db)
@@ -42,3 +57,126 @@ class TestTestUnitsOfWork:
         assert self._uow.session == self._session
         assert isinstance(self._uow.part_repository, PartRepository)
         assert isinstance(self._uow.test_repository, TestRepository)
+        assert isinstance(
+            self._uow.part_test_stats_repository, PartTestStatsRepository
+        )
+
+    @pytest.mark.parametrize(
+        "unit_of_work_type, read_only",
+        [(TestUnitOfWork, False), (ReadTestUnitOfWork, True)],
+    )
+    def test_read_only_repositories(self, unit_of_work_type, read_only):
+        with patch("app.unit_of_work.PartRepository") as part_repository:
+            with patch("app.unit_of_work.TestRepository") as test_repository:
+                unit_of_work_type(self._session, self._db)
+
+        assert part_repository.call_args.kwargs["read_only"] is read_only
+        assert test_repository.call_args.kwargs["read_only"] is read_only
+
+    def _setup_saving_unit_of_work(self, touched: set) -> AsyncMock:
+        self._session.session = []
+        self._session.touched = touched
+        self._session.inserts = {}
+        db = AsyncMock(Database, session=AsyncMock(AsyncSession))
+        self._uow = TestUnitOfWork(self._session, db)
+        return db
+
+    @pytest.mark.asyncio
+    async def test_save_bumps_versions(self):
+        db = self._setup_saving_unit_of_work({Part, Test})
+        bumped = []
+        with patch(
+            "app.unit_of_work.bump_versions",
+            side_effect=lambda _, types: bumped.append(set(types)),
+        ) as bump_versions:
+            await self._uow.save()
+
+        bump_versions.assert_called_once()
+        assert bump_versions.call_args.args[0] is db.session
+        assert bumped == [{Part, Test}]
+        db.session.flush.assert_awaited_once()
+        db.commit.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_save_inserts_rows(self):
+        db = self._setup_saving_unit_of_work({Part, Test})
+        self._session.inserts = {
+            Test: SessionRows(("id", "part_id"), [(1, 2), (3, 2)]),
+            Part: SessionRows(("id", "name"), [(2, "part")]),
+        }
+        conn = db.session.connection.return_value
+        calls = []
+        conn.execute.side_effect = lambda statement, params: calls.append(
+            (statement.table.name, params)
+        )
+        db.session.flush.side_effect = lambda: calls.append("flush")
+        with patch("app.unit_of_work.bump_versions"):
+            await self._uow.save()
+
+        assert calls == [
+            ("part", [{"id": 2, "name": "part"}]),
+            ("test", [{"id": 1, "part_id": 2}, {"id": 3, "part_id": 2}]),
+            "flush",
+        ]
+        assert self._session.inserts == {}
+
+    @pytest.mark.asyncio
+    async def test_save_untouched(self):
+        self._setup_saving_unit_of_work(set())
+        with patch("app.unit_of_work.bump_versions") as bump_versions:
+            await self._uow.save()
+
+        bump_versions.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_save_flushes_part_test_stats(self):
+        db = self._setup_saving_unit_of_work({Test})
+        calls = []
+        db.session.flush.side_effect = lambda: calls.append("flush")
+        self._uow.part_test_stats_repository.flush.side_effect = (
+            lambda: calls.append("stats")
+        )
+        db.commit.side_effect = lambda: calls.append("commit")
+        with patch("app.unit_of_work.bump_versions"):
+            await self._uow.save()
+
+        assert calls == ["flush", "stats", "commit"]
+
+    @pytest.mark.asyncio
+    async def test_save_invalidates_responses(self):
+        self._setup_saving_unit_of_work({Part, Test})
+        invalidated = []
+        with patch("app.unit_of_work.bump_versions"), patch(
+            "app.unit_of_work.response_cache", Mock(ResponseCache)
+        ) as cache:
+            cache.invalidate.side_effect = lambda types: invalidated.append(
+                set(types)
+            )
+            await self._uow.save()
+
+        assert invalidated == [{Part, Test}]
+        assert self._session.touched == set()
+
+    @pytest.mark.asyncio
+    async def test_failed_save_keeps_responses(self):
+        db = self._setup_saving_unit_of_work({Part})
+        db.commit.side_effect = Exception()
+        with patch("app.unit_of_work.bump_versions"), patch(
+            "app.unit_of_work.response_cache", Mock(ResponseCache)
+        ) as cache:
+            with pytest.raises(Exception):
+                await self._uow.save()
+
+        cache.invalidate.assert_not_called()
+
+    def test_discard(self):
+        self._session.session = [Mock()]
+        self._session.inserts = {Test: SessionRows(("id",), [(1,)])}
+        self._session.touched = {Test}
+
+        self._uow.discard()
+
+        assert self._session.session == []
+        assert self._session.inserts == {}
+        assert self._session.touched == set()
+        self._uow.part_test_stats_repository.discard.assert_called_once()